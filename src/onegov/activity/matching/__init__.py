@@ -1,4 +1,5 @@
 from onegov.activity.matching.core import deferred_acceptance
+from onegov.activity.matching.core import DeferredAcceptance
 from onegov.activity.matching.core import deferred_acceptance_from_database
 from onegov.activity.matching.interfaces import MatchableBooking
 from onegov.activity.matching.interfaces import MatchableOccasion
@@ -11,6 +12,7 @@ from onegov.activity.matching.score import Scoring
 
 __all__ = [
     'deferred_acceptance',
+    'DeferredAcceptance',
     'deferred_acceptance_from_database',
     'MatchableBooking',
     'MatchableOccasion',
@@ -1,15 +1,19 @@
 """ Implements the matching algorithm used to match attendees to occasions.
 
-The algorithm used is based on Deferred Acceptance. The algorithm has a
-quadratic runtime.
+The algorithm used is based on Deferred Acceptance. Only the attendees
+whose wishlist changed since their last proposal propose again, and the
+bookings blocking each other are computed once per attendee. A matching may
+be continued after bookings have been added or removed, without starting
+over (see :class:`DeferredAcceptance`).
 
 """
 
 from onegov.activity import Attendee, Booking, Occasion, Period
 from onegov.activity.matching.score import Scoring
 from onegov.activity.matching.utils import overlaps, LoopBudget, hashable
-from onegov.activity.matching.utils import booking_order, unblockable
+from onegov.activity.matching.utils import booking_order, conflicts
 from onegov.core.utils import Bunch
+from collections import defaultdict
 from itertools import groupby, product
 from sortedcontainers import SortedSet
 from sqlalchemy.orm import joinedload, defer
@@ -27,10 +31,12 @@ class AttendeeAgent(hashable('id')):
 
     """
 
-    __slots__ = ('id', 'wishlist', 'accepted', 'blocked')
+    __slots__ = ('id', 'wishlist', 'accepted', 'blocked', 'conflicts')
 
     def __init__(self, id, bookings, limit=None, minutes_between=0,
                  alignment=None):
+        bookings = tuple(bookings)
+
         self.id = id
         self.limit = limit
         self.wishlist = SortedSet(bookings, key=booking_order)
@@ -39,25 +45,33 @@ class AttendeeAgent(hashable('id')):
         self.minutes_between = minutes_between
         self.alignment = alignment
 
+        # the bookings blocked by each booking of the attendee
+        self.conflicts = conflicts(bookings, minutes_between, alignment)
+
     def blocks(self, subject, other):
         return overlaps(
             subject, other, self.minutes_between, self.alignment,
             with_anti_affinity_check=True)
 
+    @property
+    def limit_reached(self):
+        return self.limit and len(self.accepted) >= self.limit or False
+
     def accept(self, booking):
         """ Accepts the given booking. """
 
         self.wishlist.remove(booking)
         self.accepted.add(booking)
 
-        if self.limit and len(self.accepted) >= self.limit:
-            self.blocked |= self.wishlist
+        if self.limit_reached:
+            blocked = set(self.wishlist)
         else:
-            self.blocked |= {
-                b for b in self.wishlist if self.blocks(booking, b)
+            blocked = {
+                b for b in self.conflicts[booking] if b in self.wishlist
             }
 
-        self.wishlist -= self.blocked
+        self.blocked |= blocked
+        self.wishlist.difference_update(blocked)
 
     def deny(self, booking):
         """ Removes the given booking from the accepted bookings. """
@@ -66,12 +80,41 @@ class AttendeeAgent(hashable('id')):
         self.accepted.remove(booking)
 
         # remove bookings from the blocked list which are not blocked anymore
-        for booking in unblockable(
-                self.accepted, self.blocked, with_anti_affinity_check=True):
+        for booking in tuple(self.blocked):
+            if self.conflicts[booking].isdisjoint(self.accepted):
+                self.blocked.remove(booking)
+                self.wishlist.add(booking)
+
+    def add(self, booking):
+        """ Adds the given booking to the wishlist, unless it is blocked by
+        the accepted bookings.
+
+        """
+
+        self.conflicts[booking] = set()
+
+        for other in self.conflicts:
+            if other != booking and self.blocks(booking, other):
+                self.conflicts[booking].add(other)
+                self.conflicts[other].add(booking)
 
-            self.blocked.remove(booking)
+        if self.limit_reached or \
+                not self.conflicts[booking].isdisjoint(self.accepted):
+            self.blocked.add(booking)
+        else:
             self.wishlist.add(booking)
 
+    def remove(self, booking):
+        """ Removes the given booking, which must not be accepted. """
+
+        assert booking not in self.accepted
+
+        self.wishlist.discard(booking)
+        self.blocked.discard(booking)
+
+        for other in self.conflicts.pop(booking):
+            self.conflicts[other].discard(booking)
+
     @property
     def is_valid(self):
         """ Returns True if the results of this agent are valid.
@@ -99,14 +142,16 @@ class OccasionAgent(hashable('id')):
 
     """
 
-    __slots__ = ('occasion', 'bookings', 'attendees', 'score_function')
+    __slots__ = (
+        'occasion', 'bookings', 'attendees', 'score_function', 'on_deny')
 
-    def __init__(self, occasion, score_function=None):
+    def __init__(self, occasion, score_function=None, on_deny=None):
         self.id = occasion.id
         self.occasion = occasion
         self.bookings = set()
         self.attendees = {}
         self.score_function = score_function or (lambda b: b.score)
+        self.on_deny = on_deny
 
     @property
     def full(self):
@@ -134,9 +179,12 @@ class OccasionAgent(hashable('id')):
         attendee.accept(booking)
 
     def deny(self, booking):
-        self.attendees[booking].deny(booking)
+        attendee = self.attendees.pop(booking)
+        attendee.deny(booking)
         self.bookings.remove(booking)
-        del self.attendees[booking]
+
+        if self.on_deny:
+            self.on_deny(attendee)
 
     def match(self, attendee, booking):
 
@@ -159,6 +207,170 @@ class OccasionAgent(hashable('id')):
         return False
 
 
+class DeferredAcceptance(object):
+    """ Matches bookings with occasions, see :func:`deferred_acceptance`.
+
+    Attendees propose their wishes in rounds. Only the attendees which got
+    a booking accepted or denied in the last round propose again, as the
+    proposals of the other attendees are bound to be rejected again.
+
+    After a run, bookings may be added or removed and the matching may be
+    continued by running it again. Only the affected attendees propose in
+    this case. The result is a valid matching, but it is not necessarily
+    the same as the result of a new matching, as equally scored bookings
+    may be accepted in a different order.
+
+    """
+
+    def __init__(self, bookings, occasions,
+                 score_function=None,
+                 hard_budget=True,
+                 default_limit=None,
+                 attendee_limits=None,
+                 minutes_between=0,
+                 alignment=None,
+                 sort_bookings=True):
+
+        assert alignment in (None, 'day')
+
+        if sort_bookings:
+            bookings = sorted(bookings, key=lambda b: b.attendee_id)
+
+        self.hard_budget = hard_budget
+        self.default_limit = default_limit
+        self.attendee_limits = attendee_limits or {}
+        self.minutes_between = minutes_between
+        self.alignment = alignment
+
+        # pre-calculate the booking scores
+        self.score_function = score_function or Scoring()
+
+        for booking in bookings:
+            booking.score = self.score_function(booking)
+
+        self.occasions = {o.id: self.occasion_agent(o) for o in occasions}
+        self.attendees = {}
+
+        # the attendees with bookings of an occasion
+        self.candidates = defaultdict(set)
+
+        for aid, group in groupby(bookings, key=lambda b: b.attendee_id):
+            self.attendee_agent(aid, group)
+
+        # the attendees which have to propose in the next round
+        self.pending = set(self.attendees.values())
+
+    def occasion_agent(self, occasion):
+        return OccasionAgent(occasion, on_deny=self.pending_add)
+
+    def attendee_agent(self, aid, bookings=()):
+        bookings = tuple(bookings)
+
+        attendee = self.attendees[aid] = AttendeeAgent(
+            aid,
+            limit=self.attendee_limits.get(aid, self.default_limit),
+            bookings=bookings,
+            minutes_between=self.minutes_between,
+            alignment=self.alignment
+        )
+
+        for booking in bookings:
+            self.candidates[booking.occasion_id].add(attendee)
+
+        return attendee
+
+    def pending_add(self, attendee):
+        self.pending.add(attendee)
+
+    def run(self):
+        """ Runs the matching until no attendee can improve its situation
+        and returns the result.
+
+        """
+
+        # the attendees propose in the order they were added
+        order = {aid: ix for ix, aid in enumerate(self.attendees)}
+
+        # I haven't proven yet that the following loop will always end. Until
+        # I do there's a fallback check to make sure that we'll stop at some
+        # point
+        budget = LoopBudget(max_ticks=sum(
+            len(a.conflicts) for a in self.attendees.values()
+        ) * len(self.attendees))
+
+        while self.pending:
+
+            if budget.limit_reached(as_exception=self.hard_budget):
+                break
+
+            candidates = sorted(self.pending, key=lambda a: order[a.id])
+            self.pending = set()
+
+            # match attendees to courses
+            while candidates:
+                candidate = candidates.pop()
+
+                for booking in candidate.wishlist:
+                    occasion = self.occasions[booking.occasion_id]
+
+                    if occasion.match(candidate, booking):
+                        if candidate.wishlist:
+                            self.pending.add(candidate)
+                        break  # required because the wishlist has been changed
+                else:
+                    # all wishes of the candidate were rejected by occasions
+                    # which won't accept any worse bookings later on
+                    self.pending.discard(candidate)
+
+        return self.results
+
+    @property
+    def results(self):
+        attendees = self.attendees.values()
+
+        return Bunch(
+            open=set(b for a in attendees for b in a.wishlist),
+            accepted=set(b for a in attendees for b in a.accepted),
+            blocked=set(b for a in attendees for b in a.blocked)
+        )
+
+    def add(self, booking):
+        """ Adds the given booking to the matching. """
+
+        booking.score = self.score_function(booking)
+
+        if booking.occasion_id not in self.occasions:
+            self.occasions[booking.occasion_id] = self.occasion_agent(
+                booking.occasion)
+
+        attendee = self.attendees.get(booking.attendee_id)
+        if attendee is None:
+            attendee = self.attendee_agent(booking.attendee_id)
+
+        attendee.add(booking)
+        self.candidates[booking.occasion_id].add(attendee)
+        self.pending.add(attendee)
+
+    def remove(self, booking):
+        """ Removes the given booking from the matching (e.g. because it has
+        been cancelled).
+
+        """
+
+        attendee = self.attendees[booking.attendee_id]
+        occasion = self.occasions[booking.occasion_id]
+
+        if booking in occasion.bookings:
+            occasion.deny(booking)
+
+            # the occasion has a free spot now, which the wishes rejected
+            # so far might get
+            self.pending.update(
+                a for a in self.candidates[booking.occasion_id] if a.wishlist)
+
+        attendee.remove(booking)
+
+
 def deferred_acceptance(bookings, occasions,
                         score_function=None,
                         validity_check=True,
@@ -230,76 +442,31 @@ def deferred_acceptance(bookings, occasions,
         an alignment.
 
     """
-    assert alignment in (None, 'day')
-
-    if sort_bookings:
-        bookings = sorted(bookings, key=lambda b: b.attendee_id)
-
-    attendee_limits = attendee_limits or {}
-
-    # pre-calculate the booking scores
-    score_function = score_function or Scoring()
-
-    for booking in bookings:
-        booking.score = score_function(booking)
-
-    # after the booking score has been calculated, the scoring function
-    # should no longer be used for performance reasons
-    score_function = None
-
-    occasions = {o.id: OccasionAgent(o) for o in occasions}
-
-    attendees = {
-        aid: AttendeeAgent(
-            aid,
-            limit=attendee_limits.get(aid, default_limit),
-            bookings=bookings,
-            minutes_between=minutes_between,
-            alignment=alignment
-        )
-        for aid, bookings in groupby(bookings, key=lambda b: b.attendee_id)
-    }
-
-    # I haven't proven yet that the following loop will always end. Until I
-    # do there's a fallback check to make sure that we'll stop at some point
-    budget = LoopBudget(max_ticks=len(bookings) * len(attendees))
-
-    # while there are attendees with entries in a wishlist
-    while next((a for a in attendees.values() if a.wishlist), None):
-
-        if budget.limit_reached(as_exception=hard_budget):
-            break
-
-        candidates = [a for a in attendees.values() if a.wishlist]
-        matched = 0
-
-        # match attendees to courses
-        while candidates:
-            candidate = candidates.pop()
-
-            for booking in candidate.wishlist:
-                if occasions[booking.occasion_id].match(candidate, booking):
-                    matched += 1
-                    break  # required because the wishlist has been changed
+    matching = DeferredAcceptance(
+        bookings=bookings,
+        occasions=occasions,
+        score_function=score_function,
+        hard_budget=hard_budget,
+        default_limit=default_limit,
+        attendee_limits=attendee_limits,
+        minutes_between=minutes_between,
+        alignment=alignment,
+        sort_bookings=sort_bookings
+    )
 
-        # if no matches were possible the situation can't be improved
-        if not matched:
-            break
+    results = matching.run()
 
     # make sure the algorithm didn't make any mistakes
     if validity_check:
-        for a in attendees.values():
+        for a in matching.attendees.values():
             assert a.is_valid
 
     # make sure the result is stable
     if stability_check:
-        assert is_stable(attendees.values(), occasions.values())
+        assert is_stable(
+            matching.attendees.values(), matching.occasions.values())
 
-    return Bunch(
-        open=set(b for a in attendees.values() for b in a.wishlist),
-        accepted=set(b for a in attendees.values() for b in a.accepted),
-        blocked=set(b for a in attendees.values() for b in a.blocked)
-    )
+    return results
 
 
 def deferred_acceptance_from_database(session, period_id, **kwargs):
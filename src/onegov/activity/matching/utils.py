@@ -1,5 +1,7 @@
+from collections import defaultdict
+from itertools import combinations
 from onegov.activity import log
-from onegov.activity.utils import dates_overlap
+from onegov.activity.utils import dates_overlap, overlap_ranges
 from sortedcontainers import SortedSet
 
 
@@ -40,6 +42,59 @@ def overlaps(booking, other, minutes_between=0, alignment=None,
     )
 
 
+def conflicts(bookings, minutes_between=0, alignment=None):
+    """ Returns a dictionary with the set of bookings blocked by each of the
+    given bookings (the bookings of a single attendee), using the same rules
+    as :func:`overlaps` with the anti-affinity check.
+
+    Instead of comparing all pairs of bookings, the date ranges are sorted
+    by their start. Each range is then only compared to the ranges starting
+    before it ends, which is O(n log n + k) for n ranges and k conflicts.
+
+    """
+
+    result = {booking: set() for booking in bookings}
+
+    def block(booking, other):
+        if booking != other:
+            result[booking].add(other)
+            result[other].add(booking)
+
+    # bookings of the same anti-affinity group block each other, even if they
+    # are excluded from the overlap check
+    groups = defaultdict(list)
+
+    for booking in result:
+        if booking.occasion.anti_affinity_group is not None:
+            groups[booking.occasion.anti_affinity_group].append(booking)
+
+    for group in groups.values():
+        for booking, other in combinations(group, 2):
+            block(booking, other)
+
+    ranges = sorted((
+        (s, e, booking) for booking in result
+        if not booking.occasion.exclude_from_overlap_check
+        for s, e in overlap_ranges(
+            ((d.start, d.end) for d in booking.dates),
+            minutes_between, alignment)
+    ), key=lambda r: r[0])
+
+    for ix, (s, e, booking) in enumerate(ranges):
+        for jx in range(ix + 1, len(ranges)):
+            os, oe, other = ranges[jx]
+
+            # as the ranges are sorted by start, none of the remaining
+            # ranges overlaps this one (see :func:`sedate.overlaps`)
+            if os > e and os > s:
+                break
+
+            if os <= e or (os == s and os <= oe):
+                block(booking, other)
+
+    return result
+
+
 class LoopBudget(object):
     """ Helps ensure that a loop doesn't overreach its complexity budget.
 
@@ -168,8 +168,25 @@ def dates_overlap(a, b, minutes_between=0, cut_end=True, alignment=None):
     # operating on a very small n the constant factors dominate and there
     # are fewer constant factors in this approach:
 
+    a = tuple(overlap_ranges(a, minutes_between, alignment))
+    b = tuple(overlap_ranges(b, minutes_between, alignment))
+
+    for s, e in a:
+        for os, oe in b:
+            if sedate.overlaps(s, e, os, oe):
+                return True
+
+    return False
+
+
+def overlap_ranges(ranges, minutes_between=0, alignment=None):
+    """ Yields the given time tuples the way they are compared by
+    :func:`dates_overlap`: Aligned, extended by half the minutes between
+    on each side and with the end cut by a microsecond.
+
+    """
+
     offset = timedelta(seconds=minutes_between / 2 * 60)
-    ms = cut_end and timedelta(microseconds=1) or timedelta()
 
     # make sure that 11:00 - 12:00 and 12:00 - 13:00 are not overlapping
     ms = timedelta(microseconds=1)
@@ -183,20 +200,11 @@ def dates_overlap(a, b, minutes_between=0, cut_end=True, alignment=None):
         # module is pretty much tailored for Switzerland
         align = partial(align, timezone='Europe/Zurich')
 
-    for s, e in a:
-        for os, oe in b:
-
-            if alignment:
-                s, e = align(s, e)
-                os, oe = align(os, oe)
-
-            if sedate.overlaps(
-                s - offset, e + offset - ms,
-                os - offset, oe + offset - ms
-            ):
-                return True
+    for s, e in ranges:
+        if alignment:
+            s, e = align(s, e)
 
-    return False
+        yield s - offset, e + offset - ms
 
 
 def is_internal_image(url):
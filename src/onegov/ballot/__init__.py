@@ -6,6 +6,7 @@ from onegov.ballot.collections import ListCollection
 from onegov.ballot.collections import VoteCollection
 from onegov.ballot.models import Ballot
 from onegov.ballot.models import BallotResult
+from onegov.ballot.models import BallotSummary
 from onegov.ballot.models import Candidate
 from onegov.ballot.models import CandidateResult
 from onegov.ballot.models import ComplexVote
@@ -13,6 +14,7 @@ from onegov.ballot.models import Election
 from onegov.ballot.models import ElectionAssociation
 from onegov.ballot.models import ElectionCompound
 from onegov.ballot.models import ElectionResult
+from onegov.ballot.models import ElectionSummary
 from onegov.ballot.models import List
 from onegov.ballot.models import ListConnection
 from onegov.ballot.models import ListResult
@@ -25,6 +27,7 @@ __all__ = [
     'Ballot',
     'BallotCollection',
     'BallotResult',
+    'BallotSummary',
     'Candidate',
     'CandidateCollection',
     'CandidateResult',
@@ -35,6 +38,7 @@ __all__ = [
     'ElectionCompound',
     'ElectionCompoundCollection',
     'ElectionResult',
+    'ElectionSummary',
     'List',
     'ListCollection',
     'ListConnection',
@@ -19,6 +19,8 @@ from onegov.ballot.models.election import ListResult
 from onegov.ballot.models.election import PanachageResult
 from onegov.ballot.models.election import PartyResult
 from onegov.ballot.models.election import ProporzElection
+from onegov.ballot.models.summary import BallotSummary
+from onegov.ballot.models.summary import ElectionSummary
 from onegov.ballot.models.vote import Ballot
 from onegov.ballot.models.vote import BallotResult
 from onegov.ballot.models.vote import ComplexVote
@@ -27,6 +29,7 @@ from onegov.ballot.models.vote import Vote
 __all__ = [
     'Ballot',
     'BallotResult',
+    'BallotSummary',
     'Candidate',
     'CandidateResult',
     'ComplexVote',
@@ -34,6 +37,7 @@ __all__ = [
     'ElectionAssociation',
     'ElectionCompound',
     'ElectionResult',
+    'ElectionSummary',
     'List',
     'ListConnection',
     'ListResult',
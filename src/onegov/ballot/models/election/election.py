@@ -9,6 +9,7 @@ from onegov.ballot.models.mixins import DomainOfInfluenceMixin
 from onegov.ballot.models.mixins import StatusMixin
 from onegov.ballot.models.mixins import summarized_property
 from onegov.ballot.models.mixins import TitleTranslationsMixin
+from onegov.ballot.models.summary import ElectionSummary
 from onegov.core.orm import Base
 from onegov.core.orm import translation_hybrid
 from onegov.core.orm.mixins import ContentMixin
@@ -100,11 +101,8 @@ class Election(Base, ContentMixin, TimestampMixin,
     def counted(self):
         """ True if all results have been counted. """
 
-        count = self.results.count()
-        if not count:
-            return False
-
-        return (sum(1 for r in self.results if r.counted) == count)
+        summary = self.summary
+        return 0 < summary['results'] == summary['counted_results']
 
     @counted.expression
     def counted(cls):
@@ -124,13 +122,20 @@ class Election(Base, ContentMixin, TimestampMixin,
 
         """
 
-        query = object_session(self).query(ElectionResult)
-        query = query.with_entities(ElectionResult.counted)
-        query = query.filter(ElectionResult.election_id == self.id)
+        summary = self.summary
+        return summary['counted_results'], summary['results']
+
+    @property
+    def summary(self):
+        """ Returns the aggregated results (see
+        :class:`~onegov.ballot.models.summary.ElectionSummary`).
 
-        results = query.all()
+        """
 
-        return sum(1 for r in results if r[0]), len(results)
+        session = object_session(self)
+        if session is None:
+            return ElectionSummary.aggregate(self.results)
+        return ElectionSummary.fetch_memoized(session, self)
 
     @property
     def counted_entities(self):
@@ -146,10 +151,7 @@ class Election(Base, ContentMixin, TimestampMixin,
     def has_results(self):
         """ Returns True, if the election has any results. """
 
-        for result in self.results:
-            if result.counted:
-                return True
-        return False
+        return self.summary['counted_results'] > 0
 
     #: An election contains n candidates
     candidates = relationship(
@@ -196,7 +198,24 @@ class Election(Base, ContentMixin, TimestampMixin,
     def aggregate_results(self, attribute):
         """ Gets the sum of the given attribute from the results. """
 
-        return sum(getattr(result, attribute) for result in self.results)
+        summary = self.summary
+        accounted_ballots = (
+            summary['received_ballots']
+            - summary['blank_ballots']
+            - summary['invalid_ballots']
+        )
+
+        if attribute == 'accounted_ballots':
+            return accounted_ballots
+
+        if attribute == 'accounted_votes':
+            return (
+                self.number_of_mandates * accounted_ballots
+                - summary['blank_votes']
+                - summary['invalid_votes']
+            )
+
+        return summary[attribute]
 
     @staticmethod
     def aggregate_results_expression(cls, attribute):
@@ -333,8 +352,8 @@ class Election(Base, ContentMixin, TimestampMixin,
             ElectionResult.election_id == self.id
         ).delete()
 
-    def export(self, consider_completed=False):
-        """ Returns all data connected to this election as list with dicts.
+    def iter_export(self, consider_completed=False):
+        """ Yields all data connected to this election as dicts.
 
         This is meant as a base for json/csv/excel exports. The result is
         therefore a flat list of dictionaries with repeating values to avoid
@@ -395,8 +414,7 @@ class Election(Base, ContentMixin, TimestampMixin,
             Candidate.first_name
         )
 
-        rows = []
-        for result in results:
+        for result in results.yield_per(1000):
             row = OrderedDict()
             for locale in election_day_i18n_used_locales:
                 title = result[1] and result[1].get(locale) or ''
@@ -438,6 +456,12 @@ class Election(Base, ContentMixin, TimestampMixin,
             row['candidate_party'] = result[25]
             row['candidate_votes'] = result[0]
 
-            rows.append(row)
+            yield row
+
+    def export(self, consider_completed=False):
+        """ Returns all data connected to this election as list with dicts,
+        see :meth:`iter_export`.
+
+        """
 
-        return rows
+        return list(self.iter_export(consider_completed))
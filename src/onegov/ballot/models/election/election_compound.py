@@ -396,9 +396,8 @@ class ElectionCompound(
         for result in self.panachage_results:
             session.delete(result)
 
-    def export(self, consider_completed=False):
-        """ Returns all data connected to this election compound as list with
-        dicts.
+    def iter_export(self, consider_completed=False):
+        """ Yields all data connected to this election compound as dicts.
 
         This is meant as a base for json/csv/excel exports. The result is
         therefore a flat list of dictionaries with repeating values to avoid
@@ -421,10 +420,14 @@ class ElectionCompound(
         common['compound_date'] = self.date.isoformat()
         common['compound_mandates'] = self.number_of_mandates
 
-        rows = []
         for election in self.elections:
-            for row in election.export(consider_completed):
-                rows.append(
-                    OrderedDict(list(common.items()) + list(row.items()))
-                )
-        return rows
+            for row in election.iter_export(consider_completed):
+                yield OrderedDict(list(common.items()) + list(row.items()))
+
+    def export(self, consider_completed=False):
+        """ Returns all data connected to this election compound as list with
+        dicts, see :meth:`iter_export`.
+
+        """
+
+        return list(self.iter_export(consider_completed))
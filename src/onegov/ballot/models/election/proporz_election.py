@@ -259,8 +259,8 @@ class ProporzElection(Election, PartyResultExportMixin):
             PanachageResult.owner == self.id
         ).delete()
 
-    def export(self, consider_completed=False):
-        """ Returns all data connected to this election as list with dicts.
+    def iter_export(self, consider_completed=False):
+        """ Yields all data connected to this election as dicts.
 
         This is meant as a base for json/csv/excel exports. The result is
         therefore a flat list of dictionaries with repeating values to avoid
@@ -380,8 +380,7 @@ class ProporzElection(Election, PartyResultExportMixin):
                 key = list_lookup.get(result.target)
                 panachage[key][result.source] = result.votes
 
-        rows = []
-        for result in results:
+        for result in results.yield_per(1000):
             row = OrderedDict()
             for locale in election_day_i18n_used_locales:
                 title = result[1] and result[1].get(locale, '') or ''
@@ -436,6 +435,12 @@ class ProporzElection(Election, PartyResultExportMixin):
                 key = f'panachage_votes_from_list_{target_id}'
                 row[key] = panachage.get(result[22], {}).get(target_id)
 
-            rows.append(row)
+            yield row
+
+    def export(self, consider_completed=False):
+        """ Returns all data connected to this election as list with dicts,
+        see :meth:`iter_export`.
+
+        """
 
-        return rows
+        return list(self.iter_export(consider_completed))
@@ -0,0 +1,450 @@
+""" Stored aggregates of the results of ballots and elections.
+
+Pages showing votes and elections access the totals of the results (yeas,
+nays, received ballots, ...) many times. Instead of aggregating the results
+each time, the totals are stored in summary tables, one row per ballot or
+election.
+
+The summaries are maintained by statement level triggers on the result
+tables. They are therefore updated in the same transaction as the results
+and regardless of how the results are written (ORM, bulk inserts, bulk
+deletes).
+
+The summary of an item is read once and kept on the item until the results
+may have changed, which is whenever the session is flushed, committed or
+rolled back, or bulk changes are made (see :func:`invalidate_summaries` and
+:func:`register_summary_listeners`).
+
+"""
+from onegov.core.orm import Base
+from onegov.core.orm.types import UUID
+from sqlalchemy import Column
+from sqlalchemy import event
+from sqlalchemy import ForeignKey
+from sqlalchemy import Integer
+from sqlalchemy import Text
+from sqlalchemy import text
+
+
+class SummaryMixin(object):
+    """ Stores the aggregates of the results of an item (a ballot or an
+    election).
+
+    The subclasses define the tables involved and the aggregates (as SQL,
+    the results table is available as ``r``).
+
+    """
+
+    #: the table of the summarized item
+    item_table = None
+
+    #: the table of the results
+    results_table = None
+
+    #: the column referencing the item (in both summary and results table)
+    item_key = None
+
+    #: the postgres type of the item key
+    item_key_type = None
+
+    #: the aggregates, tuples of column name and SQL expression
+    aggregates = ()
+
+    @classmethod
+    def names(cls):
+        return tuple(name for name, expression in cls.aggregates)
+
+    @classmethod
+    def empty(cls):
+        return dict.fromkeys(cls.names(), 0)
+
+    @classmethod
+    def fetch(cls, session, item_id):
+        """ Returns the stored aggregates of the given item as dictionary.
+
+        The values are always read from the database (not from the identity
+        map), since the triggers update the summary behind the back of the
+        ORM. Pending results are flushed first by the autoflush of the query.
+
+        """
+        columns = [getattr(cls, name) for name in cls.names()]
+        query = session.query(*columns)
+        query = query.filter(getattr(cls, cls.item_key) == item_id)
+        row = query.first()
+
+        return dict(zip(cls.names(), row)) if row else cls.empty()
+
+    @classmethod
+    def fetch_memoized(cls, session, item):
+        """ Returns the stored aggregates of the given item like
+        :meth:`fetch`, but only reads them again if the results may have
+        changed since the last time.
+
+        """
+        memoized = getattr(item, '_summary', None)
+        outdated = (
+            memoized is None
+            or memoized[0] != session.info.get('summary_version', 0)
+            # pending changes are flushed by the query, they might be results
+            or session.new or session.dirty or session.deleted
+        )
+
+        if outdated:
+            summary = cls.fetch(session, item.id)
+            memoized = (session.info.get('summary_version', 0), summary)
+            item._summary = memoized
+
+        return memoized[1]
+
+    @classmethod
+    def aggregate(cls, results):
+        """ Aggregates the given result objects in python, the same way the
+        triggers do. Used for items not yet attached to a session.
+
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def live_query(cls):
+        """ Returns the SQL aggregating the results of all items, the same
+        way the triggers do.
+
+        """
+        return text("""
+            SELECT i.id AS {key}, {aggregates}
+            FROM {item} i
+            LEFT JOIN {results} r ON r.{key} = i.id
+            GROUP BY i.id
+        """.format(
+            key=cls.item_key,
+            item=cls.item_table,
+            results=cls.results_table,
+            aggregates=', '.join(
+                f'{expression} AS {name}'
+                for name, expression in cls.aggregates
+            )
+        ))
+
+    @classmethod
+    def live(cls, session):
+        """ Returns the aggregates of all items computed from the results,
+        by item id (as string).
+
+        """
+        return {
+            str(row[0]): dict(zip(cls.names(), row[1:]))
+            for row in session.execute(cls.live_query())
+        }
+
+    @classmethod
+    def stored(cls, session):
+        """ Returns the stored aggregates of all items, by item id (as
+        string).
+
+        """
+
+        columns = [getattr(cls, name) for name in cls.names()]
+        query = session.query(getattr(cls, cls.item_key), *columns)
+        return {
+            str(row[0]): dict(zip(cls.names(), row[1:])) for row in query
+        }
+
+    @classmethod
+    def refresh(cls, session):
+        """ Recalculates the summaries of all items. """
+
+        invalidate_summaries(session)
+
+        session.execute(text(
+            'DELETE FROM {summary} WHERE {key} NOT IN (SELECT id FROM {item})'
+            .format(
+                summary=cls.__tablename__,
+                key=cls.item_key,
+                item=cls.item_table
+            )
+        ))
+        session.execute(text(
+            'SELECT update_{summary}(ARRAY(SELECT id FROM {item}))'.format(
+                summary=cls.__tablename__,
+                item=cls.item_table
+            )
+        ))
+
+    @classmethod
+    def ddl(cls, schema):
+        """ Returns the statements creating the update function and the
+        triggers in the given schema.
+
+        Usually we wouldn't create our queries using format, but the schema
+        is not user defined (and if it is, it's ensured to only have safe
+        characters).
+
+        """
+        names = cls.names()
+        summary = f'"{schema}".{cls.__tablename__}'
+        results = f'"{schema}".{cls.results_table}'
+        item = f'"{schema}".{cls.item_table}'
+        function = f'"{schema}".update_{cls.__tablename__}'
+
+        # the summaries of removed (or renamed) items are deleted, the
+        # others are upserted (concurrent transactions may update the same
+        # item)
+        yield f"""
+            CREATE OR REPLACE FUNCTION {function}(ids {cls.item_key_type}[])
+            RETURNS void AS $$
+                DELETE FROM {summary}
+                WHERE {cls.item_key} = ANY(ids)
+                AND {cls.item_key} NOT IN (SELECT id FROM {item});
+
+                INSERT INTO {summary} ({cls.item_key}, {', '.join(names)})
+                SELECT i.id, {', '.join(e for n, e in cls.aggregates)}
+                FROM {item} i
+                LEFT JOIN {results} r ON r.{cls.item_key} = i.id
+                WHERE i.id = ANY(ids)
+                GROUP BY i.id
+                ON CONFLICT ({cls.item_key}) DO UPDATE SET {', '.join(
+                    f'{name} = excluded.{name}' for name in names
+                )}
+            $$ LANGUAGE sql
+        """
+
+        transitions = {
+            'INSERT': ('NEW TABLE AS new_results', ('new_results', )),
+            'UPDATE': (
+                'OLD TABLE AS old_results NEW TABLE AS new_results',
+                ('old_results', 'new_results')
+            ),
+            'DELETE': ('OLD TABLE AS old_results', ('old_results', )),
+        }
+
+        for operation, (referencing, tables) in transitions.items():
+            trigger = f'{cls.results_table}_{operation.lower()}_summary'
+            ids = ' UNION '.join(
+                f'SELECT {cls.item_key} FROM {table}' for table in tables
+            )
+
+            yield f"""
+                CREATE OR REPLACE FUNCTION "{schema}".{trigger}()
+                RETURNS trigger AS $$
+                BEGIN
+                    PERFORM {function}(ARRAY({ids}));
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql
+            """
+            yield f"""
+                DROP TRIGGER IF EXISTS {trigger} ON {results}
+            """
+            yield f"""
+                CREATE TRIGGER {trigger}
+                AFTER {operation} ON {results}
+                REFERENCING {referencing}
+                FOR EACH STATEMENT
+                EXECUTE PROCEDURE "{schema}".{trigger}()
+            """
+
+
+class BallotSummary(Base, SummaryMixin):
+    """ The aggregated results of a ballot. """
+
+    __tablename__ = 'ballot_summaries'
+
+    item_table = 'ballots'
+    results_table = 'ballot_results'
+    item_key = 'ballot_id'
+    item_key_type = 'uuid'
+    aggregates = (
+        ('results', 'count(r.id)'),
+        ('counted_results', 'count(r.id) FILTER (WHERE r.counted)'),
+        ('yeas', 'coalesce(sum(r.yeas), 0)'),
+        ('nays', 'coalesce(sum(r.nays), 0)'),
+        ('empty', 'coalesce(sum(r.empty), 0)'),
+        ('invalid', 'coalesce(sum(r.invalid), 0)'),
+        ('eligible_voters', 'coalesce(sum(r.eligible_voters), 0)'),
+        (
+            'counted_eligible_voters',
+            'coalesce(sum(r.eligible_voters) FILTER (WHERE r.counted), 0)'
+        ),
+        (
+            'counted_cast_ballots',
+            'coalesce(sum(r.yeas + r.nays + r.empty + r.invalid) '
+            'FILTER (WHERE r.counted), 0)'
+        ),
+    )
+
+    #: the ballot this summary belongs to
+    ballot_id = Column(
+        UUID,
+        ForeignKey('ballots.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+
+    #: the number of results
+    results = Column(Integer, nullable=False, default=0)
+
+    #: the number of counted results
+    counted_results = Column(Integer, nullable=False, default=0)
+
+    #: the total yeas
+    yeas = Column(Integer, nullable=False, default=0)
+
+    #: the total nays
+    nays = Column(Integer, nullable=False, default=0)
+
+    #: the total empty votes
+    empty = Column(Integer, nullable=False, default=0)
+
+    #: the total invalid votes
+    invalid = Column(Integer, nullable=False, default=0)
+
+    #: the total eligible voters
+    eligible_voters = Column(Integer, nullable=False, default=0)
+
+    #: the total eligible voters of the counted results
+    counted_eligible_voters = Column(Integer, nullable=False, default=0)
+
+    #: the total cast ballots of the counted results
+    counted_cast_ballots = Column(Integer, nullable=False, default=0)
+
+    @classmethod
+    def aggregate(cls, results):
+        summary = cls.empty()
+        for result in results:
+            summary['results'] += 1
+            summary['counted_results'] += 1 if result.counted else 0
+            for name in ('yeas', 'nays', 'empty', 'invalid',
+                         'eligible_voters', 'counted_eligible_voters',
+                         'counted_cast_ballots'):
+                summary[name] += getattr(result, name) or 0
+        return summary
+
+
+class ElectionSummary(Base, SummaryMixin):
+    """ The aggregated results of an election. """
+
+    __tablename__ = 'election_summaries'
+
+    item_table = 'elections'
+    results_table = 'election_results'
+    item_key = 'election_id'
+    item_key_type = 'text'
+    aggregates = (
+        ('results', 'count(r.id)'),
+        ('counted_results', 'count(r.id) FILTER (WHERE r.counted)'),
+        ('eligible_voters', 'coalesce(sum(r.eligible_voters), 0)'),
+        (
+            'counted_eligible_voters',
+            'coalesce(sum(r.eligible_voters) FILTER (WHERE r.counted), 0)'
+        ),
+        ('received_ballots', 'coalesce(sum(r.received_ballots), 0)'),
+        (
+            'counted_received_ballots',
+            'coalesce(sum(r.received_ballots) FILTER (WHERE r.counted), 0)'
+        ),
+        ('blank_ballots', 'coalesce(sum(r.blank_ballots), 0)'),
+        ('invalid_ballots', 'coalesce(sum(r.invalid_ballots), 0)'),
+        ('blank_votes', 'coalesce(sum(r.blank_votes), 0)'),
+        ('invalid_votes', 'coalesce(sum(r.invalid_votes), 0)'),
+    )
+
+    #: the election this summary belongs to - there's no foreign key, the
+    #: summaries of renamed or deleted elections are removed by the triggers
+    #: (a cascading update would collide with the trigger)
+    election_id = Column(Text, primary_key=True)
+
+    #: the number of results
+    results = Column(Integer, nullable=False, default=0)
+
+    #: the number of counted results
+    counted_results = Column(Integer, nullable=False, default=0)
+
+    #: the total eligible voters
+    eligible_voters = Column(Integer, nullable=False, default=0)
+
+    #: the total eligible voters of the counted results
+    counted_eligible_voters = Column(Integer, nullable=False, default=0)
+
+    #: the total received ballots
+    received_ballots = Column(Integer, nullable=False, default=0)
+
+    #: the total received ballots of the counted results
+    counted_received_ballots = Column(Integer, nullable=False, default=0)
+
+    #: the total blank ballots
+    blank_ballots = Column(Integer, nullable=False, default=0)
+
+    #: the total invalid ballots
+    invalid_ballots = Column(Integer, nullable=False, default=0)
+
+    #: the total blank votes
+    blank_votes = Column(Integer, nullable=False, default=0)
+
+    #: the total invalid votes
+    invalid_votes = Column(Integer, nullable=False, default=0)
+
+    @classmethod
+    def aggregate(cls, results):
+        summary = cls.empty()
+        for result in results:
+            summary['results'] += 1
+            summary['counted_results'] += 1 if result.counted else 0
+            for name in ('eligible_voters', 'counted_eligible_voters',
+                         'received_ballots', 'counted_received_ballots',
+                         'blank_ballots', 'invalid_ballots', 'blank_votes',
+                         'invalid_votes'):
+                summary[name] += getattr(result, name) or 0
+        return summary
+
+
+def invalidate_summaries(session):
+    """ Discards the summaries read so far in the given session.
+
+    This happens automatically on flush, commit, rollback and bulk updates
+    and deletes in sessions set up with :func:`register_summary_listeners`,
+    but has to be done manually if results are written using
+    plain SQL statements or ``session.bulk_insert_mappings``.
+
+    """
+    session.info['summary_version'] = (
+        session.info.get('summary_version', 0) + 1
+    )
+
+
+def register_summary_listeners(session):
+    """ Registers the event handlers invalidating the summaries read so far
+    with the given session (or session factory).
+
+    """
+
+    @event.listens_for(session, 'after_flush')
+    def on_after_flush(session, flush_context):
+        invalidate_summaries(session)
+
+    @event.listens_for(session, 'after_commit')
+    def on_after_commit(session):
+        invalidate_summaries(session)
+
+    @event.listens_for(session, 'after_soft_rollback')
+    def on_after_soft_rollback(session, previous_transaction):
+        invalidate_summaries(session)
+
+    @event.listens_for(session, 'after_bulk_update')
+    def on_after_bulk_update(update_context):
+        invalidate_summaries(update_context.session)
+
+    @event.listens_for(session, 'after_bulk_delete')
+    def on_after_bulk_delete(delete_context):
+        invalidate_summaries(delete_context.session)
+
+
+@event.listens_for(Base.metadata, 'after_create')
+def receive_after_create(target, connection, tables=None, **kw):
+    # the triggers need both the summary and the results tables, we
+    # therefore wait for all tables to be created
+    schema = connection._execution_options.get('schema')
+    created = {table.name for table in tables or ()}
+
+    for summary in (BallotSummary, ElectionSummary):
+        if schema and summary.__tablename__ in created:
+            for statement in summary.ddl(schema):
+                connection.execute(statement)
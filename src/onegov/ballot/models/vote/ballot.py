@@ -1,5 +1,6 @@
 from onegov.ballot.models.mixins import summarized_property
 from onegov.ballot.models.mixins import TitleTranslationsMixin
+from onegov.ballot.models.summary import BallotSummary
 from onegov.ballot.models.vote.ballot_result import BallotResult
 from onegov.ballot.models.vote.mixins import DerivedAttributesMixin
 from onegov.ballot.models.vote.mixins import DerivedBallotsCountMixin
@@ -113,12 +114,8 @@ class Ballot(Base, TimestampMixin, TitleTranslationsMixin,
     def counted(self):
         """ True if all results have been counted. """
 
-        result = self.results.with_entities(
-            func.coalesce(func.bool_and(BallotResult.counted), False)
-        )
-        result = result.order_by(None)
-        result = result.first()
-        return result[0] if result else False
+        summary = self.summary
+        return 0 < summary['results'] == summary['counted_results']
 
     @counted.expression
     def counted(cls):
@@ -138,13 +135,20 @@ class Ballot(Base, TimestampMixin, TitleTranslationsMixin,
 
         """
 
-        query = object_session(self).query(BallotResult)
-        query = query.with_entities(BallotResult.counted)
-        query = query.filter(BallotResult.ballot_id == self.id)
+        summary = self.summary
+        return summary['counted_results'], summary['results']
 
-        results = query.all()
+    @property
+    def summary(self):
+        """ Returns the aggregated results (see
+        :class:`~onegov.ballot.models.summary.BallotSummary`).
 
-        return sum(1 for r in results if r[0]), len(results)
+        """
+
+        session = object_session(self)
+        if session is None:
+            return BallotSummary.aggregate(self.results)
+        return BallotSummary.fetch_memoized(session, self)
 
     #: the total yeas
     yeas = summarized_property('yeas')
@@ -168,15 +172,8 @@ class Ballot(Base, TimestampMixin, TitleTranslationsMixin,
 
     def aggregate_results(self, attribute):
         """ Gets the sum of the given attribute from the results. """
-        if attribute == 'counted_eligible_voters':
-            return sum(getattr(result, attribute) for result in self.results)
 
-        result = self.results.with_entities(
-            func.sum(getattr(BallotResult, attribute))
-        )
-        result = result.order_by(None)
-        result = result.first()
-        return (result[0] or 0) if result else 0
+        return self.summary[attribute]
 
     @staticmethod
     def aggregate_results_expression(cls, attribute):
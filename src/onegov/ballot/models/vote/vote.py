@@ -266,8 +266,8 @@ class Vote(Base, ContentMixin, TimestampMixin,
         for ballot in self.ballots:
             ballot.clear_results()
 
-    def export(self):
-        """ Returns all data connected to this vote as list with dicts.
+    def iter_export(self):
+        """ Yields all data connected to this vote as dicts.
 
         This is meant as a base for json/csv/excel exports. The result is
         therefore a flat list of dictionaries with repeating values to avoid
@@ -276,10 +276,8 @@ class Vote(Base, ContentMixin, TimestampMixin,
 
         """
 
-        rows = []
-
         for ballot in self.ballots:
-            for result in ballot.results:
+            for result in ballot.results.yield_per(1000):
                 row = OrderedDict()
 
                 titles = (
@@ -302,6 +300,12 @@ class Vote(Base, ContentMixin, TimestampMixin,
                 row['empty'] = result.empty
                 row['eligible_voters'] = result.eligible_voters
 
-                rows.append(row)
+                yield row
+
+    def export(self):
+        """ Returns all data connected to this vote as list with dicts,
+        see :meth:`iter_export`.
+
+        """
 
-        return rows
+        return list(self.iter_export())
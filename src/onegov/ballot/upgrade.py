@@ -2,7 +2,9 @@
 upgraded on the server. See :class:`onegov.core.upgrade.upgrade_task`.
 
 """
+from onegov.ballot import BallotSummary
 from onegov.ballot import Election
+from onegov.ballot import ElectionSummary
 from onegov.ballot import Vote
 from onegov.ballot.models.election.election_compound import \
     ElectionCompoundAssociation, ElectionCompound
@@ -541,3 +543,14 @@ def add_after_pukelsheim(context):
                 nullable=False,
                 default=False
             ), default=lambda x: False)
+
+
+@upgrade_task('Adds result summaries')
+def add_result_summaries(context):
+    # the tables (and triggers) are created when the schema is loaded, the
+    # existing results are not summarized yet though
+    for summary in (BallotSummary, ElectionSummary):
+        if context.has_table(summary.__tablename__):
+            for statement in summary.ddl(context.schema):
+                context.operations.execute(statement)
+            summary.refresh(context.session)
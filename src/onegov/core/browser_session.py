@@ -1,9 +1,18 @@
 from contextlib import suppress
 from dogpile.cache.api import NO_VALUE
 from hashlib import blake2b
+from onegov.core.cache import KeyIndex
+from time import time
 
 
 class Prefixed(object):
+    """ Stores the values of a single browser session in a shared cache.
+
+    If the cache is stored in redis, the keys of the session are tracked in
+    an index of their own. Counting and flushing the values of a session
+    thus doesn't depend on the number of sessions stored in the cache.
+
+    """
 
     def __init__(self, prefix, cache):
         assert len(prefix) >= 24
@@ -15,30 +24,95 @@ class Prefixed(object):
         assert key
         return f'{self.prefix}:{key}'
 
+    @property
+    def index(self):
+        """ Returns the key index of the cache and the redis key of the
+        index of this session, or None if the cache has no key index.
+
+        """
+        backend = getattr(self.cache, 'backend', None)
+
+        if not isinstance(backend, KeyIndex):
+            return None
+
+        return backend, self.cache.key_mangler(f'{self.prefix}#keys')
+
+    def index_add(self, key):
+        index = self.index
+
+        if not index:
+            return
+
+        backend, index_key = index
+        now = time()
+
+        pipe = backend.client.pipeline(transaction=False)
+        pipe.zadd(index_key, {key: now + backend.expiration_time})
+        pipe.zremrangebyscore(index_key, '-inf', now)
+        pipe.expire(index_key, backend.expiration_time)
+        pipe.execute()
+
+    def index_remove(self, key):
+        index = self.index
+
+        if index:
+            backend, index_key = index
+            backend.client.zrem(index_key, key)
+
+    def has_index(self):
+        """ Returns True if the keys of this session are indexed. Sessions
+        written by earlier versions have no index of their own.
+
+        """
+        backend, index_key = self.index
+        return bool(backend.client.exists(index_key))
+
+    def indexed_keys(self):
+        """ Returns the (unmangled) keys of this session which are still
+        stored in redis.
+
+        """
+        backend, index_key = self.index
+        keys = backend.client.zrangebyscore(index_key, time(), '+inf')
+
+        if not keys:
+            return []
+
+        pipe = backend.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.exists(self.cache.key_mangler(self.mangle(key.decode())))
+
+        return [k.decode() for k, e in zip(keys, pipe.execute()) if e]
+
     def get(self, key):
         return self.cache.get(self.mangle(key))
 
     def set(self, key, value):
-        return self.cache.set(self.mangle(key), value)
+        self.cache.set(self.mangle(key), value)
+        self.index_add(key)
 
     def delete(self, key):
-        return self.cache.delete(self.mangle(key))
+        self.cache.delete(self.mangle(key))
+        self.index_remove(key)
 
     def count(self):
-        # note, this cannot be used in a Redis cluster - if we use that
-        # we have to keep track of all keys separately
-        return self.cache.backend.reader_client.eval("""
-            return #redis.pcall('keys', ARGV[1])
-        """, 0, f'*:{self.prefix}:*')
+        if not self.has_index():
+            return len(self.cache.keys(match=f'*:{self.prefix}:*'))
+
+        return len(self.indexed_keys())
 
     def flush(self):
-        # note, this cannot be used in a Redis cluster - if we use that
-        # we have to keep track of all keys separately
-        return self.cache.backend.reader_client.eval("""
-            if #redis.pcall('keys', ARGV[1]) > 0 then
-                return redis.pcall('del', unpack(redis.call('keys', ARGV[1])))
-            end
-        """, 0, f'*:{self.prefix}:*')
+        if not self.has_index():
+            return self.cache.flush(match=f'*:{self.prefix}:*')
+
+        backend, index_key = self.index
+        keys = self.indexed_keys()
+
+        if keys:
+            self.cache.delete_multi([self.mangle(key) for key in keys])
+
+        backend.client.unlink(index_key)
+        return len(keys)
 
 
 class BrowserSession(object):
@@ -32,70 +32,345 @@ But no such method exists yet.
 Currently there is one cache per app that never expires (though values will
 eventually be discarded by redis if the cache is full).
 
+Each cache keeps an index of its keys (see :class:`KeyIndex`), which is used
+to list and flush the keys of a single cache.
+
+Values are serialized using pickle, with dill as a fallback for values which
+pickle cannot handle (see :class:`Serializer`). Larger values may optionally
+be compressed.
+
 """
 
 import dill
+import pickle
+import zlib
 
 from dogpile.cache import make_region
 from dogpile.cache.api import NO_VALUE
+from dogpile.cache.proxy import ProxyBackend
 from fastcache import clru_cache as lru_cache  # noqa
 from redis import ConnectionPool
+from time import time
 from types import MethodType
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
-def dill_serialize(value):
-    if isinstance(value, bytes):
-        return value
-    return dill.dumps(value, recurse=True)
 
+class Serializer(object):
+    """ Serializes the values stored in the cache.
 
-def dill_deserialize(value):
-    if value is NO_VALUE:
-        return value
-    return dill.loads(value)
+    Each serialized value starts with a marker byte, describing the format:
 
+    * ``P``: pickle (protocol 5)
+    * ``D``: dill
+    * ``Z``: zlib compressed, followed by another marker
+    * ``S``: zstd compressed, followed by another marker
 
-def keys(cache):
-    # note, this cannot be used in a Redis cluster - if we use that
-    # we have to keep track of all keys separately
-    prefix = cache.key_mangler('').decode()
-    return cache.backend.reader_client.eval(
-        "return redis.pcall('keys', ARGV[1])", 0, f'{prefix}*'
-    )
+    Values without a known marker were written by an earlier version and are
+    loaded using dill.
+
+    :serializer:
+        Either 'pickle' (the default), which uses pickle and falls back to
+        dill for values pickle cannot handle, or 'dill', which always uses
+        dill (slower, but it handles more edge-cases consistently).
+
+    :compression:
+        Either None (the default), 'zlib' or 'zstd'. The latter requires the
+        zstandard package.
+
+    :threshold:
+        The minimum number of bytes a serialized value has to have for it
+        to be compressed.
+
+    """
+
+    def __init__(self, serializer='pickle', compression=None, threshold=1024):
+        assert serializer in ('pickle', 'dill')
+        assert compression in (None, 'zlib', 'zstd')
+
+        if compression == 'zstd':
+            assert zstandard, "zstd compression requires zstandard"
+
+        self.serializer = serializer
+        self.compression = compression
+        self.threshold = threshold
+
+    def dumps(self, value):
+        if isinstance(value, bytes):
+            return value
+
+        if self.serializer == 'pickle':
+            try:
+                data = b'P' + pickle.dumps(value, protocol=5)
+            except (pickle.PicklingError, AttributeError, TypeError):
+                data = b'D' + dill.dumps(value, recurse=True)
+        else:
+            data = b'D' + dill.dumps(value, recurse=True)
+
+        if self.compression and len(data) >= self.threshold:
+            data = self.compress(data)
+
+        return data
+
+    def loads(self, value):
+        if value is NO_VALUE:
+            return value
+
+        marker = value[:1]
+
+        if marker == b'P':
+            return pickle.loads(memoryview(value)[1:])
+
+        if marker == b'D':
+            return dill.loads(value[1:])
+
+        if marker == b'Z':
+            return self.loads(zlib.decompress(memoryview(value)[1:]))
+
+        if marker == b'S':
+            assert zstandard, "zstd compression requires zstandard"
+            decompressor = zstandard.ZstdDecompressor()
+            return self.loads(decompressor.decompress(value[1:]))
+
+        return dill.loads(value)
+
+    def compress(self, data):
+        if self.compression == 'zlib':
+            return b'Z' + zlib.compress(data, 1)
+
+        # zstd (de)compressors are not thread-safe, so we don't share them
+        return b'S' + zstandard.ZstdCompressor(level=3).compress(data)
+
+
+class KeyIndex(ProxyBackend):
+    """ Keeps track of all keys written to a cache region in a redis sorted
+    set, scored by the time the keys expire.
+
+    This allows us to list and flush the keys of a single region without
+    running ``KEYS`` on redis, which is slow and blocks the server for all
+    tenants. With the index, flushing a region is proportional to the
+    number of keys in that region.
+
+    Expired keys are removed from the index whenever keys are added, so the
+    index doesn't grow beyond the keys which are alive. Keys removed by
+    redis before they expire (e.g. if redis runs out of memory) are removed
+    lazily by :func:`keys`.
+
+    """
+
+    def __init__(self, index_key, expiration_time):
+        super().__init__()
+        self.index_key = index_key
+        self.expiration_time = expiration_time
+        self.migrated = False
+
+    @property
+    def client(self):
+        client = self.proxied.writer_client
+
+        if not self.migrated:
+            self.migrate(client)
+            self.migrated = True
+
+        return client
+
+    def migrate(self, client):
+        """ Converts an index stored as plain set by earlier versions into a
+        sorted set. The keys are assumed to be valid as long as new ones.
+
+        """
+        if client.type(self.index_key) != b'set':
+            return
+
+        expires = time() + self.expiration_time
+        keys = client.smembers(self.index_key)
+
+        pipe = client.pipeline()
+        pipe.delete(self.index_key)
+        if keys:
+            pipe.zadd(self.index_key, {key: expires for key in keys})
+            pipe.expire(self.index_key, self.expiration_time)
+        pipe.execute()
+
+    def add(self, keys):
+        if not keys:
+            return
+
+        now = time()
+        expires = now + self.expiration_time
+
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zadd(self.index_key, {key: expires for key in keys})
+        pipe.zremrangebyscore(self.index_key, '-inf', now)
+        pipe.expire(self.index_key, self.expiration_time)
+        pipe.execute()
 
+    def remove(self, keys):
+        if keys:
+            self.client.zrem(self.index_key, *keys)
 
-def flush(cache):
-    # note, this cannot be used in a Redis cluster - if we use that
-    # we have to keep track of all keys separately
-    prefix = cache.key_mangler('').decode()
-    return cache.backend.reader_client.eval("""
-        if #redis.pcall('keys', ARGV[1]) > 0 then
-            return redis.pcall('del', unpack(redis.call('keys', ARGV[1])))
-        end
-    """, 0, f'{prefix}*')
+    def iter_keys(self, match=None, batch_size=500):
+        now = time()
+
+        for key, expires in self.client.zscan_iter(
+                self.index_key, match=match, count=batch_size):
+            if expires > now:
+                yield key
+
+    def set(self, key, value):
+        self.proxied.set(key, value)
+        self.add((key, ))
+
+    def set_serialized(self, key, value):
+        self.proxied.set_serialized(key, value)
+        self.add((key, ))
+
+    def set_multi(self, mapping):
+        self.proxied.set_multi(mapping)
+        self.add(tuple(mapping))
+
+    def set_serialized_multi(self, mapping):
+        self.proxied.set_serialized_multi(mapping)
+        self.add(tuple(mapping))
+
+    def delete(self, key):
+        self.proxied.delete(key)
+        self.remove((key, ))
+
+    def delete_multi(self, keys):
+        keys = tuple(keys)
+        self.proxied.delete_multi(keys)
+        self.remove(keys)
+
+
+def batched(iterable, size):
+    batch = []
+
+    for item in iterable:
+        batch.append(item)
+
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def keys(cache, match=None):
+    """ Returns the keys stored in the given region. Optionally limited to
+    keys matching the given glob-style pattern.
+
+    """
+    index = cache.backend
+    result = []
+
+    for batch in batched(index.iter_keys(match), 500):
+        pipe = index.client.pipeline(transaction=False)
+
+        for key in batch:
+            pipe.exists(key)
+
+        exists = pipe.execute()
+
+        result.extend(k for k, e in zip(batch, exists) if e)
+        index.remove([k for k, e in zip(batch, exists) if not e])
+
+    return result
+
+
+def flush(cache, match=None):
+    """ Deletes the keys stored in the given region. Optionally limited to
+    keys matching the given glob-style pattern.
+
+    The keys are removed in batches, using ``UNLINK``, so redis is never
+    blocked for a longer time.
+
+    :return: The number of deleted keys.
+
+    """
+    index = cache.backend
+    count = 0
+
+    for batch in batched(index.iter_keys(match), 500):
+        pipe = index.client.pipeline(transaction=False)
+        pipe.unlink(*batch)
+        pipe.zrem(index.index_key, *batch)
+        count += pipe.execute()[0]
+
+    return count
+
+
+def add_to_index(cache, *keys):
+    """ Adds the given keys (which were written directly to redis) to the key
+    index of the given region, so they are included in :func:`flush`.
+
+    The keys are expected to be mangled already.
+
+    """
+    cache.backend.add(keys)
 
 
 @lru_cache(maxsize=1024)
-def get(namespace, expiration_time, redis_url):
+def get(namespace, expiration_time, redis_url, serializer='pickle',
+        compression=None, compression_threshold=1024, stale_time=0,
+        distributed_lock=False, lock_timeout=60):
+    """ Returns the cache region for the given namespace. See
+    :class:`Serializer` for the serialization options.
+
+    :stale_time:
+        The number of seconds expired values are kept in redis. While a value
+        is regenerated, other callers of ``get_or_create`` get the expired
+        value instead of waiting.
+
+    :distributed_lock:
+        True if the lock used to regenerate a value should be shared by all
+        processes (stored in redis). Otherwise, each process regenerates the
+        value on its own.
+
+    :lock_timeout:
+        The number of seconds after which a distributed lock is released,
+        in case the process holding it died.
+
+    """
 
     def key_mangler(key):
         return f'{namespace}:{key}'.encode('utf-8')
 
+    serializer = Serializer(serializer, compression, compression_threshold)
+    redis_expiration_time = expiration_time + stale_time + 1
+    index = KeyIndex(
+        f'{namespace}#keys'.encode('utf-8'), redis_expiration_time)
+
     region_conf = dict(
         key_mangler=key_mangler,
-        serializer=dill_serialize,
-        deserializer=dill_deserialize
+        serializer=serializer.dumps,
+        deserializer=serializer.loads
     )
+    arguments = {
+        'url': redis_url,
+        'redis_expiration_time': redis_expiration_time,
+        'connection_pool': get_pool(redis_url)
+    }
+
+    if distributed_lock:
+        arguments.update({
+            'distributed_lock': True,
+            'thread_local_lock': False,
+            'lock_timeout': lock_timeout
+        })
+
     result = make_region(**region_conf).configure(
         'dogpile.cache.redis',
-        arguments={
-            'url': redis_url,
-            'redis_expiration_time': expiration_time + 1,
-            'connection_pool': get_pool(redis_url)
-        }
+        arguments=arguments,
+        wrap=[index]
     )
     result.flush = MethodType(flush, result)
     result.keys = MethodType(keys, result)
+    result.add_to_index = MethodType(add_to_index, result)
     return result
 
 
@@ -1,27 +1,25 @@
 import click
-import email
-import mailbox
 import os
 import platform
 import shutil
+import signal
 import subprocess
 import sys
 
-from cached_property import cached_property
 from fnmatch import fnmatch
-from mailthon.middleware import TLS, Auth
+from onegov.core import cache
 from onegov.core.cache import lru_cache
 from onegov.core.cli.core import command_group, pass_group_context, abort
-from onegov.core.mail import Postman
+from onegov.core.mail_spool import MailSpool
 from onegov.core.orm import Base, SessionManager
 from onegov.core.upgrade import get_tasks
 from onegov.core.upgrade import get_upgrade_modules
 from onegov.core.upgrade import RawUpgradeRunner
 from onegov.core.upgrade import UpgradeRunner
 from onegov.server.config import Config
-from smtplib import SMTPRecipientsRefused
 from sqlalchemy import create_engine
 from sqlalchemy.orm.session import close_all_sessions
+from time import perf_counter
 
 
 #: onegov.core's own command group
@@ -77,6 +75,18 @@ def delete(group_context):
     return delete_instance
 
 
+def get_maildirs(group_context):
+    """ Returns the maildirs of all applications using maildir e-mail
+    delivery.
+
+    """
+    cfgs = (c for c in group_context.appcfgs if 'mail' in c.configuration)
+    cfgs = (v for c in cfgs for v in c.configuration['mail'].values())
+    cfgs = (c for c in cfgs if c.get('use_directory'))
+
+    return sorted(set(c['directory'] for c in cfgs))
+
+
 @cli.command(context_settings={
     'matches_required': False,
     'default_selector': '*'
@@ -91,99 +101,97 @@ def delete(group_context):
               help="Max number of mails to send before exiting")
 @click.option('--category', help="Only send e-mails of the given category",
               default=None)
+@click.option('--connections', default=1,
+              help="The number of concurrent smtp connections")
 @pass_group_context
-def sendmail(group_context,
-             hostname, port, force_tls, username, password, limit, category):
+def sendmail(group_context, hostname, port, force_tls, username, password,
+             limit, category, connections):
     """ Iterates over all applications and processes the maildir for each
     application that uses maildir e-mail delivery.
 
-    """
-    exit_code = 0
-
-    class Mail(object):
+    Transactional e-mails are sent first. See ``mailspool`` for a long
+    running alternative.
 
-        def __init__(self, maildir, filename):
-            self.maildir = maildir
-            self.filename = filename
+    """
 
-        @cached_property
-        def message(self):
-            return email.message_from_string(self.text)
+    spool = MailSpool(
+        get_maildirs(group_context),
+        hostname=hostname,
+        port=port,
+        force_tls=force_tls,
+        username=username,
+        password=password,
+        connections=connections,
+        category=category
+    )
+    spool.drain(limit)
 
-        @cached_property
-        def text(self):
-            return self.maildir.get_file(self.filename).read().decode('utf-8')
+    for mail, recipients in spool.refused:
+        print(f"Could not send e-mail: {recipients}")
 
-        @property
-        def category(self):
-            return self.message.get('X-Category')
+    for mail, error in spool.failed:
+        print(f"Could not send e-mail {mail.path}: {error}")
 
-        @property
-        def exists(self):
-            return self.filename in self.maildir
+    sys.exit(1 if spool.refused or spool.failed else 0)
 
-        def remove(self):
-            self.maildir.remove(self.filename)
 
-        def send(self, connection):
-            connection.sendmail(
-                self.message['From'],
-                self.message['To'],
-                self.text)
+@cli.command(context_settings={
+    'matches_required': False,
+    'default_selector': '*'
+})
+@click.option('--hostname', help="The smtp host")
+@click.option('--port', help="The smtp port")
+@click.option('--force-tls', default=False, is_flag=True,
+              help="Force a TLS connection")
+@click.option('--username', help="The username to authenticate", default=None)
+@click.option('--password', help="The password to authenticate", default=None)
+@click.option('--category', help="Only send e-mails of the given category",
+              default=None)
+@click.option('--connections', default=4,
+              help="The number of concurrent smtp connections")
+@click.option('--rate', default=None, type=float,
+              help="Max number of mails sent per second")
+@click.option('--poll-interval', default=1.0,
+              help="Seconds between scans of the maildirs")
+@click.option('--metrics-interval', default=60.0,
+              help="Seconds between logging the throughput")
+@pass_group_context
+def mailspool(group_context, hostname, port, force_tls, username, password,
+              category, connections, rate, poll_interval, metrics_interval):
+    """ Continuously sends the e-mails of all applications that use maildir
+    e-mail delivery, until interrupted.
 
-            return connection.noop()[0]
+    Transactional e-mails are sent before marketing e-mails. The e-mails are
+    sent over multiple concurrent connections, optionally limited to a
+    number of e-mails per second.
 
-    # applications with a maildir configuration
-    cfgs = (c for c in group_context.appcfgs if 'mail' in c.configuration)
-    cfgs = (v for c in cfgs for v in c.configuration['mail'].values())
-    cfgs = (c for c in cfgs if c.get('use_directory'))
+    """
 
-    # non-empty maildirs
-    dirs = set(c['directory'] for c in cfgs)
-    dirs = (mailbox.Maildir(d, create=False) for d in dirs)
-    dirs = (d for d in dirs if len(d))
-
-    # emails
-    mails = (Mail(d, f) for d in dirs for f in d.keys())
-    mails = tuple(mails)
-    mails = (
-        m for m in mails
-        if m.exists and (category is None or m.category == category)
+    spool = MailSpool(
+        get_maildirs(group_context),
+        hostname=hostname,
+        port=port,
+        force_tls=force_tls,
+        username=username,
+        password=password,
+        connections=connections,
+        rate=rate,
+        category=category,
+        poll_interval=poll_interval,
+        metrics_interval=metrics_interval
     )
 
-    # load all the mails we're going to process
-    if limit:
-        mails = tuple(x for _, x in zip(range(limit), mails))
-    else:
-        mails = tuple(mails)
-
-    if not mails:
-        sys.exit(exit_code)
-
-    # create the connection handler
-    postman = Postman(hostname, port)
-
-    if force_tls:
-        postman.middlewares.append(TLS(force=True))
-
-    if username:
-        postman.middlewares.append(Auth(username, password))
+    def stop(signum, frame):
+        spool.stop()
 
-    # send the messages
-    with postman.connection() as connection:
+    signal.signal(signal.SIGTERM, stop)
 
-        for mail in mails:
-            try:
-                status = mail.send(connection)
-            except SMTPRecipientsRefused as e:
-                exit_code = 1
-                print(f"Could not send e-mail: {e.recipients}")
-                mail.remove()
-            else:
-                if status == 250:
-                    mail.remove()
+    try:
+        spool.run()
+    except KeyboardInterrupt:
+        spool.stop()
 
-    sys.exit(exit_code)
+    click.echo(f"Mail spool stopped: {spool.metrics.as_dict()}")
 
 
 @cli.command(context_settings={
@@ -474,3 +482,71 @@ def shell():
         breakpoint()
 
     return _shell
+
+
+@cli.command(name='benchmark-cache', context_settings={
+    'default_selector': '*'
+})
+@click.option('--rounds', default=10, help="Number of rounds per value")
+@click.option('--threshold', default=1024,
+              help="Compression threshold in bytes")
+@pass_group_context
+def benchmark_cache(group_context, rounds, threshold):
+    """ Measures the serialization of the orm cached values of the selected
+    applications with the available cache serializers.
+
+    Prints the average time to serialize and deserialize each value, as well
+    as the size of the serialized value.
+
+    """
+
+    configurations = [
+        ('dill', None),
+        ('pickle', None),
+        ('pickle', 'zlib'),
+    ]
+
+    if cache.zstandard:
+        configurations.append(('pickle', 'zstd'))
+
+    serializers = [
+        (f'{name}+{compression}' if compression else name,
+         cache.Serializer(name, compression, threshold))
+        for name, compression in configurations
+    ]
+
+    def measure(serializer, value):
+        start = perf_counter()
+        for i in range(rounds):
+            data = serializer.dumps(value)
+        dumps = (perf_counter() - start) / rounds
+
+        start = perf_counter()
+        for i in range(rounds):
+            serializer.loads(data)
+        loads = (perf_counter() - start) / rounds
+
+        return dumps, loads, len(data)
+
+    def run_benchmark(request, app):
+        title = f"Benchmarking cache of {app.application_id}"
+        click.secho(title, underline=True)
+
+        for descriptor in app.orm_cache_descriptors:
+            try:
+                value = descriptor.create(app)
+            except Exception as e:
+                click.secho(f"{descriptor.cache_key}: skipped ({e})",
+                            fg='yellow')
+                continue
+
+            click.echo(descriptor.cache_key)
+
+            for name, serializer in serializers:
+                dumps, loads, size = measure(serializer, value)
+                click.echo(
+                    f"  {name:<12} dumps {dumps * 1000:8.2f}ms "
+                    f"loads {loads * 1000:8.2f}ms {size:>10} bytes"
+                )
+
+    return run_benchmark
@@ -1,10 +1,27 @@
+import json
 import math
 
+from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64encode
+from binascii import Error as BinasciiError
 from cached_property import cached_property
+from datetime import date
+from datetime import datetime
+from sqlalchemy import and_
+from sqlalchemy import func
+from sqlalchemy import literal
 from sqlalchemy import or_
+from sqlalchemy import tuple_
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.inspection import inspect
+from sqlalchemy.sql.expression import ClauseElement
+from sqlalchemy.sql.expression import Executable
+from sqlalchemy.sql.expression import UnaryExpression
+from sqlalchemy.sql.operators import desc_op
+from uuid import UUID
 
-from onegov.core.orm import func
+from onegov.core.orm.mixins.text_search import TextSearchMixin
+from onegov.core.orm.mixins.text_search import text_search_language
 
 
 class GenericCollection(object):
@@ -105,11 +122,8 @@ class SearcheableCollection(GenericCollection):
         configuration.
         """
 
-        mapping = {'de_CH': 'german', 'fr_CH': 'french', 'it_CH': 'italian',
-                   'rm_CH': 'english'}
-
         return self.__class__.match_term(
-            column, mapping.get(locale, 'english'), term)
+            column, text_search_language(locale), term)
 
     @property
     def term_filter_cols(self):
@@ -118,6 +132,25 @@ class SearcheableCollection(GenericCollection):
          """
         raise NotImplementedError
 
+    def filter_text(self, name, term, locale=None):
+        """ Returns an SqlAlchemy filter statement matching the given column
+        name with the search term.
+
+        Uses the stored text search vector of the column if the model has
+        one (see :class:`onegov.core.orm.mixins.TextSearchMixin`), which
+        can be looked up using its GIN index. Otherwise, the vector is
+        computed for every row.
+
+        """
+
+        model_class = self.model_class
+        if issubclass(model_class, TextSearchMixin):
+            if model_class.text_search_vector(name, locale) is not None:
+                return model_class.match_text(name, term, locale)
+
+        return self.filter_text_by_locale(
+            getattr(model_class, name), term, locale)
+
     @property
     def term_filter(self):
         assert self.term_filter_cols
@@ -125,8 +158,7 @@ class SearcheableCollection(GenericCollection):
             self.term)
 
         return (
-            self.__class__.filter_text_by_locale(
-                getattr(self.model_class, col), term, self.locale)
+            self.filter_text(col, term, self.locale)
             for col in self.term_filter_cols
         )
 
@@ -355,3 +387,217 @@ class RangedPagination(object):
 
         if e + 1 < self.pages_count:
             return self.by_page_range((e + 1, e + 1))
+
+
+class Explain(Executable, ClauseElement):
+    """ Wraps a statement with ``EXPLAIN (FORMAT JSON)``. """
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, 'postgresql')
+def compile_explain(element, compiler, **kw):
+    return 'EXPLAIN (FORMAT JSON) {}'.format(
+        compiler.process(element.statement, **kw)
+    )
+
+
+def estimate_count(query):
+    """ Returns the number of rows the query planner expects the given query
+    to return.
+
+    This is much faster than counting the rows, but only as accurate as the
+    statistics of the tables involved.
+
+    """
+    plan = query.session.execute(Explain(query.statement)).scalar()
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def encode_keyset(values):
+    """ Encodes the given sort key as URL-safe token. """
+
+    def encode(value):
+        if isinstance(value, datetime):
+            return ['datetime', value.isoformat()]
+        if isinstance(value, date):
+            return ['date', value.isoformat()]
+        if isinstance(value, UUID):
+            return ['uuid', value.hex]
+        return value
+
+    token = json.dumps([encode(value) for value in values])
+    return urlsafe_b64encode(token.encode('utf-8')).decode('ascii')
+
+
+def decode_keyset(token):
+    """ Decodes the given token to a sort key. Returns None if the token
+    is invalid.
+
+    Only scalar values and the tagged values written by
+    :func:`encode_keyset` are accepted, anything else (e.g. objects or
+    nested lists) would end up in the query.
+
+    """
+
+    decoders = {
+        'datetime': datetime.fromisoformat,
+        'date': date.fromisoformat,
+        'uuid': UUID
+    }
+
+    def decode(value):
+        if isinstance(value, list):
+            type_, value = value
+            if not isinstance(value, str):
+                raise TypeError
+            return decoders[type_](value)
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        raise TypeError
+
+    try:
+        values = json.loads(urlsafe_b64decode(token.encode('ascii')))
+        if not isinstance(values, list):
+            return None
+        return tuple(decode(value) for value in values)
+    except (BinasciiError, KeyError, TypeError, ValueError):
+        return None
+
+
+def keyset_filter(keyset, values):
+    """ Returns a filter matching the records sorted after the given sort
+    key, using the given keyset (see :class:`KeysetPagination`).
+
+    """
+
+    columns = []
+    descending = []
+    for expression in keyset:
+        if isinstance(expression, UnaryExpression) and expression.modifier:
+            descending.append(expression.modifier is desc_op)
+            expression = expression.element
+        else:
+            descending.append(False)
+        columns.append(expression)
+
+    # a row value comparison can be used with indexes, but only works if
+    # all columns are sorted in the same direction
+    if all(descending) or not any(descending):
+        row = tuple_(*columns)
+        key = tuple_(*(
+            literal(value, column.type)
+            for column, value in zip(columns, values)
+        ))
+        return row < key if descending[0] else row > key
+
+    return or_(*(
+        and_(
+            *(column == value for column, value in zip(columns, values[:ix])),
+            columns[ix] < values[ix] if descending[ix]
+            else columns[ix] > values[ix]
+        )
+        for ix in range(len(columns))
+    ))
+
+
+class KeysetPagination(Pagination):
+    """ A pagination seeking to the next page using the sort key of the last
+    element on the current page ("keyset pagination"), instead of skipping
+    all the elements on the previous pages, which gets slower with each page.
+
+    Subclasses define the sort key (see :attr:`keyset`) and accept the
+    token of the page (see :attr:`after`) in their constructor and path.
+    Pages reached through :attr:`next` are loaded by seeking, pages reached
+    otherwise (e.g. by clicking on a page number) are loaded by offset.
+
+    Large subsets are not counted exactly (see :attr:`exact_count_limit`).
+
+    """
+
+    #: the token of the current page (the encoded sort key of the last
+    #: element on the previous page)
+    after = None
+
+    #: subsets larger than this are not counted exactly - the size of
+    #: unfiltered subsets is estimated by the query planner, filtered
+    #: subsets are counted up to this limit
+    exact_count_limit = 10000
+
+    @property
+    def keyset(self):
+        """ Returns the expressions used to sort the subset (which are unique
+        together, usually ending with the primary key). Descending expressions
+        are wrapped using ``desc``.
+
+        Returns None to disable seeking (e.g. if the subset is sorted by
+        relevance).
+
+        """
+        raise NotImplementedError
+
+    @cached_property
+    def subset_count(self):
+        """ Returns the total number of elements this pagination represents.
+
+        Large unfiltered subsets are estimated. The estimates of filtered
+        subsets may be off by orders of magnitude, so they are counted up to
+        the :attr:`exact_count_limit` instead. The pages beyond the limit
+        can still be reached through :attr:`next`.
+
+        """
+        query = self.cached_subset.order_by(None)
+
+        if query.whereclause is None:
+            estimate = estimate_count(query)
+            if estimate > self.exact_count_limit:
+                return estimate
+
+        return query.limit(self.exact_count_limit + 1).count()
+
+    @cached_property
+    def batch_rows(self):
+        """ Returns the elements on the current page together with their
+        sort keys, including the first element of the next page (if any).
+
+        """
+        keyset = self.keyset
+        values = self.after and decode_keyset(self.after)
+
+        query = self.cached_subset.order_by(None).order_by(*keyset)
+        query = query.add_columns(*(
+            expression.element if isinstance(expression, UnaryExpression)
+            else expression for expression in keyset
+        ))
+
+        if values and len(values) == len(keyset):
+            query = query.filter(keyset_filter(keyset, values))
+            query = query.limit(self.batch_size + 1)
+        else:
+            query = query.slice(
+                self.offset, self.offset + self.batch_size + 1
+            )
+
+        return tuple(self.transform_batch_query(query))
+
+    @cached_property
+    def batch(self):
+        """ Returns the elements on the current page. """
+        if not self.keyset:
+            return super().batch
+
+        return tuple(row[0] for row in self.batch_rows[:self.batch_size])
+
+    @property
+    def next(self):
+        """ Returns the next page or None. """
+        if not self.keyset:
+            return super().next
+
+        if len(self.batch_rows) > self.batch_size:
+            page = self.page_by_index(self.page + 1)
+            page.after = encode_keyset(
+                self.batch_rows[self.batch_size - 1][1:]
+            )
+            return page
@@ -15,7 +15,7 @@ from csv import writer as csv_writer
 from datetime import datetime
 from editdistance import eval as distance
 from io import BytesIO, StringIO
-from itertools import permutations
+from itertools import chain, permutations
 from onegov.core import errors
 from onegov.core.cache import lru_cache
 from ordered_set import OrderedSet
@@ -433,11 +433,74 @@ def convert_list_of_dicts_to_csv(rows, fields=None, key=None, reverse=False):
     return output.read()
 
 
+def peek_fields(rows, fields=None, key=None, reverse=False):
+    """ Returns the fields and the rows of the given list or iterator of
+    dicts.
+
+    Lists are handled like :func:`get_keys_from_list_of_dicts`. Iterators
+    can only be consumed once, the fields are therefore taken from the first
+    row and the returned rows include the first row again. Rows with
+    different keys should therefore be passed as list (or together with
+    the fields).
+
+    """
+    if fields:
+        return fields, rows
+
+    if isinstance(rows, (list, tuple)):
+        return get_keys_from_list_of_dicts(rows, key, reverse), rows
+
+    rows = iter(rows)
+    first = next(rows, None)
+
+    if first is None:
+        return (), ()
+
+    fields = get_keys_from_list_of_dicts((first, ), key, reverse)
+    return fields, chain((first, ), rows)
+
+
+def iter_list_of_dicts_as_csv(rows, fields=None, key=None, reverse=False,
+                              chunk_size=64 * 1024):
+    """ Takes a list or an iterator of dictionaries and yields the csv in
+    chunks of roughly the given size.
+
+    This behaves the same way as :func:`convert_list_of_dicts_to_csv`, but
+    only ever holds a single chunk in memory. For iterators, the fields are
+    taken from the first row, if not provided.
+
+    """
+
+    fields, rows = peek_fields(rows, fields, key, reverse)
+
+    if not fields:
+        return
+
+    output = StringIO()
+    writer = DictWriter(output, fieldnames=fields)
+
+    writer.writeheader()
+
+    for row in rows:
+        writer.writerow({field: row.get(field, '') for field in fields})
+
+        if output.tell() >= chunk_size:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+
+    if output.tell():
+        yield output.getvalue()
+
+
 def convert_list_of_dicts_to_xlsx(rows, fields=None, key=None, reverse=False):
     """ Takes a list of dictionaries and returns a xlsx.
 
     This behaves the same way as :func:`convert_list_of_dicts_to_csv`.
 
+    The rows may also be an iterator, the rows are written one by one (with
+    constant memory), only the resulting file is held in memory.
+
     """
 
     small_chars = set('fijlrt:,;.+i ')
@@ -476,7 +539,7 @@ def convert_list_of_dicts_to_xlsx(rows, fields=None, key=None, reverse=False):
 
         worksheet = workbook.add_worksheet()
 
-        fields = fields or get_keys_from_list_of_dicts(rows, key, reverse)
+        fields, rows = peek_fields(rows, fields, key, reverse)
 
         # write the header
         worksheet.write_row(0, 0, fields, cellformat)
@@ -245,6 +245,18 @@ class Framework(
         :redis_url:
             The redis url used (default is 'redis://localhost:6379/0').
 
+        :cache_serializer:
+            The serializer used for the cache, either 'pickle' (default) or
+            'dill'. See :class:`onegov.core.cache.Serializer`.
+
+        :cache_compression:
+            The compression used for larger cache values, either None
+            (default), 'zlib' or 'zstd'.
+
+        :cache_compression_threshold:
+            The size in bytes from which cache values are compressed
+            (default is 1024).
+
         :file_storage:
             The file_storage module to use. See
             `<http://docs.pyfilesystem.org/en/latest/filesystems.html>`_
@@ -354,6 +366,10 @@ class Framework(
 
     def configure_redis(self, **cfg):
         self.redis_url = cfg.get('redis_url', 'redis://127.0.0.1:6379/0')
+        self.cache_serializer = cfg.get('cache_serializer', 'pickle')
+        self.cache_compression = cfg.get('cache_compression', None)
+        self.cache_compression_threshold = int(
+            cfg.get('cache_compression_threshold', 1024))
 
     def configure_secrets(self, **cfg):
 
@@ -475,12 +491,26 @@ class Framework(
             if not self.is_orm_cache_setup:
                 self.setup_orm_cache()
 
-    def get_cache(self, name, expiration_time):
-        """ Gets a cache bound to this application id. """
+    def get_cache(self, name, expiration_time, **options):
+        """ Gets a cache bound to this application id.
+
+        The serializer options of the application may be overridden per cache,
+        further options (stale values, distributed locks) may be given as
+        well (see :func:`onegov.core.cache.get`).
+
+        """
+        options = {
+            'serializer': self.cache_serializer,
+            'compression': self.cache_compression,
+            'compression_threshold': self.cache_compression_threshold,
+            **options
+        }
+
         return cache.get(
             namespace=f'{self.application_id}:{name}',
             expiration_time=expiration_time,
-            redis_url=self.redis_url
+            redis_url=self.redis_url,
+            **options
         )
 
     @property
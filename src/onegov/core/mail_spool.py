@@ -0,0 +1,385 @@
+""" Sends the e-mails stored in maildirs (see
+:class:`onegov.core.mail.MaildirTransport`) to an SMTP relay.
+
+The spool watches the maildirs by polling them and sends the e-mails over a
+pool of concurrent SMTP connections. Transactional e-mails (password resets,
+notifications) are sent before marketing e-mails, even if they are spooled
+while a newsletter is still being sent. The rate of e-mails sent to the
+relay may be limited.
+
+Only one spool should process a maildir at any given time.
+
+"""
+import os
+
+from email.parser import BytesHeaderParser
+from itertools import count
+from onegov.core import log
+from onegov.core.mail import Postman
+from mailthon.middleware import TLS, Auth
+from queue import Empty, PriorityQueue
+from smtplib import SMTPException
+from smtplib import SMTPRecipientsRefused
+from smtplib import SMTPResponseException
+from threading import Event, Lock, Thread
+from time import monotonic, sleep
+
+
+#: The priority of the categories, lower values are sent first. Other
+#: categories are sent last.
+CATEGORY_PRIORITIES = {
+    'transactional': 0,
+    'marketing': 1
+}
+
+
+def read_headers(path):
+    """ Parses the headers of the given e-mail, without reading the body. """
+
+    lines = []
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                break
+            lines.append(line)
+
+    return BytesHeaderParser().parsebytes(b''.join(lines))
+
+
+class SpooledMail(object):
+    """ An e-mail stored in a maildir. """
+
+    __slots__ = ('path', 'category')
+
+    def __init__(self, path, category=None):
+        self.path = path
+        self.category = category
+
+    @classmethod
+    def from_path(cls, path):
+        return cls(path, read_headers(path).get('X-Category'))
+
+    @property
+    def priority(self):
+        return CATEGORY_PRIORITIES.get(self.category, len(CATEGORY_PRIORITIES))
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def send(self, connection):
+        """ Sends the e-mail over the given SMTP connection. """
+
+        text = self.read()
+        headers = BytesHeaderParser().parsebytes(text)
+        connection.sendmail(headers['From'], headers['To'], text)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class RateLimiter(object):
+    """ Spaces the e-mails sent to a relay by all connections, so at most
+    ``rate`` e-mails are sent per second. No limit is applied if the rate
+    is empty.
+
+    """
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self.lock = Lock()
+        self.next = monotonic()
+
+    def wait(self):
+        if not self.rate:
+            return
+
+        with self.lock:
+            now = monotonic()
+            at = max(self.next, now)
+            self.next = at + 1 / self.rate
+
+        if at > now:
+            sleep(at - now)
+
+
+class SpoolMetrics(object):
+    """ Counts the e-mails sent by the spool. """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.started = monotonic()
+        self.sent = {}
+        self.failed = 0
+        self.retried = 0
+
+    def record_sent(self, category):
+        with self.lock:
+            self.sent[category] = self.sent.get(category, 0) + 1
+
+    def record_failed(self):
+        with self.lock:
+            self.failed += 1
+
+    def record_retried(self):
+        with self.lock:
+            self.retried += 1
+
+    def as_dict(self, queued=0):
+        sent = sum(self.sent.values())
+        elapsed = monotonic() - self.started
+
+        return {
+            'sent': sent,
+            'sent_by_category': dict(self.sent),
+            'failed': self.failed,
+            'retried': self.retried,
+            'queued': queued,
+            'throughput': sent / elapsed if elapsed else 0.0
+        }
+
+
+class MailSpool(object):
+    """ Sends the e-mails of the given maildirs.
+
+    :directories:
+        The maildirs to process.
+
+    :hostname/port/force_tls/username/password:
+        The SMTP relay.
+
+    :connections:
+        The number of concurrent SMTP connections.
+
+    :rate:
+        The maximum number of e-mails sent per second (over all
+        connections), unlimited if empty.
+
+    :category:
+        Only e-mails of this category are sent if given.
+
+    :poll_interval:
+        The seconds between scans of the maildirs.
+
+    """
+
+    def __init__(self, directories, hostname, port, force_tls=False,
+                 username=None, password=None, connections=4, rate=None,
+                 category=None, poll_interval=1.0, metrics_interval=60.0,
+                 retry_delay=5.0):
+
+        self.directories = tuple(directories)
+        self.hostname = hostname
+        self.port = port
+        self.force_tls = force_tls
+        self.username = username
+        self.password = password
+        self.connections = max(connections, 1)
+        self.category = category
+        self.poll_interval = poll_interval
+        self.metrics_interval = metrics_interval
+        self.retry_delay = retry_delay
+
+        self.limiter = RateLimiter(rate)
+        self.metrics = SpoolMetrics()
+        self.queue = PriorityQueue()
+        self.sequence = count()
+        self.stopped = Event()
+
+        # the paths of the e-mails which are queued or being sent
+        self.pending = set()
+        self.pending_lock = Lock()
+
+        # the e-mails which could not be delivered to all recipients
+        self.refused = []
+
+        # the e-mails which were rejected permanently by the relay
+        self.failed = []
+
+    def postman(self):
+        postman = Postman(self.hostname, self.port)
+
+        if self.force_tls:
+            postman.middlewares.append(TLS(force=True))
+
+        if self.username:
+            postman.middlewares.append(Auth(self.username, self.password))
+
+        return postman
+
+    def scan(self):
+        """ Returns the e-mails in the maildirs which are not pending yet, in
+        the order they were spooled.
+
+        """
+        paths = []
+
+        for directory in self.directories:
+            for subdirectory in ('new', 'cur'):
+                try:
+                    entries = os.scandir(os.path.join(directory, subdirectory))
+                except FileNotFoundError:
+                    continue
+
+                with entries:
+                    paths.extend(
+                        entry.path for entry in entries
+                        if entry.is_file() and not entry.name.startswith('.')
+                    )
+
+        # maildir names start with the time the e-mail was stored
+        paths.sort(key=os.path.basename)
+
+        with self.pending_lock:
+            paths = [path for path in paths if path not in self.pending]
+
+        mails = []
+        for path in paths:
+            try:
+                mail = SpooledMail.from_path(path)
+            except FileNotFoundError:
+                continue
+
+            if self.category is None or mail.category == self.category:
+                mails.append(mail)
+
+        return mails
+
+    def enqueue(self, mails):
+        with self.pending_lock:
+            for mail in mails:
+                self.pending.add(mail.path)
+                self.queue.put((mail.priority, next(self.sequence), mail))
+
+    def done(self, mail):
+        with self.pending_lock:
+            self.pending.discard(mail.path)
+
+    def send_mails(self, connection, stop_when_empty):
+        """ Sends queued e-mails over the given connection until the spool
+        is stopped (or the queue is empty, if requested).
+
+        """
+        while not self.stopped.is_set():
+            try:
+                item = self.queue.get(timeout=self.poll_interval)
+            except Empty:
+                if stop_when_empty:
+                    return
+                continue
+
+            mail = item[-1]
+
+            if not mail.exists:
+                self.done(mail)
+                continue
+
+            self.limiter.wait()
+
+            try:
+                mail.send(connection)
+            except SMTPRecipientsRefused as e:
+                self.refused.append((mail, e.recipients))
+                self.metrics.record_failed()
+                mail.remove()
+                self.done(mail)
+            except SMTPResponseException as e:
+                if e.smtp_code >= 500:
+                    # permanent errors are not retried, the e-mail stays
+                    # in the maildir until the spool is restarted
+                    log.error(f'Could not send {mail.path}: {e}')
+                    self.failed.append((mail, e))
+                    self.metrics.record_failed()
+                    continue
+
+                self.metrics.record_retried()
+                self.queue.put(item)
+                raise
+            except (SMTPException, OSError):
+                self.metrics.record_retried()
+                self.queue.put(item)
+                raise
+            else:
+                self.metrics.record_sent(mail.category)
+                mail.remove()
+                self.done(mail)
+
+    def worker(self, stop_when_empty=False):
+        """ Sends e-mails over a single connection, reconnecting if the
+        connection fails.
+
+        """
+        while not self.stopped.is_set():
+            try:
+                with self.postman().connection() as connection:
+                    self.send_mails(connection, stop_when_empty)
+                    return
+            except (SMTPException, OSError) as e:
+                log.warning(f'SMTP connection failed: {e}')
+
+                # when draining, the remaining e-mails are left for later
+                if stop_when_empty:
+                    return
+
+                self.stopped.wait(self.retry_delay)
+
+    def start_workers(self, stop_when_empty=False):
+        workers = [
+            Thread(target=self.worker, args=(stop_when_empty, ), daemon=True)
+            for ix in range(self.connections)
+        ]
+
+        for worker in workers:
+            worker.start()
+
+        return workers
+
+    def drain(self, limit=None):
+        """ Sends the e-mails currently in the maildirs (transactional
+        e-mails first), at most ``limit`` if given, and returns the metrics.
+
+        """
+        mails = sorted(self.scan(), key=lambda mail: mail.priority)
+
+        if limit:
+            mails = mails[:limit]
+
+        if mails:
+            self.enqueue(mails)
+
+            for worker in self.start_workers(stop_when_empty=True):
+                worker.join()
+
+        return self.metrics.as_dict(self.queue.qsize())
+
+    def run(self):
+        """ Sends the e-mails of the maildirs until the spool is stopped. """
+
+        workers = self.start_workers()
+        reported = monotonic()
+
+        try:
+            while not self.stopped.is_set():
+                self.enqueue(self.scan())
+
+                if monotonic() - reported >= self.metrics_interval:
+                    metrics = self.metrics.as_dict(self.queue.qsize())
+                    log.info(f'Mail spool: {metrics}')
+                    reported = monotonic()
+
+                self.stopped.wait(self.poll_interval)
+        finally:
+            self.stop()
+
+            for worker in workers:
+                worker.join()
+
+    def stop(self):
+        self.stopped.set()
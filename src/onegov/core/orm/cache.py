@@ -19,12 +19,80 @@ Properties defined in this way are accessible through the instance::
 If there are any changes to the users table, the cache is removed. Since the
 cache is usually a shared redis instance, this works for multiple processes.
 
+Additionally, each process keeps the most recently used values in memory,
+which saves us from deserializing them on every request. To make sure those
+values are still current, each cached property has a version stamp in redis,
+which changes whenever the cache is evicted. The in-memory value is only used
+if the version stamp is unchanged.
+
 """
 
 import inspect
 import sqlalchemy
 
+from collections import OrderedDict
+from dogpile.cache.api import NO_VALUE
 from sqlalchemy.orm.query import Query
+from threading import Lock
+from time import monotonic
+from uuid import uuid4
+
+
+class LocalOrmCache(object):
+    """ A process-local, size-limited LRU cache holding the values of the
+    orm cached properties together with the version stamp they were
+    loaded with.
+
+    """
+
+    def __init__(self, maxsize=256, ttl=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        """ Returns the (version, value, checked) tuple stored under the key,
+        or None. ``checked`` is the time when the version was last checked.
+
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is not None:
+                self.entries.move_to_end(key)
+
+            return entry
+
+    def set(self, key, version, value):
+        with self.lock:
+            self.entries[key] = (version, value, monotonic())
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def touch(self, key):
+        """ Marks the version of the given entry as checked. """
+        with self.lock:
+            if key in self.entries:
+                version, value, checked = self.entries[key]
+                self.entries[key] = (version, value, monotonic())
+
+    def is_fresh(self, entry):
+        """ Returns true if the version of the entry was checked recently
+        enough for it to be used without checking again.
+
+        """
+        return monotonic() - entry[2] < self.ttl
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
 
 
 class OrmCacheApp(object):
@@ -37,9 +105,36 @@ class OrmCacheApp(object):
 
     """
 
+    #: the process-local cache tier (see :class:`LocalOrmCache`)
+    orm_cache_local = None
+
     def configure_orm_cache(self, **cfg):
+        """ Configures the orm cache. The following options are accepted:
+
+        :orm_cache_local_size:
+            The number of orm cached values kept in memory by each process
+            (defaults to 256). Set to 0 to disable the in-memory cache.
+
+        :orm_cache_local_ttl:
+            The number of seconds an in-memory value is used without checking
+            its version stamp in redis (defaults to 0). Setting this higher
+            saves a redis roundtrip per cached property and request, at the
+            cost of not seeing changes made by other processes for the given
+            amount of time.
+
+        """
         self.is_orm_cache_setup = getattr(self, 'is_orm_cache_setup', False)
 
+        size = int(cfg.get('orm_cache_local_size', 256))
+
+        if size:
+            self.orm_cache_local = LocalOrmCache(
+                maxsize=size,
+                ttl=float(cfg.get('orm_cache_local_ttl', 0))
+            )
+        else:
+            self.orm_cache_local = None
+
     def setup_orm_cache(self):
         """ Sets up the event handlers for the change-detection. """
 
@@ -92,6 +187,7 @@ class OrmCacheApp(object):
                 # Still, trust but verify:
                 assert self.schema == schema
                 self.cache.delete(descriptor.cache_key)
+                descriptor.renew_version(self)
 
                 if descriptor.cache_key in self.request_cache:
                     del self.request_cache[descriptor.cache_key]
@@ -116,6 +212,7 @@ class OrmCacheDescriptor(object):
     def __init__(self, cache_policy, creator):
         self.cache_policy = cache_policy
         self.cache_key = creator.__qualname__
+        self.version_key = f'{self.cache_key}:version'
         self.creator = creator
 
     def create(self, instance):
@@ -134,6 +231,94 @@ class OrmCacheDescriptor(object):
 
         return result
 
+    def version_client(self, app):
+        """ Returns the redis client and the mangled key of the version stamp.
+
+        """
+        cache = app.cache
+        return cache.backend.client, cache.key_mangler(self.version_key)
+
+    def set_version(self, app, client, key, **options):
+        """ Sets a new version stamp, which expires together with the cache
+        values and is removed when the cache is flushed.
+
+        """
+        client.set(
+            key, uuid4().hex, ex=app.cache.backend.expiration_time, **options)
+        app.cache.add_to_index(key)
+
+    def get_version(self, app):
+        """ Returns the current version stamp of the cached value.
+
+        If there's no version stamp yet (or if it was flushed together with
+        the rest of the cache), a new one is created.
+
+        """
+        client, key = self.version_client(app)
+        version = client.get(key)
+
+        if version is None:
+            self.set_version(app, client, key, nx=True)
+            version = client.get(key)
+
+        return version
+
+    def renew_version(self, app):
+        """ Changes the version stamp, invalidating the in-memory values of
+        all processes.
+
+        """
+        client, key = self.version_client(app)
+        self.set_version(app, client, key)
+
+        if app.orm_cache_local is not None:
+            app.orm_cache_local.delete((app.application_id, self.cache_key))
+
+    def get_or_create(self, app):
+        """ Returns the cached value, either from memory, from redis or by
+        creating it.
+
+        """
+        local = app.orm_cache_local
+
+        if local is None:
+            return app.cache.get_or_create(
+                key=self.cache_key,
+                creator=lambda: self.create(app)
+            )
+
+        key = (app.application_id, self.cache_key)
+        entry = local.get(key)
+
+        if entry is not None and local.is_fresh(entry):
+            return entry[1]
+
+        # the version has to be read before the value, so that concurrent
+        # changes lead to a different version on the next check
+        version = self.get_version(app)
+
+        if entry is not None and entry[0] == version:
+            local.touch(key)
+            return entry[1]
+
+        created = False
+
+        def creator():
+            nonlocal created
+            created = True
+            return self.create(app)
+
+        obj = app.cache.get_or_create(key=self.cache_key, creator=creator)
+
+        # if the value was just created, it is bound to the current session,
+        # we only ever keep the detached values read from redis in memory
+        value = app.cache.get(self.cache_key) if created else obj
+
+        if value is not NO_VALUE:
+            local.set(key, version, value)
+
+        return obj
+
     def merge(self, session, obj):
         """ Merges the given obj into the given session, *if* this is possible.
 
@@ -186,19 +371,15 @@ class OrmCacheDescriptor(object):
             return self.merge(session, app.request_cache[self.cache_key])
 
         else:
-            obj = app.cache.get_or_create(
-                key=self.cache_key,
-                creator=lambda: self.create(app)
-            )
+            obj = self.get_or_create(app)
 
         # named tuples
         if isinstance(obj, tuple) and hasattr(obj.__class__, '_make'):
             obj = obj._make(self.merge(session, o) for o in obj)
 
-        # lists (we can save some memory here)
+        # lists (the value may be held in memory, so we must not change it)
         elif isinstance(obj, list):
-            for ix, o in enumerate(obj):
-                obj[ix] = self.merge(session, o)
+            obj = [self.merge(session, o) for o in obj]
 
         # generic iterables
         elif isinstance(obj, (tuple, set)):
@@ -4,6 +4,7 @@ from onegov.core.orm.mixins.content import data_property
 from onegov.core.orm.mixins.content import dict_property
 from onegov.core.orm.mixins.content import meta_property
 from onegov.core.orm.mixins.publication import UTCPublicationMixin
+from onegov.core.orm.mixins.text_search import TextSearchMixin
 from onegov.core.orm.mixins.timestamp import TimestampMixin
 
 
@@ -13,6 +14,7 @@ __all__ = [
     'data_property',
     'dict_property',
     'meta_property',
+    'TextSearchMixin',
     'TimestampMixin',
     'UTCPublicationMixin',
 ]
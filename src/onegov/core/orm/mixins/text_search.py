@@ -0,0 +1,117 @@
+from sqlalchemy import Column
+from sqlalchemy import Computed
+from sqlalchemy import func
+from sqlalchemy import Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+
+
+#: The text search configurations used for the locales
+TEXT_SEARCH_LANGUAGES = {
+    'de_CH': 'german',
+    'fr_CH': 'french',
+    'it_CH': 'italian',
+    'rm_CH': 'english'
+}
+
+
+def text_search_language(locale):
+    """ Returns the text search configuration of the given locale, english
+    if the locale is unknown.
+
+    """
+    return TEXT_SEARCH_LANGUAGES.get(locale, 'english')
+
+
+class TextSearchMixin(object):
+    """ Stores the text search vectors of a model in generated columns, one
+    per searchable text and locale, each with a GIN index.
+
+    Computing ``to_tsvector`` in the query parses the text of every row on
+    every search and Postgres cannot use an index. With the stored vectors,
+    the search becomes an index lookup::
+
+        class Document(Base, TextSearchMixin):
+            __tablename__ = 'documents'
+
+            text_search_expressions = {
+                'title': "coalesce(title, '')"
+            }
+
+        query.filter(Document.match_text('title', 'my:*', 'de_CH'))
+
+    The vectors are kept up to date by Postgres (``GENERATED ALWAYS AS ...
+    STORED``, requires Postgres 12). Existing tables get their columns with
+    :meth:`onegov.core.upgrade.UpgradeContext.add_text_search_columns`.
+
+    """
+
+    #: The searchable texts by name, as SQL expressions. ``{locale}`` is
+    #: replaced by the locale of the vector.
+    text_search_expressions = {}
+
+    #: The locales for which vectors are stored
+    text_search_locales = tuple(TEXT_SEARCH_LANGUAGES)
+
+    def __init_subclass__(cls, **kwargs):
+        # the columns are added before the declarative class is set up
+        super().__init_subclass__(**kwargs)
+
+        if '__tablename__' not in cls.__dict__:
+            return
+
+        for name, expression in cls.text_search_expressions.items():
+            for locale in cls.text_search_locales:
+                language = text_search_language(locale)
+                column_name = cls.text_search_column_name(name, locale)
+                column = Column(
+                    column_name,
+                    TSVECTOR,
+                    Computed(
+                        f"to_tsvector('{language}'::regconfig, "
+                        f"{expression.format(locale=locale)})",
+                        persisted=True
+                    )
+                )
+                Index(
+                    f'ix_{cls.__tablename__}_{column_name}',
+                    column,
+                    postgresql_using='gin'
+                )
+                setattr(cls, column_name, deferred(column))
+
+    @staticmethod
+    def text_search_column_name(name, locale):
+        return f'{name}_tsvector_{locale}'
+
+    @classmethod
+    def text_search_vector(cls, name, locale):
+        """ Returns the stored vector of the given text and locale or None.
+
+        """
+        if name not in cls.text_search_expressions:
+            return None
+        if locale not in cls.text_search_locales:
+            return None
+        return getattr(cls, cls.text_search_column_name(name, locale))
+
+    @classmethod
+    def text_search_columns(cls):
+        """ Returns the columns of all stored vectors. """
+        return [
+            cls.text_search_vector(name, locale).property.columns[0]
+            for name in cls.text_search_expressions
+            for locale in cls.text_search_locales
+        ]
+
+    @classmethod
+    def match_text(cls, name, term, locale):
+        """ Returns a filter matching the given text with the given
+        ``to_tsquery`` term in the given locale.
+
+        """
+        vector = cls.text_search_vector(name, locale)
+        assert vector is not None, f'{name} is not searchable in {locale}'
+
+        language = text_search_language(locale)
+        return vector.op('@@')(func.to_tsquery(language, term))
@@ -23,6 +23,10 @@ from sqlalchemy_utils.aggregates import manager as aggregates_manager
 # issues that we've been seeing on some servers.
 CONNECTION_LIFETIME = 60 * 60
 
+# matches the statements sent for savepoints
+SAVEPOINT_STATEMENT = re.compile(
+    r'^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\s', re.I)
+
 
 class ForceFetchQueryClass(Query):
     """ Alters the buitlin query class, ensuring that the delete query always
@@ -51,6 +55,134 @@ def query_schemas(connection, namespace=None):
             yield schema
 
 
+def apply_connection_setting(connection, cursor, name, value, statement):
+    """ Runs the given statement on the cursor, unless the setting with the
+    given name already has the given value on the underlying connection.
+
+    The applied values are tracked in the info dictionary of the DBAPI
+    connection, which lives as long as the connection itself. This saves us
+    from running the same ``SET`` statements before each and every query.
+
+    Values set during a transaction are kept separately until the
+    transaction is committed (see :func:`settle_connection_settings`), with
+    one level per open savepoint (see :func:`begin_savepoint_settings`).
+
+    """
+    info = connection.info
+
+    # the connection is only used again after a successful commit
+    settle_connection_settings(info)
+
+    if current_connection_setting(info, name) == value:
+        return
+
+    cursor.execute(statement, (value, ))
+
+    pending = info.setdefault('pending_settings', [])
+
+    if not pending:
+        pending.append({})
+
+    pending[-1][name] = value
+
+
+def is_savepoint_statement(statement):
+    """ Returns True if the given statement creates, releases or rolls back
+    a savepoint. No settings are applied before these statements, as the
+    savepoint events have already been sent at that point.
+
+    """
+    return SAVEPOINT_STATEMENT.match(statement) is not None
+
+
+def current_connection_setting(info, name):
+    """ Returns the value of the given setting, including the values set
+    during the current transaction.
+
+    """
+    for settings in reversed(info.get('pending_settings', ())):
+        if name in settings:
+            return settings[name]
+
+    return info.get('settings', {}).get(name)
+
+
+def commit_connection_settings(info):
+    """ Keeps the settings applied during the current transaction until the
+    outcome of the commit is known. To be called when the transaction is
+    committed, before ``COMMIT`` is run.
+
+    """
+    pending = info.pop('pending_settings', None)
+
+    for settings in pending or ():
+        info.setdefault('committed_settings', {}).update(settings)
+
+
+def settle_connection_settings(info):
+    """ Marks the settings of the last committed transaction as permanent.
+    To be called once the commit has succeeded, that is once the connection
+    is used again (or returned to the pool) without being rolled back.
+
+    """
+    committed = info.pop('committed_settings', None)
+
+    if committed:
+        info.setdefault('settings', {}).update(committed)
+
+
+def discard_connection_settings(info):
+    """ Forgets about the settings applied during the current transaction. To
+    be called once the transaction is rolled back, as postgres reverts them.
+
+    A failed commit is always followed by a rollback, so the settings of
+    the failed commit are forgotten as well.
+
+    """
+    info.pop('pending_settings', None)
+    info.pop('committed_settings', None)
+
+
+def begin_savepoint_settings(info):
+    """ Keeps the settings applied after a savepoint separately, so they may
+    be discarded on their own. To be called when a savepoint is created.
+
+    Savepoints are strictly nested, the last level therefore always belongs
+    to the innermost savepoint.
+
+    """
+    pending = info.setdefault('pending_settings', [])
+
+    if not pending:
+        pending.append({})
+
+    pending.append({})
+
+
+def release_savepoint_settings(info):
+    """ Merges the settings applied after the innermost savepoint into the
+    enclosing level. To be called when a savepoint is released.
+
+    """
+    pending = info.get('pending_settings', ())
+
+    if len(pending) > 1:
+        released = pending.pop()
+        pending[-1].update(released)
+
+
+def rollback_savepoint_settings(info):
+    """ Forgets about the settings applied after the innermost savepoint,
+    postgres keeps the ones applied before. To be called when a savepoint is
+    rolled back.
+
+    """
+    pending = info.get('pending_settings', ())
+
+    if len(pending) > 1:
+        pending.pop()
+
+
 class SessionManager(object):
     """ Holds sessions and creates schemas before binding sessions to schemas.
 
@@ -265,12 +397,15 @@ class SessionManager(object):
         """
 
         @event.listens_for(engine, "before_cursor_execute")
-        def activate_schema(connection, cursor, *args, **kwargs):
+        def activate_schema(connection, cursor, statement, *args, **kwargs):
             """ Share the 'info' dictionary of Session with Connection
             objects.
 
             """
 
+            if is_savepoint_statement(statement):
+                return
+
             # execution options have priority!
             if 'schema' in connection._execution_options:
                 schema = connection._execution_options['schema']
@@ -281,17 +416,72 @@ class SessionManager(object):
                     schema = None
 
             if schema is not None:
-                cursor.execute("SET search_path TO %s, extensions", (schema, ))
+                apply_connection_setting(
+                    connection, cursor, 'search_path', schema,
+                    "SET search_path TO %s, extensions"
+                )
 
         @event.listens_for(engine, "before_cursor_execute")
-        def limit_session_lifetime(connection, cursor, *args, **kwargs):
+        def limit_session_lifetime(connection, cursor, statement, *args,
+                                   **kwargs):
             """ Kills idle sessions after a while, freeing up memory. """
 
-            cursor.execute(
-                "SET SESSION idle_in_transaction_session_timeout = %s",
-                (f'{CONNECTION_LIFETIME}s', )
+            if is_savepoint_statement(statement):
+                return
+
+            apply_connection_setting(
+                connection, cursor, 'idle_in_transaction_session_timeout',
+                f'{CONNECTION_LIFETIME}s',
+                "SET SESSION idle_in_transaction_session_timeout = %s"
             )
 
+        # settings changed with SET are reverted by postgres if the
+        # transaction in which they were changed is rolled back, so we
+        # only consider them applied once the transaction is committed
+        #
+        # the commit events are sent before the COMMIT is run, the settings
+        # are therefore only settled once the connection is used again, or
+        # returned to the pool, without having been rolled back (a failed
+        # commit is always rolled back)
+        @event.listens_for(engine, "commit")
+        def on_commit(connection):
+            commit_connection_settings(connection.info)
+
+        @event.listens_for(engine, "commit_twophase")
+        def on_commit_twophase(connection, xid, is_prepared):
+            commit_connection_settings(connection.info)
+
+        @event.listens_for(engine, "begin")
+        def on_begin(connection):
+            settle_connection_settings(connection.info)
+
+        @event.listens_for(engine, "rollback")
+        def on_rollback(connection):
+            discard_connection_settings(connection.info)
+
+        @event.listens_for(engine, "savepoint")
+        def on_savepoint(connection, name):
+            begin_savepoint_settings(connection.info)
+
+        @event.listens_for(engine, "release_savepoint")
+        def on_release_savepoint(connection, name, context):
+            release_savepoint_settings(connection.info)
+
+        @event.listens_for(engine, "rollback_savepoint")
+        def on_rollback_savepoint(connection, name, context):
+            rollback_savepoint_settings(connection.info)
+
+        @event.listens_for(engine, "rollback_twophase")
+        def on_rollback_twophase(connection, xid, is_prepared):
+            discard_connection_settings(connection.info)
+
+        @event.listens_for(engine, "reset")
+        def on_reset(dbapi_connection, connection_record):
+            # connections returned to the pool are rolled back, which only
+            # reverts the settings of the transaction still in progress
+            settle_connection_settings(connection_record.info)
+            discard_connection_settings(connection_record.info)
+
     def register_session(self, session):
         """ Takes the given session and registers it with zope.sqlalchemy and
         various orm events.
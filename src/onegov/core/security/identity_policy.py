@@ -27,6 +27,11 @@ class IdentityPolicy(object):
     def forget(self, response, request):
         request.browser_session.flush()
 
+        # sessions created before the cache kept an index of its keys are
+        # not completely flushed, so we make sure the identity is gone
+        for key in self.required_keys:
+            del request.browser_session[key]
+
 
 @Framework.identity_policy()
 def identity_policy():
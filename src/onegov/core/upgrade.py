@@ -417,6 +417,28 @@ class UpgradeContext(object):
         inspector = Inspector(self.operations_connection)
         return table in inspector.get_table_names(schema=self.schema)
 
+    def add_text_search_columns(self, model):
+        """ Adds the missing text search vector columns of the given model
+        (see :class:`onegov.core.orm.mixins.TextSearchMixin`) together with
+        their GIN indexes.
+
+        Postgres computes the vectors of the existing rows while adding the
+        columns, which rewrites the table.
+
+        """
+        table = model.__tablename__
+        for column in model.text_search_columns():
+            if self.has_column(table, column.name):
+                continue
+
+            self.operations.add_column(table, column.copy())
+            for index in column.table.indexes:
+                if list(index.columns) == [column]:
+                    self.operations.create_index(
+                        index.name, table, [column.name],
+                        postgresql_using='gin'
+                    )
+
     def models(self, table):
         def has_matching_tablename(model):
             if not hasattr(model, '__tablename__'):
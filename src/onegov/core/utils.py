@@ -14,6 +14,7 @@ import os.path
 import re
 import shutil
 import sqlalchemy
+import transaction
 import urllib.request
 
 from collections.abc import Iterable
@@ -993,3 +994,27 @@ def safe_move(src, dst):
             os.unlink(src)
         else:
             raise
+
+
+def stream_after_commit(request, chunks):
+    """ Streams the given chunks, ending the transaction they started.
+
+    Streamed responses are consumed after the transaction of the request
+    has been committed, the queries of the chunks therefore run in a new
+    transaction, which is never committed.
+
+    The connection of the new transaction might have been used by another
+    application in the meantime. The session of the request is therefore
+    bound to the schema of the application again, before the first chunk
+    is generated.
+
+    """
+
+    try:
+        app = request.app
+        app.session_manager.set_current_schema(app.schema)
+        app.session_manager.bind_session(request.session)
+
+        yield from chunks
+    finally:
+        transaction.abort()
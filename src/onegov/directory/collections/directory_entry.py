@@ -1,14 +1,13 @@
-from itertools import groupby
-from onegov.core.collection import GenericCollection, Pagination
+from onegov.core.collection import GenericCollection, KeysetPagination
 from onegov.core.utils import toggle
 from onegov.directory.models import DirectoryEntry
 from onegov.form import as_internal_id
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, func, or_
 from sqlalchemy.orm import object_session
 from sqlalchemy.dialects.postgresql import array
 
 
-class DirectoryEntryCollection(GenericCollection, Pagination):
+class DirectoryEntryCollection(GenericCollection, KeysetPagination):
     """ Provides a view on a directory's entries.
 
     The directory itself might be a natural place for lots of these methods
@@ -18,7 +17,7 @@ class DirectoryEntryCollection(GenericCollection, Pagination):
     """
 
     def __init__(self, directory, type='*', keywords=None, page=0,
-                 searchwidget=None):
+                 searchwidget=None, after=None):
         super().__init__(object_session(directory))
 
         self.type = type
@@ -26,6 +25,7 @@ class DirectoryEntryCollection(GenericCollection, Pagination):
         self.keywords = keywords or {}
         self.page = page
         self.searchwidget = searchwidget
+        self.after = after
 
     def __eq__(self, other):
         return self.type == other.type and self.page == other.page
@@ -41,6 +41,17 @@ class DirectoryEntryCollection(GenericCollection, Pagination):
     def search_query(self):
         return self.searchwidget and self.searchwidget.search_query
 
+    @property
+    def keyset(self):
+        # searches order the entries by relevance
+        if self.search_query:
+            return None
+
+        cls = self.model_class
+        if self.directory.configuration.direction == 'desc':
+            return (desc(cls.order), desc(cls.id))
+        return (cls.order, cls.id)
+
     @property
     def page_index(self):
         return self.page
@@ -60,33 +71,84 @@ class DirectoryEntryCollection(GenericCollection, Pagination):
         cls = self.model_class
 
         query = super().query().filter_by(directory_id=self.directory.id)
-        keywords = self.valid_keywords(self.keywords)
-
-        def keyword_group(value):
-            return value.split(':')[0]
-
-        values = [
-            ':'.join((keyword, value))
-            for keyword in keywords
-            for value in keywords[keyword]
-        ]
-        values.sort(key=keyword_group)
 
         query = query.filter(and_(
-            cls._keywords.has_any(array(group_values))
-            for group, group_values in groupby(values, key=keyword_group)
+            cls._keywords.has_any(array(values))
+            for values in self.keyword_values().values()
         ))
 
         if self.directory.configuration.direction == 'desc':
-            query = query.order_by(desc(cls.order))
+            query = query.order_by(desc(cls.order), desc(cls.id))
         else:
-            query = query.order_by(cls.order)
+            query = query.order_by(cls.order, cls.id)
 
         if self.searchwidget:
             query = self.searchwidget.adapt(query)
 
         return query
 
+    def keyword_values(self):
+        """ Returns the keywords of the selected filters ('keyword:value')
+        by keyword.
+
+        """
+        return {
+            keyword: [':'.join((keyword, value)) for value in values]
+            for keyword, values in self.valid_keywords(self.keywords).items()
+            if values
+        }
+
+    def keyword_counts(self, query=None):
+        """ Returns the number of entries per keyword value, for all keywords
+        of the directory, using a single aggregate query::
+
+            {'category': {'Consultant': 3, 'Employee': 5}}
+
+        The count of a value is the number of entries with this value, which
+        match the selected filters of all other keywords (but not the
+        selected filters of the same keyword). The entries of the given query
+        are counted, by default the entries of the directory.
+
+        """
+        cls = self.model_class
+
+        if query is None:
+            query = self.without_keywords().query()
+
+        # for each selected keyword, the entries matching its filter
+        selected = self.keyword_values()
+        matches = [
+            cls._keywords.has_any(array(values)).label(f'match_{ix}')
+            for ix, values in enumerate(selected.values())
+        ]
+
+        entries = query.order_by(None).with_entities(
+            func.skeys(cls._keywords).label('keyword'),
+            *matches
+        ).subquery()
+
+        keyword = func.split_part(entries.c.keyword, ':', 1)
+
+        counts = self.session.query(entries.c.keyword, func.count())
+        counts = counts.filter(and_(
+            or_(entries.c[f'match_{ix}'], keyword == selected_keyword)
+            for ix, selected_keyword in enumerate(selected)
+        ))
+        counts = counts.group_by(entries.c.keyword)
+
+        keywords = {
+            as_internal_id(k)
+            for k in self.directory.configuration.keywords or tuple()
+        }
+
+        result = {}
+        for value, count in counts:
+            field_id, value = value.split(':', 1)
+            if field_id in keywords:
+                result.setdefault(field_id, {})[value] = count
+
+        return result
+
     def valid_keywords(self, parameters):
         return {
             as_internal_id(k): v for k, v in parameters.items()
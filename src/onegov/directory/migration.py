@@ -3,8 +3,10 @@ from onegov.form import as_internal_id
 from onegov.form import flatten_fieldsets
 from onegov.form import parse_form
 from onegov.form import parse_formcode
-from sqlalchemy.orm import object_session, joinedload, undefer
+from sqlalchemy.orm import object_session, joinedload, selectinload
+from sqlalchemy.orm import undefer
 from sqlalchemy.orm.attributes import get_history
+from time import perf_counter
 
 
 class DirectoryMigration(object):
@@ -43,15 +45,15 @@ class DirectoryMigration(object):
 
     @property
     def possible(self):
-        if not self.directory.entries:
-            return True
-
         if not self.changes:
             return True
 
         if not self.changes.changed_fields:
             return True
 
+        if not self.has_entries:
+            return True
+
         for changed in self.changes.changed_fields:
             old = self.changes.old[changed]
             new = self.changes.new[changed]
@@ -70,6 +72,19 @@ class DirectoryMigration(object):
 
         return False
 
+    @property
+    def has_entries(self):
+        session = object_session(self.directory)
+
+        if not session:
+            return bool(self.directory.entries)
+
+        # avoids loading all entries of the directory
+        query = session.query(DirectoryEntry.id)
+        query = query.filter_by(directory_id=self.directory.id)
+
+        return session.query(query.exists()).scalar()
+
     @property
     def entries(self):
         session = object_session(self.directory)
@@ -99,6 +114,125 @@ class DirectoryMigration(object):
         for entry in self.entries:
             self.migrate_entry(entry)
 
+    def execute_in_batches(self, batch_size=100, progress=None, limit=None):
+        """ Runs the migration like :meth:`execute`, but outside of a flush.
+
+        The entries are loaded, migrated, flushed and expunged in batches,
+        so only a single batch of entries is held in memory. This is meant
+        for large directories, migrated in the background (e.g. from the
+        command line).
+
+        :progress:
+            Called with the number of entries of each migrated batch.
+
+        :limit:
+            The maximum number of entries to migrate.
+
+        Returns the number of migrated entries.
+
+        """
+        assert self.possible
+
+        session = object_session(self.directory)
+
+        # the entries are migrated below, not by the observer of the
+        # directory during the flush
+        self.migrate_directory()
+        self.directory.migrate_entries_on_flush = False
+
+        try:
+            session.flush()
+        finally:
+            del self.directory.migrate_entries_on_flush
+
+        # the loaded entries of the directory would be kept in memory
+        session.expire(self.directory, ('entries', ))
+
+        migrated = 0
+
+        for loaded in self.entry_batches(batch_size):
+            batch = loaded
+
+            if limit is not None:
+                batch = batch[:limit - migrated]
+
+            for entry in batch:
+                self.update_entry(entry)
+
+            session.flush()
+
+            for entry in loaded:
+                session.expunge(entry)
+
+            migrated += len(batch)
+
+            if progress is not None:
+                progress(len(batch))
+
+            if limit is not None and migrated >= limit:
+                break
+
+        return migrated
+
+    def estimate(self, sample_size=100):
+        """ Migrates a sample of the entries and estimates the seconds needed
+        to migrate all entries. The changes are rolled back.
+
+        Returns the number of entries and the estimated seconds.
+
+        """
+        session = object_session(self.directory)
+
+        query = session.query(DirectoryEntry.id)
+        query = query.filter_by(directory_id=self.directory.id)
+        count = query.count()
+
+        savepoint = session.begin_nested()
+
+        try:
+            start = perf_counter()
+            migrated = self.execute_in_batches(
+                batch_size=sample_size, limit=sample_size)
+            duration = perf_counter() - start
+        finally:
+            savepoint.rollback()
+
+        if not migrated:
+            return count, 0.0
+
+        return count, duration / migrated * count
+
+    def entry_batches(self, batch_size=100):
+        """ Yields the entries of the directory in batches, ordered by id.
+
+        Each batch is loaded with its own query (keyset pagination), so the
+        entries of previous batches may be expunged from the session.
+
+        """
+        session = object_session(self.directory)
+
+        query = session.query(DirectoryEntry)
+        query = query.filter_by(directory_id=self.directory.id)
+        query = query.options(selectinload(DirectoryEntry.files))
+        query = query.options(undefer(DirectoryEntry.content))
+        query = query.order_by(DirectoryEntry.id)
+
+        last_id = None
+
+        while True:
+            batch = query
+
+            if last_id is not None:
+                batch = batch.filter(DirectoryEntry.id > last_id)
+
+            batch = batch.limit(batch_size).all()
+
+            if not batch:
+                break
+
+            last_id = batch[-1].id
+            yield batch
+
     def migrate_directory(self):
         self.directory.structure = self.new_structure
         self.directory.configuration = self.new_configuration
@@ -114,11 +248,16 @@ class DirectoryMigration(object):
         since the values are already migrated and migration will
         fail when removing fieldsets.
         """
-        update = self.changes and True or False
         session = object_session(entry)
 
         if not session._flushing:
             return
+
+        self.update_entry(entry)
+
+    def update_entry(self, entry):
+        update = self.changes and True or False
+
         self.migrate_values(entry.values)
         self.directory.update(entry, entry.values, force_update=update)
 
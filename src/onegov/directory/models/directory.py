@@ -15,6 +15,7 @@ from onegov.directory.types import DirectoryConfigurationStorage
 from onegov.file import File
 from onegov.file.utils import as_fileintent
 from onegov.form import flatten_fieldsets, parse_formcode, parse_form
+from onegov.form.parser.core import FORMCODE_CACHE_SIZE
 from onegov.search import SearchableContent
 from sqlalchemy import Column
 from sqlalchemy import func, exists, and_
@@ -268,9 +269,14 @@ class Directory(Base, ContentMixin, TimestampMixin, SearchableContent):
     def title_observer(self, title):
         self.order = normalize_for_url(title)
 
+    #: Disabled while the entries are migrated in batches, see
+    #: :meth:`onegov.directory.migration.DirectoryMigration.execute_in_batches`
+    migrate_entries_on_flush = True
+
     @observes('structure', 'configuration')
     def structure_configuration_observer(self, structure, configuration):
-        self.migration(structure, configuration).execute()
+        if self.migrate_entries_on_flush:
+            self.migration(structure, configuration).execute()
 
     def entry_with_name_exists(self, name):
         return object_session(self).query(exists().where(and_(
@@ -289,9 +295,8 @@ class Directory(Base, ContentMixin, TimestampMixin, SearchableContent):
     def fields(self):
         return self.fields_from_structure(self.structure)
 
-    @lru_cache(maxsize=1)
     def fields_from_structure(self, structure):
-        return tuple(flatten_fieldsets(parse_formcode(structure)))
+        return fields_from_structure(structure)
 
     @property
     def basic_fields(self):
@@ -313,54 +318,98 @@ class Directory(Base, ContentMixin, TimestampMixin, SearchableContent):
     def form_class(self):
         return self.form_class_from_structure(self.structure)
 
-    @lru_cache(maxsize=1)
+    @property
+    def shared_form_class(self):
+        """ The form class shared by all directories with the same structure.
+        Unlike :attr:`form_class`, it is not bound to this directory, the
+        forms update the directory of the entry they populate.
+
+        """
+        return directory_entry_form_class(self.structure)
+
     def form_obj_from_structure(self, structure):
         return self.form_class_from_structure(structure)()
 
-    @lru_cache(maxsize=1)
     def form_class_from_structure(self, structure):
-        directory = self
+        # only a thin subclass bound to this directory is created, it is
+        # kept on the instance so it lives as long as the directory
+        bound = self.__dict__.setdefault('_bound_form_classes', {})
+
+        if structure not in bound:
+            form_class = directory_entry_form_class(structure)
+            bound[structure] = type(
+                form_class.__name__, (form_class, ), {'_directory': self})
+
+        return bound[structure]
+
+
+@lru_cache(maxsize=FORMCODE_CACHE_SIZE)
+def fields_from_structure(structure):
+    """ Returns the fields of the given directory structure. The fields are
+    shared by all directories with the same structure.
+
+    """
+
+    return tuple(flatten_fieldsets(parse_formcode(structure)))
+
 
-        class DirectoryEntryForm(parse_form(self.structure)):
+@lru_cache(maxsize=FORMCODE_CACHE_SIZE)
+def directory_entry_form_class(structure):
+    """ Returns the form class of the entries of the given directory
+    structure. The class is shared by all directories with the same
+    structure, see :meth:`Directory.form_class_from_structure` for a class
+    bound to a directory.
+
+    """
 
-            @property
-            def mixed_data(self):
-                # use the field data for non-file fields
-                data = {
-                    k: v for k, v in self.data.items() if k not in {
-                        f.id for f in directory.file_fields
-                    }
+    fields = fields_from_structure(structure)
+    file_fields = tuple(f for f in fields if f.type == 'fileinput')
+
+    class DirectoryEntryForm(parse_form(structure)):
+
+        #: The directory updated when populating an entry, if not given the
+        #: directory of the entry is updated (not a field, as it's private)
+        _directory = None
+
+        @property
+        def mixed_data(self):
+            # use the field data for non-file fields
+            data = {
+                k: v for k, v in self.data.items() if k not in {
+                    f.id for f in file_fields
                 }
+            }
 
-                # use the field objects for file-fields
-                for field in directory.file_fields:
-                    data[field.id] = self[field.id]
+            # use the field objects for file-fields
+            for field in file_fields:
+                data[field.id] = self[field.id]
 
-                return data
+            return data
 
-            def populate_obj(self, obj, directory_update=True):
-                exclude = {k for k, v in inspect.getmembers(
-                    obj.__class__,
-                    lambda v: isinstance(v, InstrumentedAttribute)
-                )}
+        def populate_obj(self, obj, directory_update=True):
+            exclude = {k for k, v in inspect.getmembers(
+                obj.__class__,
+                lambda v: isinstance(v, InstrumentedAttribute)
+            )}
 
-                include = ('publication_start', 'publication_end')
-                exclude = {k for k in exclude if k not in include}
+            include = ('publication_start', 'publication_end')
+            exclude = {k for k in exclude if k not in include}
 
-                super().populate_obj(obj, exclude=exclude)
+            super().populate_obj(obj, exclude=exclude)
 
-                if directory_update:
-                    directory.update(obj, self.mixed_data)
+            if directory_update:
+                directory = self._directory or obj.directory
+                directory.update(obj, self.mixed_data)
 
-            def process_obj(self, obj):
-                super().process_obj(obj)
+        def process_obj(self, obj):
+            super().process_obj(obj)
 
-                for field in directory.fields:
-                    form_field = getattr(self, field.id)
+            for field in fields:
+                form_field = getattr(self, field.id)
 
-                    if form_field is None:
-                        continue
+                if form_field is None:
+                    continue
 
-                    form_field.data = obj.values.get(field.id)
+                form_field.data = obj.values.get(field.id)
 
-        return DirectoryEntryForm
+    return DirectoryEntryForm
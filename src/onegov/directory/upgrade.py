@@ -54,3 +54,12 @@ def add_publication_dates_to_dir_entries(context):
             'directory_entries',
             Column('publication_end', UTCDateTime, nullable=True)
         )
+
+
+@upgrade_task('Add keywords index to directory entries')
+def add_keywords_index_to_directory_entries(context):
+    # the keyword filters and counts rely on the inverted index
+    context.session.execute("""
+        CREATE INDEX IF NOT EXISTS inverted_keywords
+        ON directory_entries USING gin (keywords)
+    """)
@@ -5,6 +5,7 @@ from datetime import datetime
 from dectate import directive
 from more.content_security import SELF
 from more.content_security.core import content_security_policy_tween_factory
+from onegov.ballot.models.summary import register_summary_listeners
 from onegov.core import Framework
 from onegov.core import utils
 from onegov.core.datamanager import FileDataManager
@@ -18,10 +19,16 @@ from onegov.election_day.directives import ManageHtmlAction
 from onegov.election_day.directives import PdfFileViewAction
 from onegov.election_day.directives import ScreenWidgetAction
 from onegov.election_day.directives import SvgFileViewAction
+from onegov.election_day.directives import XlsxFileAction
 from onegov.election_day.models import Principal
 from onegov.election_day.theme import ElectionDayTheme
+from onegov.election_day.utils.pages_cache import cache_streamed_response
+from onegov.election_day.utils.pages_cache import invalidation_time
+from onegov.election_day.utils.pages_cache import record_page_metrics
 from onegov.form import FormApp
 from onegov.user import UserApp
+from time import perf_counter
+from time import time
 
 
 class ElectionDayApp(Framework, FormApp, UserApp):
@@ -38,6 +45,12 @@ class ElectionDayApp(Framework, FormApp, UserApp):
     pdf_file = directive(PdfFileViewAction)
     svg_file = directive(SvgFileViewAction)
     screen_widget = directive(ScreenWidgetAction)
+    xlsx_file = directive(XlsxFileAction)
+
+    def configure_summaries(self, **cfg):
+        # runs after configure_dsn, which sets up the session manager
+        if self.dsn:
+            register_summary_listeners(self.session_manager.session_factory)
 
     @property
     def principal(self):
@@ -119,11 +132,28 @@ class ElectionDayApp(Framework, FormApp, UserApp):
 
     @property
     def pages_cache(self):
-        """ A cache for pages. """
+        """ A cache for pages.
+
+        Expired pages are kept for another expiration period and served while
+        a single process (over all workers) regenerates the page.
+
+        """
         expiration_time = 300
         if self.principal and hasattr(self.principal, 'cache_expiration_time'):
             expiration_time = self.principal.cache_expiration_time
-        return self.get_cache('pages', expiration_time)
+        return self.get_cache(
+            'pages', expiration_time,
+            stale_time=expiration_time,
+            distributed_lock=True
+        )
+
+    @property
+    def charts_cache(self):
+        """ A cache for the charts rendered by the d3-renderer, keyed by
+        their content hash.
+
+        """
+        return self.get_cache('charts', 24 * 60 * 60, compression='zlib')
 
 
 @ElectionDayApp.static_directory()
@@ -220,6 +250,11 @@ def micro_cache_anonymous_pages_tween_factory(app, handler):
 
         That is to say, we observe the Cache-Control header.
 
+        Uploading results marks the pages of the affected items as stale (see
+        :mod:`onegov.election_day.utils.pages_cache`). Stale pages are
+        regenerated by the first request, concurrent requests get the stale
+        page in the meantime.
+
         """
 
         # no cache if the user is logged in
@@ -244,12 +279,49 @@ def micro_cache_anonymous_pages_tween_factory(app, handler):
             'hl' if 'headerless' in request.browser_session else 'hf'
         ))
 
-        return app.pages_cache.get_or_create(
+        # pages older than the last invalidation of their item expire
+        # immediately
+        cache = app.pages_cache
+        expiration_time = cache.expiration_time
+        invalidated = invalidation_time(app, request.path_info)
+        if invalidated:
+            expiration_time = max(
+                min(expiration_time, time() - invalidated), 0
+            )
+
+        regenerated = []
+
+        def create():
+            start = perf_counter()
+            response = handler(request)
+            regenerated.append(perf_counter() - start)
+            return response
+
+        # streamed responses (e.g. data downloads) cannot be pickled, they
+        # are cached once they have been sent completely (see below)
+        response = cache.get_or_create(
             key,
-            creator=lambda: handler(request),
-            should_cache_fn=lambda response: response.status_code == 200
+            creator=create,
+            expiration_time=expiration_time,
+            should_cache_fn=lambda response: (
+                response.status_code == 200
+                and isinstance(response.app_iter, list)
+            )
         )
 
+        record_page_metrics(
+            app, request.path_info, regenerated[0] if regenerated else None
+        )
+
+        if (
+            regenerated
+            and response.status_code == 200
+            and not isinstance(response.app_iter, list)
+        ):
+            cache_streamed_response(cache, key, response)
+
+        return response
+
     return micro_cache_anonymous_pages_tween
 
 
@@ -3,15 +3,19 @@
 import click
 import os
 
+from onegov.ballot import BallotSummary
+from onegov.ballot import ElectionSummary
 from onegov.core.cli import command_group
 from onegov.core.cli import pass_group_context
 from onegov.election_day.models import ArchivedResult, DataSource
 from onegov.election_day.utils import add_local_results
 from onegov.election_day.utils.d3_renderer import D3Renderer
+from onegov.election_day.utils.export_generator import ExportGenerator
 from onegov.election_day.utils.pdf_generator import PdfGenerator
 from onegov.election_day.utils.sms_processor import SmsQueueProcessor
 from onegov.election_day.utils.svg_generator import SvgGenerator
 from pathlib import Path
+from time import perf_counter
 
 
 cli = command_group()
@@ -108,11 +112,19 @@ def send_sms(group_context, username, password, originator):
 
 
 @cli.command('generate-media')
-def generate_media():
+@click.option('--workers', default=1, type=int,
+              help="Number of PDFs rendered at the same time")
+def generate_media(workers):
     """ Generates the PDF and/or SVGs for the selected instances. For example:
 
         onegov-election-day --select '/onegov_election_day/zg' generate-media
 
+    Rendering the PDFs is mostly spent waiting for the d3-renderer, so using
+    multiple workers speeds up the generation considerably:
+
+        onegov-election-day --select '/onegov_election_day/zg' generate-media
+            --workers 4
+
     """
 
     def generate(request, app):
@@ -131,13 +143,97 @@ def generate_media():
         else:
             renderer = D3Renderer(app)
             SvgGenerator(app, renderer).create_svgs()
-            PdfGenerator(app, renderer).create_pdfs()
+            PdfGenerator(app, renderer, workers).create_pdfs()
         finally:
             lockfile.unlink()
 
     return generate
 
 
+@cli.command('generate-exports')
+def generate_exports():
+    """ Precomputes the JSON, CSV and XLSX exports of the selected instances.
+    For example:
+
+        onegov-election-day --select '/onegov_election_day/zg' generate-exports
+
+    The views serve the precomputed exports instead of generating them on
+    every request, as long as they are up to date.
+
+    """
+
+    def generate(request, app):
+        if not app.principal:
+            return
+
+        lockfile = Path(os.path.join(
+            app.configuration.get('lockfile_path', ''),
+            '.lock-exports-{}'.format(app.schema)
+        ))
+
+        try:
+            lockfile.touch(exist_ok=False)
+        except FileExistsError:
+            return
+
+        try:
+            ExportGenerator(app).create_exports()
+        finally:
+            lockfile.unlink()
+
+    return generate
+
+
+@cli.command('check-summaries')
+@click.option('--fix', is_flag=True, default=False,
+              help="Recalculate the summaries if they are inconsistent")
+def check_summaries(fix):
+    """ Compares the stored aggregates of ballots and elections with the
+    aggregates calculated from the results. For example:
+
+        onegov-election-day --select '/onegov_election_day/*' check-summaries
+
+    Also reports the time needed to read the stored and the calculated
+    aggregates.
+
+    """
+
+    def check(request, app):
+        session = request.session
+
+        for summary in (BallotSummary, ElectionSummary):
+            start = perf_counter()
+            live = summary.live(session)
+            live_duration = perf_counter() - start
+
+            start = perf_counter()
+            stored = summary.stored(session)
+            stored_duration = perf_counter() - start
+
+            inconsistent = [
+                item_id for item_id, values in live.items()
+                if stored.get(item_id, summary.empty()) != values
+            ]
+
+            click.secho(
+                f'{app.schema}/{summary.__tablename__}: {len(live)} items, '
+                f'calculated in {live_duration:.3f}s, '
+                f'stored read in {stored_duration:.3f}s'
+            )
+
+            if inconsistent:
+                click.secho(
+                    f'{len(inconsistent)} inconsistent: '
+                    f'{", ".join(str(i) for i in inconsistent)}',
+                    fg='yellow'
+                )
+                if fix:
+                    summary.refresh(session)
+                    click.secho('Summaries recalculated', fg='green')
+
+    return check
+
+
 @cli.command('delete-associated')
 @click.option('--wabsti-token')
 @click.option('--delete-compound', help='Delete the compound if it exists')
@@ -18,7 +18,7 @@ from sqlalchemy import or_
 from sqlalchemy.sql.expression import case
 from time import mktime
 from time import strptime
-from onegov.core.collection import Pagination
+from onegov.core.collection import KeysetPagination
 
 
 def groupbydict(items, keyfunc, sortfunc=None):
@@ -267,7 +267,7 @@ class ArchivedResultCollection(object):
 
 
 class SearchableArchivedResultCollection(
-        ArchivedResultCollection, Pagination):
+        ArchivedResultCollection, KeysetPagination):
 
     def __init__(
             self,
@@ -280,7 +280,8 @@ class SearchableArchivedResultCollection(
             term=None,
             answers=None,
             locale='de_CH',
-            page=0
+            page=0,
+            after=None
     ):
         super().__init__(session, date_=date_)
         self.from_date = from_date
@@ -292,6 +293,7 @@ class SearchableArchivedResultCollection(
         self.locale = locale
         self.app_principal_domain = None
         self.page = page
+        self.after = after
 
     def __eq__(self, other):
         return self.page == other.page
@@ -374,13 +376,12 @@ class SearchableArchivedResultCollection(
         term = SearchableArchivedResultCollection.term_to_tsquery_string(
             self.term
         )
+        locale = self.locale
+        if locale not in ArchivedResult.text_search_locales:
+            locale = 'de_CH'
         return (
-            SearchableArchivedResultCollection.filter_text_by_locale(
-                ArchivedResult.shortcode, term, self.locale
-            ),
-            SearchableArchivedResultCollection.filter_text_by_locale(
-                ArchivedResult.title, term, self.locale
-            )
+            ArchivedResult.match_text('shortcode', term, locale),
+            ArchivedResult.match_text('title', term, locale)
         )
 
     def query(self):
@@ -431,19 +432,25 @@ class SearchableArchivedResultCollection(
             query = query.filter(or_(*self.term_filter))
 
         # order by date and type
+        query = query.order_by(*self.keyset)
+        return query
+
+    @property
+    def keyset(self):
         order = ('federation', 'canton', 'region', 'municipality')
         if self.app_principal_domain == 'municipality':
             order = ('municipality', 'federation', 'canton', 'region')
-        query = query.order_by(
+
+        return (
             ArchivedResult.date.desc(),
             case(
                 tuple(
                     (ArchivedResult.domain == opt, ind) for
                     ind, opt in enumerate(order, 1)
                 )
-            )
+            ),
+            ArchivedResult.id
         )
-        return query
 
     def reset_query_params(self):
         self.from_date = None
@@ -3,13 +3,18 @@ from morepath.directive import HtmlAction
 from morepath.directive import ViewAction
 from morepath.request import Response
 from onegov.core.csv import convert_list_of_dicts_to_csv
+from onegov.core.csv import convert_list_of_dicts_to_xlsx
+from onegov.core.csv import iter_list_of_dicts_as_csv
 from onegov.core.custom import json
 from onegov.core.directives import HtmlHandleFormAction
 from onegov.core.security import Private
 from onegov.core.security import Public
 from onegov.core.security import Secret
+from onegov.core.utils import stream_after_commit
 from onegov.election_day.forms import EmptyForm
+from textwrap import indent
 from webob.exc import HTTPAccepted
+from webob.static import FileIter
 
 
 class ManageHtmlAction(HtmlAction):
@@ -96,45 +101,135 @@ class PdfFileViewAction(ViewAction):
         )
 
 
-class JsonFileAction(ViewAction):
+def iter_json_list(rows, chunk_size=64 * 1024):
+    """ Yields the given rows as JSON list in chunks of roughly the given
+    size. The result is the same as dumping the list of rows with sorted
+    keys and an indentation of two.
 
-    """ View directive for viewing JSON data as file. """
+    """
 
-    def __init__(self, model, **kwargs):
-        kwargs['permission'] = kwargs.get('permission', Public)
-        kwargs['render'] = self.render
-        super().__init__(model, **kwargs)
+    chunk = []
+    size = 0
+    separator = '[\n'
 
-    @staticmethod
-    def render(content, request):
-        data = content.get('data', {})
-        name = content.get('name', 'data.json')
-        return Response(
-            json.dumps(data, sort_keys=True, indent=2).encode('utf-8'),
-            content_type='application/json',
-            content_disposition=f'inline; filename={name}.json')
+    for row in rows:
+        value = indent(json.dumps(row, sort_keys=True, indent=2), '  ')
+        chunk.append(separator)
+        chunk.append(value)
+        size += len(value)
+        separator = ',\n'
 
+        if size >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
 
-class CsvFileAction(ViewAction):
+    chunk.append('[]' if separator == '[\n' else '\n]')
+    yield ''.join(chunk)
 
-    """ View directive for viewing CSV data as file. """
+
+class ExportFileAction(ViewAction):
+
+    """ Base class for view directives serving data as file.
+
+    The views return the data (a list of dicts or an iterator of dicts), the
+    name of the file and optionally the path of a precomputed export in the
+    filestorage. If the precomputed export exists, it is served. Otherwise,
+    the data is converted - iterators are streamed.
+
+    """
+
+    content_type = None
+    extension = None
 
     def __init__(self, model, **kwargs):
         kwargs['permission'] = kwargs.get('permission', Public)
         kwargs['render'] = self.render
         super().__init__(model, **kwargs)
 
-    @staticmethod
-    def render(content, request):
+    def convert(self, data):
+        """ Returns the given list or dict as file content. """
+        raise NotImplementedError
+
+    def stream(self, rows):
+        """ Yields the given rows as file content in (encoded) chunks. """
+        yield self.convert(rows)
+
+    def render(self, content, request):
         data = content.get('data', {})
-        name = content.get('name', 'data.json')
+        path = content.get('path')
+        name = content.get('name', 'data')
+        options = {
+            'content_type': self.content_type,
+            'content_disposition': (
+                f'inline; filename={name}.{self.extension}'
+            )
+        }
+
+        filestorage = request.app.filestorage
+        if path and filestorage.exists(path):
+            return Response(
+                app_iter=FileIter(filestorage.open(path, 'rb')),
+                **options
+            )
+
+        if isinstance(data, (dict, list)):
+            return Response(self.convert(data), **options)
+
         return Response(
-            convert_list_of_dicts_to_csv(data),
-            content_type='text/csv',
-            content_disposition=f'inline; filename={name}.csv'
+            app_iter=stream_after_commit(request, self.stream(data)),
+            **options
         )
 
 
+class JsonFileAction(ExportFileAction):
+
+    """ View directive for viewing JSON data as file. """
+
+    content_type = 'application/json'
+    extension = 'json'
+
+    def convert(self, data):
+        return json.dumps(data, sort_keys=True, indent=2).encode('utf-8')
+
+    def stream(self, rows):
+        for chunk in iter_json_list(rows):
+            yield chunk.encode('utf-8')
+
+
+class CsvFileAction(ExportFileAction):
+
+    """ View directive for viewing CSV data as file. """
+
+    content_type = 'text/csv'
+    extension = 'csv'
+
+    def convert(self, data):
+        return convert_list_of_dicts_to_csv(data)
+
+    def stream(self, rows):
+        for chunk in iter_list_of_dicts_as_csv(rows):
+            yield chunk.encode('utf-8')
+
+
+class XlsxFileAction(ExportFileAction):
+
+    """ View directive for viewing XLSX data as file.
+
+    The rows are written one by one, but the file can only be sent once it
+    is complete.
+
+    """
+
+    content_type = (
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    extension = 'xlsx'
+
+    def convert(self, data):
+        return convert_list_of_dicts_to_xlsx(data)
+
+
 class ScreenWidgetRegistry(dict):
 
     def by_categories(self, categories):
@@ -1,5 +1,6 @@
 import re
 
+from onegov.ballot.models.summary import invalidate_summaries
 from onegov.core.csv import convert_excel_to_csv
 from onegov.core.csv import CSVFile
 from onegov.core.errors import AmbiguousColumnsError
@@ -229,3 +230,53 @@ def validate_list_id(line, col, treat_empty_as_default=True, default='0'):
     elif treat_empty_as_default:
         return default
     raise ValueError(_('Empty value: ${col}', mapping={'col': col}))
+
+
+# Database utils
+def bulk_insert(session, model, mappings, page_size=1000):
+    """ Inserts the given mappings (dictionaries keyed by the column names)
+    into the table of the given model.
+
+    Unlike ``session.bulk_insert_mappings``, which sends one INSERT per row,
+    this sends multi-row INSERTs of up to ``page_size`` rows. Consecutive
+    mappings with the same keys are inserted together, the order of the
+    mappings is kept (e.g. parent list connections before their children).
+    Keys which are not columns are ignored, as are None values (the
+    defaults of the columns are used instead, as with
+    ``bulk_insert_mappings``).
+
+    The statement level triggers on the result tables (see
+    :mod:`onegov.ballot.models.summary`) therefore run once per page instead
+    of once per row. The summaries read before are discarded.
+
+    Only the writing is done in bulk. The importers still validate their
+    files line by line, as the errors refer to the lines they occur on. The
+    values derived from the results (cast ballots, turnout, accounted votes,
+    ...) are not stored, they are evaluated by the database (as hybrid
+    properties and by the summary triggers).
+
+    """
+
+    table = model.__table__
+    insert = table.insert()
+
+    page = []
+    keys = None
+
+    for mapping in mappings:
+        mapping = {
+            key: value for key, value in mapping.items()
+            if key in table.c and value is not None
+        }
+
+        if page and (len(page) >= page_size or mapping.keys() != keys):
+            session.execute(insert.values(page))
+            page = []
+
+        keys = mapping.keys()
+        page.append(mapping)
+
+    if page:
+        session.execute(insert.values(page))
+
+    invalidate_summaries(session)
@@ -2,6 +2,7 @@ from onegov.ballot import Candidate
 from onegov.ballot import CandidateResult
 from onegov.ballot import ElectionResult
 from onegov.election_day import _
+from onegov.election_day.formats.common import bulk_insert
 from onegov.election_day.formats.common import EXPATS, validate_integer
 from onegov.election_day.formats.common import FileImportError
 from onegov.election_day.formats.common import load_csv
@@ -222,8 +223,8 @@ def import_election_internal_majorz(election, principal, file, mimetype):
     election.status = status
 
     session = object_session(election)
-    session.bulk_insert_mappings(Candidate, candidates.values())
-    session.bulk_insert_mappings(ElectionResult, results.values())
-    session.bulk_insert_mappings(CandidateResult, candidate_results)
+    bulk_insert(session, Candidate, candidates.values())
+    bulk_insert(session, ElectionResult, results.values())
+    bulk_insert(session, CandidateResult, candidate_results)
 
     return []
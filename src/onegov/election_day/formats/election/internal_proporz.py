@@ -6,6 +6,7 @@ from onegov.ballot import ListConnection
 from onegov.ballot import ListResult
 from onegov.ballot import PanachageResult
 from onegov.election_day import _
+from onegov.election_day.formats.common import bulk_insert
 from onegov.election_day.formats.common import EXPATS, validate_integer, \
     validate_list_id
 from onegov.election_day.formats.common import FileImportError
@@ -354,10 +355,10 @@ def import_election_internal_proporz(election, principal, file, mimetype):
     list_uids = {r['list_id']: r['id'] for r in lists.values()}
     session = object_session(election)
     # FIXME: Sub-Sublists are also possible
-    session.bulk_insert_mappings(ListConnection, connections.values())
-    session.bulk_insert_mappings(ListConnection, subconnections.values())
-    session.bulk_insert_mappings(List, lists.values())
-    session.bulk_insert_mappings(PanachageResult, (
+    bulk_insert(session, ListConnection, connections.values())
+    bulk_insert(session, ListConnection, subconnections.values())
+    bulk_insert(session, List, lists.values())
+    bulk_insert(session, PanachageResult, (
         dict(
             id=uuid4(),
             source=source,
@@ -367,13 +368,13 @@ def import_election_internal_proporz(election, principal, file, mimetype):
         for list_id in panachage
         for source, votes in panachage[list_id].items()
     ))
-    session.bulk_insert_mappings(Candidate, candidates.values())
-    session.bulk_insert_mappings(ElectionResult, results.values())
-    session.bulk_insert_mappings(ListResult, (
+    bulk_insert(session, Candidate, candidates.values())
+    bulk_insert(session, ElectionResult, results.values())
+    bulk_insert(session, ListResult, (
         dict(**list_result, election_result_id=result_uids[entity_id])
         for entity_id, values in list_results.items()
         for list_result in values.values()
     ))
-    session.bulk_insert_mappings(CandidateResult, candidate_results)
+    bulk_insert(session, CandidateResult, candidate_results)
 
     return []
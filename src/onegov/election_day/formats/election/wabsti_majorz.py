@@ -2,9 +2,11 @@ from onegov.ballot import Candidate
 from onegov.ballot import CandidateResult
 from onegov.ballot import ElectionResult
 from onegov.election_day import _
+from onegov.election_day.formats.common import bulk_insert
 from onegov.election_day.formats.common import EXPATS, validate_integer
 from onegov.election_day.formats.common import FileImportError
 from onegov.election_day.formats.common import load_csv
+from sqlalchemy.orm import object_session
 from uuid import uuid4
 
 from onegov.election_day.import_export.mappings import \
@@ -82,7 +84,7 @@ def parse_election_result(line, errors, entities, added_entities):
         else:
             added_entities.add(entity_id)
             entity = entities.get(entity_id, {})
-            return ElectionResult(
+            return dict(
                 id=uuid4(),
                 name=entity.get('name', ''),
                 district=entity.get('district', ''),
@@ -120,14 +122,14 @@ def parse_candidates(line, errors):
             if family_name in skip:
                 continue
             results.append((
-                Candidate(
+                dict(
                     id=uuid4(),
                     candidate_id=candidate_id,
                     family_name=family_name,
                     first_name=first_name,
                     elected=elected
                 ),
-                CandidateResult(
+                dict(
                     id=uuid4(),
                     votes=votes,
                 )
@@ -152,6 +154,7 @@ def import_election_wabsti_majorz(
     errors = []
     candidates = {}
     results = {}
+    candidate_results = {}
     added_entities = set()
     entities = principal.entities[election.date.year]
 
@@ -186,13 +189,15 @@ def import_election_wabsti_majorz(
             if result:
                 for candidate, c_result in parse_candidates(line, line_errors):
                     candidate = candidates.setdefault(
-                        candidate.candidate_id, candidate
+                        candidate['candidate_id'], candidate
                     )
-                    c_result.candidate_id = candidate.id
-                    result.candidate_results.append(c_result)
+                    c_result['candidate_id'] = candidate['id']
+                    c_result['election_result_id'] = result['id']
+                    candidate_results.setdefault(result['id'], [])
+                    candidate_results[result['id']].append(c_result)
 
             # Skip expats if not enabled
-            if result and result.entity_id == 0 and not election.expats:
+            if result and result['entity_id'] == 0 and not election.expats:
                 continue
 
             # Pass the errors and continue to next line
@@ -205,7 +210,7 @@ def import_election_wabsti_majorz(
                 )
                 continue
 
-            results.setdefault(result.entity_id, result)
+            results.setdefault(result['entity_id'], result)
 
     # The candidates file has one elected candidate per line
     filename = _("Elected Candidates")
@@ -240,7 +245,7 @@ def import_election_wabsti_majorz(
                     )
                 else:
                     if candidate_id in candidates:
-                        candidates[candidate_id].elected = True
+                        candidates[candidate_id]['elected'] = True
                     else:
                         errors.append(
                             FileImportError(
@@ -254,7 +259,7 @@ def import_election_wabsti_majorz(
         errors.append(FileImportError(_("No data found")))
 
     # Check if all results are from the same district if regional election
-    districts = set([result.district for result in results.values()])
+    districts = set([result['district'] for result in results.values()])
     if election.domain == 'region' and election.distinct:
         if principal.has_districts:
             if len(districts) != 1:
@@ -281,7 +286,7 @@ def import_election_wabsti_majorz(
                 continue
             if district not in districts:
                 continue
-        results[entity_id] = ElectionResult(
+        results[entity_id] = dict(
             id=uuid4(),
             name=entity.get('name', ''),
             district=district,
@@ -293,10 +298,20 @@ def import_election_wabsti_majorz(
     election.number_of_mandates = mandates
     election.absolute_majority = majority
 
-    for candidate in candidates.values():
-        election.candidates.append(candidate)
-
-    for result in results.values():
-        election.results.append(result)
+    election_id = election.id
+    session = object_session(election)
+    bulk_insert(session, Candidate, (
+        dict(**candidate, election_id=election_id)
+        for candidate in candidates.values()
+    ))
+    bulk_insert(session, ElectionResult, (
+        dict(**result, election_id=election_id)
+        for result in results.values()
+    ))
+    bulk_insert(session, CandidateResult, (
+        candidate_result
+        for result in results.values()
+        for candidate_result in candidate_results.get(result['id'], ())
+    ))
 
     return []
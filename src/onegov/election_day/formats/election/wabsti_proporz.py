@@ -6,10 +6,12 @@ from onegov.ballot import ListConnection
 from onegov.ballot import ListResult
 from onegov.ballot import PanachageResult
 from onegov.election_day import _
+from onegov.election_day.formats.common import bulk_insert
 from onegov.election_day.formats.common import EXPATS, validate_integer, \
     validate_list_id
 from onegov.election_day.formats.common import FileImportError
 from onegov.election_day.formats.common import load_csv
+from sqlalchemy.orm import object_session
 from uuid import uuid4
 
 from onegov.election_day.import_export.mappings import \
@@ -32,7 +34,7 @@ def parse_election_result(line, errors, entities):
             ))
         else:
             entity = entities.get(entity_id, {})
-            return ElectionResult(
+            return dict(
                 id=uuid4(),
                 name=entity.get('name', ''),
                 district=entity.get('district', ''),
@@ -48,7 +50,7 @@ def parse_list(line, errors):
     except ValueError as e:
         errors.append(e.args[0])
     else:
-        return List(
+        return dict(
             id=uuid4(),
             list_id=list_id,
             number_of_mandates=0,
@@ -62,7 +64,7 @@ def parse_list_result(line, errors):
     except ValueError as e:
         errors.append(e.args[0])
     else:
-        return ListResult(
+        return dict(
             id=uuid4(),
             votes=votes
         )
@@ -121,7 +123,7 @@ def parse_candidate(line, errors):
     except Exception:
         errors.append(_("Invalid candidate values"))
     else:
-        return Candidate(
+        return dict(
             id=uuid4(),
             candidate_id=candidate_id,
             family_name=family_name,
@@ -136,7 +138,7 @@ def parse_candidate_result(line, errors):
     except ValueError as e:
         errors.append(e.args[0])
     else:
-        return CandidateResult(
+        return dict(
             id=uuid4(),
             votes=votes,
         )
@@ -154,11 +156,11 @@ def parse_connection(line, errors):
     except Exception:
         errors.append(_("Invalid list connection values"))
     else:
-        connection = ListConnection(
+        connection = dict(
             id=uuid4(),
             connection_id=connection_id,
         ) if connection_id else None
-        subconnection = ListConnection(
+        subconnection = dict(
             id=uuid4(),
             connection_id=subconnection_id,
         ) if subconnection_id else None
@@ -190,6 +192,7 @@ def import_election_wabsti_proporz(
     connections = {}
     subconnections = {}
     results = {}
+    candidate_results = []
     entities = principal.entities[election.date.year]
     panachage_headers = None
 
@@ -226,7 +229,7 @@ def import_election_wabsti_proporz(
                 line, line_errors, panachage, panachage_headers)
 
             # Skip expats if not enabled
-            if result and result.entity_id == 0 and not election.expats:
+            if result and result['entity_id'] == 0 and not election.expats:
                 continue
 
             # Pass the errors and continue to next line
@@ -240,22 +243,23 @@ def import_election_wabsti_proporz(
                 continue
 
             # Add the data
-            result = results.setdefault(result.entity_id, result)
+            result = results.setdefault(result['entity_id'], result)
 
-            list = lists.setdefault(list.list_id, list)
+            list = lists.setdefault(list['list_id'], list)
 
-            list_results.setdefault(result.entity_id, {})
-            list_result = list_results[result.entity_id].setdefault(
-                list.list_id, list_result
+            list_results.setdefault(result['entity_id'], {})
+            list_result = list_results[result['entity_id']].setdefault(
+                list['list_id'], list_result
             )
-            list_result.list_id = list.id
+            list_result['list_id'] = list['id']
 
-            candidate = candidates.setdefault(candidate.candidate_id,
+            candidate = candidates.setdefault(candidate['candidate_id'],
                                               candidate)
-            candidate_result.candidate_id = candidate.id
-            result.candidate_results.append(candidate_result)
+            candidate_result['candidate_id'] = candidate['id']
+            candidate_result['election_result_id'] = result['id']
+            candidate_results.append(candidate_result)
 
-            candidate.list_id = list.id
+            candidate['list_id'] = list['id']
 
     # The list connections has one list per line
     filename = _("List connections")
@@ -300,15 +304,15 @@ def import_election_wabsti_proporz(
 
                 if connection:
                     connection = connections.setdefault(
-                        connection.connection_id, connection
+                        connection['connection_id'], connection
                     )
-                    lists[list_id].connection_id = connection.id
+                    lists[list_id]['connection_id'] = connection['id']
                     if subconnection:
                         subconnection = subconnections.setdefault(
-                            subconnection.connection_id, subconnection
+                            subconnection['connection_id'], subconnection
                         )
-                        subconnection.parent_id = connection.id
-                        lists[list_id].connection_id = subconnection.id
+                        subconnection['parent_id'] = connection['id']
+                        lists[list_id]['connection_id'] = subconnection['id']
 
     # The candidates file has one elected candidate per line
     filename = _("Elected Candidates")
@@ -331,7 +335,7 @@ def import_election_wabsti_proporz(
             else:
                 error = None
         if not error:
-            indexes = dict([(item.id, key) for key, item in lists.items()])
+            indexes = dict([(item['id'], key) for key, item in lists.items()])
             for line in csv.lines:
                 try:
                     candidate_id = validate_integer(line, 'liste_kandid')
@@ -345,10 +349,9 @@ def import_election_wabsti_proporz(
                     )
                 else:
                     if candidate_id in candidates:
-                        candidates[candidate_id].elected = True
-                        index = indexes[candidates[candidate_id].list_id]
-                        lists[index].number_of_mandates = 1 + \
-                            lists[index].number_of_mandates
+                        candidates[candidate_id]['elected'] = True
+                        index = indexes[candidates[candidate_id]['list_id']]
+                        lists[index]['number_of_mandates'] += 1
                     else:
                         errors.append(
                             FileImportError(
@@ -403,17 +406,19 @@ def import_election_wabsti_proporz(
                         entity_id = 0
 
                     if entity_id in results:
-                        results[entity_id].eligible_voters = eligible_voters
-                        results[entity_id].received_ballots = received_ballots
-                        results[entity_id].blank_ballots = blank_ballots
-                        results[entity_id].invalid_ballots = invalid_ballots
-                        results[entity_id].blank_votes = blank_votes
+                        results[entity_id].update(
+                            eligible_voters=eligible_voters,
+                            received_ballots=received_ballots,
+                            blank_ballots=blank_ballots,
+                            invalid_ballots=invalid_ballots,
+                            blank_votes=blank_votes
+                        )
 
     if not errors and not results:
         errors.append(FileImportError(_("No data found")))
 
     # Check if all results are from the same district if regional election
-    districts = set([result.district for result in results.values()])
+    districts = set([result['district'] for result in results.values()])
     if election.domain == 'region' and election.distinct:
         if principal.has_districts:
             if len(districts) != 1:
@@ -448,7 +453,7 @@ def import_election_wabsti_proporz(
                 continue
             if district not in districts:
                 continue
-        results[entity_id] = ElectionResult(
+        results[entity_id] = dict(
             id=uuid4(),
             name=entity.get('name', ''),
             district=district,
@@ -458,26 +463,44 @@ def import_election_wabsti_proporz(
 
     election.clear_results()
 
-    for connection in connections.values():
-        election.list_connections.append(connection)
-    for connection in subconnections.values():
-        election.list_connections.append(connection)
-
-    for list_ in lists.values():
-        election.lists.append(list_)
-        if list_.list_id in panachage:
-            for source, votes in panachage[list_.list_id].items():
-                list_.panachage_results.append(
-                    PanachageResult(
-                        owner=election.id, source=source, votes=votes)
-                )
-
-    for candidate in candidates.values():
-        election.candidates.append(candidate)
-
-    for result in results.values():
-        for list_result in list_results.get(result.entity_id, {}).values():
-            result.list_results.append(list_result)
-        election.results.append(result)
+    election_id = election.id
+    session = object_session(election)
+    bulk_insert(session, ListConnection, (
+        dict(**connection, election_id=election_id)
+        for connection in connections.values()
+    ))
+    bulk_insert(session, ListConnection, (
+        dict(**connection, election_id=election_id)
+        for connection in subconnections.values()
+    ))
+    bulk_insert(session, List, (
+        dict(**list_, election_id=election_id)
+        for list_ in lists.values()
+    ))
+    bulk_insert(session, PanachageResult, (
+        dict(
+            id=uuid4(),
+            owner=election_id,
+            source=source,
+            target=str(lists[list_id]['id']),
+            votes=votes
+        )
+        for list_id in lists
+        for source, votes in panachage.get(list_id, {}).items()
+    ))
+    bulk_insert(session, Candidate, (
+        dict(**candidate, election_id=election_id)
+        for candidate in candidates.values()
+    ))
+    bulk_insert(session, ElectionResult, (
+        dict(**result, election_id=election_id)
+        for result in results.values()
+    ))
+    bulk_insert(session, ListResult, (
+        dict(**list_result, election_result_id=result['id'])
+        for result in results.values()
+        for list_result in list_results.get(result['entity_id'], {}).values()
+    ))
+    bulk_insert(session, CandidateResult, candidate_results)
 
     return []
@@ -2,6 +2,7 @@ from onegov.ballot import Candidate
 from onegov.ballot import CandidateResult
 from onegov.ballot import ElectionResult
 from onegov.election_day import _
+from onegov.election_day.formats.common import bulk_insert
 from onegov.election_day.formats.common import EXPATS, \
     validate_integer, line_is_relevant
 from onegov.election_day.formats.common import FileImportError
@@ -356,9 +357,9 @@ def import_election_wabstic_majorz(
     result_uids = {entity_id: uuid4() for entity_id in added_results}
 
     session = object_session(election)
-    session.bulk_insert_mappings(Candidate, added_candidates.values())
-    session.bulk_insert_mappings(
-        ElectionResult,
+    bulk_insert(session, Candidate, added_candidates.values())
+    bulk_insert(
+        session, ElectionResult,
         (
             dict(
                 id=result_uids[entity_id],
@@ -377,8 +378,8 @@ def import_election_wabstic_majorz(
             for entity_id in added_results.keys()
         )
     )
-    session.bulk_insert_mappings(
-        CandidateResult,
+    bulk_insert(
+        session, CandidateResult,
         (
             dict(
                 id=uuid4(),
@@ -417,6 +418,6 @@ def import_election_wabstic_majorz(
                 counted=False
             )
         )
-    session.bulk_insert_mappings(ElectionResult, result_inserts)
+    bulk_insert(session, ElectionResult, result_inserts)
 
     return []
@@ -10,6 +10,7 @@ from onegov.ballot.models.election.election_compound import \
     ElectionCompoundAssociation
 from onegov.core.utils import normalize_for_url
 from onegov.election_day import _
+from onegov.election_day.formats.common import bulk_insert
 from onegov.election_day.formats.common import EXPATS, line_is_relevant, \
     validate_integer
 from onegov.election_day.formats.common import FileImportError
@@ -691,23 +692,23 @@ def import_election_wabstic_proporz(
     result_uids = {entity_id: uuid4() for entity_id in added_results}
 
     session = object_session(election)
-    session.bulk_insert_mappings(
-        ListConnection,
+    bulk_insert(
+        session, ListConnection,
         (
             added_connections[key]
             for key in sorted(added_connections, key=lambda x: x[1] or '')
         )
     )
-    session.bulk_insert_mappings(
-        List,
+    bulk_insert(
+        session, List,
         (
             added_lists[key]
             for key in filter(lambda x: x != '999', added_lists)
         )
     )
-    session.bulk_insert_mappings(Candidate, added_candidates.values())
-    session.bulk_insert_mappings(
-        ElectionResult,
+    bulk_insert(session, Candidate, added_candidates.values())
+    bulk_insert(
+        session, ElectionResult,
         (
             dict(
                 id=result_uids[entity_id],
@@ -725,8 +726,8 @@ def import_election_wabstic_proporz(
             for entity_id in added_results
         )
     )
-    session.bulk_insert_mappings(
-        CandidateResult,
+    bulk_insert(
+        session, CandidateResult,
         (
             dict(
                 id=uuid4(),
@@ -738,8 +739,8 @@ def import_election_wabstic_proporz(
             for candidate_id, votes in added_results[entity_id].items()
         )
     )
-    session.bulk_insert_mappings(
-        ListResult,
+    bulk_insert(
+        session, ListResult,
         (
             dict(
                 id=uuid4(),
@@ -779,6 +780,6 @@ def import_election_wabstic_proporz(
                 counted=False
             )
         )
-    session.bulk_insert_mappings(ElectionResult, result_inserts)
+    bulk_insert(session, ElectionResult, result_inserts)
 
     return []
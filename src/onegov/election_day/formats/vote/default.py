@@ -1,10 +1,12 @@
 from onegov.ballot import BallotResult
 from onegov.election_day import _
+from onegov.election_day.formats.common import bulk_insert
 from onegov.election_day.formats.common import EXPATS, validate_integer
 from onegov.election_day.formats.common import FileImportError
 from onegov.election_day.formats.common import load_csv
 from onegov.election_day.formats.common import BALLOT_TYPES
 from onegov.election_day.import_export.mappings import DEFAULT_VOTE_HEADER
+from sqlalchemy.orm import object_session
 
 
 def import_vote_default(vote, principal, ballot_type, file, mimetype):
@@ -151,7 +153,7 @@ def import_vote_default(vote, principal, ballot_type, file, mimetype):
         if not errors:
             entity = entities.get(entity_id, {})
             ballot_results.append(
-                BallotResult(
+                dict(
                     name=entity.get('name', ''),
                     district=entity.get('district', ''),
                     counted=True,
@@ -176,7 +178,7 @@ def import_vote_default(vote, principal, ballot_type, file, mimetype):
         for entity_id in remaining:
             entity = entities.get(entity_id, {})
             ballot_results.append(
-                BallotResult(
+                dict(
                     name=entity.get('name', ''),
                     district=entity.get('district', ''),
                     counted=False,
@@ -191,7 +193,10 @@ def import_vote_default(vote, principal, ballot_type, file, mimetype):
         vote.status = None
         ballot.clear_results()
 
-        for result in ballot_results:
-            ballot.results.append(result)
+        session = object_session(vote)
+        session.flush()
+        bulk_insert(session, BallotResult, (
+            dict(**result, ballot_id=ballot.id) for result in ballot_results
+        ))
 
     return []
@@ -1,5 +1,6 @@
 from onegov.ballot import BallotResult
 from onegov.election_day import _
+from onegov.election_day.formats.common import bulk_insert
 from onegov.election_day.formats.common import EXPATS, validate_integer
 from onegov.election_day.formats.common import FileImportError
 from onegov.election_day.formats.common import load_csv
@@ -236,8 +237,8 @@ def import_vote_wabstic(vote, principal, number, district,
 
     session = object_session(vote)
     session.flush()
-    session.bulk_insert_mappings(
-        BallotResult,
+    bulk_insert(
+        session, BallotResult,
         (
             dict(**result, ballot_id=ballot_ids[ballot_type])
             for ballot_type in used_ballot_types
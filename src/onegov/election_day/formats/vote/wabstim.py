@@ -1,9 +1,11 @@
 from onegov.ballot import BallotResult
 from onegov.election_day import _
+from onegov.election_day.formats.common import bulk_insert
 from onegov.election_day.formats.common import EXPATS, validate_integer
 from onegov.election_day.formats.common import FileImportError
 from onegov.election_day.formats.common import load_csv
 from onegov.election_day.import_export.mappings import WABSTIM_VOTE_HEADERS
+from sqlalchemy.orm import object_session
 
 
 def import_vote_wabstim(vote, principal, file, mimetype):
@@ -134,7 +136,7 @@ def import_vote_wabstim(vote, principal, file, mimetype):
             for ballot_type in used_ballot_types:
                 entity = entities.get(entity_id, {})
                 ballot_results[ballot_type].append(
-                    BallotResult(
+                    dict(
                         name=entity.get('name', ''),
                         district=entity.get('district', ''),
                         counted=counted,
@@ -166,7 +168,7 @@ def import_vote_wabstim(vote, principal, file, mimetype):
         for id in remaining:
             entity = entities.get(entity_id, {})
             ballot_results[ballot_type].append(
-                BallotResult(
+                dict(
                     name=entity.get('name', ''),
                     district=entity.get('district', ''),
                     counted=False,
@@ -174,9 +176,18 @@ def import_vote_wabstim(vote, principal, file, mimetype):
                 )
             )
 
-        if ballot_results[ballot_type]:
-            ballot = vote.ballot(ballot_type, create=True)
-            for result in ballot_results[ballot_type]:
-                ballot.results.append(result)
+    ballot_ids = {
+        ballot_type: vote.ballot(ballot_type, create=True).id
+        for ballot_type in used_ballot_types
+        if ballot_results[ballot_type]
+    }
+
+    session = object_session(vote)
+    session.flush()
+    bulk_insert(session, BallotResult, (
+        dict(**result, ballot_id=ballot_ids[ballot_type])
+        for ballot_type in ballot_ids
+        for result in ballot_results[ballot_type]
+    ))
 
     return []
@@ -5,6 +5,7 @@ from onegov.core.orm import Base
 from onegov.core.orm import translation_hybrid
 from onegov.core.orm.mixins import ContentMixin
 from onegov.core.orm.mixins import meta_property
+from onegov.core.orm.mixins import TextSearchMixin
 from onegov.core.orm.mixins import TimestampMixin
 from onegov.core.orm.mixins.content import dictionary_based_property_factory
 from onegov.core.orm.types import HSTORE
@@ -23,7 +24,8 @@ meta_local_property = dictionary_based_property_factory('local')
 
 
 class ArchivedResult(Base, ContentMixin, TimestampMixin,
-                     DomainOfInfluenceMixin, TitleTranslationsMixin):
+                     DomainOfInfluenceMixin, TitleTranslationsMixin,
+                     TextSearchMixin):
 
     """ Stores the result of an election or vote. """
 
@@ -101,6 +103,16 @@ class ArchivedResult(Base, ContentMixin, TimestampMixin,
     #: Shortcode for cantons that use it
     shortcode = Column(Text, nullable=True)
 
+    #: The texts searched by the archive, the titles fall back to the
+    #: default locale (de_CH) like the title itself
+    text_search_expressions = {
+        'shortcode': "coalesce(shortcode, '')",
+        'title': (
+            "coalesce(title_translations -> '{locale}', "
+            "title_translations -> 'de_CH', '')"
+        )
+    }
+
     #: The id of the election/vote.
     external_id = meta_property('id')
 
@@ -262,7 +262,8 @@ def get_archive_search(
         item_type=None,
         domains=None,
         term=None,
-        page=0
+        page=0,
+        after=None
 ):
     return SearchableArchivedResultCollection.for_item_type(
         app.session(),
@@ -272,7 +273,8 @@ def get_archive_search(
         answers=answers,
         domains=domains,
         term=term,
-        page=page
+        page=page,
+        after=after
     )
 
 
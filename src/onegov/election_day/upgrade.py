@@ -291,3 +291,8 @@ def enable_expats(context):
     for election in context.session.query(Election):
         if election.results.filter_by(entity_id=0).first():
             election.expats = True
+
+
+@upgrade_task('Add text search columns to archived results')
+def add_text_search_columns_to_archived_results(context):
+    context.add_text_search_columns(ArchivedResult)
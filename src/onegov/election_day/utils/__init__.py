@@ -2,8 +2,12 @@ from onegov.election_day.utils.common import add_cors_header
 from onegov.election_day.utils.common import add_last_modified_header
 from onegov.election_day.utils.common import add_local_results
 from onegov.election_day.utils.common import get_parameter
+from onegov.election_day.utils.common import iter_export
+from onegov.election_day.utils.filenames import export_filename
 from onegov.election_day.utils.filenames import pdf_filename
 from onegov.election_day.utils.filenames import svg_filename
+from onegov.election_day.utils.pages_cache import get_page_metrics
+from onegov.election_day.utils.pages_cache import invalidate_pages
 from onegov.election_day.utils.summaries import get_election_compound_summary
 from onegov.election_day.utils.summaries import get_election_summary
 from onegov.election_day.utils.summaries import get_summaries
@@ -15,12 +19,16 @@ __all__ = [
     'add_cors_header',
     'add_last_modified_header',
     'add_local_results',
+    'export_filename',
     'get_election_compound_summary',
     'get_election_summary',
+    'get_page_metrics',
     'get_parameter',
     'get_summaries',
     'get_summary',
     'get_vote_summary',
+    'invalidate_pages',
+    'iter_export',
     'pdf_filename',
     'svg_filename',
 ]
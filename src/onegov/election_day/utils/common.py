@@ -34,6 +34,19 @@ def add_last_modified_header(response, last_modified):
         )
 
 
+def iter_export(request, item, **kwargs):
+    """ Yields the rows of the export of the given election, election
+    compound or vote.
+
+    Streamed rows are generated after the transaction of the request has been
+    committed, at which point the item is no longer attached to the session.
+    The item is therefore merged into the session first.
+
+    """
+
+    yield from request.session.merge(item).iter_export(**kwargs)
+
+
 def add_cors_header(response):
     """ Adds a header allowing the response being used in scripts. """
     response.headers.add('Access-Control-Allow-Origin', '*')
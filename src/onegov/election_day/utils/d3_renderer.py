@@ -1,4 +1,6 @@
 from base64 import b64decode
+from functools import lru_cache
+from hashlib import sha256
 from io import BytesIO
 from io import StringIO
 from onegov.ballot import Ballot
@@ -15,10 +17,34 @@ from onegov.election_day.utils.election import get_lists_data
 from onegov.election_day.utils.election import get_lists_panachage_data
 from onegov.election_day.utils.election import get_parties_panachage_data
 from onegov.election_day.utils.election import get_party_results_data
-from requests import post
+from requests import Session
 from rjsmin import jsmin
 
 
+@lru_cache(maxsize=None)
+def load_script(script):
+    """ Reads and minifies the given javascript source, once per process.
+
+    """
+    path = module_path('onegov.election_day', 'assets/js/{}'.format(script))
+    with open(path, 'r') as f:
+        return jsmin(f.read())
+
+
+@lru_cache(maxsize=32)
+def load_mapdata(year, principal):
+    """ Reads the map data of the given principal and year, once per
+    process.
+
+    """
+    path = module_path(
+        'onegov.election_day',
+        'static/mapdata/{}/{}.json'.format(year, principal)
+    )
+    with open(path, 'r') as f:
+        return json.loads(f.read())
+
+
 class D3Renderer():
 
     """ Provides access to the d3-renderer (github.com/seantis/d3-renderer).
@@ -28,6 +54,15 @@ class D3Renderer():
     def __init__(self, app):
         self.app = app
         self.renderer = app.configuration.get('d3_renderer').rstrip('/')
+
+        #: The rendered charts by content hash, kept in memory in addition
+        #: to the charts cache of the application. Disabled by default, the
+        #: generators enable it to render identical charts only once.
+        self.cache = None
+
+        #: The HTTP session, reusing the connections to the d3-renderer
+        self.session = Session()
+
         self.supported_charts = {
             'bar': {
                 'main': 'barChart',
@@ -52,15 +87,20 @@ class D3Renderer():
         }
 
         # Read and minify the javascript sources
-        self.scripts = {}
-        for chart in self.supported_charts:
-            self.scripts[chart] = []
-            for script in self.supported_charts[chart]['scripts']:
-                path = module_path(
-                    'onegov.election_day', 'assets/js/{}'.format(script)
-                )
-                with open(path, 'r') as f:
-                    self.scripts[chart].append(jsmin(f.read()))
+        self.scripts = {
+            chart: [
+                load_script(script)
+                for script in self.supported_charts[chart]['scripts']
+            ]
+            for chart in self.supported_charts
+        }
+
+        # The scripts are part of the content hash, changing them changes
+        # the rendered charts
+        self.versions = {
+            chart: sha256(''.join(scripts).encode('utf-8')).hexdigest()
+            for chart, scripts in self.scripts.items()
+        }
 
     def translate(self, text, locale):
         """ Translates the given string. """
@@ -68,10 +108,16 @@ class D3Renderer():
         translator = self.app.translations.get(locale)
         return text.interpolate(translator.gettext(text))
 
-    def get_chart(self, chart, fmt, data, width=1000, params=None):
+    def get_chart(self, chart, fmt, data, width=1000, params=None, year=None):
         """ Returns the requested chart from the d3-render service as a
         PNG/PDF/SVG.
 
+        If a year is given, the map data of the principal for this year is
+        added to the parameters.
+
+        The rendered charts are cached by their content hash, unchanged
+        charts are not rendered again.
+
         """
 
         assert chart in self.supported_charts
@@ -84,42 +130,70 @@ class D3Renderer():
             'viewport_width': width  # only used for PDF and PNG
         })
 
-        response = post('{}/d3/{}'.format(self.renderer, fmt), json={
-            'scripts': self.scripts[chart],
-            'main': self.supported_charts[chart]['main'],
-            'params': params
-        })
+        key = self.get_chart_key(chart, fmt, params, year)
+        if year is not None:
+            params['mapdata'] = load_mapdata(year, self.app.principal.id)
 
-        response.raise_for_status()
+        text = self.cache.get(key) if self.cache is not None else None
+        if text is None:
+            text = self.app.charts_cache.get_or_create(
+                key, lambda: self.render_chart(chart, fmt, params)
+            )
+            if self.cache is not None:
+                self.cache[key] = text
 
         if fmt == 'svg':
-            return StringIO(response.text)
+            return StringIO(text)
         else:
-            return BytesIO(b64decode(response.text))
+            return BytesIO(b64decode(text))
+
+    def get_chart_key(self, chart, fmt, params, year=None):
+        """ Returns the content hash of the given chart.
+
+        The map data is identified by the year and the principal, hashing
+        it for every chart would be expensive.
+
+        """
+        if year is not None:
+            params = {k: v for k, v in params.items() if k != 'mapdata'}
+
+        content = json.dumps(
+            [chart, self.versions[chart], fmt, params, year],
+            sort_keys=True
+        )
+        return sha256(content.encode('utf-8')).hexdigest()
+
+    def render_chart(self, chart, fmt, params):
+        """ Renders the given chart using the d3-render service, returns
+        the SVG or the base64 encoded PDF.
+
+        """
+        response = self.session.post(
+            '{}/d3/{}'.format(self.renderer, fmt),
+            json={
+                'scripts': self.scripts[chart],
+                'main': self.supported_charts[chart]['main'],
+                'params': params
+            }
+        )
+
+        response.raise_for_status()
+
+        return response.text
 
     def get_map(self, map, fmt, data, year, width=1000, params=None):
         """ Returns the request chart from the d3-render service as a
         PNG/PDF/SVG.
 
         """
-        mapdata = None
-        path = module_path(
-            'onegov.election_day',
-            'static/mapdata/{}/{}.json'.format(
-                year,
-                self.app.principal.id
-            )
-        )
-        with open(path, 'r') as f:
-            mapdata = json.loads(f.read())
-
         params = params or {}
         params.update({
-            'mapdata': mapdata,
             'canton': self.app.principal.id
         })
 
-        return self.get_chart('{}-map'.format(map), fmt, data, width, params)
+        return self.get_chart(
+            '{}-map'.format(map), fmt, data, width, params, year
+        )
 
     def get_lists_chart(self, item, fmt, return_data=False):
         chart = None
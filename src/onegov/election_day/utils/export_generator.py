@@ -0,0 +1,97 @@
+from onegov.ballot import Election
+from onegov.ballot import ElectionCompound
+from onegov.ballot import Vote
+from onegov.core.csv import convert_list_of_dicts_to_xlsx
+from onegov.core.csv import iter_list_of_dicts_as_csv
+from onegov.election_day import log
+from onegov.election_day.directives import iter_json_list
+from onegov.election_day.utils.filenames import export_filename
+
+
+class ExportGenerator():
+
+    """ Precomputes the JSON, CSV and XLSX exports of all elections, election
+    compounds and votes and stores them in the filestorage.
+
+    The exports are named after the last change of the item. The views
+    serve the precomputed exports if they are available and generate the
+    exports themselves otherwise.
+
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.export_dir = 'exports'
+        self.session = self.app.session()
+
+    def write(self, path, chunks):
+        """ Writes the given chunks to the given path, using a temporary file
+        so that the views never serve incomplete exports.
+
+        """
+
+        fs = self.app.filestorage
+        temporary = f'{path}.tmp'
+
+        with fs.open(temporary, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk.encode('utf-8') if isinstance(chunk, str)
+                        else chunk)
+
+        fs.move(temporary, path, overwrite=True)
+
+    def generate_export(self, item, format_, last_modified):
+        """ Creates the requested export, if not already created. Returns the
+        filename of the export.
+
+        """
+
+        filename = export_filename(item, format_, last_modified)
+        path = '{}/{}'.format(self.export_dir, filename)
+        if self.app.filestorage.exists(path):
+            return filename
+
+        if format_ == 'json':
+            kwargs = {}
+            if not isinstance(item, Vote):
+                kwargs['consider_completed'] = True
+            self.write(path, iter_json_list(item.iter_export(**kwargs)))
+        elif format_ in ('csv', 'xlsx'):
+            # the rows of election compounds have different columns per
+            # election, the header needs all rows
+            if isinstance(item, ElectionCompound):
+                rows = item.export()
+            else:
+                rows = item.iter_export()
+
+            if format_ == 'csv':
+                self.write(path, iter_list_of_dicts_as_csv(rows))
+            else:
+                self.write(path, (convert_list_of_dicts_to_xlsx(rows), ))
+
+        log.info("{} created".format(filename))
+        return filename
+
+    def create_exports(self):
+        """ Generates the exports of all elections, election compounds and
+        votes, if not already generated since the last change.
+
+        Removes the outdated exports.
+
+        """
+
+        fs = self.app.filestorage
+        if not fs.exists(self.export_dir):
+            fs.makedir(self.export_dir)
+
+        created = set()
+        for model in (Election, ElectionCompound, Vote):
+            for item in self.session.query(model):
+                last_modified = item.last_modified
+                for format_ in ('json', 'csv', 'xlsx'):
+                    created.add(
+                        self.generate_export(item, format_, last_modified)
+                    )
+
+        for filename in set(fs.listdir(self.export_dir)) - created:
+            fs.remove('{}/{}'.format(self.export_dir, filename))
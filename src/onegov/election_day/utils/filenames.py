@@ -1,5 +1,6 @@
 from hashlib import sha256
 from onegov.ballot import Ballot
+from onegov.ballot import ElectionCompound
 from onegov.ballot import Vote
 
 
@@ -38,3 +39,25 @@ def svg_filename(item, type_, locale=None, last_modified=None):
         ts = int((last_modified or item.last_modified).timestamp())
 
     return '{}-{}.{}.{}.{}.svg'.format(name, hash, ts, type_, locale or 'any')
+
+
+def export_filename(item, format_, last_modified=None):
+    """ Generates a filename for a precomputed export of an election,
+    election compound or vote:
+
+        ['election', 'compound' or 'vote']-[hash of id].[timestamp].[format_]
+
+    """
+    if isinstance(item, Vote):
+        name = 'vote'
+    elif isinstance(item, ElectionCompound):
+        name = 'compound'
+    else:
+        name = 'election'
+
+    return '{}-{}.{}.{}'.format(
+        name,
+        sha256(item.id.encode('utf-8')).hexdigest(),
+        int((last_modified or item.last_modified).timestamp()),
+        format_
+    )
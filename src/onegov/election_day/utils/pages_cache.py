@@ -0,0 +1,285 @@
+""" Invalidation, pre-warming and metrics of the pages cache (see
+:func:`onegov.election_day.app.micro_cache_anonymous_pages_tween_factory`).
+
+Pages are not removed from the cache when new results are uploaded. Instead,
+the pages of the affected items and the pages listing all items (the
+homepage and the archive) are marked as stale. The next request of a
+stale page regenerates it, while concurrent requests get the stale page
+(stale-while-revalidate). After the upload, the pages are requested once in
+the background, so they are usually regenerated before any visitor asks for
+them.
+
+The invalidation stamps are read from redis at most once per second and
+process, and only a sample of the cache hits is recorded, so a cache hit
+costs a single round trip to redis in most cases.
+
+"""
+import pycurl
+import transaction
+
+from collections import defaultdict
+from random import random
+from morepath.request import Response
+from onegov.ballot import Candidate
+from onegov.ballot import ElectionCompound
+from onegov.ballot import List
+from onegov.ballot import ProporzElection
+from onegov.ballot import Vote
+from onegov.election_day import log
+from threading import Thread
+from time import time
+
+
+#: Pages shared by all items, invalidated on every upload
+SHARED_PAGES = ('/', '/screen', '/catalog.rdf', '/archive', '/archive-search')
+
+#: The shared pages by their first segment
+SHARED_PAGES_BY_SEGMENT = {
+    prefix.split('/')[1]: prefix for prefix in SHARED_PAGES if prefix != '/'
+}
+
+#: The number of seconds the invalidation stamps are kept in memory
+STAMPS_LIFETIME = 1.0
+
+#: The invalidation stamps by application id (time fetched, stamps)
+_stamps = {}
+
+
+def page_prefix(path):
+    """ Returns the prefix of the given path, which identifies the item
+    the page belongs to:
+
+        /election/majorz/candidates -> /election/majorz
+        /archive/2015-01-01/json -> /archive
+
+    """
+
+    segments = path.split('/')
+
+    if segments[1] in SHARED_PAGES_BY_SEGMENT:
+        return SHARED_PAGES_BY_SEGMENT[segments[1]]
+
+    # the pages of the principal are part of the homepage (e.g. /json)
+    if len(segments) == 2:
+        return '/'
+
+    return '/'.join(segments[:3])
+
+
+def item_prefixes(item):
+    """ Returns the prefixes of all pages showing the given item. """
+
+    if isinstance(item, Vote):
+        return [f'/vote/{item.id}'] + [
+            f'/ballot/{ballot.id}' for ballot in item.ballots
+        ]
+
+    if isinstance(item, ElectionCompound):
+        return [f'/elections/{item.id}']
+
+    prefixes = [f'/election/{item.id}']
+    candidates = item.candidates.with_entities(Candidate.id)
+    prefixes.extend(f'/candidate/{candidate.id}' for candidate in candidates)
+    if isinstance(item, ProporzElection):
+        lists = item.lists.with_entities(List.id)
+        prefixes.extend(f'/list/{list_.id}' for list_ in lists)
+    if item.compound:
+        prefixes.append(f'/elections/{item.compound.id}')
+    return prefixes
+
+
+def redis_key(app, name):
+    return f'{app.application_id}:pages#{name}'
+
+
+def invalidation_stamps(app):
+    """ Returns the invalidation stamps of all prefixes. The stamps are
+    fetched once per :attr:`STAMPS_LIFETIME` (per application and process).
+
+    """
+
+    now = time()
+    fetched, stamps = _stamps.get(app.application_id, (0, None))
+
+    if stamps is None or now - fetched > STAMPS_LIFETIME:
+        client = app.pages_cache.backend.client
+        stamps = {
+            prefix.decode('utf-8'): float(value)
+            for prefix, value in client.hgetall(
+                redis_key(app, 'invalidated')
+            ).items()
+        }
+        _stamps[app.application_id] = (now, stamps)
+
+    return stamps
+
+
+def invalidation_time(app, path):
+    """ Returns the last time the pages of the item the given path belongs
+    to have been invalidated (as timestamp), or 0.
+
+    """
+
+    stamps = invalidation_stamps(app)
+    return max(stamps.get(page_prefix(path), 0), stamps.get('*', 0))
+
+
+def invalidate_pages(request, items=None):
+    """ Marks the pages of the given items (and the pages shared by all
+    items) as stale. Marks all pages as stale, if no items are given.
+
+    The pages are pre-warmed once the transaction has been committed.
+
+    """
+
+    app = request.app
+    prefixes = set(SHARED_PAGES)
+    for item in items or ():
+        prefixes.update(item_prefixes(item))
+    if items is None:
+        prefixes = {'*'}
+
+    key = redis_key(app, 'invalidated')
+    now = time()
+
+    pipe = app.pages_cache.backend.client.pipeline(transaction=False)
+    for prefix in prefixes:
+        pipe.hset(key, prefix, now)
+    pipe.expire(key, 24 * 60 * 60)
+    pipe.execute()
+
+    # this process sees the new stamps immediately, the others after at
+    # most STAMPS_LIFETIME seconds
+    _stamps.pop(app.application_id, None)
+
+    if items and app.configuration.get('prewarm_pages', True):
+        urls = [url for item in items for url in item_urls(request, item)]
+        transaction.get().addAfterCommitHook(
+            lambda success: success and prewarm_pages(urls)
+        )
+
+
+def item_urls(request, item):
+    """ Returns the urls of the main page and all visible tabs of the
+    given item.
+
+    """
+
+    # avoid circular imports, the layouts use the utils
+    from onegov.election_day.layouts import ElectionCompoundLayout
+    from onegov.election_day.layouts import ElectionLayout
+    from onegov.election_day.layouts import VoteLayout
+
+    if isinstance(item, Vote):
+        layout = VoteLayout(item, request)
+    elif isinstance(item, ElectionCompound):
+        layout = ElectionCompoundLayout(item, request)
+    else:
+        layout = ElectionLayout(item, request)
+
+    return [request.link(item)] + [
+        request.link(item, tab)
+        for tab in layout.all_tabs if layout.tab_visible(tab)
+    ]
+
+
+def prewarm_pages(urls):
+    """ Requests the given urls in a background thread. """
+
+    def request_pages():
+        for url in urls:
+            # see onegov.core.cronjobs why we use curl
+            try:
+                c = pycurl.Curl()
+                c.setopt(c.URL, url)
+                c.setopt(c.FOLLOWLOCATION, True)
+                c.setopt(c.WRITEFUNCTION, lambda bytes: len(bytes))
+                c.perform()
+                c.close()
+            except pycurl.error as e:
+                log.warning(f'Could not pre-warm {url}: {e}')
+
+    Thread(target=request_pages, daemon=True).start()
+
+
+def cache_streamed_response(cache, key, response):
+    """ Stores the given streamed response in the given cache once it has
+    been sent completely.
+
+    Streamed responses (e.g. the data downloads) cannot be pickled. Instead,
+    the chunks are collected while they are sent and stored as a regular
+    response at the end. Responses which are not sent completely (e.g. if
+    the client disconnects) are not cached.
+
+    """
+
+    app_iter = response.app_iter
+
+    def collect():
+        chunks = []
+        try:
+            for chunk in app_iter:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+        cached = Response(
+            status=response.status,
+            headerlist=list(response.headerlist)
+        )
+        cached.body = b''.join(chunks)
+        cache.set(key, cached)
+
+    response.app_iter = collect()
+
+
+def record_page_metrics(app, path, duration=None):
+    """ Records a hit (no duration given) or a miss of the given path. The
+    duration is the time needed to regenerate the page.
+
+    Misses are always recorded. Hits are only recorded for a sample of the
+    requests (see ``pages_cache_metrics_sample_rate``, defaults to 0.1) and
+    weighted accordingly.
+
+    """
+
+    key = redis_key(app, 'metrics')
+
+    if duration is None:
+        rate = app.configuration.get('pages_cache_metrics_sample_rate', 0.1)
+        if not rate or random() >= rate:
+            return
+
+    pipe = app.pages_cache.backend.client.pipeline(transaction=False)
+    if duration is None:
+        pipe.hincrby(key, f'{path}|hits', round(1 / rate))
+    else:
+        pipe.hincrby(key, f'{path}|misses', 1)
+        pipe.hincrbyfloat(key, f'{path}|time', duration)
+    pipe.expire(key, 7 * 24 * 60 * 60)
+    pipe.execute()
+
+
+def get_page_metrics(app):
+    """ Returns the recorded hits, misses and the average regeneration time
+    (in seconds) by path.
+
+    """
+
+    client = app.pages_cache.backend.client
+    values = client.hgetall(redis_key(app, 'metrics'))
+
+    result = defaultdict(lambda: {'hits': 0, 'misses': 0, 'time': 0.0})
+    for field, value in values.items():
+        path, name = field.decode('utf-8').rsplit('|', 1)
+        result[path][name] = float(value) if name == 'time' else int(value)
+
+    for metrics in result.values():
+        total = metrics.pop('time')
+        metrics['regeneration_time'] = (
+            total / metrics['misses'] if metrics['misses'] else None
+        )
+
+    return dict(result)
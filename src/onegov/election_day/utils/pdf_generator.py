@@ -1,3 +1,8 @@
+import transaction
+
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from onegov.ballot import Election
 from onegov.ballot import ElectionCompound
 from onegov.ballot import Vote
@@ -20,17 +25,39 @@ from os.path import basename
 from pdfdocument.document import MarkupParagraph
 from pytz import timezone
 from reportlab.lib.units import cm
+from time import perf_counter
 
 
 class PdfGenerator():
 
-    def __init__(self, app, renderer=None):
+    """ Generates the PDFs of the elections, election compounds and votes.
+
+    :workers:
+        The number of PDFs rendered at the same time. Each worker renders
+        using its own database session, the files are written by the calling
+        thread only.
+
+    """
+
+    def __init__(self, app, renderer=None, workers=1):
         self.app = app
         self.pdf_dir = 'pdf'
-        self.session = self.app.session()
         self.pdf_signing = self.app.principal.pdf_signing
         self.default_locale = self.app.settings.i18n.default_locale
         self.renderer = renderer or D3Renderer(app)
+        self.workers = workers
+
+        #: The time spent to create each PDF of the last run, by filename
+        self.timings = {}
+
+        # many charts don't depend on the locale, render them only once
+        if self.renderer.cache is None:
+            self.renderer.cache = {}
+
+    @property
+    def session(self):
+        # sessions are bound to the thread, each worker uses its own
+        return self.app.session()
 
     def remove(self, directory, files):
         """ Safely removes the given files from the directory. Allows to use
@@ -46,22 +73,31 @@ class PdfGenerator():
             if fs.exists(path) and not file.is_dir:
                 fs.remove(path)
 
+    def sign_file(self, file, filename):
+        """ Returns the signed content of the given PDF file or None if the
+        PDF could not be signed.
+
+        """
+        signer = LexworkSigner(
+            self.pdf_signing['host'],
+            self.pdf_signing['login'],
+            self.pdf_signing['password']
+        )
+        reason = self.pdf_signing['reason']
+        try:
+            return signer.sign(file, filename, reason)
+        except Exception as e:
+            log.error("Could not sign PDF: {}".format(e))
+            log.warning("PDF {} could not be signed".format(filename))
+            return None
+
     def sign_pdf(self, path):
         if self.pdf_signing:
-            signer = LexworkSigner(
-                self.pdf_signing['host'],
-                self.pdf_signing['login'],
-                self.pdf_signing['password']
-            )
             with self.app.filestorage.open(path, 'rb') as file:
-                filename = basename(path)
-                reason = self.pdf_signing['reason']
-                try:
-                    data = signer.sign(file, filename, reason)
-                except Exception as e:
-                    log.error("Could not sign PDF: {}".format(e))
-                    log.warning("PDF {} could not be signed".format(filename))
-                    return
+                data = self.sign_file(file, basename(path))
+
+            if data is None:
+                return
 
             self.app.filestorage.remove(path)
             with self.app.filestorage.open(path, 'wb') as f:
@@ -69,52 +105,114 @@ class PdfGenerator():
 
     def generate_pdf(self, item, path, locale):
         """ Generates the PDF for an election or a vote. """
-        principal = self.app.principal
 
         with self.app.filestorage.open(path, 'wb') as f:
+            self.render_pdf(item, f, locale)
 
-            pdf = Pdf(
-                f,
-                title=item.get_title(locale, self.default_locale),
-                author=principal.name,
-                locale=locale,
-                translations=self.app.translations
-            )
-            pdf.init_a4_portrait(
-                page_fn=page_fn_footer,
-                page_fn_later=page_fn_header_and_footer
-            )
+    def render_pdf(self, item, file, locale):
+        """ Renders the PDF for an election or a vote into the given file. """
+        principal = self.app.principal
 
-            # Add Header
-            pdf.h1(item.get_title(locale, self.default_locale))
+        pdf = Pdf(
+            file,
+            title=item.get_title(locale, self.default_locale),
+            author=principal.name,
+            locale=locale,
+            translations=self.app.translations
+        )
+        pdf.init_a4_portrait(
+            page_fn=page_fn_footer,
+            page_fn_later=page_fn_header_and_footer
+        )
 
-            # Add dates
-            changed = item.last_result_change
-            if getattr(changed, 'tzinfo', None) is not None:
-                tz = timezone('Europe/Zurich')
-                changed = tz.normalize(changed.astimezone(tz))
-            pdf.dates_line(item.date, changed)
-            pdf.spacer()
+        # Add Header
+        pdf.h1(item.get_title(locale, self.default_locale))
+
+        # Add dates
+        changed = item.last_result_change
+        if getattr(changed, 'tzinfo', None) is not None:
+            tz = timezone('Europe/Zurich')
+            changed = tz.normalize(changed.astimezone(tz))
+        pdf.dates_line(item.date, changed)
+        pdf.spacer()
+
+        if isinstance(item, Election) and item.tacit:
+            self.add_tacit_election(principal, item, pdf)
 
-            if isinstance(item, Election) and item.tacit:
-                self.add_tacit_election(principal, item, pdf)
+        elif isinstance(item, Election):
+            self.add_election(principal, item, pdf)
 
-            elif isinstance(item, Election):
-                self.add_election(principal, item, pdf)
+        elif isinstance(item, ElectionCompound):
+            self.add_election_compound(principal, item, pdf)
 
-            elif isinstance(item, ElectionCompound):
-                self.add_election_compound(principal, item, pdf)
+        elif isinstance(item, Vote):
+            self.add_vote(principal, item, pdf, locale)
 
-            elif isinstance(item, Vote):
-                self.add_vote(principal, item, pdf, locale)
+        # Add related link
+        link = item.related_link
+        if link:
+            pdf.h2(_('Related link'))
+            pdf.p_markup('<a href="{link}">{link}</a>'.format(link=link))
 
-            # Add related link
-            link = item.related_link
-            if link:
-                pdf.h2(_('Related link'))
-                pdf.p_markup('<a href="{link}">{link}</a>'.format(link=link))
+        pdf.generate()
 
-            pdf.generate()
+    def create_pdf(self, item, filename, locale):
+        """ Renders and signs the PDF for an election or a vote in memory.
+
+        Returns the content of the PDF and the time spent to create it.
+
+        """
+        start = perf_counter()
+
+        file = BytesIO()
+        self.render_pdf(item, file, locale)
+        data = file.getvalue()
+
+        if self.pdf_signing:
+            file.seek(0)
+            data = self.sign_file(file, filename) or data
+
+        return data, perf_counter() - start
+
+    def create_pdf_in_worker(self, model, id, filename, locale):
+        """ Creates the PDF inside a worker thread, using a separate session.
+
+        """
+        try:
+            item = self.session.query(model).get(id)
+            return self.create_pdf(item, filename, locale)
+        finally:
+            transaction.abort()
+            self.app.session_manager.session_factory.remove()
+
+    def submit_pdfs(self, pending):
+        """ Creates the given PDFs (a list of item, filename and locale
+        tuples), using the configured number of workers.
+
+        Yields the item and filename together with a future of the result
+        of :meth:`create_pdf`. The results are yielded in the order of
+        the given PDFs.
+
+        """
+        if self.workers <= 1:
+            for item, filename, locale in pending:
+                future = Future()
+                try:
+                    future.set_result(self.create_pdf(item, filename, locale))
+                except Exception as e:
+                    future.set_exception(e)
+                yield item, filename, future
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                (item, filename, executor.submit(
+                    self.create_pdf_in_worker,
+                    item.__class__, item.id, filename, locale
+                ))
+                for item, filename, locale in pending
+            ]
+            yield from futures
 
     def add_tacit_election(self, principal, election, pdf):
 
@@ -988,6 +1086,9 @@ class PdfGenerator():
 
         Optionally cleans up unused PDFs.
 
+        The time spent on each PDF is logged and stored in
+        :attr:`timings`.
+
         """
 
         # Get all elections and votes
@@ -1022,6 +1123,7 @@ class PdfGenerator():
 
         # Generate the PDFs
         created = []
+        pending = []
         for locale in self.app.locales:
             for item in items:
                 last_modified = item.last_modified
@@ -1030,20 +1132,32 @@ class PdfGenerator():
                 )
                 created.append(filename.split('.')[0])
                 if filename not in existing and render_item(item):
-                    path = '{}/{}'.format(self.pdf_dir, filename)
-                    if fs.exists(path):
-                        fs.remove(path)
-                    try:
-                        self.generate_pdf(item, path, locale)
-                        self.sign_pdf(path)
-                        log.info("{} created".format(filename))
-                    except Exception:
-                        log.exception("Could not create {} ({})".format(
-                            filename, item.title
-                        ))
-                        # Don't leave probably broken PDFs laying around
-                        if fs.exists(path):
-                            fs.remove(path)
+                    pending.append((item, filename, locale))
+
+        self.timings = {}
+        start = perf_counter()
+        for item, filename, future in self.submit_pdfs(pending):
+            path = '{}/{}'.format(self.pdf_dir, filename)
+            if fs.exists(path):
+                fs.remove(path)
+            try:
+                data, duration = future.result()
+            except Exception:
+                log.exception("Could not create {} ({})".format(
+                    filename, item.title
+                ))
+                continue
+
+            with fs.open(path, 'wb') as f:
+                f.write(data)
+
+            self.timings[filename] = duration
+            log.info("{} created in {:.2f}s".format(filename, duration))
+
+        if self.timings:
+            log.info("{} PDFs created in {:.2f}s using {} worker(s)".format(
+                len(self.timings), perf_counter() - start, self.workers
+            ))
 
         # Delete old PDFs
         existing = fs.listdir(self.pdf_dir)
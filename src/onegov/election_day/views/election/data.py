@@ -5,6 +5,8 @@ from onegov.election_day import _
 from onegov.election_day import ElectionDayApp
 from onegov.election_day.layouts import ElectionLayout
 from onegov.election_day.utils import add_last_modified_header
+from onegov.election_day.utils import export_filename
+from onegov.election_day.utils import iter_export
 from onegov.election_day.utils.election import get_aggregated_list_results
 from onegov.election_day.utils.election import get_connection_results_api
 
@@ -37,8 +39,9 @@ def view_election_data_as_json(self, request):
         add_last_modified_header(response, self.last_modified)
 
     return {
-        'data': self.export(consider_completed=True),
-        'name': normalize_for_url(self.title)
+        'data': iter_export(request, self, consider_completed=True),
+        'name': normalize_for_url(self.title),
+        'path': 'exports/{}'.format(export_filename(self, 'json'))
     }
 
 
@@ -52,8 +55,25 @@ def view_election_data_as_csv(self, request):
         add_last_modified_header(response, self.last_modified)
 
     return {
-        'data': self.export(),
-        'name': normalize_for_url(self.title)
+        'data': iter_export(request, self),
+        'name': normalize_for_url(self.title),
+        'path': 'exports/{}'.format(export_filename(self, 'csv'))
+    }
+
+
+@ElectionDayApp.xlsx_file(model=Election, name='data-xlsx')
+def view_election_data_as_xlsx(self, request):
+
+    """ View the raw data as XLSX. """
+
+    @request.after
+    def add_last_modified(response):
+        add_last_modified_header(response, self.last_modified)
+
+    return {
+        'data': iter_export(request, self),
+        'name': normalize_for_url(self.title),
+        'path': 'exports/{}'.format(export_filename(self, 'xlsx'))
     }
 
 
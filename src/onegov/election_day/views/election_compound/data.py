@@ -5,6 +5,8 @@ from onegov.election_day import _
 from onegov.election_day import ElectionDayApp
 from onegov.election_day.layouts import ElectionCompoundLayout
 from onegov.election_day.utils import add_last_modified_header
+from onegov.election_day.utils import export_filename
+from onegov.election_day.utils import iter_export
 
 
 @ElectionDayApp.html(
@@ -35,15 +37,42 @@ def view_election_compound_data_as_json(self, request):
         add_last_modified_header(response, self.last_modified)
 
     return {
-        'data': self.export(consider_completed=True),
-        'name': normalize_for_url(self.title)
+        'data': iter_export(request, self, consider_completed=True),
+        'name': normalize_for_url(self.title),
+        'path': 'exports/{}'.format(export_filename(self, 'json'))
     }
 
 
 @ElectionDayApp.csv_file(model=ElectionCompound, name='data-csv')
 def view_election_compound_data_as_csv(self, request):
 
-    """ View the raw data as CSV. """
+    """ View the raw data as CSV.
+
+    The rows of the elections have different panachage columns, the rows
+    are therefore collected first to get the columns of all elections.
+
+    """
+
+    @request.after
+    def add_last_modified(response):
+        add_last_modified_header(response, self.last_modified)
+
+    return {
+        'data': self.export(),
+        'name': normalize_for_url(self.title),
+        'path': 'exports/{}'.format(export_filename(self, 'csv'))
+    }
+
+
+@ElectionDayApp.xlsx_file(model=ElectionCompound, name='data-xlsx')
+def view_election_compound_data_as_xlsx(self, request):
+
+    """ View the raw data as XLSX.
+
+    The rows of the elections have different panachage columns, the rows
+    are therefore collected first to get the columns of all elections.
+
+    """
 
     @request.after
     def add_last_modified(response):
@@ -51,7 +80,8 @@ def view_election_compound_data_as_csv(self, request):
 
     return {
         'data': self.export(),
-        'name': normalize_for_url(self.title)
+        'name': normalize_for_url(self.title),
+        'path': 'exports/{}'.format(export_filename(self, 'xlsx'))
     }
 
 
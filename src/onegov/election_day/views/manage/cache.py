@@ -5,6 +5,7 @@ from onegov.election_day import ElectionDayApp
 from onegov.election_day.forms import EmptyForm
 from onegov.election_day.layouts import DefaultLayout
 from onegov.election_day.models import Principal
+from onegov.election_day.utils import get_page_metrics
 
 
 @ElectionDayApp.manage_form(
@@ -38,3 +39,18 @@ def view_clear_pages_cache(self, request, form):
         ),
         'cancel': layout.manage_link
     }
+
+
+@ElectionDayApp.json(
+    model=Principal,
+    name='cache-metrics',
+    permission=Secret
+)
+def view_pages_cache_metrics(self, request):
+
+    """ Returns the hits, misses and average regeneration times of the
+    pages cache by path.
+
+    """
+
+    return get_page_metrics(request.app)
@@ -14,6 +14,7 @@ from onegov.election_day.formats import import_election_wabstic_proporz
 from onegov.election_day.forms import UploadMajorzElectionForm
 from onegov.election_day.forms import UploadProporzElectionForm
 from onegov.election_day.layouts import ManageElectionsLayout
+from onegov.election_day.utils import invalidate_pages
 from onegov.election_day.views.upload import unsupported_year_error
 
 
@@ -115,7 +116,7 @@ def view_upload_majorz_election(self, request, form):
             else:
                 status = 'success'
                 last_change = self.last_result_change
-                request.app.pages_cache.flush()
+                invalidate_pages(request, [self])
                 request.app.send_zulip(
                     request.app.principal.name,
                     'New results available: [{}]({})'.format(
@@ -223,7 +224,7 @@ def view_upload_proporz_election(self, request, form):
             else:
                 status = 'success'
                 last_change = self.last_result_change
-                request.app.pages_cache.flush()
+                invalidate_pages(request, [self])
                 request.app.send_zulip(
                     request.app.principal.name,
                     'New results available: [{}]({})'.format(
@@ -18,6 +18,7 @@ from onegov.election_day.formats.election.wabstic_proporz import \
 from onegov.election_day.forms.upload.wabsti_proporz import \
     CreateWabstiProporzElectionForm
 from onegov.election_day.models import Principal
+from onegov.election_day.utils import invalidate_pages
 from onegov.election_day.views.upload import set_locale, translate_errors
 from onegov.election_day.views.upload.wabsti_exporter import \
     authenticated_source
@@ -72,5 +73,5 @@ def view_create_wabsti_proporz(self, request):
         transaction.abort()
         return {'status': 'error', 'errors': errors}
     else:
-        request.app.pages_cache.flush()
+        invalidate_pages(request)
         return {'status': 'success', 'errors': {}}
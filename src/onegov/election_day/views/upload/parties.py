@@ -9,6 +9,7 @@ from onegov.election_day.formats import import_party_results
 from onegov.election_day.forms import UploadPartyResultsForm
 from onegov.election_day.layouts import ManageElectionCompoundsLayout
 from onegov.election_day.layouts import ManageElectionsLayout
+from onegov.election_day.utils import invalidate_pages
 
 
 @ElectionDayApp.manage_form(
@@ -41,7 +42,7 @@ def view_upload_election_party_results(self, request, form):
         else:
             status = 'success'
             last_change = self.last_result_change
-            request.app.pages_cache.flush()
+            invalidate_pages(request, [self])
             request.app.send_zulip(
                 request.app.principal.name,
                 'New party results available: [{}]({})'.format(
@@ -94,7 +95,7 @@ def view_upload_election_compound_party_results(self, request, form):
         else:
             status = 'success'
             last_change = self.last_result_change
-            request.app.pages_cache.flush()
+            invalidate_pages(request, [self])
             request.app.send_zulip(
                 request.app.principal.name,
                 'New party results available: [{}]({})'.format(
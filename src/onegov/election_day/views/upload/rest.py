@@ -14,6 +14,7 @@ from onegov.election_day.formats import import_vote_internal
 from onegov.election_day.forms import UploadRestForm
 from onegov.election_day.models import Principal
 from onegov.election_day.models import UploadToken
+from onegov.election_day.utils import invalidate_pages
 from onegov.election_day.views.upload import set_locale
 from onegov.election_day.views.upload import translate_errors
 from onegov.election_day.views.upload import unsupported_year_error
@@ -133,5 +134,5 @@ def view_upload_rest(self, request):
         transaction.abort()
         return {'status': 'error', 'errors': errors}
     else:
-        request.app.pages_cache.flush()
+        invalidate_pages(request, [item])
         return {'status': 'success', 'errors': {}}
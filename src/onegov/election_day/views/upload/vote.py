@@ -12,6 +12,7 @@ from onegov.election_day.formats import import_vote_wabstim
 from onegov.election_day.formats.common import BALLOT_TYPES
 from onegov.election_day.forms import UploadVoteForm
 from onegov.election_day.layouts import ManageVotesLayout
+from onegov.election_day.utils import invalidate_pages
 from onegov.election_day.views.upload import unsupported_year_error
 
 
@@ -104,7 +105,7 @@ def view_upload(self, request, form):
         else:
             status = 'success'
             last_change = self.last_result_change
-            request.app.pages_cache.flush()
+            invalidate_pages(request, [self])
             request.app.send_zulip(
                 request.app.principal.name,
                 'New results available: [{}]({})'.format(
@@ -13,6 +13,7 @@ from onegov.election_day.forms import UploadWabstiProporzElectionForm
 from onegov.election_day.forms import UploadWabstiVoteForm
 from onegov.election_day.models import DataSource
 from onegov.election_day.models import Principal
+from onegov.election_day.utils import invalidate_pages
 from onegov.election_day.views.upload import set_locale
 from onegov.election_day.views.upload import translate_errors
 from onegov.election_day.views.upload import unsupported_year_error
@@ -113,7 +114,9 @@ def view_upload_wabsti_vote(self, request):
         transaction.abort()
         return {'status': 'error', 'errors': errors}
     else:
-        request.app.pages_cache.flush()
+        invalidate_pages(
+            request, [item.item for item in data_source.items if item.item]
+        )
         return {'status': 'success', 'errors': {}}
 
 
@@ -208,7 +211,9 @@ def view_upload_wabsti_majorz(self, request):
         transaction.abort()
         return {'status': 'error', 'errors': errors}
     else:
-        request.app.pages_cache.flush()
+        invalidate_pages(
+            request, [item.item for item in data_source.items if item.item]
+        )
         return {'status': 'success', 'errors': {}}
 
 
@@ -311,5 +316,7 @@ def view_upload_wabsti_proporz(self, request):
         transaction.abort()
         return {'status': 'error', 'errors': errors}
     else:
-        request.app.pages_cache.flush()
+        invalidate_pages(
+            request, [item.item for item in data_source.items if item.item]
+        )
         return {'status': 'success', 'errors': {}}
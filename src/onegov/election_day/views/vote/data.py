@@ -4,6 +4,8 @@ from onegov.core.utils import normalize_for_url
 from onegov.election_day import ElectionDayApp
 from onegov.election_day.layouts import VoteLayout
 from onegov.election_day.utils import add_last_modified_header
+from onegov.election_day.utils import export_filename
+from onegov.election_day.utils import iter_export
 
 
 @ElectionDayApp.html(
@@ -34,8 +36,9 @@ def view_vote_data_as_json(self, request):
         add_last_modified_header(response, self.last_modified)
 
     return {
-        'data': self.export(),
-        'name': normalize_for_url(self.title)
+        'data': iter_export(request, self),
+        'name': normalize_for_url(self.title),
+        'path': 'exports/{}'.format(export_filename(self, 'json'))
     }
 
 
@@ -49,6 +52,23 @@ def view_vote_data_as_csv(self, request):
         add_last_modified_header(response, self.last_modified)
 
     return {
-        'data': self.export(),
-        'name': normalize_for_url(self.title)
+        'data': iter_export(request, self),
+        'name': normalize_for_url(self.title),
+        'path': 'exports/{}'.format(export_filename(self, 'csv'))
+    }
+
+
+@ElectionDayApp.xlsx_file(model=Vote, name='data-xlsx')
+def view_vote_data_as_xlsx(self, request):
+
+    """ View the raw data as XLSX. """
+
+    @request.after
+    def add_last_modified(response):
+        add_last_modified_header(response, self.last_modified)
+
+    return {
+        'data': iter_export(request, self),
+        'name': normalize_for_url(self.title),
+        'path': 'exports/{}'.format(export_filename(self, 'xlsx'))
     }
@@ -9,6 +9,7 @@ from onegov.core.collection import Pagination
 from onegov.core.utils import increment_name
 from onegov.core.utils import normalize_for_url
 from onegov.event.models import Event
+from onegov.event.models import Occurrence
 from onegov.gis import Coordinates
 from pytz import UTC
 from sedate import as_datetime
@@ -16,7 +17,9 @@ from sedate import replace_timezone
 from sedate import standardize_date
 from sedate import to_timezone
 from sqlalchemy import and_
+from sqlalchemy import func
 from sqlalchemy import or_
+from sqlalchemy.orm import selectinload
 
 
 EventImportItem = namedtuple(
@@ -134,6 +137,57 @@ class EventCollection(Pagination):
 
         self.session.flush()
 
+    def extend_occurrences(self):
+        """ Creates the occurrences of recurring events which entered the
+        time window of stored occurrences (this and the next year).
+
+        The window moves forward once a year. Only the occurrences after the
+        last stored occurrence of an event are added, existing occurrences
+        are left untouched.
+
+        :return: The number of events with added occurrences.
+
+        """
+
+        max_year = datetime.today().year + Event.occurrence_dates_year_limit
+
+        # events which have been extended already have an occurrence in the
+        # last year of the window (unless they recur less than once a year)
+        last = self.session.query(
+            Occurrence.event_id,
+            func.max(Occurrence.start).label('start')
+        ).group_by(Occurrence.event_id).subquery()
+
+        events = self.session.query(Event, last.c.start)
+        events = events.outerjoin(last, last.c.event_id == Event.id)
+        events = events.filter(
+            Event.state == 'published',
+            Event.recurrence != None,
+            Event.start != None,
+            Event.end != None,
+            or_(
+                last.c.start == None,
+                last.c.start < datetime(max_year, 1, 1, tzinfo=UTC)
+            )
+        )
+        events = events.options(selectinload(Event.occurrences))
+
+        count = 0
+        for event, last_start in events:
+            occurrences = [
+                event.spawn_occurrence(start)
+                for start in event.occurrence_dates()
+                if last_start is None or start > last_start
+            ]
+
+            if occurrences:
+                event.occurrences.extend(occurrences)
+                count += 1
+
+        self.session.flush()
+
+        return count
+
     def by_name(self, name):
         """ Returns an event by its URL-friendly name. """
 
@@ -241,18 +295,17 @@ class EventCollection(Pagination):
                     )
 
                 if changed:
-                    state = existing.state  # avoid updating occurrences
-                    existing.state = 'initiated'
-                    existing.title = event.title
-                    existing.location = event.location
-                    existing.tags = event.tags
-                    existing.timezone = event.timezone
-                    existing.start = event.start
-                    existing.end = event.end
-                    existing.content = event.content
-                    existing.coordinates = event.coordinates
-                    existing.recurrence = event.recurrence
-                    existing.state = state
+                    # update the occurrences only once
+                    with existing.deferred_occurrences():
+                        existing.title = event.title
+                        existing.location = event.location
+                        existing.tags = event.tags
+                        existing.timezone = event.timezone
+                        existing.start = event.start
+                        existing.end = event.end
+                        existing.content = event.content
+                        existing.coordinates = event.coordinates
+                        existing.recurrence = event.recurrence
                     existing.set_image(item.image, item.image_filename)
                     existing.set_pdf(item.pdf, item.pdf_filename)
                 if update_state:
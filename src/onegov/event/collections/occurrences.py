@@ -2,6 +2,7 @@ from cached_property import cached_property
 from datetime import date
 from datetime import timedelta
 from dateutil.relativedelta import relativedelta
+from hashlib import sha1
 from icalendar import Calendar as vCalendar
 from onegov.core.collection import Pagination
 from onegov.core.utils import get_unique_hstore_keys
@@ -12,9 +13,12 @@ from sedate import replace_timezone
 from sedate import standardize_date
 from sqlalchemy import and_
 from sqlalchemy import distinct
+from sqlalchemy import func
 from sqlalchemy import or_
 from sqlalchemy.dialects.postgresql import array
 from sqlalchemy.orm import contains_eager
+from sqlalchemy.orm import lazyload
+from sqlalchemy.orm import undefer
 
 
 class OccurrenceCollection(Pagination):
@@ -287,22 +291,71 @@ class OccurrenceCollection(Pagination):
         query = self.session.query(Occurrence).filter(Occurrence.name == name)
         return query.first()
 
-    def as_ical(self, request):
-        """ Returns the the events of the given occurrences as iCalendar
-        string.
+    def events_query(self):
+        """ Returns a query of the events of the occurrences. """
+
+        occurrences = self.query().with_entities(Occurrence.event_id)
+        occurrences = occurrences.order_by(None)
+
+        return self.session.query(Event).filter(
+            Event.id.in_(occurrences.subquery())
+        )
+
+    def ical_version(self):
+        """ Returns an etag for the iCalendar export, changing whenever the
+        export changes.
+
+        There's no last modification date, as the export also changes if
+        events are deleted or occurrences move out of the date window.
+
+        """
+
+        query = self.events_query().with_entities(
+            func.max(func.coalesce(Event.modified, Event.created)),
+            func.count(Event.id)
+        )
+        last_modified, count = query.one()
+
+        # the occurrences also depend on the current date
+        etag = sha1('{}-{}-{}'.format(
+            last_modified and last_modified.isoformat(),
+            count,
+            date.today().isoformat()
+        ).encode('utf-8')).hexdigest()
+
+        return etag
+
+    def iter_ical(self, request, batch_size=100):
+        """ Yields the events of the given occurrences as iCalendar chunks.
+
+        The events are loaded in batches using a server-side cursor, the
+        calendar is never held in memory as a whole.
 
         """
 
         vcalendar = vCalendar()
         vcalendar.add('prodid', '-//OneGov//onegov.event//')
         vcalendar.add('version', '2.0')
+        head, tail = vcalendar.to_ical().split(b'END:VCALENDAR')
+
+        yield head
+
+        query = self.events_query().options(
+            lazyload(Event.occurrences),
+            undefer(Event.content)
+        )
+        for event in query.yield_per(batch_size):
+            yield b''.join(
+                vevent.to_ical()
+                for vevent in event.get_ical_vevents(request.link(event))
+            )
+
+        yield b'END:VCALENDAR' + tail
 
-        query = self.query().with_entities(Occurrence.event_id)
-        event_ids = set([r.event_id for r in query])
+    def as_ical(self, request):
+        """ Returns the the events of the given occurrences as iCalendar
+        string.
 
-        query = self.session.query(Event).filter(Event.id.in_(event_ids))
-        for event in query:
-            for vevent in event.get_ical_vevents(request.link(event)):
-                vcalendar.add_component(vevent)
+        """
 
-        return vcalendar.to_ical()
+        return b''.join(self.iter_ical(request))
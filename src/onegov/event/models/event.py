@@ -1,5 +1,6 @@
 import warnings
 
+from contextlib import contextmanager
 from datetime import datetime
 from dateutil import rrule
 from dateutil.rrule import rrulestr
@@ -305,21 +306,26 @@ class Event(Base, OccurrenceMixin, ContentMixin, TimestampMixin,
 
         return dates
 
-    def spawn_occurrence(self, start):
-        """ Create an occurrence at the given date, without storing it. """
+    def occurrence_values(self, start):
+        """ Returns the values of the occurrence at the given date. """
 
         end = start + (self.end - self.start)
         name = '{0}-{1}'.format(self.name, start.date().isoformat())
 
-        return Occurrence(
-            title=self.title,
-            name=name,
-            location=self.location,
-            tags=self.tags,
-            start=start,
-            end=end,
-            timezone=self.timezone,
-        )
+        return {
+            'title': self.title,
+            'name': name,
+            'location': self.location,
+            'tags': self.tags,
+            'start': start,
+            'end': end,
+            'timezone': self.timezone,
+        }
+
+    def spawn_occurrence(self, start):
+        """ Create an occurrence at the given date, without storing it. """
+
+        return Occurrence(**self.occurrence_values(start))
 
     @property
     def virtual_occurrence(self):
@@ -351,22 +357,65 @@ class Event(Base, OccurrenceMixin, ContentMixin, TimestampMixin,
         Removes all occurrences if the event is not published or no start and
         end date/time is set. Only occurrences for this and next year are
         created.
-        """
 
-        # clear old occurrences
-        self.occurrences = []
+        Existing occurrences are kept and only changed if their values
+        differ, missing occurrences are added and obsolete occurrences are
+        removed.
 
-        # do not create occurrences unless the event is published
-        if not self.state == 'published':
-            return
+        """
 
-        # do not create occurrences unless start and end is set
-        if not self.start or not self.end:
+        if getattr(self, '_occurrences_deferred', False):
             return
 
-        # create all occurrences for this and next year
-        for start in self.occurrence_dates():
-            self.occurrences.append(self.spawn_occurrence(start))
+        # occurrences are only created for published events with a start
+        # and an end date/time
+        values = {}
+        if self.state == 'published' and self.start and self.end:
+            values = {
+                start: self.occurrence_values(start)
+                for start in self.occurrence_dates()
+            }
+
+        occurrences = []
+        for occurrence in self.occurrences:
+            new = values.pop(occurrence.start, None)
+            if new is None:
+                continue
+
+            for key, value in new.items():
+                if key == 'tags':
+                    if set(occurrence.tags) != set(value):
+                        occurrence.tags = value
+                elif getattr(occurrence, key) != value:
+                    setattr(occurrence, key, value)
+
+            occurrences.append(occurrence)
+
+        occurrences.extend(Occurrence(**new) for new in values.values())
+
+        # only touch the relationship if occurrences are added or removed
+        if len(occurrences) != len(self.occurrences) or values:
+            self.occurrences = sorted(occurrences, key=lambda o: o.start)
+
+    @contextmanager
+    def deferred_occurrences(self):
+        """ Updates the occurrences only once at the end of the block instead
+        of once per changed attribute::
+
+            with event.deferred_occurrences():
+                event.title = 'Concert'
+                event.start = start
+                event.end = end
+
+        """
+
+        self._occurrences_deferred = True
+        try:
+            yield self
+        finally:
+            self._occurrences_deferred = False
+
+        self._update_occurrences()
 
     def submit(self):
         """ Submit the event. """
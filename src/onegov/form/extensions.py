@@ -1,3 +1,7 @@
+from onegov.core.cache import lru_cache
+from onegov.form.parser.core import FORMCODE_CACHE_SIZE
+
+
 form_extensions = {}
 
 
@@ -65,10 +69,22 @@ class Extendable(object):
         if not extensions:
             return form_class
 
-        for extension in extensions:
-            if extension not in form_extensions:
-                raise KeyError(f"Unknown form extension: {extension}")
+        return extended_form_class(form_class, tuple(extensions))
+
+
+@lru_cache(maxsize=FORMCODE_CACHE_SIZE)
+def extended_form_class(form_class, extensions):
+    """ Returns the given form class with the given extensions applied.
+
+    The extended classes are cached, which is why extensions must not
+    change the form class they are given.
+
+    """
+
+    for extension in extensions:
+        if extension not in form_extensions:
+            raise KeyError(f"Unknown form extension: {extension}")
 
-            form_class = form_extensions[extension](form_class).create()
+        form_class = form_extensions[extension](form_class).create()
 
-        return form_class
+    return form_class
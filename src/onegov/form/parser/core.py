@@ -367,6 +367,12 @@ from onegov.form.parser.grammar import url
 from onegov.form.utils import as_internal_id
 
 
+#: The number of parsed formcodes (and form classes generated from them)
+#: which are kept in memory. The caches are shared by all applications, so
+#: identical formcode is only parsed once.
+FORMCODE_CACHE_SIZE = 256
+
+
 # cache the parser elements
 def create_parser_elements():
     elements = Bunch()
@@ -832,11 +838,14 @@ class CheckboxField(OptionsField, Field):
     type = 'checkbox'
 
 
-@lru_cache(maxsize=1)
+@lru_cache(maxsize=FORMCODE_CACHE_SIZE)
 def parse_formcode(formcode):
     """ Takes the given formcode and returns an intermediate representation
     that can be used to generate forms or do other things.
 
+    The result is cached by formcode and therefore shared, it must not be
+    changed.
+
     """
     parsed = yaml.load('\n'.join(translate_to_yaml(formcode)), CustomLoader)
 
@@ -1,9 +1,11 @@
 from html import escape
+from onegov.core.cache import lru_cache
 from onegov.form import errors
 from onegov.form.core import FieldDependency
 from onegov.form.core import Form
 from onegov.form.fields import MultiCheckboxField, DateTimeLocalField
 from onegov.form.fields import UploadField
+from onegov.form.parser.core import FORMCODE_CACHE_SIZE
 from onegov.form.parser.core import parse_formcode
 from onegov.form.utils import as_internal_id
 from onegov.form.utils import with_options
@@ -43,6 +45,20 @@ def parse_form(text, base_class=Form):
     """ Takes the given form text, parses it and returns a WTForms form
     class (not an instance of it).
 
+    The form classes are cached by form text and base class, so the same
+    class is returned for the same text. The class must not be changed,
+    subclass or clone it instead (see :meth:`onegov.form.core.Form.clone`).
+
+    """
+
+    return build_form_class(text, base_class)
+
+
+@lru_cache(maxsize=FORMCODE_CACHE_SIZE)
+def build_form_class(text, base_class):
+    """ Builds the form class of the given form text, see
+    :func:`parse_form`.
+
     """
 
     builder = WTFormsClassBuilder(base_class)
@@ -1,3 +1,4 @@
+from copy import copy
 from inspect import getmembers
 
 from wtforms.validators import DataRequired
@@ -11,6 +12,13 @@ def prepare_for_submission(
         for_change_request=False,
         force_simple=True,
 ):
+    """ Returns a subclass of the given form class, prepared for submissions.
+
+    The given form class is not changed, as form classes generated from
+    formcode are shared (see :func:`onegov.form.parse_form`).
+
+    """
+
     # force all upload fields to be simple, we do not support the more
     # complex add/keep/replace widget, which is hard to properly support
     # and is not super useful in submissions
@@ -20,24 +28,33 @@ def prepare_for_submission(
 
         return issubclass(attribute.field_class, UploadField)
 
+    class SubmissionForm(form_class):
+        pass
+
     for name, field in getmembers(form_class, predicate=is_upload):
 
-        if force_simple:
-            if 'render_kw' not in field.kwargs:
-                field.kwargs['render_kw'] = {}
+        # copy the unbound field, keeping its position in the form
+        field = copy(field)
+        field.kwargs = dict(field.kwargs)
 
-            field.kwargs['render_kw']['force_simple'] = True
+        if force_simple:
+            field.kwargs['render_kw'] = {
+                **(field.kwargs.get('render_kw') or {}),
+                'force_simple': True
+            }
 
         # Otherwise the user gets stuck when in form validation not
         # changing the file
         if for_change_request:
             validators = [StrictOptional()] + [
-                v for v in field.kwargs['validators'] or []
+                v for v in field.kwargs.get('validators') or []
                 if not isinstance(v, DataRequired)
             ]
             field.kwargs['validators'] = validators
 
-    return form_class
+        setattr(SubmissionForm, name, field)
+
+    return SubmissionForm
 
 
 def get_fields(form_class, names_only=False, exclude=None):
@@ -1,6 +1,7 @@
 from onegov.core.crypto import random_token
 from onegov.core.orm import Base
 from onegov.core.orm.mixins import ContentMixin, TimestampMixin
+from onegov.core.orm.mixins import meta_property
 from onegov.core.orm.types import UTCDateTime, UUID
 from onegov.core.utils import normalize_for_url
 from onegov.search import SearchableContent
@@ -86,19 +87,61 @@ class Newsletter(Base, ContentMixin, TimestampMixin, SearchableContent):
         secondary=newsletter_recipients,
         back_populates='newsletters')
 
+    #: true while the newsletter is delivered in batches (see
+    #: :meth:`open_recipients_query`)
+    delivery_pending = meta_property(default=False)
+
+    #: the number of recipients of the current (or last) delivery
+    delivery_total = meta_property(default=0)
+
+    #: the number of recipients the current (or last) delivery was sent to
+    delivery_sent = meta_property(default=0)
+
     @property
-    def open_recipients(self):
-        received = select([newsletter_recipients.c.recipient_id]).where(
+    def received(self):
+        """ Returns a query of the ids of the recipients who received this
+        newsletter.
+
+        """
+        return select([newsletter_recipients.c.recipient_id]).where(
             newsletter_recipients.c.newsletter_id == self.name)
 
-        return tuple(object_session(self).query(Recipient).filter(
+    def open_recipients_query(self):
+        """ Returns a query of the confirmed recipients who did not receive
+        this newsletter yet, ordered by id.
+
+        As recipients are marked as received in the same transaction as the
+        e-mails are sent, a delivery sent in batches can be resumed with
+        this query.
+
+        """
+        return object_session(self).query(Recipient).filter(
             and_(
                 not_(
-                    Recipient.id.in_(received)
+                    Recipient.id.in_(self.received)
                 ),
                 Recipient.confirmed == True
             )
-        ))
+        ).order_by(Recipient.id)
+
+    @property
+    def open_recipients(self):
+        return tuple(self.open_recipients_query())
+
+    def mark_as_received(self, recipient_ids):
+        """ Records that the recipients with the given ids received this
+        newsletter, using a single statement.
+
+        """
+        session = object_session(self)
+        values = [
+            {'newsletter_id': self.name, 'recipient_id': recipient_id}
+            for recipient_id in recipient_ids
+        ]
+
+        if values:
+            session.execute(newsletter_recipients.insert().values(values))
+            session.expire(self, ('recipients', ))
 
 
 class Recipient(Base, TimestampMixin):
@@ -121,8 +121,9 @@ class OrgApp(Framework, LibresIntegration, ElasticsearchApp, MapboxApp,
         else:
             return PageTemplate('')
 
-    @orm_cached(policy='on-table-change:tickets')
+    @property
     def ticket_count(self):
+        # the counts are maintained by triggers, reading them is cheap
         return TicketCollection(self.session()).get_count()
 
     @orm_cached(policy='on-table-change:ticket_permissions')
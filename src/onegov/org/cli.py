@@ -10,6 +10,7 @@ import re
 import requests
 import shutil
 import textwrap
+import transaction
 
 from cached_property import cached_property
 from collections import defaultdict
@@ -25,7 +26,7 @@ from onegov.core.crypto import random_token
 from onegov.core.csv import CSVFile
 from onegov.core.custom import json
 from onegov.core.utils import Bunch
-from onegov.directory import DirectoryEntry
+from onegov.directory import Directory, DirectoryEntry
 from onegov.directory.models.directory import DirectoryFile
 from onegov.event import Event, Occurrence, EventCollection
 from onegov.event.collections.events import EventImportItem
@@ -1294,6 +1295,56 @@ def fix_directory_files(group_context):
     return execute
 
 
+@cli.command('migrate-directory', context_settings={'singular': True})
+@click.argument('name')
+@click.option('--structure', type=click.File('r'), default=None,
+              help="File containing the new structure of the directory")
+@click.option('--batch-size', default=100,
+              help="Number of entries migrated at once")
+@click.option('--dry-run', is_flag=True, default=False,
+              help="Estimate the duration of the migration using a sample")
+@click.option('--sample-size', default=100,
+              help="Number of entries migrated for the estimate")
+@pass_group_context
+def migrate_directory(group_context, name, structure, batch_size, dry_run,
+                      sample_size):
+    """ Migrates the entries of the given directory to a new structure, in
+    batches. Without a new structure, the entries are migrated to the
+    current structure.
+
+    Unlike changing the structure in the browser, this is suitable for
+    directories with a lot of entries.
+
+    """
+
+    def execute(request, app):
+        directory = request.session.query(Directory)\
+            .filter_by(name=name).first()
+
+        if not directory:
+            abort(f"{name} could not be found")
+
+        migration = directory.migration(
+            structure and structure.read() or directory.structure,
+            directory.configuration
+        )
+
+        if not migration.possible:
+            abort("The new structure is incompatible with existing entries")
+
+        if dry_run:
+            count, seconds = migration.estimate(sample_size)
+            click.echo(f"Migrating {count} entries takes about {seconds:.0f}s")
+            transaction.abort()
+            return
+
+        count = directory.count
+        with tqdm(total=count, unit=' entries') as progress:
+            migration.execute_in_batches(batch_size, progress=progress.update)
+
+    return execute
+
+
 @cli.command('migrate-town', context_settings={'singular': True})
 @pass_group_context
 def migrate_town(group_context):
@@ -3,20 +3,24 @@ from datetime import datetime, timedelta
 from itertools import groupby
 from onegov.core.cache import lru_cache
 from onegov.core.templates import render_template
+from onegov.event import EventCollection
 from onegov.file import FileCollection
 from onegov.form import FormSubmission, parse_form
 from onegov.newsletter import Newsletter, NewsletterCollection
-from onegov.org import _, OrgApp
+from onegov.org import _, log, OrgApp
 from onegov.org.layout import DefaultMailLayout
 from onegov.org.models import ResourceRecipient, ResourceRecipientCollection
 from onegov.org.views.allocation import handle_rules_cronjob
-from onegov.org.views.newsletter import send_newsletter
+from onegov.org.views.newsletter import deliver_newsletter
+from onegov.org.views.newsletter import NEWSLETTER_TIME_BUDGET
+from onegov.org.views.newsletter import start_newsletter_delivery
 from onegov.reservation import Reservation, Resource, ResourceCollection
-from onegov.ticket import Ticket, TicketCollection
+from onegov.ticket import Ticket, TicketCollection, TicketCounter
 from onegov.user import User, UserCollection
 from sedate import replace_timezone, to_timezone, utcnow, align_date_to_day
 from sqlalchemy import and_
 from sqlalchemy.orm import undefer
+from time import monotonic
 from uuid import UUID
 
 
@@ -53,14 +57,51 @@ def send_scheduled_newsletter(request):
     ))
 
     for newsletter in newsletters:
-        send_newsletter(request, newsletter, newsletter.open_recipients)
+        # wait for a running delivery to finish
+        if newsletter.delivery_pending:
+            continue
+
+        start_newsletter_delivery(request, newsletter)
         newsletter.scheduled = None
 
 
+@OrgApp.cronjob(hour='*', minute='*/5', timezone='UTC')
+def deliver_newsletters(request):
+    # continues the deliveries started by the send view and the scheduled
+    # newsletters, each batch is committed on its own - large deliveries
+    # are spread over multiple runs, as they block all other cronjobs
+    until = monotonic() + NEWSLETTER_TIME_BUDGET
+
+    newsletters = NewsletterCollection(request.session).query()
+    newsletters = newsletters.filter(
+        Newsletter.meta['delivery_pending'].astext == 'true'
+    )
+
+    for name, in newsletters.with_entities(Newsletter.name).all():
+        newsletter = NewsletterCollection(request.session).by_name(name)
+        if not deliver_newsletter(request, newsletter, until=until):
+            break
+
+
 def publish_files(request):
     FileCollection(request.session).publish_files()
 
 
+@OrgApp.cronjob(hour=3, minute=30, timezone='Europe/Zurich')
+def extend_event_occurrences(request):
+    EventCollection(request.session).extend_occurrences()
+
+
+@OrgApp.cronjob(hour=4, minute=15, timezone='Europe/Zurich')
+def reconcile_ticket_counters(request):
+    # the counters are maintained by triggers, this merely ensures that
+    # they can't drift apart forever (e.g. through manual changes)
+    if TicketCounter.refresh(request.session):
+        log.warning(f'Ticket counters of {request.app.schema} were wrong')
+    else:
+        TicketCounter.compact(request.session)
+
+
 @OrgApp.cronjob(hour=23, minute=45, timezone='Europe/Zurich')
 def process_resource_rules(request):
     resources = ResourceCollection(request.app.libres_context)
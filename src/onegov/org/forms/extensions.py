@@ -107,9 +107,10 @@ class ChangeRequestFormExtension(FormExtension, name='change-request'):
 
         # XXX circular import
         from onegov.org.models.directory import ExtendedDirectoryEntry
-        prepare_for_submission(self.form_class, for_change_request=True)
+        form_class = prepare_for_submission(
+            self.form_class, for_change_request=True)
 
-        class ChangeRequestForm(self.form_class):
+        class ChangeRequestForm(form_class):
 
             @cached_property
             def target(self):
@@ -253,7 +253,8 @@ class ExtendedDirectory(Directory, AccessExtension, Extendable):
         from UploadFields.
 
         """
-        form_class = self.extend_form_class(self.form_class, self.extensions)
+        form_class = self.extend_form_class(
+            self.shared_form_class, self.extensions)
         form_class = prepare_for_submission(form_class, change_request)
         return form_class
 
@@ -358,8 +359,8 @@ class ExtendedDirectoryEntryCollection(DirectoryEntryCollection):
 
     def __init__(self, directory, type='extended', keywords=None, page=0,
                  searchwidget=None, published_only=None, past_only=None,
-                 upcoming_only=None):
-        super().__init__(directory, type, keywords, page, searchwidget)
+                 upcoming_only=None, after=None):
+        super().__init__(directory, type, keywords, page, searchwidget, after)
         self.published_only = published_only
         self.past_only = past_only
         self.upcoming_only = upcoming_only
@@ -273,7 +273,7 @@ def get_ticket(app, handler_code, id):
 
 @OrgApp.path(model=TicketCollection, path='/tickets/{handler}/{state}')
 def get_tickets(app, handler='ALL', state='open', page=0, group=None,
-                owner=None, extra_parameters=None):
+                owner=None, extra_parameters=None, after=None):
     return TicketCollection(
         app.session(),
         handler=handler,
@@ -282,6 +282,7 @@ def get_tickets(app, handler='ALL', state='open', page=0, group=None,
         group=group,
         owner=owner or '*',
         extra_parameters=extra_parameters,
+        after=after
     )
 
 
@@ -290,7 +291,7 @@ def get_tickets(app, handler='ALL', state='open', page=0, group=None,
 )
 def get_archived_tickets(
         app, handler='ALL', page=0, group=None, owner=None,
-        extra_parameters=None):
+        extra_parameters=None, after=None):
     return ArchivedTicketsCollection(
         app.session(),
         handler=handler,
@@ -298,7 +299,8 @@ def get_archived_tickets(
         page=page,
         group=group,
         owner=owner or '*',
-        extra_parameters=extra_parameters
+        extra_parameters=extra_parameters,
+        after=after
     )
 
 
@@ -600,7 +602,8 @@ def get_directory_entries(
         search_query=None,
         published_only=None,
         past_only=None,
-        upcoming_only=None
+        upcoming_only=None,
+        after=None
 ):
     directory = DirectoryCollection(app.session()).by_name(directory_name)
 
@@ -625,7 +628,8 @@ def get_directory_entries(
             searchwidget=searchwidget,
             published_only=published_only,
             past_only=past_only,
-            upcoming_only=upcoming_only
+            upcoming_only=upcoming_only,
+            after=after
         )
 
         collection.access = directory.access
@@ -15,6 +15,7 @@ from onegov.file import File, FileCollection
 from onegov.org import _
 from onegov.org.elements import DeleteLink, Link
 from onegov.org.models.search import Search
+from onegov.reservation import Allocation
 from onegov.ticket import TicketCollection
 from operator import attrgetter
 from purl import URL
@@ -324,19 +325,62 @@ class ReservationInfo(object):
         }
 
 
+class AllocationLinks(object):
+    """ Generates the links of the allocations of a resource.
+
+    Generating links through morepath is comparatively slow and the calendar
+    needs a handful of links for each allocation it shows. Therefore, each
+    link is generated once with a placeholder, which is then replaced by the
+    id of the allocation.
+
+    """
+
+    placeholder = 'ALLOCATIONID'
+
+    __slots__ = ['templates']
+
+    def __init__(self, request, resource):
+
+        def template(name=''):
+            return request.class_link(
+                Allocation,
+                {'resource': resource, 'id': self.placeholder},
+                name=name
+            )
+
+        self.templates = {
+            '': template(),
+            'edit': template('edit'),
+            'reserve': template('reserve'),
+            'tickets': request.link(TicketCollection(
+                session=request.session,
+                handler='RSV',
+                state='all',
+                extra_parameters={'allocation_id': self.placeholder}
+            ))
+        }
+
+    def link(self, allocation, name=''):
+        return self.templates[name].replace(
+            self.placeholder, str(allocation.id)
+        )
+
+
 class AllocationEventInfo(object):
 
-    __slots__ = ['allocation', 'availability', 'request', 'translate']
+    __slots__ = ['allocation', 'availability', 'request', 'translate', 'links']
 
-    def __init__(self, allocation, availability, request):
+    def __init__(self, allocation, availability, request, links=None):
         self.allocation = allocation
         self.availability = availability
         self.request = request
         self.translate = request.translate
+        self.links = links or AllocationLinks(request, allocation.resource)
 
     @classmethod
     def from_allocations(cls, request, scheduler, allocations):
         events = []
+        links = {}
 
         for key, group in groupby(allocations, key=attrgetter('_start')):
             grouped = tuple(group)
@@ -346,11 +390,16 @@ class AllocationEventInfo(object):
 
             for allocation in grouped:
                 if allocation.is_master:
+                    resource = allocation.resource
+                    if resource not in links:
+                        links[resource] = AllocationLinks(request, resource)
+
                     events.append(
                         cls(
                             allocation,
                             availability,
-                            request
+                            request,
+                            links[resource]
                         )
                     )
 
@@ -442,25 +491,18 @@ class AllocationEventInfo(object):
         if self.request.is_manager:
             yield Link(
                 _("Edit"),
-                self.request.link(self.allocation, name='edit'),
+                self.links.link(self.allocation, 'edit'),
             )
 
             yield Link(
                 _("Tickets"),
-                self.request.link(TicketCollection(
-                    session=self.request.session,
-                    handler='RSV',
-                    state='all',
-                    extra_parameters={
-                        'allocation_id': str(self.allocation.id)
-                    }
-                )),
+                self.links.link(self.allocation, 'tickets'),
             )
 
             if self.availability == 100.0:
                 yield DeleteLink(
                     _("Delete"),
-                    self.request.link(self.allocation),
+                    self.links.link(self.allocation),
                     confirm=_("Do you really want to delete this allocation?"),
                     extra_information=self.event_identification,
                     yes_button_text=_("Delete allocation")
@@ -468,7 +510,7 @@ class AllocationEventInfo(object):
             else:
                 yield DeleteLink(
                     _("Delete"),
-                    self.request.link(self.allocation),
+                    self.links.link(self.allocation),
                     confirm=_(
                         "This allocation can't be deleted because there are "
                         "existing reservations associated with it."
@@ -495,8 +537,8 @@ class AllocationEventInfo(object):
                 link(self.request).decode('utf-8')
                 for link in self.event_actions
             ],
-            'editurl': self.request.link(self.allocation, name='edit'),
-            'reserveurl': self.request.link(self.allocation, name='reserve')
+            'editurl': self.links.link(self.allocation, 'edit'),
+            'reserveurl': self.links.link(self.allocation, 'reserve')
         }
 
 
@@ -1,6 +1,6 @@
 import morepath
 
-from datetime import timedelta
+from datetime import datetime, timedelta
 from libres.db.models import ReservedSlot
 from libres.modules.errors import LibresError
 from onegov.core.security import Public, Private, Secret
@@ -44,22 +44,84 @@ def view_allocations_json(self, request):
     if not (start and end):
         return tuple()
 
-    # get all allocations (including mirrors), for the availability calculation
-    query = self.scheduler.allocations_in_range(start, end, masters_only=False)
-    query = query.order_by(Allocation._start)
-    query = query.options(defer(Allocation.data))
-    query = query.options(defer(Allocation.group))
-    query = query.options(
-        defaultload('reserved_slots')
-        .defer('reservation_token')
-        .defer('allocation_id')
-        .defer('end'))
-
-    # but only return the master allocations
-    return tuple(
-        e.as_dict() for e in utils.AllocationEventInfo.from_allocations(
-            request, self.scheduler, tuple(query)
+    def get_events():
+        # get all allocations (including mirrors), for the availability
+        # calculation
+        query = self.scheduler.allocations_in_range(
+            start, end, masters_only=False)
+        query = query.order_by(Allocation._start)
+        query = query.options(defer(Allocation.data))
+        query = query.options(defer(Allocation.group))
+        query = query.options(
+            defaultload('reserved_slots')
+            .defer('reservation_token')
+            .defer('allocation_id')
+            .defer('end'))
+
+        # but only return the master allocations
+        return tuple(
+            e.as_dict() for e in utils.AllocationEventInfo.from_allocations(
+                request, self.scheduler, tuple(query)
+            )
         )
+
+    # the actions shown to managers contain csrf protected links, which
+    # we cannot share between requests
+    if request.is_manager:
+        return get_events()
+
+    key = ':'.join((
+        'allocations',
+        self.id.hex,
+        start.isoformat(),
+        end.isoformat(),
+        request.locale or '',
+        allocations_change_key(self.scheduler, start, end)
+    ))
+
+    events = request.app.cache.get_or_create(
+        key, get_events, expiration_time=300
+    )
+
+    # slots move into the past while they are cached
+    return tuple(mark_past_events(events))
+
+
+def mark_past_events(events):
+    """ Updates the 'event-in-past' class of the given (cached) events. """
+
+    now = utcnow()
+
+    for event in events:
+        classes = [
+            c for c in event['className'].split() if c != 'event-in-past'
+        ]
+
+        if datetime.fromisoformat(event['end']) <= now:
+            classes.insert(0, 'event-in-past')
+
+        yield {**event, 'className': ' '.join(classes)}
+
+
+def allocations_change_key(scheduler, start, end):
+    """ Returns a key which changes whenever the allocations in the given
+    range or their reserved slots are added, changed or removed.
+
+    """
+
+    query = scheduler.allocations_in_range(start, end, masters_only=False)
+    query = query.outerjoin(
+        ReservedSlot, ReservedSlot.allocation_id == Allocation.id)
+    query = query.with_entities(
+        func.count(Allocation.id.distinct()),
+        func.count(ReservedSlot.allocation_id),
+        func.max(func.coalesce(Allocation.modified, Allocation.created)),
+        func.max(func.coalesce(ReservedSlot.modified, ReservedSlot.created))
+    )
+
+    return '-'.join(
+        value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        for value in query.one()
     )
 
 
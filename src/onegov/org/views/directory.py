@@ -1,3 +1,4 @@
+import json
 import re
 import transaction
 
@@ -13,7 +14,7 @@ from onegov.directory.errors import DuplicateEntryError
 from onegov.directory.errors import MissingColumnError
 from onegov.directory.errors import MissingFileError
 from onegov.directory.errors import ValidationError
-from onegov.form import FormCollection, as_internal_id
+from onegov.form import FormCollection
 from onegov.form.errors import InvalidFormSyntax, MixedTypeError, \
     DuplicateLabelError
 from onegov.form.fields import UploadField
@@ -27,6 +28,7 @@ from onegov.org.models import DirectorySubmissionAction
 from onegov.org.models import ExtendedDirectory, ExtendedDirectoryEntry
 from onegov.core.elements import Link
 from purl import URL
+from sqlalchemy import func, or_
 from tempfile import NamedTemporaryFile
 from webob.exc import HTTPForbidden
 
@@ -253,20 +255,69 @@ def get_filters(request, self, keyword_counts=None, view_name=None):
 
 
 def keyword_count(request, collection):
+    """ Returns the number of visible entries per keyword value (see
+    :meth:`onegov.directory.DirectoryEntryCollection.keyword_counts`).
+
+    The counts are cached until the entries of the directory change.
+
+    """
     self = collection
-    keywords = tuple(
-        as_internal_id(k)
-        for k in self.directory.configuration.keywords or tuple()
+    cls = self.model_class
+    query = self.without_keywords().query()
+
+    # the visibility rules of request.is_visible, applied by the query
+    if request.is_manager:
+        visibility = 'all'
+    else:
+        visibility = request.is_logged_in and 'member' or 'anonymous'
+
+        access = cls.meta['access'].astext
+        query = query.filter(or_(
+            access == None,
+            access.notin_(('private', 'secret'))
+        ))
+
+        if not request.is_logged_in:
+            query = query.filter(cls.published)
+
+    # searches are not cached
+    if self.searchwidget:
+        return self.keyword_counts(query)
+
+    key = ':'.join((
+        'directory-keyword-counts',
+        self.directory.id.hex,
+        visibility,
+        json.dumps(self.keywords, sort_keys=True),
+        entries_change_key(request.session, self.directory)
+    ))
+
+    return request.app.cache.get_or_create(
+        key, lambda: self.keyword_counts(query), expiration_time=300
+    )
+
+
+def entries_change_key(session, directory):
+    """ Returns a key which changes whenever the entries of the given
+    directory are added, changed or removed.
+
+    """
+
+    query = session.query(DirectoryEntry)
+    query = query.filter_by(directory_id=directory.id)
+    query = query.with_entities(
+        func.count(DirectoryEntry.id),
+        func.max(func.coalesce(
+            DirectoryEntry.modified, DirectoryEntry.created))
     )
-    fields = {f.id: f for f in self.directory.fields if f.id in keywords}
-    counts = {}
-    for model in request.exclude_invisible(self.without_keywords().query()):
-        for entry in model.keywords:
-            field_id, value = entry.split(':', 1)
-            if field_id in fields:
-                f_count = counts.setdefault(field_id, defaultdict(int))
-                f_count[value] += 1
-    return counts
+
+    count, changed = query.one()
+
+    return '-'.join((
+        str(count),
+        changed and changed.isoformat() or '',
+        directory.modified and directory.modified.isoformat() or ''
+    ))
 
 
 @OrgApp.html(
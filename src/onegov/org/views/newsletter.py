@@ -1,6 +1,7 @@
 """ The newsletter view. """
 
 import morepath
+import transaction
 
 from collections import OrderedDict
 from itertools import groupby
@@ -13,6 +14,7 @@ from onegov.newsletter import Newsletter
 from onegov.newsletter import NewsletterCollection
 from onegov.newsletter import Recipient
 from onegov.newsletter import RecipientCollection
+from onegov.newsletter import Subscription
 from onegov.newsletter.errors import AlreadyExistsError
 from onegov.org import _, OrgApp
 from onegov.org.forms import NewsletterForm
@@ -29,6 +31,7 @@ from sedate import utcnow
 from sqlalchemy import desc
 from sqlalchemy.orm import undefer
 from string import Template
+from time import monotonic
 
 
 def get_newsletter_form(model, request):
@@ -273,10 +276,47 @@ def delete_page(self, request):
     request.success(_("The newsletter was deleted"))
 
 
-def send_newsletter(request, newsletter, recipients, is_test=False,
-                    layout=None):
+#: The number of e-mails sent per batch. Larger deliveries are continued
+#: in the background by :func:`onegov.org.cronjobs.deliver_newsletters`
+NEWSLETTER_BATCH_SIZE = 500
+
+#: The number of seconds a single run of the delivery job sends batches, the
+#: rest is sent by the next run (see ``CRONJOB_MAX_DURATION``)
+NEWSLETTER_TIME_BUDGET = 20
+
+
+class UnsubscribeLinks(object):
+    """ Generates the unsubscribe links of many recipients, without going
+    through the path resolution for each of them.
+
+    """
+
+    placeholders = ('RECIPIENTID', 'RECIPIENTTOKEN')
+
+    __slots__ = ('template', )
+
+    def __init__(self, request):
+        recipient_id, token = self.placeholders
+        self.template = request.class_link(
+            Subscription,
+            {'recipient_id': recipient_id, 'token': token},
+            name='unsubscribe'
+        )
+
+    def link(self, recipient):
+        recipient_id, token = self.placeholders
+        return self.template\
+            .replace(recipient_id, recipient.id.hex)\
+            .replace(token, recipient.token)
+
+
+def render_newsletter(request, newsletter, layout=None):
+    """ Renders the newsletter once, the unsubscribe link is left as
+    ``$unsubscribe`` placeholder.
+
+    """
     layout = layout or DefaultMailLayout(newsletter, request)
-    html = Template(render_template(
+    return Template(render_template(
         'mail_newsletter.pt', request, {
             'layout': layout,
             'lead': layout.linkify(newsletter.lead or ''),
@@ -290,24 +330,105 @@ def send_newsletter(request, newsletter, recipients, is_test=False,
         }
     ))
 
-    count = 0
 
+def send_test_newsletter(request, newsletter, recipients, layout=None):
+    """ Sends the newsletter to the given recipients as a test, they are not
+    recorded as receivers of the newsletter. Returns the number of e-mails
+    sent.
+
+    The actual delivery is done in batches, see
+    :func:`start_newsletter_delivery`.
+
+    """
+    html = render_newsletter(request, newsletter, layout)
+    links = UnsubscribeLinks(request)
+
+    count = 0
     for count, recipient in enumerate(recipients, start=1):
-        unsubscribe = request.link(recipient.subscription, 'unsubscribe')
+        request.app.send_marketing_email(
+            subject=newsletter.title,
+            receivers=(recipient.address, ),
+            content=html.substitute(unsubscribe=links.link(recipient))
+        )
+
+    return count
 
+
+def send_newsletter_batch(request, newsletter, html=None, batch_size=None):
+    """ Sends the newsletter to the next batch of open recipients and
+    updates the progress of the delivery. Returns the number of e-mails
+    sent, which is smaller than the batch size once the delivery is done.
+
+    """
+    batch_size = batch_size or NEWSLETTER_BATCH_SIZE
+    recipients = newsletter.open_recipients_query().limit(batch_size).all()
+
+    html = html or render_newsletter(request, newsletter)
+    links = UnsubscribeLinks(request)
+
+    for recipient in recipients:
         request.app.send_marketing_email(
             subject=newsletter.title,
             receivers=(recipient.address, ),
-            content=html.substitute(unsubscribe=unsubscribe)
+            content=html.substitute(unsubscribe=links.link(recipient))
         )
 
-        if not is_test and recipient not in newsletter.recipients:
-            newsletter.recipients.append(recipient)
+    newsletter.mark_as_received(recipient.id for recipient in recipients)
+    newsletter.sent = newsletter.sent or utcnow()
+    newsletter.delivery_sent += len(recipients)
 
-    if not is_test:
-        newsletter.sent = newsletter.sent or utcnow()
+    if len(recipients) < batch_size:
+        newsletter.delivery_pending = False
 
-    return count
+    return len(recipients)
+
+
+def start_newsletter_delivery(request, newsletter, batch_size=None):
+    """ Starts the delivery of the newsletter to all open recipients.
+
+    The first batch is sent with the current transaction, the rest of the
+    recipients are sent to by :func:`deliver_newsletter` in the background.
+    Returns the number of recipients.
+
+    """
+    total = newsletter.open_recipients_query().count()
+
+    newsletter.delivery_total = total
+    newsletter.delivery_sent = 0
+    newsletter.delivery_pending = True
+
+    send_newsletter_batch(request, newsletter, batch_size=batch_size)
+
+    return total
+
+
+def deliver_newsletter(request, newsletter, batch_size=None, until=None):
+    """ Continues the pending delivery of the given newsletter, committing
+    each batch on its own. This keeps the number of e-mails held by the
+    transaction low and the delivery may be resumed if it is interrupted.
+
+    If a deadline is given (as value of :func:`time.monotonic`), no further
+    batches are sent once it has passed. At least one batch is sent though.
+
+    Returns True if the delivery is done.
+
+    """
+    name = newsletter.name
+    html = render_newsletter(request, newsletter)
+
+    while True:
+        # the session is closed after each commit
+        newsletter = request.session.query(Newsletter)\
+            .filter_by(name=name).one()
+
+        if not newsletter.delivery_pending:
+            return True
+
+        send_newsletter_batch(request, newsletter, html, batch_size)
+        transaction.commit()
+
+        if until is not None and monotonic() >= until:
+            return False
 
 
 @OrgApp.form(model=Newsletter, template='send_newsletter.pt', name='send',
@@ -315,16 +436,36 @@ def send_newsletter(request, newsletter, recipients, is_test=False,
 def handle_send_newsletter(self, request, form, layout=None):
     layout = layout or NewsletterLayout(self, request)
 
-    open_recipients = self.open_recipients
+    # the recipients are sent to in batches, we only need to know if
+    # there are any left
+    open_recipients = self.open_recipients_query().first() is not None
 
     if form.submitted(request):
-        if form.send.data == 'now':
-            sent = send_newsletter(request, self, open_recipients)
-
-            request.success(_('Sent "${title}" to ${n} recipients', mapping={
-                'title': self.title,
-                'n': sent
-            }))
+        # a running delivery must not be restarted, it would be sent twice
+        if self.delivery_pending:
+            request.info(_(
+                'The delivery of "${title}" is still in progress', mapping={
+                    'title': self.title
+                }
+            ))
+        elif form.send.data == 'now':
+            total = start_newsletter_delivery(request, self)
+
+            if self.delivery_pending:
+                request.success(_(
+                    'Sending "${title}" to ${n} recipients, the delivery '
+                    'continues in the background', mapping={
+                        'title': self.title,
+                        'n': total
+                    }
+                ))
+            else:
+                request.success(_(
+                    'Sent "${title}" to ${n} recipients', mapping={
+                        'title': self.title,
+                        'n': total
+                    }
+                ))
         elif form.send.data == 'specify':
             self.scheduled = form.time.data
 
@@ -355,7 +496,7 @@ def handle_test_newsletter(self, request, form, layout=None):
     layout = layout or NewsletterLayout(self, request)
 
     if form.submitted(request):
-        send_newsletter(request, self, (form.recipient, ), is_test=True)
+        send_test_newsletter(request, self, (form.recipient, ))
 
         request.success(_('Sent "${title}" to ${recipient}', mapping={
             'title': self.title,
@@ -1,10 +1,12 @@
 """ The onegov org collection of images uploaded to the site. """
 
+
 from datetime import date
 from morepath import redirect
 from morepath.request import Response
 from onegov.core.security import Public, Private
 from onegov.core.utils import linkify, normalize_for_url
+from onegov.core.utils import stream_after_commit
 from onegov.event import Occurrence, OccurrenceCollection
 from onegov.org import _, OrgApp
 from onegov.org.elements import Link
@@ -123,13 +125,25 @@ def ical_export_occurence(self, request):
 
 @OrgApp.view(model=OccurrenceCollection, name='ical', permission=Public)
 def ical_export_occurences(self, request):
-    """ Returns the occurrences as ics. """
+    """ Returns the occurrences as ics.
 
-    return Response(
-        self.as_ical(request),
+    The calendar is streamed. Subscribers polling the calendar get an empty
+    response (304) if the calendar didn't change.
+
+    """
+
+    etag = self.ical_version()
+
+    # the calendar is only generated if the response is not a 304
+    response = Response(
+        app_iter=stream_after_commit(request, self.iter_ical(request)),
         content_type='text/calendar',
-        content_disposition='inline; filename=calendar.ics'
+        content_disposition='inline; filename=calendar.ics',
+        conditional_response=True
     )
+    response.etag = etag
+
+    return response
 
 
 @OrgApp.form(model=OccurrenceCollection, name='export', permission=Public,
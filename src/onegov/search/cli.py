@@ -3,6 +3,7 @@
 import click
 
 from onegov.core.cli import command_group, pass_group_context
+from onegov.search.reindex import ParallelReindex
 from sedate import utcnow
 
 
@@ -11,9 +12,27 @@ cli = command_group()
 
 @cli.command(context_settings={'default_selector': '*'})
 @click.option('--fail', is_flag=True, default=False, help='Fail on errors')
+@click.option('--processes', type=int, default=0,
+              help='Rebuild the indices in the background, using the given '
+                   'number of worker processes')
+@click.option('--checkpoint', default=None,
+              help='Directory to store the progress of a parallel reindex '
+                   'in, allowing an interrupted run to be resumed')
+@click.option('--batch-size', type=int, default=1000,
+              help='Records loaded at once during a parallel reindex')
 @pass_group_context
-def reindex(group_context, fail):
-    """ Reindexes all objects in the elasticsearch database. """
+def reindex(group_context, fail, processes, checkpoint, batch_size):
+    """ Reindexes all objects in the elasticsearch database.
+
+    By default, the indices are deleted and rebuilt. With --processes, the
+    new indices are built in the background and swapped in when done, so
+    search keeps working throughout.
+
+    """
+
+    if checkpoint and not processes:
+        click.secho('--checkpoint requires --processes', fg='red')
+        return
 
     def run_reindex(request, app):
         if not hasattr(request.app, 'es_client'):
@@ -23,7 +42,17 @@ def reindex(group_context, fail):
         print(click.style(title, underline=True))
 
         start = utcnow()
-        request.app.es_perform_reindex(fail)
+
+        if processes:
+            ParallelReindex(
+                request.app,
+                processes=processes,
+                checkpoint=checkpoint,
+                batch_size=batch_size,
+                fail=fail
+            ).run()
+        else:
+            request.app.es_perform_reindex(fail)
 
         print(f"took {utcnow() - start}")
 
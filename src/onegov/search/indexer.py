@@ -10,6 +10,7 @@ from onegov.core.utils import is_non_string_iterable
 from onegov.search import log, Searchable, utils
 from onegov.search.errors import SearchOfflineError
 from queue import Queue, Empty, Full
+from time import perf_counter
 
 
 ES_ANALYZER_MAP = {
@@ -260,21 +261,58 @@ class Indexer(object):
         return True
 
     def ensure_index(self, task):
+        # outside of a build we write through the alias, as it keeps pointing
+        # to the current index, even if another process switched it over
         return self.ixmgr.ensure_index(
             task['schema'],
             task['language'],
             self.mappings[task['type_name']],
-            return_index='internal'
+            return_index=self.ixmgr.build and 'internal' or 'external'
         )
 
+    def build_indices(self, task, aliases=None):
+        """ Returns the internal indices of the builds in progress, which
+        the document of the given index task has to be written to as well.
+
+        Outside of a build, documents are written through the alias, which
+        keeps pointing to the current index until the build is activated
+        (see :class:`onegov.search.reindex.ParallelReindex`). Without
+        writing them to the build as well, the changes made during a
+        reindex would be lost.
+
+        The indices are cached in the given dictionary, if any.
+
+        """
+        if self.ixmgr.build:
+            return ()
+
+        mapping = self.mappings[task['type_name']]
+        current = self.ixmgr.get_internal_index_name(
+            task['schema'], task['language'], mapping.name, mapping.version)
+
+        if aliases is None:
+            aliases = {}
+
+        if current not in aliases:
+            indices = self.es_client.indices.get_alias(index=f'{current}_*')
+
+            # activated builds are written to through the alias
+            aliases[current] = tuple(
+                internal for internal, info in indices.items()
+                if not info['aliases']
+            )
+
+        return aliases[current]
+
     def index(self, task):
         index = self.ensure_index(task)
 
-        self.es_client.index(
-            index=index,
-            id=task['id'],
-            body=task['properties']
-        )
+        for internal in (index, *self.build_indices(task)):
+            self.es_client.index(
+                index=internal,
+                id=task['id'],
+                body=task['properties']
+            )
 
     def delete(self, task):
         # get all the types this model could be stored in (with polymorphic)
@@ -295,8 +333,11 @@ class Indexer(object):
                 type_name=type
             )
 
-            # for the delete operation we need the internal index names
-            for internal in self.es_client.indices.get_alias(index=ix).keys():
+            # for the delete operation we need the internal index names,
+            # including the ones of a build which have no alias yet
+            indices = self.es_client.indices.get_alias(index=f'{ix}-*')
+
+            for internal in indices.keys():
                 try:
                     self.es_client.delete(
                         index=internal,
@@ -306,6 +347,349 @@ class Indexer(object):
                     pass
 
 
+class IndexerStatistics(object):
+    """ Keeps simple counters about the work done by an indexer. Meant to be
+    inspected by monitoring code or from the shell, not persisted.
+
+    """
+
+    __slots__ = (
+        'batches',
+        'tasks',
+        'coalesced',
+        'failures',
+        'last_batch_size',
+        'max_batch_size',
+        'last_latency',
+        'total_latency',
+        'max_queue_depth',
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.batches = 0
+        self.tasks = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_latency = 0.0
+        self.total_latency = 0.0
+        self.max_queue_depth = 0
+
+    @property
+    def average_batch_size(self):
+        return self.batches and self.tasks / self.batches or 0
+
+    @property
+    def average_latency(self):
+        return self.batches and self.total_latency / self.batches or 0.0
+
+    def record_queue_depth(self, depth):
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def record_batch(self, tasks, coalesced, actions, latency):
+        self.batches += 1
+        self.tasks += tasks
+        self.coalesced += tasks - coalesced
+        self.last_batch_size = actions
+        self.max_batch_size = max(self.max_batch_size, actions)
+        self.last_latency = latency
+        self.total_latency += latency
+
+    def as_dict(self):
+        return {
+            'batches': self.batches,
+            'tasks': self.tasks,
+            'coalesced': self.coalesced,
+            'failures': self.failures,
+            'last_batch_size': self.last_batch_size,
+            'max_batch_size': self.max_batch_size,
+            'average_batch_size': self.average_batch_size,
+            'last_latency': self.last_latency,
+            'average_latency': self.average_latency,
+            'max_queue_depth': self.max_queue_depth,
+        }
+
+
+def coalesce_tasks(tasks):
+    """ Takes a list of indexer tasks and reduces them to the minimal set of
+    operations needed to reach the same end state.
+
+    Tasks are grouped by document (schema, type and id). For each document
+    we remember if it was deleted at any point and which index task came last
+    (if any). A delete followed by an index (which is what an update looks
+    like) thus results in one delete and one index task, no matter how often
+    the document was updated in the meantime.
+
+    Returns a list of (delete, index) tuples in the order in which the
+    documents were first seen. Either one of the two may be None.
+
+    """
+    documents = {}
+
+    for task in tasks:
+        key = (task['schema'], task['type_name'], task['id'])
+        delete, index = documents.get(key, (None, None))
+
+        if task['action'] == 'delete':
+            documents[key] = (task, None)
+        elif task['action'] == 'index':
+            documents[key] = (delete, task)
+        else:
+            raise NotImplementedError
+
+    return list(documents.values())
+
+
+class BulkIndexer(Indexer):
+    """ An indexer which drains the queue in batches and sends them to
+    elasticsearch using the bulk api.
+
+    Repeated changes to the same document within a batch are coalesced (see
+    :func:`coalesce_tasks`), so a request which updates the same object a
+    dozen times results in a single index operation.
+
+    Like the :class:`Indexer`, this class is tolerant of elasticsearch
+    outages: If the cluster cannot be reached, the batch is kept and retried
+    on the next call. Since index and delete operations are idempotent, it
+    is safe to send a partially processed batch again.
+
+    Items which are rejected by elasticsearch with a temporary error (429 or
+    5xx) are kept for the next run as well. Items rejected for other reasons
+    are logged and dropped, as retrying them won't help.
+
+    The bulk helper is not allowed to retry rejected items by itself, as it
+    would send them after the rest of the batch. A retried index could then
+    overwrite a later delete of the same document (or vice versa). Instead,
+    rejected items are put at the head of the next batch, where they are
+    coalesced with the newer tasks of the same document.
+
+    When building indices (see :class:`onegov.search.reindex.ParallelReindex`)
+    documents are only created. The live indexers write the changes made
+    during the build to it as well, a document created by them is newer than
+    the record which was loaded by the build.
+
+    """
+
+    # http status codes of bulk items which we retry on the next run
+    retry_status_codes = (429, 502, 503, 504)
+
+    def __init__(self, mappings, queue, es_client, hostname=None,
+                 batch_size=500):
+        super().__init__(mappings, queue, es_client, hostname)
+        self.batch_size = batch_size
+        self.failed_tasks = []
+        self.statistics = IndexerStatistics()
+
+    @property
+    def queue_depth(self):
+        return self.queue.qsize() + len(self.failed_tasks)
+
+    def next_batch(self, block=False, timeout=None):
+        """ Returns the next batch of tasks, starting with the tasks that
+        failed during the last run.
+
+        """
+        batch, self.failed_tasks = self.failed_tasks, []
+
+        try:
+            while len(batch) < self.batch_size:
+                batch.append(self.queue.get(block, timeout))
+
+                # only block for the first task
+                block = False
+        except Empty:
+            pass
+
+        return batch
+
+    def process(self, block=False, timeout=None):
+        """ Processes the queue in batches until it is empty or until there's
+        an error.
+
+        :return: The number of successfully processed tasks (before
+        coalescing).
+
+        """
+        processed = 0
+
+        while True:
+            self.statistics.record_queue_depth(self.queue_depth)
+
+            batch = self.next_batch(block, timeout)
+            block = False
+
+            if not batch:
+                return processed
+
+            processed += self.process_batch(batch)
+
+            if self.failed_tasks:
+                return processed
+
+    def process_batch(self, batch):
+        """ Sends the given batch of tasks to elasticsearch. Tasks which have
+        to be retried are stored in ``failed_tasks``.
+
+        :return: The number of successfully processed tasks.
+
+        """
+        start = perf_counter()
+
+        documents = coalesce_tasks(batch)
+        coalesced = sum(1 for doc in documents for task in doc if task)
+
+        try:
+            actions, tasks = self.bulk_actions(documents)
+            retry = self.send_bulk(actions, tasks)
+        except SearchOfflineError:
+            self.statistics.failures += 1
+            self.failed_tasks = batch
+            return 0
+
+        self.statistics.record_batch(
+            len(batch), coalesced, len(actions), perf_counter() - start)
+
+        if retry:
+            self.statistics.failures += 1
+            self.failed_tasks = retry
+
+        done = len(batch) - len(retry)
+
+        for i in range(done):
+            self.queue.task_done()
+
+        return done
+
+    def bulk_actions(self, documents):
+        """ Turns the given coalesced documents (see :func:`coalesce_tasks`)
+        into a list of bulk actions. Additionally returns a dictionary with
+        the originating (delete, index) tasks of each action, keyed by
+        operation, index and id.
+
+        """
+        actions = []
+        tasks = {}
+        aliases = {}
+
+        def add(op_type, index, document, **extra):
+            id = next(t['id'] for t in document if t)
+            actions.append({
+                '_op_type': op_type,
+                '_index': index,
+                '_id': id,
+                **extra
+            })
+            tasks[(op_type, index, str(id))] = document
+
+        for document in documents:
+            delete, index = document
+
+            if delete:
+                for internal in self.internal_indices(delete, aliases):
+                    add('delete', internal, document)
+
+            if index:
+                add(self.ixmgr.build and 'create' or 'index',
+                    self.ensure_index(index), document,
+                    _source=index['properties'])
+
+                for internal in self.build_indices(index, aliases):
+                    add('index', internal, document,
+                        _source=index['properties'])
+
+        return actions, tasks
+
+    def internal_indices(self, task, aliases):
+        """ Returns the internal indices which may contain the document
+        referred to by the given delete task. See :meth:`Indexer.delete`.
+
+        The indices of a build in progress are included, so deletions made
+        during a reindex do not reappear once the build is activated.
+
+        The aliases are cached in the given dictionary, so each external
+        index is only queried once per batch.
+
+        """
+        mapping = self.mappings[task['type_name']]
+
+        if mapping.model:
+            types = utils.related_types(mapping.model)
+        else:
+            types = (mapping.name, )
+
+        for type in types:
+            ix = self.ixmgr.get_external_index_name(
+                schema=task['schema'],
+                language='*',
+                type_name=type
+            )
+
+            if ix not in aliases:
+                aliases[ix] = tuple(
+                    self.es_client.indices.get_alias(index=f'{ix}-*').keys())
+
+            yield from aliases[ix]
+
+    def send_bulk(self, actions, tasks):
+        """ Sends the actions to elasticsearch. Returns the tasks that should
+        be retried later.
+
+        Rejected items are not retried by the bulk helper, to keep the order
+        of the operations on each document (see :class:`BulkIndexer`). We
+        look up the originating tasks of each failed result and hand them
+        back to the caller instead.
+
+        If any action of a document fails, all its tasks are retried, as
+        retrying only the delete of an updated document would remove it
+        from the index.
+
+        """
+        retry = {}
+
+        results = streaming_bulk(
+            self.es_client,
+            actions,
+            chunk_size=self.batch_size,
+            max_retries=0,
+            raise_on_error=False,
+            raise_on_exception=False
+        )
+
+        for ok, info in results:
+            if ok:
+                continue
+
+            op, details = info.popitem()
+            status = details.get('status')
+
+            if op == 'delete' and status == 404:
+                continue
+
+            # the document has been written by a live indexer in the meantime
+            if op == 'create' and status == 409:
+                continue
+
+            if status in self.retry_status_codes:
+                # documents written through an alias are reported with the
+                # internal index name
+                index, doc_id = details['_index'], str(details['_id'])
+                document = (
+                    tasks.get((op, index, doc_id))
+                    or tasks[(op, index.rsplit('-', 1)[0], doc_id)]
+                )
+                retry[id(document)] = document
+                continue
+
+            log.error(f"Failed to {op} document {details.get('_id')} "
+                      f"in {details.get('_index')}: {details.get('error')}")
+
+        return [task for doc in retry.values() for task in doc if task]
+
+
 class TypeMapping(object):
 
     __slots__ = ['name', 'mapping', 'version', 'model']
@@ -432,13 +816,18 @@ class IndexManager(object):
     have an internal name and an external alias. To facilitate that, versions
     are used.
 
+    If a build is given, the indices are created with the build appended to
+    the version and no alias is pointed to them. This is used to rebuild the
+    indices in the background, see :meth:`activate_build`.
+
     """
 
-    def __init__(self, hostname, es_client):
+    def __init__(self, hostname, es_client, build=None):
         assert hostname and es_client
 
         self.hostname = hostname
         self.es_client = es_client
+        self.build = build
         self.created_indices = set()
 
     @property
@@ -498,16 +887,24 @@ class IndexManager(object):
 
         external = self.get_external_index_name(schema, language, mapping.name)
         internal = self.get_internal_index_name(
-            schema, language, mapping.name, mapping.version)
-
-        return_value = return_index == 'external' and external or internal
+            schema, language, mapping.name, mapping.version, self.build)
 
         if internal in self.created_indices:
-            return return_value
+            return return_index == 'external' and external or internal
 
         if self.es_client.indices.exists(internal):
             self.created_indices.add(internal)
-            return return_value
+            return return_index == 'external' and external or internal
+
+        # the alias might point to a rebuilt index of the same version
+        if not self.build:
+            rebuilt = self.get_rebuilt_index_name(external, mapping.version)
+
+            if rebuilt:
+                internal = rebuilt
+
+                self.created_indices.add(internal)
+                return return_index == 'external' and external or internal
 
         # create the index
         self.es_client.indices.create(internal, body={
@@ -524,13 +921,81 @@ class IndexManager(object):
             }
         })
 
-        # point the alias to the new index
-        self.es_client.indices.put_alias(name=external, index=internal)
+        # point the alias to the new index (unless we are building), writes
+        # through the alias go to the newest index
+        if not self.build:
+            self.es_client.indices.put_alias(
+                name=external,
+                index=internal,
+                body={'is_write_index': True}
+            )
 
         # cache the result
         self.created_indices.add(internal)
 
-        return return_value
+        return return_index == 'external' and external or internal
+
+    def get_rebuilt_index_name(self, external, version):
+        """ Returns the internal name of the index the given alias points to,
+        if said index is a build of the given version.
+
+        """
+        try:
+            indices = self.es_client.indices.get_alias(name=external)
+        except NotFoundError:
+            return None
+
+        for internal in indices:
+            if parse_index_name(internal).version.split('_')[0] == version:
+                return internal
+
+        return None
+
+    def activate_build(self, schema, build):
+        """ Points the aliases of the given schema to the indices of the given
+        build and deletes all other indices of the schema.
+
+        The aliases are switched in one atomic operation, so there's no
+        moment where searches come up empty. The new indices become the
+        write indices of their aliases in the same operation, so writes sent
+        through an alias which still points to two indices are accepted.
+
+        :return: The number of indices that were deleted.
+
+        """
+        suffix = '_' + utils.normalize_index_segment(
+            build, allow_wildcards=False)
+
+        wildcard = self.get_managed_indices_wildcard(schema)
+
+        indices = self.es_client.indices.get_alias(index=wildcard)
+        built = {ix for ix in indices if ix.endswith(suffix)}
+        obsolete = set(indices) - built
+
+        actions = []
+
+        for internal in built:
+            external = internal.rsplit('-', 1)[0]
+
+            for old in obsolete:
+                if external in indices[old]['aliases']:
+                    actions.append(
+                        {'remove': {'index': old, 'alias': external}})
+
+            actions.append({'add': {
+                'index': internal,
+                'alias': external,
+                'is_write_index': True
+            }})
+
+        if actions:
+            self.es_client.indices.update_aliases(body={'actions': actions})
+
+        for internal in obsolete:
+            self.es_client.indices.delete(internal)
+            self.created_indices.discard(internal)
+
+        return len(obsolete)
 
     def remove_expired_indices(self, current_mappings):
         """ Removes all expired indices. An index is expired if it's version
@@ -545,9 +1010,12 @@ class IndexManager(object):
         for index in self.query_indices():
             info = parse_index_name(index)
 
-            if info.version and info.version not in active_versions:
+            # rebuilt indices have the build appended to the version
+            version = info.version and info.version.split('_')[0]
+
+            if version and version not in active_versions:
                 self.es_client.indices.delete(index)
-                self.created_indices.remove(index)
+                self.created_indices.discard(index)
                 count += 1
 
         return count
@@ -588,9 +1056,13 @@ class IndexManager(object):
 
         return '-'.join(segments)
 
-    def get_internal_index_name(self, schema, language, type_name, version):
+    def get_internal_index_name(self, schema, language, type_name, version,
+                                build=None):
         """ Generates the internal index name from the given parameters. """
 
+        if build:
+            version = f'{version}_{build}'
+
         return '-'.join((
             self.get_external_index_name(schema, language, type_name),
             utils.normalize_index_segment(version, allow_wildcards=False)
@@ -12,6 +12,7 @@ from elasticsearch.connection import create_ssl_context
 from more.transaction.main import transaction_tween_factory
 from onegov.search import Search, log
 from onegov.search.errors import SearchOfflineError
+from onegov.search.indexer import BulkIndexer
 from onegov.search.indexer import Indexer
 from onegov.search.indexer import ORMEventTranslator
 from onegov.search.indexer import TypeMappingRegistry
@@ -140,6 +141,15 @@ class ElasticsearchApp(morepath.App):
             the ssl connection. Defaults to true. Do not disable, unless you
             are in testing!
 
+        :elasticsearch_bulk_indexing:
+            If true, the changes of each request are coalesced and sent to
+            elasticsearch in batches using the bulk api, instead of one
+            request per change (defaults to false).
+
+        :elasticsearch_bulk_size:
+            The maximum number of changes sent in a single bulk request.
+            Defaults to 500.
+
         :elasticsearch_languages:
             The languages supported by onegov.search. Defaults to:
                 - en
@@ -187,11 +197,19 @@ class ElasticsearchApp(morepath.App):
                 max_queue_size=max_queue_size
             )
 
-            self.es_indexer = Indexer(
-                self.es_mappings,
-                self.es_orm_events.queue,
-                es_client=self.es_client
-            )
+            if cfg.get('elasticsearch_bulk_indexing', False):
+                self.es_indexer = BulkIndexer(
+                    self.es_mappings,
+                    self.es_orm_events.queue,
+                    es_client=self.es_client,
+                    batch_size=int(cfg.get('elasticsearch_bulk_size', 500))
+                )
+            else:
+                self.es_indexer = Indexer(
+                    self.es_mappings,
+                    self.es_orm_events.queue,
+                    es_client=self.es_client
+                )
 
             self.session_manager.on_insert.connect(
                 self.es_orm_events.on_insert)
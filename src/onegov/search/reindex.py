@@ -0,0 +1,476 @@
+""" Provides a parallel, resumable reindex of all searchable models.
+
+The regular reindex (see
+:meth:`~onegov.search.integration.ElasticsearchApp.es_perform_reindex`)
+deletes all indices of a schema and then loads all models in threads. Until
+the reindex is done, searches return incomplete results.
+
+The reindex implemented here works differently:
+
+* The indices are rebuilt in the background, using a build identifier
+  appended to the internal index names. Once all models are indexed, the
+  aliases are switched over in a single atomic operation.
+
+* Each searchable model is indexed by a separate worker process, using
+  keyset pagination (ordered by primary key) to read the records in batches.
+
+* The progress of each model is written to a checkpoint directory after each
+  batch. If the reindex is interrupted, it continues where it left off.
+
+* The indices of the build are created before the workers start. From then
+  on, the live indexers write all changes to the build as well (see
+  :meth:`~onegov.search.indexer.Indexer.build_indices`). The workers only
+  add documents which are not in the build yet, so a record loaded before
+  it was changed never overwrites the change.
+
+* Before the build is activated, the documents of records deleted during the
+  reindex are removed from the build.
+
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+from elasticsearch.helpers import scan
+from elasticsearch.helpers import streaming_bulk
+from onegov.core.utils import chunks
+from onegov.search import log
+from onegov.search.indexer import BulkIndexer
+from onegov.search.indexer import IndexManager
+from onegov.search.indexer import ORMEventTranslator
+from onegov.search.utils import normalize_index_segment
+from onegov.search.utils import searchable_sqlalchemy_models
+from sedate import utcnow
+from sqlalchemy import inspect
+from sqlalchemy.orm import undefer
+from time import sleep
+
+
+#: The application used by the worker processes. Worker processes are
+#: forked, so they inherit the application of the parent process.
+_worker_app = None
+
+
+class ReindexCheckpoint(object):
+    """ Stores the progress of a parallel reindex in a directory.
+
+    For each schema, the build identifier and whether the schema has been
+    completed is stored. For each model, the last primary key that has
+    been indexed is stored.
+
+    Each entry is written to its own file, so worker processes never write
+    to the same file.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def filename(self, *segments):
+        return os.path.join(self.path, '.'.join(segments) + '.json')
+
+    def read(self, *segments):
+        try:
+            with open(self.filename(*segments), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def write(self, data, *segments):
+        # write atomically, so an interrupted run never leaves a broken file
+        filename = self.filename(*segments)
+        temporary = f'{filename}.{os.getpid()}.tmp'
+
+        with open(temporary, 'w') as f:
+            json.dump(data, f)
+
+        os.replace(temporary, filename)
+
+    def schema(self, schema):
+        return self.read(schema)
+
+    def update_schema(self, schema, **values):
+        self.write({**self.schema(schema), **values}, schema)
+
+    def model(self, schema, model):
+        return self.read(schema, model_key(model))
+
+    def update_model(self, schema, model, **values):
+        key = model_key(model)
+        self.write({**self.read(schema, key), **values}, schema, key)
+
+
+def model_key(model):
+    return f'{model.__module__}.{model.__name__}'
+
+
+def serialize_key(value):
+    return value if isinstance(value, int) else str(value)
+
+
+def reindex_queries(session, model):
+    """ Returns the query used to load the given model together with the
+    primary key column used for the keyset pagination, or None if the model
+    has a composite primary key.
+
+    """
+    mapper = inspect(model)
+
+    query = session.query(model).options(undefer('*'))
+
+    if mapper.polymorphic_on is not None:
+        query = query.filter(
+            mapper.polymorphic_on == mapper.polymorphic_identity)
+
+    if len(mapper.primary_key) != 1:
+        return query, None
+
+    return query, getattr(model, mapper.get_property_by_column(
+        mapper.primary_key[0]).key)
+
+
+def iter_batches(query, column, after=None, batch_size=1000):
+    """ Yields the results of the given query in batches, using the given
+    column as (unique) sort key. Only records with a key greater than
+    ``after`` are returned.
+
+    Unlike offset pagination, the cost of loading a batch does not depend
+    on the number of records before it.
+
+    """
+    if column is None:
+        yield query.all()
+        return
+
+    while True:
+        q = query.order_by(column)
+
+        if after is not None:
+            q = q.filter(column > after)
+
+        batch = q.limit(batch_size).all()
+
+        if not batch:
+            return
+
+        yield batch
+
+        after = getattr(batch[-1], column.key)
+
+
+def build_indexer(app, build):
+    """ Returns a bulk indexer which writes to the indices of the given build,
+    together with an orm event translator that feeds it.
+
+    """
+    translator = ORMEventTranslator(app.es_mappings)
+    indexer = BulkIndexer(
+        app.es_mappings,
+        translator.queue,
+        es_client=app.es_client,
+        hostname=app.es_indexer.hostname
+    )
+    indexer.ixmgr = IndexManager(
+        indexer.hostname,
+        es_client=app.es_client,
+        build=build
+    )
+
+    return translator, indexer
+
+
+def index_objects(translator, indexer, schema, objects, retries=3):
+    for obj in objects:
+        translator.index(schema, obj)
+
+    # items rejected by a busy cluster are kept by the indexer, we send them
+    # again after a short pause
+    for attempt in range(retries + 1):
+        if attempt:
+            sleep(2 ** attempt)
+
+        indexer.process()
+
+        if not indexer.failed_tasks:
+            break
+
+    if indexer.failed_tasks:
+        raise RuntimeError(f'Failed to index {len(indexer.failed_tasks)} '
+                           f'documents in {schema}')
+
+
+def initialize_worker():
+    # the connection pool and the elasticsearch client must not be shared
+    # with the parent process - we create new ones, without closing the
+    # connections of the parent
+    engine = _worker_app.session_manager.engine
+    engine.pool = engine.pool.recreate()
+
+    _worker_app.es_configure_client(usage='reindex')
+
+
+def reindex_model(schema, model, build, checkpoint_path, batch_size):
+    """ Indexes all records of the given model into the indices of the
+    given build. Runs inside a worker process.
+
+    The work is done in a separate thread, which guarantees that we get
+    a new session (sessions are scoped by thread).
+
+    :return: The number of indexed records.
+
+    """
+    result = {}
+
+    def work():
+        result['count'] = _reindex_model(
+            _worker_app, schema, model, build, checkpoint_path, batch_size)
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    thread.join()
+
+    if 'count' not in result:
+        raise RuntimeError(f'Failed to reindex {model_key(model)} in {schema}')
+
+    return result['count']
+
+
+def _reindex_model(app, schema, model, build, checkpoint_path, batch_size):
+    checkpoint = checkpoint_path and ReindexCheckpoint(checkpoint_path)
+    progress = checkpoint and checkpoint.model(schema, model) or {}
+
+    if progress.get('done'):
+        return 0
+
+    app.session_manager.set_current_schema(schema)
+    session = app.session()
+
+    translator, indexer = build_indexer(app, build)
+    count = 0
+
+    try:
+        query, column = reindex_queries(session, model)
+
+        for batch in iter_batches(
+                query, column, progress.get('after'), batch_size):
+
+            index_objects(translator, indexer, schema, batch)
+            count += len(batch)
+
+            if checkpoint and column is not None:
+                checkpoint.update_model(
+                    schema, model,
+                    after=serialize_key(getattr(batch[-1], column.key))
+                )
+
+            session.expunge_all()
+
+        if checkpoint:
+            checkpoint.update_model(schema, model, done=True)
+
+    finally:
+        session.invalidate()
+        session.bind.dispose()
+
+    return count
+
+
+class ParallelReindex(object):
+    """ Rebuilds the indices of a schema using a pool of processes.
+
+    Usage::
+
+        reindex = ParallelReindex(app, processes=4, checkpoint='/tmp/ckpt')
+        reindex.run()
+
+    :processes:
+        The number of worker processes (defaults to the number of cpus).
+
+    :checkpoint:
+        A directory in which the progress is stored. If given, an
+        interrupted reindex resumes where it left off. Remove the directory
+        to start from scratch.
+
+    :batch_size:
+        The number of records loaded from the database at once.
+
+    :fail:
+        If True, errors are raised. Otherwise they are logged and the schema
+        keeps its current indices.
+
+    """
+
+    def __init__(self, app, processes=None, checkpoint=None, batch_size=1000,
+                 fail=False):
+        self.app = app
+        self.fail = fail
+        self.processes = processes or multiprocessing.cpu_count()
+        self.checkpoint_path = checkpoint
+        self.checkpoint = checkpoint and ReindexCheckpoint(checkpoint)
+        self.batch_size = batch_size
+
+    @property
+    def models(self):
+        return [
+            model
+            for base in self.app.session_manager.bases
+            for model in searchable_sqlalchemy_models(base)
+        ]
+
+    def run(self):
+        """ Reindexes the current schema of the application.
+
+        :return: The number of indexed records or None if the schema has
+        been reindexed by a previous run or if the reindex failed.
+
+        """
+        schema = self.app.schema
+        state = self.checkpoint and self.checkpoint.schema(schema) or {}
+
+        if state.get('done'):
+            log.info(f'Skipping {schema}, reindexed by a previous run')
+            return None
+
+        build = state.get('build') or utcnow().strftime('%Y%m%d%H%M%S')
+
+        if self.checkpoint:
+            self.checkpoint.update_schema(schema, build=build, done=False)
+
+        try:
+            return self.rebuild(schema, build)
+        except Exception:
+            if self.fail:
+                raise
+
+            log.exception(f'Failed to reindex {schema}')
+            return None
+
+    def rebuild(self, schema, build):
+        """ Builds the indices of the given build and activates them. """
+
+        self.create_indices(build)
+
+        # the worker processes are forked and inherit the application
+        global _worker_app
+        _worker_app = self.app
+
+        executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=initialize_worker
+        )
+
+        try:
+            with executor:
+                futures = [
+                    executor.submit(
+                        reindex_model, schema, model, build,
+                        self.checkpoint_path, self.batch_size
+                    ) for model in self.models
+                ]
+                count = sum(future.result() for future in futures)
+        finally:
+            _worker_app = None
+
+        purged = self.purge(build)
+
+        deleted = self.app.es_indexer.ixmgr.activate_build(schema, build)
+        self.app.es_indexer.ixmgr.created_indices = set()
+
+        log.info(f'Reindexed {count} records in {schema}, '
+                 f'purging {purged} deleted records, '
+                 f'replacing {deleted} indices')
+
+        if self.checkpoint:
+            self.checkpoint.update_schema(schema, done=True)
+
+        return count
+
+    def create_indices(self, build):
+        """ Creates all indices of the given build, so the live indexers
+        write the changes made during the reindex to the build (see
+        :meth:`~onegov.search.indexer.Indexer.build_indices`).
+
+        """
+        ixmgr = IndexManager(
+            self.app.es_indexer.hostname,
+            es_client=self.app.es_client,
+            build=build
+        )
+
+        languages = self.app.es_orm_events.detector.supported_languages
+
+        for mapping in self.app.es_mappings:
+            for language in languages:
+                ixmgr.ensure_index(self.app.schema, language, mapping)
+
+    def purge(self, build):
+        """ Removes the documents of records deleted while the workers were
+        running from the indices of the given build.
+
+        Deletions reach the indices of the build as well, but a worker may
+        have loaded a record just before it was deleted and indexed it
+        afterwards. So we look up all documents of the build in the database
+        and delete the ones whose records no longer exist.
+
+        :return: The number of deleted documents.
+
+        """
+        session = self.app.session()
+        es_client = self.app.es_client
+        ixmgr = self.app.es_indexer.ixmgr
+        suffix = normalize_index_segment(build, allow_wildcards=False)
+
+        # polymorphic models may share the indices of their type
+        types = {}
+
+        for model in self.models:
+            types.setdefault(model.es_type_name, []).append(model)
+
+        count = 0
+
+        for type_name, models in types.items():
+            external = ixmgr.get_external_index_name(
+                self.app.schema, '*', type_name)
+            indices = f'{external}-*_{suffix}'
+
+            es_client.indices.refresh(index=indices)
+
+            documents = scan(
+                es_client,
+                index=indices,
+                query={'query': {'match_all': {}}},
+                _source=False
+            )
+
+            for batch in chunks(documents, self.batch_size):
+                batch = [document for document in batch if document]
+                missing = {document['_id'] for document in batch}
+
+                for model in models:
+                    if not missing:
+                        break
+
+                    column = getattr(model, model.es_id)
+                    query = session.query(column)
+                    query = query.filter(column.in_(tuple(missing)))
+
+                    missing -= {str(id) for id, in query}
+
+                actions = [
+                    {
+                        '_op_type': 'delete',
+                        '_index': document['_index'],
+                        '_id': document['_id']
+                    } for document in batch if document['_id'] in missing
+                ]
+
+                for ok, info in streaming_bulk(
+                        es_client, actions, raise_on_error=False):
+                    count += ok
+
+        return count
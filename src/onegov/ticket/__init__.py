@@ -3,6 +3,7 @@ handlers = HandlerRegistry()  # noqa
 
 from onegov.ticket.model import Ticket
 from onegov.ticket.model import TicketPermission
+from onegov.ticket.counter import TicketCounter
 from onegov.ticket.collection import TicketCollection
 
 
@@ -11,5 +12,6 @@ __all__ = [
     'handlers',
     'Ticket',
     'TicketCollection',
+    'TicketCounter',
     'TicketPermission'
 ]
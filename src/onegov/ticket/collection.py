@@ -1,20 +1,21 @@
-import random
-
 from collections import namedtuple
-from onegov.core.collection import Pagination
+from onegov.core.collection import KeysetPagination
 from onegov.ticket import handlers as global_handlers
+from onegov.ticket.counter import TicketCounter
 from onegov.ticket.model import Ticket
-from sqlalchemy import desc, distinct, func
+from onegov.ticket.numbers import issue_ticket_number
+from sqlalchemy import desc, distinct
 from sqlalchemy.orm import joinedload, undefer
 from uuid import UUID
 
 
-class TicketCollectionPagination(Pagination):
+class TicketCollectionPagination(KeysetPagination):
 
     def __init__(self, session, page=0, state='open', handler='ALL',
-                 group=None, owner='*', extra_parameters=None):
+                 group=None, owner='*', extra_parameters=None, after=None):
         self.session = session
         self.page = page
+        self.after = after
         self.state = state
         self.handler = handler
         self.handlers = global_handlers
@@ -63,6 +64,10 @@ class TicketCollectionPagination(Pagination):
 
         return query
 
+    @property
+    def keyset(self):
+        return (desc(Ticket.created), desc(Ticket.id))
+
     @property
     def page_index(self):
         return self.page
@@ -118,55 +123,24 @@ class TicketCollection(TicketCollectionPagination):
     def query(self):
         return self.session.query(Ticket)
 
-    def random_number(self, length):
-        range_start = 10 ** (length - 1)
-        range_end = 10 ** length - 1
-
-        return random.randint(range_start, range_end)
-
-    def random_ticket_number(self, handler_code):
-        number = str(self.random_number(length=8))
-        return '{}-{}-{}'.format(handler_code, number[:4], number[4:])
-
-    def is_existing_ticket_number(self, ticket_number):
-        query = self.query().with_entities(Ticket.number)
-        return bool(query.filter(Ticket.number == ticket_number).first())
-
     def issue_unique_ticket_number(self, handler_code):
-        """ Randomly generates a new ticket number, ensuring it is unique
-        for the given handler_code.
+        """ Issues a new ticket number, unique for the given handler_code.
 
         The resulting code is of the following form::
 
             XXX-0000-1111
 
-        Where ``XXX`` is the handler_code and the rest is a 12 character
-        sequence of random numbers separated by dashes.
-
-        This gives us 10^8 or 100 million ticket numbers for each handler.
+        Where ``XXX`` is the handler_code and the rest is a non-sequential
+        looking number taken from a sequence of the handler (see
+        :mod:`onegov.ticket.numbers`). No lookups are needed, as the
+        numbers are unique by construction.
 
-        Though we'll never reach that limit, there is an increasing chance
-        of conflict with existing ticket numbers, so we have to check
-        against the database.
-
-        Still, this number is not unguessable (say in an URL) - there we have
+        This number is not unguessable (say in an URL) - there we have
         to rely on the internal ticket id, which is a uuid.
 
-        In a social engineering setting, where we don't have the abilty to
-        quickly try out thousands of numbers, the ticket number should
-        be pretty unguessable however.
-
         """
 
-        # usually we won't have any conflict, so we just run queries
-        # against the existing database, even if this means to run more than
-        # one query once in forever
-
-        while True:
-            candidate = self.random_ticket_number(handler_code)
-
-            if not self.is_existing_ticket_number(candidate):
-                return candidate
+        return issue_ticket_number(self.session, handler_code)
 
     def open_ticket(self, handler_code, handler_id, **handler_data):
         """ Opens a new ticket using the given handler. """
@@ -202,15 +176,15 @@ class TicketCollection(TicketCollectionPagination):
         return self.query().filter(Ticket.handler_id == handler_id).first()
 
     def get_count(self, excl_archived=True):
-        query = self.query()
-        query = query.with_entities(Ticket.state, func.count(Ticket.state))
+        """ Returns the number of tickets by state, read from the maintained
+        counters (see :class:`onegov.ticket.counter.TicketCounter`).
 
-        if excl_archived:
-            query = query.filter(Ticket.state != 'archived')
+        """
+        count = TicketCounter.counts(self.session)
 
-        query = query.group_by(Ticket.state)
+        if excl_archived:
+            count.pop('archived', None)
 
-        count = {r[0]: r[1] for r in query.all()}
         count.setdefault('open', 0)
         count.setdefault('pending', 0)
         count.setdefault('closed', 0)
@@ -0,0 +1,211 @@
+""" Maintained ticket counts.
+
+Counting the tickets by state requires a scan of the whole tickets table,
+which is too slow to be done on every page showing the number of open
+tickets. Instead, the number of tickets per handler, group and state is
+stored in a separate table.
+
+The counts are maintained by statement level triggers on the tickets table.
+They are therefore updated in the same transaction as the tickets and
+regardless of how the tickets are written. Updates not changing the handler,
+the group or the state of a ticket (snapshots, handler data, ...) do not
+touch the counts at all.
+
+The triggers only ever append rows with the change of the count (deltas),
+they never update existing rows. Concurrent transactions opening tickets of
+the same handler would otherwise compete for the same row, which always
+fails with a serialization error. The deltas are summed up when reading
+and compacted to one row per handler, group and state every night.
+
+"""
+from onegov.core.orm import Base
+from sqlalchemy import Column
+from sqlalchemy import event
+from sqlalchemy import func
+from sqlalchemy import Integer
+from sqlalchemy import Text
+from sqlalchemy import text
+
+
+class TicketCounter(Base):
+    """ A change of the number of tickets of a handler and group in a
+    specific state. The number of tickets is the sum of all changes.
+
+    """
+
+    __tablename__ = 'ticket_counters'
+
+    #: the internal id of the change
+    id = Column(Integer, primary_key=True)
+
+    #: the handler code of the tickets
+    handler_code = Column(Text, nullable=False)
+
+    #: the group of the tickets
+    group = Column(Text, nullable=False)
+
+    #: the state of the tickets
+    state = Column(Text, nullable=False)
+
+    #: the change of the number of tickets
+    count = Column(Integer, nullable=False, default=0)
+
+    @classmethod
+    def counts(cls, session, handler_code=None, group=None):
+        """ Returns the number of tickets by state, optionally limited to the
+        given handler and group.
+
+        """
+
+        query = session.query(cls.state, func.sum(cls.count))
+        if handler_code:
+            query = query.filter(cls.handler_code == handler_code)
+        if group:
+            query = query.filter(cls.group == group)
+        query = query.group_by(cls.state)
+
+        return {state: int(count) for state, count in query}
+
+    @classmethod
+    def live_query(cls):
+        """ Returns the SQL counting the tickets, the same way the triggers
+        do.
+
+        """
+        return text("""
+            SELECT handler_code, "group", state::text, count(*)
+            FROM tickets
+            GROUP BY handler_code, "group", state
+        """)
+
+    @classmethod
+    def live(cls, session):
+        """ Returns the number of tickets counted from the tickets table, by
+        handler code, group and state.
+
+        """
+        return {
+            (handler_code, group, state): count
+            for handler_code, group, state, count
+            in session.execute(cls.live_query())
+        }
+
+    @classmethod
+    def stored(cls, session):
+        """ Returns the stored number of tickets, by handler code, group and
+        state.
+
+        """
+        query = session.query(
+            cls.handler_code, cls.group, cls.state, func.sum(cls.count)
+        )
+        query = query.group_by(cls.handler_code, cls.group, cls.state)
+        query = query.having(func.sum(cls.count) != 0)
+        return {
+            (handler_code, group, state): int(count)
+            for handler_code, group, state, count in query
+        }
+
+    @classmethod
+    def compact(cls, session):
+        """ Replaces the changes with one row per handler, group and state.
+
+        Changes made by concurrent transactions are not visible to this
+        statement and therefore left untouched.
+
+        """
+        session.execute(text("""
+            WITH changes AS (
+                DELETE FROM ticket_counters
+                RETURNING handler_code, "group", state, count
+            )
+            INSERT INTO ticket_counters (handler_code, "group", state, count)
+            SELECT handler_code, "group", state, sum(count)
+            FROM changes
+            GROUP BY handler_code, "group", state
+            HAVING sum(count) != 0
+        """))
+
+    @classmethod
+    def refresh(cls, session):
+        """ Recounts all tickets. Returns True if the stored counts were
+        wrong.
+
+        """
+
+        if cls.stored(session) == cls.live(session):
+            return False
+
+        session.execute(text('LOCK TABLE tickets IN SHARE MODE'))
+        session.query(cls).delete()
+        session.execute(text(
+            'INSERT INTO ticket_counters '
+            '(handler_code, "group", state, count) '
+            'SELECT handler_code, "group", state::text, count(*) '
+            'FROM tickets GROUP BY handler_code, "group", state'
+        ))
+        return True
+
+    @classmethod
+    def ddl(cls, schema):
+        """ Returns the statements creating the triggers in the given schema.
+
+        Usually we wouldn't create our queries using format, but the schema
+        is not user defined (and if it is, it's ensured to only have safe
+        characters).
+
+        """
+
+        transitions = {
+            'INSERT': ('NEW TABLE AS new_tickets', ('new_tickets', 1)),
+            'UPDATE': (
+                'OLD TABLE AS old_tickets NEW TABLE AS new_tickets',
+                ('old_tickets', -1), ('new_tickets', 1)
+            ),
+            'DELETE': ('OLD TABLE AS old_tickets', ('old_tickets', -1)),
+        }
+
+        for operation, (referencing, *tables) in transitions.items():
+            trigger = f'tickets_{operation.lower()}_counters'
+            changes = ' UNION ALL '.join(
+                f'SELECT handler_code, "group", state, {delta} AS delta '
+                f'FROM {table}' for table, delta in tables
+            )
+
+            # the changes are appended, existing rows are never updated
+            yield f"""
+                CREATE OR REPLACE FUNCTION "{schema}".{trigger}()
+                RETURNS trigger AS $$
+                BEGIN
+                    INSERT INTO "{schema}".ticket_counters
+                        (handler_code, "group", state, count)
+                    SELECT handler_code, "group", state::text, sum(delta)
+                    FROM ({changes}) AS changes
+                    GROUP BY handler_code, "group", state
+                    HAVING sum(delta) != 0;
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql
+            """
+            yield f"""
+                DROP TRIGGER IF EXISTS {trigger} ON "{schema}".tickets
+            """
+            yield f"""
+                CREATE TRIGGER {trigger}
+                AFTER {operation} ON "{schema}".tickets
+                REFERENCING {referencing}
+                FOR EACH STATEMENT
+                EXECUTE PROCEDURE "{schema}".{trigger}()
+            """
+
+
+@event.listens_for(Base.metadata, 'after_create')
+def receive_after_create(target, connection, tables=None, **kw):
+    # the triggers need both the counters and the tickets tables, we
+    # therefore wait for all tables to be created
+    schema = connection._execution_options.get('schema')
+    created = {table.name for table in tables or ()}
+
+    if schema and TicketCounter.__tablename__ in created:
+        for statement in TicketCounter.ddl(schema):
+            connection.execute(statement)
@@ -0,0 +1,128 @@
+""" Allocation of ticket numbers.
+
+Ticket numbers used to be drawn randomly from 10000000-99999999, which
+required a lookup per candidate to ensure they are unique. Concurrently
+opened tickets then read and write the same rows, which leads to
+serialization conflicts.
+
+Instead, each handler has its own Postgres sequence. Sequences are not
+transactional, so concurrent transactions never wait on or conflict with
+each other. The values of the sequence are permuted with a Feistel network
+so the resulting numbers do not look sequential.
+
+The permutation is limited to numbers below 10000000, which have never
+been issued by the random allocation. New numbers therefore can't collide
+with the numbers of existing tickets.
+
+Like before, the numbers are not unguessable and must not be used to
+access a ticket anonymously.
+
+"""
+from hashlib import blake2b
+from psycopg2.extensions import TransactionRollbackError
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import OperationalError
+
+
+#: The number of ticket numbers available per handler
+TICKET_NUMBERS = 10 ** 7
+
+#: The numbers are split into two halves of this size for the permutation
+HALF = 10 ** 4
+
+#: The rounds of the Feistel network
+ROUNDS = 4
+
+
+def round_function(value, key, step):
+    digest = blake2b(
+        f'{key}:{step}:{value}'.encode('utf-8'), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, 'big') % HALF
+
+
+def feistel(value, key):
+    """ Permutes a value in the range of 0 to HALF * HALF - 1. """
+
+    left, right = divmod(value, HALF)
+    for step in range(ROUNDS):
+        left, right = right, (left + round_function(right, key, step)) % HALF
+    return left * HALF + right
+
+
+def permute_ticket_number(value, key):
+    """ Maps the values 0 to TICKET_NUMBERS - 1 to non-sequential looking
+    numbers in the same range. Each value is mapped to a different number.
+
+    As the Feistel network permutes a larger range, the network is applied
+    until the result is within the range (cycle walking).
+
+    """
+    assert 0 <= value < TICKET_NUMBERS
+
+    value = feistel(value, key)
+    while value >= TICKET_NUMBERS:
+        value = feistel(value, key)
+    return value
+
+
+def format_ticket_number(handler_code, number):
+    """ Returns the ticket number of the following form::
+
+        XXX-0000-1111
+
+    """
+    number = f'{number:08d}'
+    return f'{handler_code}-{number[:4]}-{number[4:]}'
+
+
+def sequence_name(handler_code):
+    assert handler_code.isalnum()
+    return f'ticket_numbers_{handler_code.lower()}'
+
+
+def next_ticket_number_value(session, handler_code):
+    """ Returns the next value of the sequence of the given handler. The
+    sequence is created the first time it is used.
+
+    If the sequence is being created by a concurrent transaction which has
+    not been committed yet, a serialization error is raised, so the
+    transaction is retried (like any other conflicting transaction).
+
+    """
+    name = sequence_name(handler_code)
+
+    # nextval(NULL) is NULL, so a missing sequence doesn't raise an error
+    query = text(f"SELECT nextval(to_regclass('{name}'))")
+    value = session.execute(query).scalar()
+
+    if value is None:
+        try:
+            with session.begin_nested():
+                session.execute(text(
+                    f'CREATE SEQUENCE IF NOT EXISTS {name} '
+                    f'MINVALUE 0 MAXVALUE {TICKET_NUMBERS - 1} START 0'
+                ))
+        except DBAPIError:
+            # created by a concurrent transaction
+            pass
+
+        value = session.execute(query).scalar()
+
+    if value is None:
+        raise OperationalError(
+            str(query), {}, TransactionRollbackError(
+                f'The sequence {name} is being created concurrently'
+            )
+        )
+
+    return value
+
+
+def issue_ticket_number(session, handler_code):
+    """ Returns a new, unique ticket number for the given handler. """
+
+    value = next_ticket_number_value(session, handler_code)
+    number = permute_ticket_number(value, handler_code)
+    return format_ticket_number(handler_code, number)
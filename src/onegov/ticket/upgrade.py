@@ -5,6 +5,7 @@ upgraded on the server. See :class:`onegov.core.upgrade.upgrade_task`.
 from onegov.core.orm.types import JSON, UTCDateTime
 from onegov.core.upgrade import upgrade_task
 from onegov.ticket import Ticket
+from onegov.ticket import TicketCounter
 from sqlalchemy import Boolean, Column, Integer, Text, Enum
 
 
@@ -134,3 +135,14 @@ def add_archived_state_to_ticket(context):
         USING state::text::ticket_state
     """)
     tmp_type.drop(context.operations.get_bind(), checkfirst=False)
+
+
+@upgrade_task('Adds ticket counters')
+def add_ticket_counters(context):
+    # the table (and triggers) are created when the schema is loaded, the
+    # existing tickets are not counted yet though
+    if context.has_table('ticket_counters'):
+        for statement in TicketCounter.ddl(context.schema):
+            context.operations.execute(statement)
+        TicketCounter.refresh(context.session)
+
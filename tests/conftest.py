@@ -1 +1,20 @@
+import os
+import pytest
+
+
 pytest_plugins = ['tests.shared']
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'benchmark: measures the performance with datasets of realistic '
+        'size, skipped unless the ONEGOV_BENCHMARK environment variable is '
+        'set (ONEGOV_BENCHMARK=1 py.test -m benchmark -s)'
+    )
+
+
+def pytest_runtest_setup(item):
+    if item.get_closest_marker('benchmark'):
+        if not os.environ.get('ONEGOV_BENCHMARK'):
+            pytest.skip('Benchmarks are not enabled')
@@ -0,0 +1,120 @@
+""" Runs the matching with synthetic periods. """
+
+import pytest
+import random
+
+from datetime import datetime, timedelta
+from onegov.activity.matching.core import DeferredAcceptance
+from tests.onegov.activity.test_matching_memory import Occasion
+from time import perf_counter
+
+
+def synthetic_period(attendees, occasions, wishes=8, seed=0):
+    """ Returns the bookings and occasions of a synthetic period.
+
+    The occasions take place during three weeks, most of them for a few
+    hours, some of them for a couple of days. Some occasions are a lot more
+    popular than others.
+
+    """
+
+    rnd = random.Random(seed)
+    start = datetime(2021, 7, 5, 8)
+
+    items = []
+    for ix in range(occasions):
+        begin = start + timedelta(
+            days=rnd.randrange(21), hours=rnd.randrange(10))
+
+        if rnd.random() < 0.1:
+            end = begin + timedelta(days=rnd.randint(1, 5))
+        else:
+            end = begin + timedelta(hours=rnd.randint(1, 4))
+
+        items.append(Occasion(
+            ix, [(begin, end)],
+            max_spots=rnd.randint(5, 20),
+            anti_affinity_group=rnd.random() < 0.05 and 'camp' or None
+        ))
+
+    popularity = [rnd.paretovariate(1.5) for item in items]
+
+    bookings = []
+    for attendee in range(attendees):
+        chosen = []
+        while len(chosen) < min(wishes, occasions):
+            item = rnd.choices(items, popularity)[0]
+            if item not in chosen:
+                chosen.append(item)
+
+        for item in chosen:
+            bookings.append(item.booking(attendee, 'open', rnd.randint(0, 1)))
+
+    return bookings, items
+
+
+def assert_valid(matching):
+    for attendee in matching.attendees.values():
+        assert attendee.is_valid
+
+    for occasion in matching.occasions.values():
+        assert len(occasion.bookings) <= occasion.occasion.max_spots
+
+
+def test_synthetic_period():
+    bookings, occasions = synthetic_period(attendees=200, occasions=40)
+
+    matching = DeferredAcceptance(bookings, occasions, default_limit=4)
+    results = matching.run()
+    assert_valid(matching)
+
+    assert results.accepted
+    assert results.open | results.accepted | results.blocked == set(bookings)
+
+    # continue the matching after some bookings have been cancelled and
+    # some wishes have been added
+    cancelled = list(results.accepted)[:10]
+    for booking in cancelled:
+        matching.remove(booking)
+
+    added = [occasions[0].booking(1000 + ix, 'open', 1) for ix in range(5)]
+    for booking in added:
+        matching.add(booking)
+
+    results = matching.run()
+    assert_valid(matching)
+
+    assert not results.accepted & set(cancelled)
+    assert results.open | results.accepted | results.blocked \
+        == set(bookings) - set(cancelled) | set(added)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('attendees,occasions', [
+    (1000, 150),
+    (5000, 500),
+    (10000, 1000),
+])
+def test_benchmark(attendees, occasions):
+    bookings, items = synthetic_period(attendees, occasions)
+
+    start = perf_counter()
+    matching = DeferredAcceptance(bookings, items)
+    matching.run()
+    full = perf_counter() - start
+
+    assert_valid(matching)
+
+    rnd = random.Random(1)
+    start = perf_counter()
+    for booking in rnd.sample(bookings, 20):
+        matching.remove(booking)
+    matching.run()
+    incremental = perf_counter() - start
+
+    assert_valid(matching)
+
+    print(
+        f'{attendees} attendees, {len(bookings)} bookings: '
+        f'{full:.2f}s (full), {incremental:.2f}s (incremental)'
+    )
@@ -0,0 +1,9 @@
+import pytest
+
+from onegov.ballot.models.summary import register_summary_listeners
+
+
+@pytest.fixture(scope="function")
+def session_manager(session_manager):
+    register_summary_listeners(session_manager.session_factory)
+    yield session_manager
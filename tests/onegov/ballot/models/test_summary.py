@@ -0,0 +1,139 @@
+from datetime import date
+from onegov.ballot import BallotResult
+from onegov.ballot import BallotSummary
+from onegov.ballot import Election
+from onegov.ballot import ElectionResult
+from onegov.ballot import ElectionSummary
+from onegov.ballot import Vote
+from onegov.ballot.models.summary import invalidate_summaries
+from sqlalchemy import text
+from uuid import uuid4
+
+
+def test_ballot_summary(session):
+    vote = Vote(title='Vote', domain='federation', date=date(2015, 6, 14))
+    session.add(vote)
+    session.flush()
+
+    ballot = vote.proposal
+    assert ballot.summary == BallotSummary.empty()
+    assert ballot.progress == (0, 0)
+    assert not ballot.counted
+
+    # orm
+    ballot.results.append(BallotResult(
+        name='A', entity_id=1, counted=True, yeas=10, nays=5, empty=1,
+        invalid=2, eligible_voters=30
+    ))
+    ballot.results.append(BallotResult(
+        name='B', entity_id=2, counted=False, eligible_voters=20
+    ))
+    assert ballot.yeas == 10
+    assert ballot.nays == 5
+    assert ballot.empty == 1
+    assert ballot.invalid == 2
+    assert ballot.eligible_voters == 50
+    assert ballot.counted_eligible_voters == 30
+    assert ballot.counted_cast_ballots == 18
+    assert ballot.progress == (1, 2)
+    assert not ballot.counted
+
+    # updates
+    result = ballot.results.filter_by(name='B').one()
+    result.counted = True
+    result.yeas = 7
+    assert ballot.yeas == 17
+    assert ballot.counted_eligible_voters == 50
+    assert ballot.progress == (2, 2)
+    assert ballot.counted
+
+    # bulk operations
+    ballot.clear_results()
+    assert ballot.summary == BallotSummary.empty()
+
+    session.bulk_insert_mappings(BallotResult, [
+        dict(
+            id=uuid4(), ballot_id=ballot.id, name=str(index),
+            entity_id=index, counted=True, yeas=index, nays=1, empty=0,
+            invalid=0, eligible_voters=10
+        ) for index in range(1, 11)
+    ])
+    # bulk inserts don't cause events, the summaries are discarded manually
+    invalidate_summaries(session)
+    assert ballot.yeas == 55
+    assert ballot.nays == 10
+    assert ballot.progress == (10, 10)
+    assert vote.yeas == 55
+
+    assert BallotSummary.stored(session) == BallotSummary.live(session)
+
+    # the summary is read once until the results might have changed
+    session.execute(text('UPDATE ballot_summaries SET yeas = 1'))
+    assert ballot.yeas == 55
+    assert vote.proposal.summary['yeas'] == 55
+
+    invalidate_summaries(session)
+    assert ballot.yeas == 1
+
+    BallotSummary.refresh(session)
+    assert ballot.yeas == 55
+
+    # deleting the ballot removes the summary
+    session.delete(vote)
+    session.flush()
+    assert session.query(BallotSummary).count() == 0
+
+
+def test_election_summary(session):
+    election = Election(
+        title='Election', domain='federation', date=date(2015, 6, 14),
+        number_of_mandates=2
+    )
+    session.add(election)
+    session.flush()
+
+    assert election.summary == ElectionSummary.empty()
+    assert not election.has_results
+    assert not election.counted
+
+    election.results.append(ElectionResult(
+        name='A', entity_id=1, counted=True, eligible_voters=100,
+        received_ballots=50, blank_ballots=2, invalid_ballots=3,
+        blank_votes=4, invalid_votes=5
+    ))
+    election.results.append(ElectionResult(
+        name='B', entity_id=2, counted=False, eligible_voters=50,
+    ))
+    assert election.eligible_voters == 150
+    assert election.counted_eligible_voters == 100
+    assert election.received_ballots == 50
+    assert election.counted_received_ballots == 50
+    assert election.accounted_ballots == 45
+    assert election.blank_ballots == 2
+    assert election.invalid_ballots == 3
+    assert election.accounted_votes == 81
+    assert election.progress == (1, 2)
+    assert election.has_results
+    assert not election.counted
+
+    # the summary follows the id of the election
+    election.id = 'renamed'
+    session.flush()
+    assert election.eligible_voters == 150
+
+    election.clear_results()
+    assert election.summary == ElectionSummary.empty()
+    assert ElectionSummary.stored(session) == ElectionSummary.live(session)
+
+    # inconsistencies are fixed by refreshing
+    session.query(ElectionSummary).delete()
+    election.results.append(ElectionResult(
+        name='A', entity_id=1, counted=True, eligible_voters=100
+    ))
+    session.flush()
+    session.query(ElectionSummary).update({'eligible_voters': 1})
+    assert ElectionSummary.stored(session) != ElectionSummary.live(session)
+
+    ElectionSummary.refresh(session)
+    assert ElectionSummary.stored(session) == ElectionSummary.live(session)
+    assert election.eligible_voters == 100
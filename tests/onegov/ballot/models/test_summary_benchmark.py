@@ -0,0 +1,125 @@
+""" Measures the summaries of votes and elections of canton-sized datasets. """
+
+import pytest
+
+from datetime import date
+from onegov.ballot import BallotResult
+from onegov.ballot import BallotSummary
+from onegov.ballot import ComplexVote
+from onegov.ballot import Election
+from onegov.ballot import ElectionResult
+from onegov.ballot import ElectionSummary
+from onegov.ballot.models.summary import invalidate_summaries
+from time import perf_counter
+from uuid import uuid4
+
+
+#: The number of municipalities of the largest canton (Bern)
+ENTITIES = 340
+
+
+def timed(function, runs=1):
+    start = perf_counter()
+    for run in range(runs):
+        function()
+    return perf_counter() - start
+
+
+@pytest.mark.benchmark
+def test_benchmark_vote_summary(session):
+    vote = ComplexVote(
+        title='Vote', domain='canton', date=date(2021, 3, 7))
+    session.add(vote)
+    ballots = (vote.proposal, vote.counter_proposal, vote.tie_breaker)
+    session.flush()
+
+    def insert():
+        for ballot in ballots:
+            session.bulk_insert_mappings(BallotResult, [
+                dict(
+                    id=uuid4(), ballot_id=ballot.id, name=str(entity),
+                    entity_id=entity, counted=entity % 10 != 0,
+                    yeas=entity * 7 % 1000, nays=entity * 3 % 1000,
+                    empty=entity % 7, invalid=entity % 5,
+                    eligible_voters=2000
+                ) for entity in range(1, ENTITIES + 1)
+            ])
+        invalidate_summaries(session)
+
+    def render():
+        # the aggregates a vote page reads, more or less
+        vote.answer
+        vote.progress
+        vote.yeas_percentage
+        vote.nays_percentage
+        for ballot in ballots:
+            ballot.yeas
+            ballot.nays
+            ballot.empty
+            ballot.invalid
+            ballot.eligible_voters
+            ballot.cast_ballots
+            ballot.turnout
+            ballot.progress
+
+    timings = {
+        'insert': timed(insert),
+        'render': timed(render, runs=100) / 100,
+        'live': timed(lambda: BallotSummary.live(session)),
+        'refresh': timed(lambda: BallotSummary.refresh(session)),
+    }
+
+    assert BallotSummary.stored(session) == BallotSummary.live(session)
+
+    print(
+        f'vote ({len(ballots)} x {ENTITIES} results): '
+        f"{', '.join(f'{k} {v * 1000:.2f}ms' for k, v in timings.items())}"
+    )
+
+
+@pytest.mark.benchmark
+def test_benchmark_election_summary(session):
+    election = Election(
+        title='Election', domain='canton', date=date(2021, 3, 7),
+        number_of_mandates=7
+    )
+    session.add(election)
+    session.flush()
+
+    def insert():
+        session.bulk_insert_mappings(ElectionResult, [
+            dict(
+                id=uuid4(), election_id=election.id, name=str(entity),
+                entity_id=entity, counted=entity % 10 != 0,
+                eligible_voters=2000, received_ballots=entity * 3 % 1000,
+                blank_ballots=entity % 7, invalid_ballots=entity % 5,
+                blank_votes=entity % 11, invalid_votes=entity % 13
+            ) for entity in range(1, ENTITIES + 1)
+        ])
+        invalidate_summaries(session)
+
+    def render():
+        # the aggregates an election page reads, more or less
+        election.counted
+        election.progress
+        election.eligible_voters
+        election.received_ballots
+        election.accounted_ballots
+        election.blank_ballots
+        election.invalid_ballots
+        election.accounted_votes
+        election.turnout
+
+    timings = {
+        'insert': timed(insert),
+        'render': timed(render, runs=100) / 100,
+        'live': timed(lambda: ElectionSummary.live(session)),
+        'refresh': timed(lambda: ElectionSummary.refresh(session)),
+    }
+
+    assert ElectionSummary.stored(session) == ElectionSummary.live(session)
+
+    print(
+        f'election ({ENTITIES} results): '
+        f"{', '.join(f'{k} {v * 1000:.2f}ms' for k, v in timings.items())}"
+    )
@@ -95,3 +95,36 @@ def test_browser_session_count(redis_url):
 
     session.flush()
     assert session.count() == 0
+
+
+def test_browser_session_index(redis_url):
+    sessions = cache.get('sessions', 60, redis_url)
+    foo = BrowserSession(sessions, 'foo')
+    bar = BrowserSession(sessions, 'bar')
+
+    foo.name = 'Foo'
+    foo.role = 'admin'
+    bar.name = 'Bar'
+
+    # each session keeps track of its own keys
+    assert sorted(foo._cache.indexed_keys()) == ['name', 'role']
+    assert bar._cache.indexed_keys() == ['name']
+
+    assert foo.count() == 2
+    assert bar.count() == 1
+
+    foo.flush()
+    assert foo.count() == 0
+    assert not foo.has('name')
+    assert bar.name == 'Bar'
+    assert len(sessions.keys()) == 1
+
+    # sessions written without an index are still flushed
+    sessions.set(bar._cache.mangle('role'), 'member')
+    backend, index_key = bar._cache.index
+    backend.client.unlink(index_key)
+    assert bar.count() == 2
+
+    bar.flush()
+    assert bar.count() == 0
+    assert len(sessions.keys()) == 0
@@ -1,4 +1,8 @@
+import dill
+import pytest
+
 from chameleon import PageTemplate
+from freezegun import freeze_time
 from onegov.core import cache
 from onegov.core.framework import Framework
 from onegov.core.utils import Bunch
@@ -92,3 +96,140 @@ def test_cache_flush(redis_url):
     baz.cache.flush()
     assert bar.cache.keys() == [b'foo/bar:short-term:moo']
     assert baz.cache.keys() == []
+
+
+@pytest.mark.parametrize('compression', [None, 'zlib', 'zstd'])
+def test_serializer(compression):
+    if compression == 'zstd' and not cache.zstandard:
+        pytest.skip("zstandard is not installed")
+
+    serializer = cache.Serializer(compression=compression, threshold=500)
+
+    # plain values are pickled
+    data = serializer.dumps({'foo': 'bar'})
+    assert data.startswith(b'P')
+    assert serializer.loads(data) == {'foo': 'bar'}
+
+    # values that cannot be pickled fall back to dill
+    data = serializer.dumps(lambda: 'foo')
+    assert data.startswith(b'D')
+    assert serializer.loads(data)() == 'foo'
+
+    # larger values are compressed
+    data = serializer.dumps('x' * 2000)
+    assert serializer.loads(data) == 'x' * 2000
+
+    if compression:
+        assert data.startswith(compression == 'zlib' and b'Z' or b'S')
+        assert len(data) < 500
+    else:
+        assert data.startswith(b'P')
+
+    # values of earlier versions are still readable
+    assert serializer.loads(dill.dumps(Point(1, 2), recurse=True)).y == 2
+
+    # serialized values are passed through
+    assert serializer.dumps(b'P') == b'P'
+
+
+def test_dill_serializer():
+    serializer = cache.Serializer(serializer='dill')
+
+    data = serializer.dumps({'foo': 'bar'})
+    assert data.startswith(b'D')
+    assert serializer.loads(data) == {'foo': 'bar'}
+
+
+def test_redis_compression(redis_url):
+    app = Framework()
+    app.namespace = 'towns'
+    app.set_application_id('towns/detroit')
+    app.configure_application(
+        redis_url=redis_url,
+        cache_compression='zlib',
+        cache_compression_threshold=10
+    )
+    app.cache.set('foobar', Bunch(foo='bar' * 100))
+
+    assert app.cache.get('foobar').foo == 'bar' * 100
+
+
+def test_cache_flush_many_namespaces(redis_url):
+    regions = [
+        cache.get(namespace=f'ns{n}', expiration_time=60, redis_url=redis_url)
+        for n in range(200)
+    ]
+
+    for region in regions:
+        region.set_multi({f'key{k}': k for k in range(20)})
+
+    assert len(regions[0].keys()) == 20
+    assert regions[0].flush() == 20
+    assert regions[0].keys() == []
+    assert regions[0].get('key0') is cache.NO_VALUE
+
+    # the other namespaces are untouched
+    for region in regions[1:]:
+        assert len(region.keys()) == 20
+        assert region.get('key19') == 19
+
+    # deleted keys are removed from the index
+    regions[1].delete('key0')
+    regions[1].delete_multi(['key1', 'key2'])
+    assert len(regions[1].keys()) == 17
+
+    # keys may be flushed selectively
+    assert regions[2].flush(match='ns2:key1*') == 11
+    assert sorted(regions[2].keys()) == [
+        f'ns2:key{k}'.encode('utf-8') for k in (0, *range(2, 10))
+    ]
+
+    for region in regions:
+        region.flush()
+
+
+def test_cache_index_expired_keys(redis_url):
+    region = cache.get(namespace='ns', expiration_time=60, redis_url=redis_url)
+    region.set('foo', 'bar')
+    region.set('bar', 'foo')
+
+    # keys expired by redis disappear from the index lazily
+    region.backend.client.delete(b'ns:foo')
+    assert region.keys() == [b'ns:bar']
+    assert region.backend.client.zrange(b'ns#keys', 0, -1) == [b'ns:bar']
+
+    region.flush()
+
+
+def test_cache_index_expiration(redis_url):
+    region = cache.get(namespace='ns', expiration_time=60, redis_url=redis_url)
+
+    with freeze_time('2020-01-01 12:00'):
+        region.set('foo', 'bar')
+
+    # keys past their expiration time are no longer listed and they are
+    # removed from the index with the next write
+    with freeze_time('2020-01-01 12:02'):
+        assert region.keys() == []
+
+        region.set('bar', 'foo')
+        assert region.backend.client.zrange(b'ns#keys', 0, -1) == [b'ns:bar']
+
+    region.backend.client.delete(b'ns:foo')
+    region.flush()
+
+
+def test_cache_index_migration(redis_url):
+    region = cache.get(namespace='ns', expiration_time=60, redis_url=redis_url)
+    client = region.backend.proxied.writer_client
+
+    # earlier versions stored the index as plain set
+    client.set(b'ns:foo', b'bar')
+    client.sadd(b'ns#keys', b'ns:foo')
+
+    region.backend.migrated = False
+    region.set('bar', 'foo')
+
+    assert client.type(b'ns#keys') == b'zset'
+    assert sorted(region.keys()) == [b'ns:bar', b'ns:foo']
+    assert region.flush() == 2
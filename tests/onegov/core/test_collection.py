@@ -1,7 +1,15 @@
-from onegov.core.collection import GenericCollection, Pagination
+from datetime import date, datetime, timezone
+from onegov.core.collection import decode_keyset
+from onegov.core.collection import encode_keyset
+from onegov.core.collection import GenericCollection
+from onegov.core.collection import KeysetPagination
+from onegov.core.collection import Pagination
+from onegov.core.collection import SearcheableCollection
 from onegov.core.orm import SessionManager
-from sqlalchemy import Column, Integer, Text
+from onegov.core.orm.mixins import TextSearchMixin
+from sqlalchemy import Column, desc, Integer, Text
 from sqlalchemy.ext.declarative import declarative_base
+from uuid import uuid4
 
 
 def test_pagination():
@@ -99,3 +107,184 @@ def test_generic_collection(postgres_dsn):
     collection.delete(readme)
     assert collection.query().all() == []
     assert collection.by_id(readme.id) is None
+
+
+def test_searcheable_collection_text_search(postgres_dsn):
+    Base = declarative_base()
+
+    class Document(Base, TextSearchMixin):
+        __tablename__ = 'document'
+
+        id = Column(Integer, primary_key=True)
+        title = Column(Text)
+        body = Column(Text)
+
+        text_search_expressions = {'title': "coalesce(title, '')"}
+        text_search_locales = ('de_CH', 'fr_CH')
+
+    class DocumentCollection(SearcheableCollection):
+
+        def __init__(self, session, term, locale):
+            super().__init__(session)
+            self.term = term
+            self.locale = locale
+
+        @property
+        def model_class(self):
+            return Document
+
+        @property
+        def term_filter_cols(self):
+            return {'title': 'title', 'body': 'body'}
+
+    mgr = SessionManager(postgres_dsn, Base)
+    mgr.set_current_schema('searcheable_collection')
+
+    session = mgr.session()
+    session.add(Document(title="Die Häuser", body="Les maisons"))
+    session.add(Document(title="Der Garten", body="Le jardin"))
+    session.flush()
+
+    def search(term, locale):
+        collection = DocumentCollection(session, term, locale)
+        return sorted(d.title for d in collection.query())
+
+    # the titles are searched using the stored vectors
+    assert 'title_tsvector_de_CH" @@' in str(
+        DocumentCollection(session, 'haus', 'de_CH').query()
+    )
+    assert search('haus', 'de_CH') == ["Die Häuser"]
+    assert search('Gärten', 'de_CH') == ["Der Garten"]
+    assert search('jardins', 'fr_CH') == ["Der Garten"]
+
+    # locales without stored vectors compute them
+    assert search('garten', 'it_CH') == ["Der Garten"]
+
+    # the vectors are updated by postgres
+    session.query(Document).filter_by(title="Der Garten").one().title = "Haus"
+    session.flush()
+    assert search('haus', 'de_CH') == ["Die Häuser", "Haus"]
+
+    mgr.dispose()
+
+
+def test_keyset_token():
+    key = (
+        datetime(2020, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+        date(2020, 1, 1), uuid4(), 'text', 1
+    )
+    assert decode_keyset(encode_keyset(key)) == key
+    assert decode_keyset('invalid') is None
+    assert decode_keyset(encode_keyset([['unknown', 1]])) is None
+
+    # only scalars and tagged values are accepted
+    assert decode_keyset(encode_keyset([{'foo': 'bar'}])) is None
+    assert decode_keyset(encode_keyset([[1, 2, 3]])) is None
+    assert decode_keyset(encode_keyset([['uuid', [1]]])) is None
+    assert decode_keyset(encode_keyset([['date', 1, 2]])) is None
+    assert decode_keyset(encode_keyset([[]])) is None
+    assert decode_keyset(encode_keyset([None, True, 1.5])) == (
+        None, True, 1.5
+    )
+
+
+def test_keyset_pagination(postgres_dsn):
+    Base = declarative_base()
+
+    class Document(Base):
+        __tablename__ = 'document'
+
+        id = Column(Integer, primary_key=True)
+        title = Column(Text)
+
+    class DocumentCollection(GenericCollection, KeysetPagination):
+
+        def __init__(self, session, page=0, after=None, direction='asc',
+                     title=None):
+            super().__init__(session)
+            self.page = page
+            self.after = after
+            self.direction = direction
+            self.title = title
+
+        def __eq__(self, other):
+            return self.page == other.page
+
+        @property
+        def model_class(self):
+            return Document
+
+        @property
+        def keyset(self):
+            if self.direction == 'asc':
+                return (Document.title, Document.id)
+            if self.direction == 'desc':
+                return (desc(Document.title), desc(Document.id))
+            return (Document.title, desc(Document.id))
+
+        def subset(self):
+            query = self.query()
+            if self.title:
+                query = query.filter(Document.title == self.title)
+            return query
+
+        @property
+        def page_index(self):
+            return self.page
+
+        def page_by_index(self, index):
+            return self.__class__(
+                self.session, index, direction=self.direction,
+                title=self.title
+            )
+
+    mgr = SessionManager(postgres_dsn, Base)
+    mgr.set_current_schema('keyset_pagination')
+
+    session = mgr.session()
+    for id in range(1, 26):
+        session.add(Document(id=id, title=str(id % 3)))
+    session.flush()
+
+    def titles(batch):
+        return [(d.title, d.id) for d in batch]
+
+    for direction in ('asc', 'desc', 'mixed'):
+        collection = DocumentCollection(session, direction=direction)
+        expected = titles(session.query(Document).order_by(
+            *collection.keyset
+        ))
+
+        assert collection.subset_count == 25
+        assert collection.pages_count == 3
+
+        # seeking
+        page = collection
+        seen = []
+        while page:
+            seen.extend(titles(page.batch))
+            page = page.next
+            assert page is None or page.after
+
+        assert seen == expected
+
+        # offset
+        assert titles(collection.page_by_index(1).batch) == expected[10:20]
+        assert titles(collection.page_by_index(2).batch) == expected[20:]
+
+        # invalid tokens are ignored
+        page = DocumentCollection(session, 1, 'invalid', direction)
+        assert titles(page.batch) == expected[10:20]
+
+    # large subsets are estimated
+    collection = DocumentCollection(session)
+    collection.exact_count_limit = 0
+    assert collection.subset_count > 0
+
+    # large filtered subsets are counted up to the limit
+    collection = DocumentCollection(session, title='1')
+    assert collection.subset_count == 9
+
+    collection = DocumentCollection(session, title='1')
+    collection.exact_count_limit = 5
+    assert collection.subset_count == 6
@@ -11,6 +11,7 @@ from onegov.core.csv import (
     convert_xls_to_csv,
     convert_xlsx_to_csv,
     detect_encoding,
+    iter_list_of_dicts_as_csv,
     match_headers,
     normalize_header,
     parse_header,
@@ -356,6 +357,51 @@ def test_convert_list_of_dicts_to_xlsx():
         assert rows[2][1].value == 'Rumsfeld'
 
 
+def test_iter_list_of_dicts_as_csv():
+    data = [
+        {'first_name': 'Dick', 'last_name': 'Cheney'},
+        {'first_name': 'Donald', 'last_name': 'Rumsfeld'},
+        {'first_name': 'Condoleezza', 'last_name': 'Rice'},
+    ]
+
+    assert ''.join(iter_list_of_dicts_as_csv(data)) == \
+        convert_list_of_dicts_to_csv(data)
+
+    # iterators are consumed once, the fields are taken from the first row
+    chunks = list(iter_list_of_dicts_as_csv(iter(data), chunk_size=1))
+    assert chunks == [
+        'first_name,last_name\r\nDick,Cheney\r\n',
+        'Donald,Rumsfeld\r\n',
+        'Condoleezza,Rice\r\n'
+    ]
+
+    chunks = iter_list_of_dicts_as_csv(iter(data), ('last_name', ))
+    assert ''.join(chunks).splitlines() == [
+        'last_name', 'Cheney', 'Rumsfeld', 'Rice'
+    ]
+
+    assert list(iter_list_of_dicts_as_csv(iter([]))) == []
+    assert list(iter_list_of_dicts_as_csv([])) == []
+
+
+def test_convert_iterator_of_dicts_to_xlsx():
+    data = (
+        {'first_name': name, 'last_name': name.upper()}
+        for name in ('Dick', 'Donald')
+    )
+
+    xlsx = convert_list_of_dicts_to_xlsx(data)
+
+    with tempfile.NamedTemporaryFile() as f:
+        f.write(xlsx)
+
+        rows = tuple(load_workbook(f).active.rows)
+
+        assert [cell.value for cell in rows[0]] == ['first_name', 'last_name']
+        assert [cell.value for cell in rows[1]] == ['Dick', 'DICK']
+        assert [cell.value for cell in rows[2]] == ['Donald', 'DONALD']
+
+
 def test_convert_irregular_list_of_dicts_to_csv():
     data = [
         {
@@ -0,0 +1,185 @@
+import os
+import pytest
+
+from email.message import EmailMessage
+from mailbox import Maildir
+from onegov.core.mail_spool import MailSpool, RateLimiter, SpooledMail
+from smtplib import SMTPResponseException
+from threading import Thread
+from time import perf_counter, sleep
+
+
+def spool_mail(maildir, subject, category=None):
+    message = EmailMessage()
+    message['From'] = 'noreply@example.org'
+    message['To'] = 'recipient@example.org'
+    message['Subject'] = subject
+
+    if category:
+        message['X-Category'] = category
+
+    message.set_content(subject)
+    return Maildir(maildir, create=True).add(message)
+
+
+def mail_spool(smtp, maildir, **kwargs):
+    return MailSpool(
+        [maildir],
+        hostname=smtp.address[0],
+        port=smtp.address[1],
+        **kwargs
+    )
+
+
+def test_spooled_mail(temporary_directory):
+    maildir = os.path.join(temporary_directory, 'mails')
+    key = spool_mail(maildir, 'Newsletter', 'marketing')
+
+    mail = SpooledMail.from_path(os.path.join(maildir, 'new', key))
+    assert mail.category == 'marketing'
+    assert mail.priority == 1
+    assert mail.exists
+
+    mail.remove()
+    assert not mail.exists
+
+    # removing a removed e-mail is fine
+    mail.remove()
+
+
+def test_mail_spool_drain(smtp, temporary_directory):
+    maildir = os.path.join(temporary_directory, 'mails')
+    spool = mail_spool(smtp, maildir)
+    assert spool.drain()['sent'] == 0
+
+    for ix in range(3):
+        spool_mail(maildir, f'Newsletter {ix}', 'marketing')
+
+    spool_mail(maildir, 'Password Reset', 'transactional')
+    spool_mail(maildir, 'Other')
+
+    # transactional e-mails are sent first, the rest in the order they
+    # were spooled
+    spool = mail_spool(smtp, maildir, connections=1)
+    metrics = spool.drain(limit=2)
+
+    assert metrics['sent'] == 2
+    assert metrics['sent_by_category'] == {
+        'transactional': 1,
+        'marketing': 1
+    }
+    assert [m['Subject'] for m in smtp.outbox] == [
+        'Password Reset', 'Newsletter 0'
+    ]
+
+    spool = mail_spool(smtp, maildir, connections=4)
+    metrics = spool.drain()
+
+    assert metrics['sent'] == 3
+    assert len(smtp.outbox) == 5
+    assert not os.listdir(os.path.join(maildir, 'new'))
+
+    # nothing is sent twice
+    assert mail_spool(smtp, maildir).drain()['sent'] == 0
+    assert len(smtp.outbox) == 5
+
+
+def test_mail_spool_category(smtp, temporary_directory):
+    maildir = os.path.join(temporary_directory, 'mails')
+    spool_mail(maildir, 'Newsletter', 'marketing')
+    spool_mail(maildir, 'Password Reset', 'transactional')
+
+    mail_spool(smtp, maildir, category='marketing').drain()
+    assert [m['Subject'] for m in smtp.outbox] == ['Newsletter']
+
+    mail_spool(smtp, maildir, category='transactional').drain()
+    assert [m['Subject'] for m in smtp.outbox] == [
+        'Newsletter', 'Password Reset'
+    ]
+
+
+def test_mail_spool_unavailable(temporary_directory):
+    maildir = os.path.join(temporary_directory, 'mails')
+    spool_mail(maildir, 'Password Reset', 'transactional')
+
+    # the e-mails are kept if the relay is not available
+    spool = MailSpool([maildir], hostname='127.0.0.1', port=1)
+    assert spool.drain()['sent'] == 0
+    assert len(os.listdir(os.path.join(maildir, 'new'))) == 1
+
+
+def test_mail_spool_rejected(temporary_directory):
+    maildir = os.path.join(temporary_directory, 'mails')
+    spool_mail(maildir, 'Password Reset', 'transactional')
+
+    class Connection(object):
+        def sendmail(self, sender, recipients, text):
+            raise SMTPResponseException(554, b'Transaction failed')
+
+    # permanent errors are recorded and not retried
+    spool = MailSpool([maildir], hostname='127.0.0.1', port=1)
+    spool.enqueue(spool.scan())
+    spool.send_mails(Connection(), stop_when_empty=True)
+
+    assert [error.smtp_code for mail, error in spool.failed] == [554]
+    assert spool.metrics.as_dict()['failed'] == 1
+    assert spool.queue.empty()
+    assert len(os.listdir(os.path.join(maildir, 'new'))) == 1
+
+
+def test_mail_spool_run(smtp, temporary_directory):
+    maildir = os.path.join(temporary_directory, 'mails')
+    spool = mail_spool(smtp, maildir, connections=2, poll_interval=0.05)
+
+    thread = Thread(target=spool.run)
+    thread.start()
+
+    try:
+        spool_mail(maildir, 'Newsletter', 'marketing')
+        spool_mail(maildir, 'Password Reset', 'transactional')
+
+        for ix in range(100):
+            if len(smtp.outbox) == 2:
+                break
+            sleep(0.05)
+    finally:
+        spool.stop()
+        thread.join()
+
+    assert sorted(m['Subject'] for m in smtp.outbox) == [
+        'Newsletter', 'Password Reset'
+    ]
+    assert not os.listdir(os.path.join(maildir, 'new'))
+    assert spool.metrics.as_dict()['sent'] == 2
+
+
+def test_rate_limiter():
+    limiter = RateLimiter()
+
+    start = perf_counter()
+    for ix in range(100):
+        limiter.wait()
+    assert perf_counter() - start < 0.1
+
+    limiter = RateLimiter(rate=20)
+
+    start = perf_counter()
+    for ix in range(5):
+        limiter.wait()
+    assert perf_counter() - start >= 0.2
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('connections', [1, 4, 8])
+def test_benchmark_mail_spool(smtp, temporary_directory, connections):
+    maildir = os.path.join(temporary_directory, 'mails')
+
+    for ix in range(1000):
+        spool_mail(maildir, f'Newsletter {ix}', 'marketing')
+
+    start = perf_counter()
+    metrics = mail_spool(smtp, maildir, connections=connections).drain()
+    duration = perf_counter() - start
+
+    assert metrics['sent'] == 1000
+    print(f'{connections} connections: {1000 / duration:.0f} e-mails/s')
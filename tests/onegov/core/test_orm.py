@@ -21,10 +21,19 @@ from onegov.core.orm.mixins import dict_property
 from onegov.core.orm.mixins import ContentMixin
 from onegov.core.orm.mixins import TimestampMixin
 from onegov.core.orm import orm_cached
+from onegov.core.orm.session_manager import begin_savepoint_settings
+from onegov.core.orm.session_manager import commit_connection_settings
+from onegov.core.orm.session_manager import current_connection_setting
+from onegov.core.orm.session_manager import discard_connection_settings
+from onegov.core.orm.session_manager import is_savepoint_statement
+from onegov.core.orm.session_manager import release_savepoint_settings
+from onegov.core.orm.session_manager import rollback_savepoint_settings
+from onegov.core.orm.session_manager import settle_connection_settings
 from onegov.core.orm.types import HSTORE, JSON, UTCDateTime, UUID
 from onegov.core.orm.types import LowercaseText
 from onegov.core.security import Private
 from onegov.core.utils import scan_morepath_modules
+from psycopg2.extensions import cursor as Cursor
 from psycopg2.extensions import TransactionRollbackError
 from pytz import timezone
 from sqlalchemy import Column, Integer, Text, ForeignKey, func, select, and_
@@ -35,6 +44,7 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.orm.exc import DetachedInstanceError
 from sqlalchemy_utils import aggregated
 from threading import Thread
+from unittest.mock import patch
 from webob.exc import HTTPUnauthorized, HTTPConflict
 from webtest import TestApp as Client
 
@@ -81,6 +91,155 @@ def test_independent_sessions(postgres_dsn):
     mgr.dispose()
 
 
+def test_connection_settings_round_trips(postgres_dsn):
+    Base = declarative_base(cls=ModelBase)
+
+    class Document(Base):
+        __tablename__ = 'document'
+        id = Column(Integer, primary_key=True)
+
+    statements = []
+
+    class RecordingCursor(Cursor):
+        def execute(self, query, vars=None):
+            statements.append(query)
+            return super().execute(query, vars)
+
+    def settings():
+        count = sum(1 for s in statements if s.startswith('SET '))
+        statements.clear()
+        return count
+
+    mgr = SessionManager(postgres_dsn, Base, engine_config={
+        'connect_args': {'cursor_factory': RecordingCursor}
+    })
+
+    mgr.set_current_schema('foo')
+    mgr.set_current_schema('bar')
+
+    # start with a fresh connection
+    mgr.engine.dispose()
+    settings()
+
+    # the settings are applied once per connection, not once per query
+    session = mgr.session()
+    for i in range(10):
+        session.query(Document).count()
+    assert settings() == 2
+
+    transaction.commit()
+    for i in range(10):
+        mgr.session().query(Document).count()
+    assert settings() == 0
+
+    # changing the schema on the same connection requires one statement
+    mgr.set_current_schema('foo')
+    mgr.session().add(Document())
+    mgr.session().flush()
+    assert mgr.session().query(Document).count() == 1
+    assert settings() == 1
+
+    # postgres reverts settings made in a transaction that is rolled back
+    transaction.abort()
+    assert mgr.session().query(Document).count() == 0
+    assert settings() == 1
+
+    transaction.commit()
+    mgr.set_current_schema('bar')
+    assert mgr.session().query(Document).count() == 0
+    assert settings() == 1
+
+    # rolling back a savepoint only reverts the settings made after it
+    transaction.commit()
+    mgr.set_current_schema('foo')
+    assert mgr.session().query(Document).count() == 0
+    assert settings() == 1
+
+    savepoint = mgr.session().begin_nested()
+    assert mgr.session().query(Document).count() == 0
+    savepoint.rollback()
+    assert mgr.session().query(Document).count() == 0
+    assert settings() == 0
+
+    mgr.dispose()
+
+
+@pytest.mark.benchmark
+def test_benchmark_connection_settings(postgres_dsn):
+    Base = declarative_base(cls=ModelBase)
+
+    class Document(Base):
+        __tablename__ = 'document'
+        id = Column(Integer, primary_key=True)
+
+    mgr = SessionManager(postgres_dsn, Base)
+    mgr.set_current_schema('foo')
+
+    session = mgr.session()
+    session.query(Document).count()
+
+    def measure(forget):
+        info = session.connection().info
+        start = time.perf_counter()
+
+        for i in range(1000):
+            if forget:
+                # as if the settings were applied before each statement
+                info.pop('settings', None)
+                info.pop('pending_settings', None)
+            session.query(Document).count()
+
+        return (time.perf_counter() - start) / 1000 * 1000
+
+    tracked = measure(forget=False)
+    untracked = measure(forget=True)
+    print(f'tracked: {tracked:.3f}ms, untracked: {untracked:.3f}ms')
+
+    mgr.dispose()
+
+
+def test_connection_settings_levels():
+    info = {}
+    begin_savepoint_settings(info)
+    assert info['pending_settings'] == [{}, {}]
+
+    info['pending_settings'][0]['search_path'] = 'foo'
+    info['pending_settings'][1]['search_path'] = 'bar'
+    assert current_connection_setting(info, 'search_path') == 'bar'
+
+    # rolled back savepoints only drop their own settings
+    rollback_savepoint_settings(info)
+    assert current_connection_setting(info, 'search_path') == 'foo'
+
+    begin_savepoint_settings(info)
+    info['pending_settings'][1]['search_path'] = 'bar'
+    release_savepoint_settings(info)
+    assert info['pending_settings'] == [{'search_path': 'bar'}]
+
+    # the settings are permanent once the commit has succeeded
+    commit_connection_settings(info)
+    assert info == {'committed_settings': {'search_path': 'bar'}}
+
+    settle_connection_settings(info)
+    assert info == {'settings': {'search_path': 'bar'}}
+
+    info['pending_settings'] = [{'search_path': 'foo'}]
+    discard_connection_settings(info)
+    assert current_connection_setting(info, 'search_path') == 'bar'
+
+    # a failed commit is rolled back
+    info['pending_settings'] = [{'search_path': 'foo'}]
+    commit_connection_settings(info)
+    discard_connection_settings(info)
+    settle_connection_settings(info)
+    assert info == {'settings': {'search_path': 'bar'}}
+
+    assert is_savepoint_statement('SAVEPOINT sa_savepoint_1')
+    assert is_savepoint_statement('ROLLBACK TO SAVEPOINT sa_savepoint_1')
+    assert is_savepoint_statement('RELEASE SAVEPOINT sa_savepoint_1')
+    assert not is_savepoint_statement('SELECT 1')
+
+
 def test_independent_managers(postgres_dsn):
     Base = declarative_base(cls=ModelBase)
 
@@ -1504,6 +1663,84 @@ def test_orm_cache_flush(postgres_dsn, redis_url):
     assert app.foo.title == 'Sup'
 
 
+def test_orm_cache_local(postgres_dsn, redis_url):
+
+    Base = declarative_base(cls=ModelBase)
+
+    class App(Framework):
+
+        @orm_cached(policy='on-table-change:documents')
+        def documents(self):
+            return self.session().query(Document)
+
+    # get dill to pickle the following inline class
+    global Document
+
+    class Document(Base):
+        __tablename__ = 'documents'
+
+        id = Column(Integer, primary_key=True)
+        title = Column(Text, nullable=True)
+
+    scan_morepath_modules(App)
+
+    app = App()
+    app.configure_application(
+        dsn=postgres_dsn,
+        base=Base,
+        redis_url=redis_url
+    )
+    app.namespace = 'foo'
+    app.set_application_id('foo/bar')
+
+    cache_key = 'test_orm_cache_local.<locals>.App.documents'
+    local_key = ('foo/bar', cache_key)
+
+    app.clear_request_cache()
+    assert app.documents == tuple()
+    assert app.orm_cache_local.get(local_key) is not None
+
+    # as long as the version stamp is the same, redis is not consulted
+    app.cache.delete(cache_key)
+    app.session().execute("INSERT INTO documents (id, title) VALUES (1, 'A')")
+    transaction.commit()
+
+    app.clear_request_cache()
+    assert app.documents == tuple()
+
+    # a new version stamp (as set by another process) is picked up
+    client, key = App.documents.version_client(app)
+    client.set(key, 'new-version')
+
+    app.clear_request_cache()
+    assert app.documents[0].title == 'A'
+    assert app.orm_cache_local.get(local_key)[0] == b'new-version'
+
+    # a value found in redis is kept in memory without reading it again
+    client.set(key, 'newer-version')
+
+    app.clear_request_cache()
+    with patch.object(app.cache, 'get', wraps=app.cache.get) as get:
+        assert app.documents[0].title == 'A'
+
+    assert not get.called
+    assert app.orm_cache_local.get(local_key)[0] == b'newer-version'
+
+    # changes through the orm evict the in-memory value
+    app.session().add(Document(id=2, title='B'))
+    transaction.commit()
+
+    assert app.orm_cache_local.get(local_key) is None
+    assert client.get(key) != b'new-version'
+
+    app.clear_request_cache()
+    assert len(app.documents) == 2
+
+    # the in-memory value is detached and never modified
+    app.documents[0].title = 'C'
+    assert 'C' not in {d.title for d in app.orm_cache_local.get(local_key)[1]}
+
+
 def test_associable_one_to_one(postgres_dsn):
     Base = declarative_base(cls=ModelBase)
 
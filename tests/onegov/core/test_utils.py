@@ -266,6 +266,40 @@ def test_get_unique_hstore_keys(postgres_dsn):
     }
 
 
+def test_stream_after_commit(postgres_dsn):
+    Base = declarative_base()
+
+    class Document(Base):
+        __tablename__ = 'documents'
+        id = Column(Integer, primary_key=True)
+
+    mgr = SessionManager(postgres_dsn, Base)
+    mgr.set_current_schema('foo')
+    mgr.session().add(Document())
+    transaction.commit()
+
+    session = mgr.session()
+    request = Bunch(
+        app=Bunch(session_manager=mgr, schema='foo'),
+        session=session
+    )
+
+    def chunks():
+        yield str(session.query(Document).count())
+
+    stream = utils.stream_after_commit(request, chunks())
+    transaction.commit()
+
+    # another application uses the connection in the meantime
+    mgr.set_current_schema('bar')
+    assert mgr.session().query(Document).count() == 0
+    transaction.commit()
+
+    assert list(stream) == ['1']
+
+    mgr.dispose()
+
+
 def test_remove_repeated_spaces():
 
     assert utils.remove_repeated_spaces('  ') == ' '
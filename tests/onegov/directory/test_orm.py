@@ -146,6 +146,41 @@ def test_directory_form(session):
     assert form.last_name.data == 'Sanchez'
 
 
+def test_directory_form_class_cache(session):
+    structure = """
+        First Name *= ___
+        Last Name *= ___
+    """
+
+    configuration = DirectoryConfiguration(
+        title="[First Name] [Last Name]",
+        order=('Last Name', 'First Name'),
+    )
+
+    collection = DirectoryCollection(session)
+    people = collection.add(
+        title='People', structure=structure, configuration=configuration)
+    staff = collection.add(
+        title='Staff', structure=structure, configuration=configuration)
+
+    # the form classes are bound to the directory, but share their base
+    assert people.form_class is people.form_class
+    assert people.form_class is not staff.form_class
+    assert people.shared_form_class is staff.shared_form_class
+    assert issubclass(people.form_class, people.shared_form_class)
+
+    # forms of the shared class update the directory of the entry
+    form = people.shared_form_class()
+    form.first_name.data = 'Rick'
+    form.last_name.data = 'Sanchez'
+
+    rick = staff.add(values={'first_name': 'Morty', 'last_name': 'Smith'})
+    form.populate_obj(rick)
+
+    assert rick.title == 'Rick Sanchez'
+    assert rick.directory == staff
+
+
 def test_directory_entry_collection(session):
     directory = DirectoryCollection(session).add(
         title='Albums',
@@ -232,6 +267,35 @@ def test_directory_entry_collection(session):
         genre='Rock'
     ).query().count() == 1
 
+    # the counts of a keyword ignore its own filter
+    assert albums.keyword_counts() == {
+        'genre': {'Rock': 2, 'Pop': 1, 'Hip Hop': 1},
+        'german': {'No': 2, 'Yes': 1}
+    }
+    assert albums.for_filter(german='Yes').keyword_counts() == {
+        'genre': {'Rock': 1, 'Pop': 1},
+        'german': {'No': 2, 'Yes': 1}
+    }
+    assert albums.for_filter(genre='Rock').keyword_counts() == {
+        'genre': {'Rock': 2, 'Pop': 1, 'Hip Hop': 1},
+        'german': {'No': 1, 'Yes': 1}
+    }
+    assert albums.for_filter(
+        genre='Rock'
+    ).for_filter(
+        german='No'
+    ).keyword_counts() == {
+        'genre': {'Rock': 1, 'Hip Hop': 1},
+        'german': {'No': 1, 'Yes': 1}
+    }
+
+    # the counts may be limited to the entries of a given query
+    query = albums.query().filter(DirectoryEntry.title.like('Si%'))
+    assert albums.keyword_counts(query) == {
+        'genre': {'Rock': 1},
+        'german': {'No': 1}
+    }
+
 
 def test_validation_error(session):
     places = DirectoryCollection(session).add(
@@ -381,6 +445,56 @@ def test_migrate_rename_field(session):
     assert conference.values['notiz'] == 'Has a beamer and snacks'
 
 
+def test_migrate_in_batches(session):
+    rooms = DirectoryCollection(session).add(
+        title="Rooms",
+        structure="""
+            Name *= ___
+            Note  = ___
+        """,
+        configuration=DirectoryConfiguration(
+            title=('Name', ),
+            order=('Name', ),
+        )
+    )
+
+    for ix in range(5):
+        rooms.add(values=dict(name=f"Room {ix}", note=f"Note {ix}"))
+
+    transaction.commit()
+
+    structure = """
+        Name *= ___
+        Notiz  = ___
+    """
+
+    # the estimate doesn't change anything
+    rooms = session.query(Directory).one()
+    migration = rooms.migration(structure, rooms.configuration)
+
+    count, seconds = migration.estimate(sample_size=2)
+    assert count == 5
+    assert seconds > 0
+
+    rooms = session.query(Directory).one()
+    assert 'Notiz' not in rooms.structure
+    assert all(
+        'note' in entry.values for entry in session.query(DirectoryEntry)
+    )
+
+    progress = []
+    migration = rooms.migration(structure, rooms.configuration)
+    assert migration.execute_in_batches(2, progress=progress.append) == 5
+    assert progress == [2, 2, 1]
+    transaction.commit()
+
+    rooms = session.query(Directory).one()
+    assert 'Notiz' in rooms.structure
+    assert sorted(
+        entry.values['notiz'] for entry in session.query(DirectoryEntry)
+    ) == [f"Note {ix}" for ix in range(5)]
+
+
 def test_migrate_introduce_radio_field(session):
     rooms = DirectoryCollection(session).add(
         title="Rooms",
@@ -166,8 +166,8 @@ def test_searchable_archive_with_all_params_non_default(searchable_archive):
     assert 'archived_results.type IN' in sql_query
     assert 'archived_results.date >=' in sql_query
     assert 'archived_results.date <=' in sql_query
-    assert "archived_results.title_translations -> 'de_CH'" in sql_query
-    assert "archived_results.shortcode) @@ to_tsquery" in sql_query
+    assert 'archived_results."title_tsvector_de_CH" @@ to_tsquery' in sql_query
+    assert 'archived_results."shortcode_tsvector_de_CH" @@' in sql_query
 
 
 def test_searchable_archive_query_term_only_on_locale(election_day_app):
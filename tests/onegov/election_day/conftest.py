@@ -9,6 +9,7 @@ import textwrap
 import transaction
 
 from onegov.ballot import Election, Vote, ProporzElection, ComplexVote
+from onegov.ballot.models.summary import register_summary_listeners
 from datetime import date
 from onegov.core.crypto import hash_password
 from onegov.election_day import ElectionDayApp
@@ -26,6 +27,12 @@ from onegov.user import User
 from tests.shared.utils import create_app
 
 
+@pytest.fixture(scope="function")
+def session_manager(session_manager):
+    register_summary_listeners(session_manager.session_factory)
+    yield session_manager
+
+
 def bool_as_string(val):
     assert isinstance(val, bool)
     return 'true' if val else 'false'
@@ -63,6 +70,8 @@ def create_election_day(
     app = create_app(ElectionDayApp, request, use_smtp=True)
     app.configuration['sms_directory'] = os.path.join(tmp, 'sms')
     app.configuration['d3_renderer'] = 'http://localhost:1337'
+    app.configuration['prewarm_pages'] = False
+    app.configuration['pages_cache_metrics_sample_rate'] = 1
     app.session_manager.set_locale('de_CH', 'de_CH')
     tenan = f'canton: {canton}' if canton else f'municipality: {municipality}'
     chart_percentages = bool_as_string(hide_candidate_chart_percentages)
@@ -0,0 +1,62 @@
+""" Measures the time needed to import real-size WabstiC files. """
+
+import pytest
+
+from datetime import date
+from time import perf_counter
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('options', [
+    dict(
+        election_type='proporz',
+        dataset_name='nationalratswahl-2015',
+        number_of_mandates=12,
+        date_=date(2015, 10, 18),
+        expats=True
+    ),
+    dict(
+        election_type='majorz',
+        dataset_name='regierungsratswahlen-2016',
+        number_of_mandates=6,
+        date_=date(2016, 2, 28),
+        expats=True,
+        election_number='9',
+        election_district='1'
+    ),
+])
+def test_benchmark_wabstic(session, import_test_datasets, options):
+
+    # the first import creates the election, the following imports replace
+    # the results of the election
+    start = perf_counter()
+    election, errors = import_test_datasets(
+        'wabstic', 'election', 'sg', 'canton', **options
+    )
+    session.flush()
+    timings = [perf_counter() - start]
+    assert not errors
+
+    for run in range(3):
+        start = perf_counter()
+        election, errors = import_test_datasets(
+            'wabstic', 'election', 'sg', 'canton',
+            election=election,
+            **{
+                key: value for key, value in options.items()
+                if key not in ('date_', 'number_of_mandates', 'expats')
+            }
+        )
+        session.flush()
+        timings.append(perf_counter() - start)
+        assert not errors
+
+    assert election.completed
+
+    print(
+        f"{options['dataset_name']}: "
+        f"{election.results.count()} results, "
+        f"{sum(r.candidate_results.count() for r in election.results)} "
+        f"candidate results, "
+        f"{', '.join(f'{t:.2f}s' for t in timings)}"
+    )
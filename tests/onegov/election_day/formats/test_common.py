@@ -1,7 +1,11 @@
 import pytest
 
+from datetime import date
 from io import BytesIO
+from onegov.ballot import BallotResult
+from onegov.ballot import Vote
 from onegov.core.utils import module_path
+from onegov.election_day.formats.common import bulk_insert
 from onegov.election_day.formats.common import load_csv
 
 
@@ -92,3 +96,30 @@ def test_load_csv_errors(election_day_app):
         BytesIO('A,B\n1,2\n'.encode('utf-8')), 'application/excel', ['A']
     )
     assert error.error == 'Not a valid xls/xlsx file.'
+
+
+def test_bulk_insert(session):
+    session.add(
+        Vote(title='Vote', domain='federation', date=date(2015, 6, 14))
+    )
+    session.flush()
+    ballot = session.query(Vote).one().proposal
+    session.flush()
+
+    bulk_insert(session, BallotResult, (
+        dict(
+            ballot_id=ballot.id,
+            entity_id=entity_id,
+            name=str(entity_id),
+            counted=entity_id % 2 == 0,
+            yeas=entity_id if entity_id % 3 else None,
+            unknown='ignored'
+        )
+        for entity_id in range(1, 11)
+    ), page_size=4)
+
+    results = ballot.results.order_by(BallotResult.entity_id).all()
+    assert [r.entity_id for r in results] == list(range(1, 11))
+    assert [r.counted for r in results] == [False, True] * 5
+    assert [r.yeas for r in results] == [1, 2, 0, 4, 5, 0, 7, 8, 0, 10]
+    assert all(r.id and r.created for r in results)
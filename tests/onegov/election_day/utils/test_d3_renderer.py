@@ -26,7 +26,7 @@ def test_d3_renderer_translatation(election_day_app):
 def test_d3_renderer_get_chart(election_day_app):
     d3 = D3Renderer(election_day_app)
 
-    with patch('onegov.election_day.utils.d3_renderer.post',
+    with patch('onegov.election_day.utils.d3_renderer.Session.post',
                return_value=MagicMock(text='<svg></svg>')) as post:
         data = {'key': 'value'}
         params = {'p': '1'}
@@ -115,7 +115,7 @@ def test_d3_renderer_get_chart(election_day_app):
         assert post.call_args[1]['json']['params']['mapdata']
         assert post.call_args[1]['json']['params']['canton'] == 'zg'
 
-    with patch('onegov.election_day.utils.d3_renderer.post',
+    with patch('onegov.election_day.utils.d3_renderer.Session.post',
                return_value=MagicMock(text=b64encode('PDF'.encode()))) as post:
         data = {'key': 'value'}
 
@@ -129,6 +129,52 @@ def test_d3_renderer_get_chart(election_day_app):
         assert post.call_args[0] == ('http://localhost:1337/d3/pdf',)
 
 
+def test_d3_renderer_cache(election_day_app):
+    d3 = D3Renderer(election_day_app)
+    d3.cache = {}
+
+    with patch('onegov.election_day.utils.d3_renderer.Session.post',
+               return_value=MagicMock(text='<svg></svg>')) as post:
+        chart = d3.get_chart('bar', 'svg', {'key': 'value'})
+        assert chart.read() == '<svg></svg>'
+        assert post.call_count == 1
+
+        chart = d3.get_chart('bar', 'svg', {'key': 'value'})
+        assert chart.read() == '<svg></svg>'
+        assert post.call_count == 1
+
+        d3.get_chart('bar', 'svg', {'key': 'other'})
+        d3.get_chart('grouped', 'svg', {'key': 'value'})
+        d3.get_chart('bar', 'svg', {'key': 'value'}, width=500)
+        assert post.call_count == 4
+        assert len(d3.cache) == 4
+
+    pdf = b64encode(b'PDF').decode()
+    with patch('onegov.election_day.utils.d3_renderer.Session.post',
+               return_value=MagicMock(text=pdf)) as post:
+        assert d3.get_chart('bar', 'pdf', {'key': 'value'}).read() == b'PDF'
+        assert d3.get_chart('bar', 'pdf', {'key': 'value'}).read() == b'PDF'
+        assert post.call_count == 1
+
+    # the charts are cached by the application, too
+    d3 = D3Renderer(election_day_app)
+    assert d3.cache is None
+
+    with patch('onegov.election_day.utils.d3_renderer.Session.post',
+               return_value=MagicMock(text='<svg></svg>')) as post:
+        chart = d3.get_chart('bar', 'svg', {'key': 'value'})
+        assert chart.read() == '<svg></svg>'
+        assert post.call_count == 0
+
+        d3.get_map('entities', 'svg', {'key': 'value'}, 2015)
+        d3.get_map('entities', 'svg', {'key': 'value'}, 2015)
+        assert post.call_count == 1
+        assert post.call_args[1]['json']['params']['mapdata']
+
+        d3.get_map('entities', 'svg', {'key': 'value'}, 2014)
+        assert post.call_count == 2
+
+
 def test_d3_renderer_get_charts(election_day_app):
     election = Election(
         title="Election",
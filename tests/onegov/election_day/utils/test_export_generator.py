@@ -0,0 +1,68 @@
+from freezegun import freeze_time
+from io import BytesIO
+from onegov.core.csv import convert_list_of_dicts_to_csv
+from onegov.core.custom import json
+from onegov.election_day.utils import export_filename
+from onegov.election_day.utils.export_generator import ExportGenerator
+from openpyxl import load_workbook
+from tests.onegov.election_day.utils.common import add_election_compound
+from tests.onegov.election_day.utils.common import add_majorz_election
+from tests.onegov.election_day.utils.common import add_proporz_election
+from tests.onegov.election_day.utils.common import add_vote
+
+
+def test_create_exports(election_day_app_gr):
+    generator = ExportGenerator(election_day_app_gr)
+    session = election_day_app_gr.session()
+    fs = election_day_app_gr.filestorage
+
+    generator.create_exports()
+    assert fs.listdir('exports') == []
+
+    with freeze_time("2014-04-04 14:00"):
+        majorz = add_majorz_election(session)
+        proporz = add_proporz_election(session)
+        compound = add_election_compound(
+            session, elections=[majorz, proporz]
+        )
+        vote = add_vote(session, 'complex')
+
+    generator.create_exports()
+    assert len(fs.listdir('exports')) == 12
+
+    # the exports match the exports of the models
+    def read(item, format_):
+        path = 'exports/{}'.format(export_filename(item, format_))
+        with fs.open(path, 'rb') as f:
+            return f.read()
+
+    for item in (majorz, proporz, compound):
+        assert read(item, 'json').decode('utf-8') == json.dumps(
+            item.export(consider_completed=True), sort_keys=True, indent=2
+        )
+        assert read(item, 'csv').decode('utf-8') == \
+            convert_list_of_dicts_to_csv(item.export())
+
+    # the columns of election compounds include the columns of all elections
+    header = read(compound, 'csv').decode('utf-8').splitlines()[0]
+    assert 'list_name' in header
+    rows = tuple(load_workbook(BytesIO(read(compound, 'xlsx'))).active.rows)
+    assert 'list_name' in [cell.value for cell in rows[0]]
+
+    rows = tuple(load_workbook(BytesIO(read(vote, 'xlsx'))).active.rows)
+    assert len(rows) == len(vote.export()) + 1
+    assert rows[0][0].value.startswith('title_')
+
+    # existing exports are not regenerated, outdated exports are removed
+    fs.touch('exports/somefile')
+    generator.create_exports()
+    assert len(fs.listdir('exports')) == 12
+
+    with freeze_time("2014-04-05 14:00"):
+        majorz.title = 'Majorz'
+        session.delete(vote)
+        session.flush()
+
+    generator.create_exports()
+    assert len(fs.listdir('exports')) == 9
+    assert read(majorz, 'csv')
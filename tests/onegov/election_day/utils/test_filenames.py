@@ -4,6 +4,7 @@ from onegov.ballot import Ballot
 from onegov.ballot import Election
 from onegov.ballot import ElectionCompound
 from onegov.ballot import Vote
+from onegov.election_day.utils import export_filename
 from onegov.election_day.utils import pdf_filename
 from onegov.election_day.utils import svg_filename
 
@@ -100,3 +101,36 @@ def test_svg_filename(session):
             f'ballot-{hb}.{ts}.chart.de.svg'
         assert svg_filename(ballot, 'chart', 'rm') == \
             f'ballot-{hb}.{ts}.chart.rm.svg'
+
+
+def test_export_filename(session):
+    with freeze_time("2014-01-01 12:00"):
+        election = Election(
+            title="Election",
+            domain='federation',
+            date=date(2011, 1, 1),
+        )
+        compound = ElectionCompound(
+            title="ElectionCompound",
+            domain='canton',
+            date=date(2011, 1, 1),
+        )
+        vote = Vote(
+            title="Vote",
+            domain='federation',
+            date=date(2011, 1, 1),
+        )
+        session.add(election)
+        session.add(compound)
+        session.add(vote)
+        session.flush()
+
+        ts = 1388577600
+        he = '4b9e99d2bd5e48d9a569e5f82175d1d2ed59105f8d82a12dc51b673ff12dc1f2'
+        assert export_filename(election, 'csv') == f'election-{he}.{ts}.csv'
+
+        hc = '2ef359817c8f8a7354e201f891cd7c11a13f4e025aa25239c3ad0cabe58bc49b'
+        assert export_filename(compound, 'json') == f'compound-{hc}.{ts}.json'
+
+        hv = 'ab274474a6aa82c100dddca63977facb556f66f489fb558c044a456f9ba919ce'
+        assert export_filename(vote, 'xlsx') == f'vote-{hv}.{ts}.xlsx'
@@ -1,3 +1,5 @@
+import transaction
+
 from datetime import date
 from onegov.ballot import Ballot
 from onegov.ballot import BallotResult
@@ -265,3 +267,36 @@ def test_create_pdfs(election_day_app):
 
     generator.create_pdfs()
     assert len(fs.listdir('pdf')) == 0
+
+
+def test_create_pdfs_workers(election_day_app):
+    generator = PatchedPdfGenerator(election_day_app)
+    generator.workers = 3
+    session = election_day_app.session()
+    fs = election_day_app.filestorage
+
+    add_majorz_election(session)
+    add_proporz_election(session)
+    add_vote(session, 'complex')
+    transaction.commit()
+
+    generator.create_pdfs()
+    assert len(fs.listdir('pdf')) == 12
+    assert sorted(generator.timings) == sorted(fs.listdir('pdf'))
+    for filename in fs.listdir('pdf'):
+        with fs.open('pdf/{}'.format(filename), 'rb') as f:
+            assert len(PdfReader(f, decompress=False).pages)
+
+    # unchanged PDFs are not created again
+    generator.create_pdfs()
+    assert len(fs.listdir('pdf')) == 12
+    assert generator.timings == {}
+
+    # failing PDFs are skipped
+    for filename in fs.listdir('pdf'):
+        fs.remove('pdf/{}'.format(filename))
+
+    with patch.object(generator, 'render_pdf', side_effect=ValueError):
+        generator.create_pdfs()
+        assert fs.listdir('pdf') == []
+        assert generator.timings == {}
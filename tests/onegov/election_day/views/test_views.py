@@ -4,7 +4,10 @@ from onegov import election_day
 from onegov.ballot import Ballot
 from onegov.ballot import Vote
 from onegov.election_day import ElectionDayApp
+from onegov.election_day.utils import invalidate_pages
+from onegov.election_day.utils.pages_cache import item_urls
 from tests.onegov.election_day.common import create_election_compound
+from tests.onegov.election_day.common import DummyRequest
 from tests.onegov.election_day.common import login
 from tests.onegov.election_day.common import upload_majorz_election
 from tests.onegov.election_day.common import upload_proporz_election
@@ -121,6 +124,109 @@ def test_pages_cache(election_day_app):
         assert '0xd3adc0d3' in anonymous.get(url, headers=no_cache)
         assert '0xd3adc0d3' in client.get(url)
 
+    # Streamed downloads are cached once they have been sent
+    for format_ in ('json', 'csv', 'xlsx'):
+        url = f'/vote/0xdeadbeef/data-{format_}'
+        first = anonymous.get(url, status=200)
+        second = anonymous.get(url, status=200)
+        assert first.body == second.body
+        assert second.content_length == len(second.body)
+
+        metrics = client.get('/cache-metrics').json
+        assert metrics[url]['misses'] == 1
+        assert metrics[url]['hits'] == 1
+
+
+def test_pages_cache_invalidation(election_day_app):
+    client = Client(election_day_app)
+    client.get('/locale/de_CH')
+    login(client)
+
+    for title in ('0xdeadbeef', '0xfeedface'):
+        new = client.get('/manage/votes/new-vote')
+        new.form['vote_de'] = title
+        new.form['date'] = date(2015, 1, 1)
+        new.form['domain'] = 'federation'
+        new.form.submit()
+
+    anonymous = Client(election_day_app)
+    urls = ('/vote/0xdeadbeef/entities', '/vote/0xfeedface/entities')
+    for url in urls:
+        assert '0XDEADBEEF' not in anonymous.get(url)
+
+    # Modify without invalidating the cache
+    session = election_day_app.session()
+    for vote in session.query(Vote):
+        vote.title = vote.title.upper()
+    commit()
+
+    for url in urls:
+        assert '0XDEADBEEF' not in anonymous.get(url)
+        assert '0XFEEDFACE' not in anonymous.get(url)
+
+    # Only the pages of the given items are invalidated
+    vote = session.query(Vote).filter_by(id='0xdeadbeef').one()
+    invalidate_pages(DummyRequest(app=election_day_app), [vote])
+
+    assert '0XDEADBEEF' in anonymous.get(urls[0])
+    assert '0XFEEDFACE' not in anonymous.get(urls[1])
+
+    invalidate_pages(DummyRequest(app=election_day_app))
+    assert '0XFEEDFACE' in anonymous.get(urls[1])
+
+    # Hits and misses are recorded
+    metrics = client.get('/cache-metrics').json
+    assert metrics[urls[0]]['hits'] == 2
+    assert metrics[urls[0]]['misses'] == 2
+    assert metrics[urls[0]]['regeneration_time'] > 0
+    assert metrics[urls[1]]['hits'] == 3
+    assert metrics[urls[1]]['misses'] == 2
+
+
+def test_pages_cache_invalidation_upload(election_day_app):
+    client = Client(election_day_app)
+    client.get('/locale/de_CH')
+    login(client)
+
+    new = client.get('/manage/votes/new-vote')
+    new.form['vote_de'] = 'Vote'
+    new.form['date'] = date(2015, 1, 1)
+    new.form['domain'] = 'federation'
+    new.form['vote_type'] = 'simple'
+    new.form.submit()
+
+    anonymous = Client(election_day_app)
+    pages = ('/', '/archive/2015-01-01')
+    json_pages = ('/json', '/archive/2015-01-01/json')
+    for url in pages:
+        assert 'answer rejected' not in anonymous.get(url)
+    for url in json_pages:
+        assert anonymous.get(url).json['results'][0]['answer'] is None
+
+    # the pages listing all items show the new results after an upload
+    upload_vote(client, create=False)
+
+    for url in pages:
+        assert 'answer rejected' in anonymous.get(url)
+    for url in json_pages:
+        assert anonymous.get(url).json['results'][0]['answer'] == 'rejected'
+
+
+def test_pages_cache_prewarm_urls(election_day_app):
+    client = Client(election_day_app)
+    client.get('/locale/de_CH')
+    login(client)
+    upload_vote(client)
+
+    vote = election_day_app.session().query(Vote).one()
+    urls = item_urls(DummyRequest(app=election_day_app), vote)
+
+    # the main page and the visible tabs are pre-warmed
+    assert urls[0] == f'Vote/{vote.id}'
+    assert 'Vote/entities' in urls
+    assert 'Vote/data' in urls
+    assert 'Vote/proposal-entities' not in urls
+
 
 def test_view_last_modified(election_day_app):
     with freeze_time("2014-01-01 12:00"):
@@ -1,5 +1,6 @@
 import pytest
 from freezegun import freeze_time
+from onegov.election_day.utils.export_generator import ExportGenerator
 from tests.onegov.election_day.common import login
 from tests.onegov.election_day.common import upload_complex_vote
 from tests.onegov.election_day.common import upload_vote
@@ -133,6 +134,23 @@ def test_view_vote_data(election_day_app):
     export = client.get('/vote/vote/data-csv')
     assert all((expected in export for expected in ("1711", "Zug", "16516")))
 
+    export = client.get('/vote/vote/data-xlsx')
+    assert export.content_type == (
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    assert export.body[:2] == b'PK'
+
+    # precomputed exports are served if available
+    ExportGenerator(election_day_app).create_exports()
+    fs = election_day_app.filestorage
+    for name in fs.listdir('exports'):
+        with fs.open(f'exports/{name}', 'w') as f:
+            f.write('precomputed')
+
+    for format_ in ('json', 'csv', 'xlsx'):
+        export = client.get(f'/vote/vote/data-{format_}')
+        assert export.body == b'precomputed'
+
 
 @pytest.mark.parametrize('url,', [
     'proposal-by-entities-table',
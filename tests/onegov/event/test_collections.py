@@ -88,6 +88,48 @@ def test_event_collection_remove_stale_events(session):
     assert events.query().count() == 0
 
 
+def test_event_collection_extend_occurrences(session):
+    events = EventCollection(session)
+
+    with freeze_time('2020-01-01'):
+        event = events.add(
+            title='Weekly',
+            timezone='Europe/Zurich',
+            start=tzdatetime(2020, 1, 6, 18, 0, 'Europe/Zurich'),
+            end=tzdatetime(2020, 1, 6, 20, 0, 'Europe/Zurich'),
+            recurrence=(
+                'RRULE:FREQ=WEEKLY;'
+                'UNTIL=20301231T230000Z;'
+                'BYDAY=MO'
+            )
+        )
+        events.add(
+            title='Single',
+            timezone='Europe/Zurich',
+            start=tzdatetime(2020, 1, 6, 18, 0, 'Europe/Zurich'),
+            end=tzdatetime(2020, 1, 6, 20, 0, 'Europe/Zurich'),
+        )
+        for item in events.query():
+            item.submit()
+            item.publish()
+
+        ids = {occurrence.id for occurrence in event.occurrences}
+        assert max(o.start for o in event.occurrences).year == 2022
+        assert events.extend_occurrences() == 0
+
+    with freeze_time('2021-06-01'):
+        first = min(event.occurrences, key=lambda o: o.start)
+        first.title = 'Changed'
+
+        assert events.extend_occurrences() == 1
+        assert max(o.start for o in event.occurrences).year == 2023
+        assert ids < {occurrence.id for occurrence in event.occurrences}
+        assert len(event.occurrences) == len(set(event.occurrence_dates()))
+        assert first.title == 'Changed'
+
+        assert events.extend_occurrences() == 0
+
+
 def test_event_collection_pagination(session):
     events = EventCollection(session)
 
@@ -479,6 +479,74 @@ def test_update_event(session):
     assert len(session.query(Event).one().occurrences) == 1
 
 
+def test_update_event_occurrences_incrementally(session):
+    timezone = 'Europe/Zurich'
+
+    event = Event(state='initiated')
+    event.timezone = timezone
+    event.start = tzdatetime(2009, 2, 7, 10, 15, timezone)
+    event.end = tzdatetime(2009, 2, 7, 12, 15, timezone)
+    event.title = 'Squirrel Park Visit'
+    event.name = 'event'
+    event.tags = ['fun']
+    event.recurrence = (
+        'RRULE:FREQ=WEEKLY;'
+        'UNTIL=20090213T230000Z;'
+        'BYDAY=MO,TU,WE,TH,FR,SA,SU'
+    )
+    session.add(event)
+    event.submit()
+    event.publish()
+    session.flush()
+
+    ids = [occurrence.id for occurrence in event.occurrences]
+    assert len(ids) == 7
+
+    # changed values are updated in place
+    event.title = 'Squirrel Park Tour'
+    event.tags = ['fun', 'animals']
+    event.end = tzdatetime(2009, 2, 7, 13, 15, timezone)
+    session.flush()
+
+    occurrences = session.query(Occurrence).order_by(Occurrence.start).all()
+    assert [occurrence.id for occurrence in occurrences] == ids
+    assert {o.title for o in occurrences} == {'Squirrel Park Tour'}
+    assert {frozenset(o.tags) for o in occurrences} == {
+        frozenset(('fun', 'animals'))
+    }
+    assert occurrences[1].end == tzdatetime(2009, 2, 8, 13, 15, timezone)
+
+    # only obsolete occurrences are removed, only missing ones are added
+    event.recurrence = (
+        'RRULE:FREQ=WEEKLY;'
+        'UNTIL=20090215T230000Z;'
+        'BYDAY=SA,SU'
+    )
+    session.flush()
+
+    occurrences = session.query(Occurrence).order_by(Occurrence.start).all()
+    assert [o.start.day for o in occurrences] == [7, 8, 14, 15]
+    assert [o.id for o in occurrences[:2]] == ids[:2]
+
+    # the update can be deferred
+    with event.deferred_occurrences():
+        event.title = 'Squirrel Park Walk'
+        event.start = tzdatetime(2009, 2, 8, 10, 15, timezone)
+        event.end = tzdatetime(2009, 2, 8, 12, 15, timezone)
+        assert event.occurrences[0].title == 'Squirrel Park Tour'
+
+    session.flush()
+
+    occurrences = session.query(Occurrence).order_by(Occurrence.start).all()
+    assert [o.start.day for o in occurrences] == [8, 14, 15]
+    assert {o.title for o in occurrences} == {'Squirrel Park Walk'}
+    assert occurrences[0].id == ids[1]
+
+    event.withdraw()
+    session.flush()
+    assert session.query(Occurrence).count() == 0
+
+
 def test_delete_event(session):
     timezone = 'Europe/Zurich'
     event = Event(
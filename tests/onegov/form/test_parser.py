@@ -4,9 +4,12 @@ from decimal import Decimal
 from onegov.form import Form, errors, find_field
 from onegov.form import parse_formcode, parse_form, flatten_fieldsets
 from onegov.form.fields import DateTimeLocalField
+from onegov.form.parser.form import build_form_class
 from onegov.form.parser.grammar import field_help_identifier
+from onegov.form.submissions import prepare_for_submission
 from onegov.pay import Price
 from textwrap import dedent
+from time import perf_counter
 from webob.multidict import MultiDict
 from wtforms import FileField
 from wtforms import validators
@@ -839,3 +842,67 @@ def test_dependency_validation_chain(field, invalid):
         inv = invalid
         assert not form(data={'select': 'no', 'select_value': inv}).validate()
         assert not form(data={'select': 'ya', 'select_value': inv}).validate()
+
+
+def test_parse_form_cache():
+    code = """
+        First Name *= ___
+        Last Name *= ___
+        Photo = *.png
+    """
+
+    class MyForm(Form):
+        pass
+
+    # the form classes are shared for identical formcode
+    copy = ''.join(code.splitlines(True))
+    assert copy is not code
+    assert parse_form(code) is parse_form(copy)
+    assert parse_formcode(code) is parse_formcode(copy)
+    assert parse_form(code) is not parse_form(code, base_class=MyForm)
+    assert parse_form(code.replace('Photo', 'Image')) is not parse_form(code)
+
+    # preparing a form class for submission does not change the shared
+    # form class
+    submission_form = prepare_for_submission(
+        parse_form(code), for_change_request=True)
+
+    assert submission_form().photo.render_kw == {'force_simple': True}
+    assert parse_form(code)().photo.render_kw is None
+
+    # the order of the fields is kept
+    assert [f.id for f in submission_form()] == [
+        'first_name', 'last_name', 'photo'
+    ]
+
+
+@pytest.mark.benchmark
+def test_benchmark_parse_form():
+    code = '\n'.join(
+        f'# Fieldset {ix}\n'
+        f'Text {ix} *= ___\n'
+        f'Choice {ix} =\n'
+        f'    (x) Yes\n'
+        f'        Details {ix} = ...\n'
+        f'    ( ) No\n'
+        f'Date {ix} = YYYY.MM.DD\n'
+        for ix in range(20)
+    )
+
+    start = perf_counter()
+    parse_formcode.__wrapped__(code)
+    parse = perf_counter() - start
+
+    start = perf_counter()
+    build_form_class.__wrapped__(code, Form)
+    build = perf_counter() - start
+
+    start = perf_counter()
+    for ix in range(1000):
+        parse_form(code)
+    cached = (perf_counter() - start) / 1000
+
+    print(
+        f'parse: {parse * 1000:.2f}ms, build: {build * 1000:.2f}ms, '
+        f'cached: {cached * 1000 * 1000:.2f}us'
+    )
@@ -106,3 +106,31 @@ def test_newsletter_recipients_cascade(session):
     newsletter = session.query(Newsletter).first()
     assert len(newsletter.recipients) == 0
     assert session.query(newsletter_recipients).count() == 0
+
+
+def test_newsletter_mark_as_received(session):
+    newsletter = Newsletter(
+        title="10 things you didn't know",
+        name="10-things-you-didnt-know",
+        html="<h1>10 things you didn't know</h1>"
+    )
+    session.add(newsletter)
+
+    for ix in range(4):
+        session.add(Recipient(address=f'info{ix}@example.org', confirmed=True))
+    session.add(Recipient(address='unconfirmed@example.org'))
+    session.flush()
+
+    assert len(newsletter.open_recipients) == 4
+    assert not newsletter.recipients
+
+    batch = newsletter.open_recipients_query().limit(3).all()
+    assert [r.id for r in batch] == sorted(r.id for r in batch)
+
+    newsletter.mark_as_received(r.id for r in batch)
+    assert len(newsletter.recipients) == 3
+    assert len(newsletter.open_recipients) == 1
+    assert newsletter.open_recipients[0] not in batch
+
+    newsletter.mark_as_received(())
+    assert session.query(newsletter_recipients).count() == 3
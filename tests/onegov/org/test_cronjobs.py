@@ -370,3 +370,84 @@ def test_send_scheduled_newsletters(org_app, smtp):
         newsletter = newsletters.query().one()
         assert not newsletter.scheduled
         assert len(smtp.outbox) == 1
+
+
+def test_deliver_newsletters_in_batches(org_app, smtp, monkeypatch):
+    monkeypatch.setattr('onegov.org.views.newsletter.NEWSLETTER_BATCH_SIZE', 2)
+
+    newsletters = NewsletterCollection(org_app.session())
+    recipients = RecipientCollection(org_app.session())
+
+    for ix in range(5):
+        recipients.add(f'info{ix}@example.org', confirmed=True)
+    recipients.add('unconfirmed@example.org')
+
+    with freeze_time('2018-05-31 12:00'):
+        newsletters.add("Foo", "Bar", scheduled=utcnow())
+
+    transaction.commit()
+
+    job = get_cronjob_by_name(org_app, 'hourly_maintenance_tasks')
+    job.app = org_app
+
+    with freeze_time('2018-05-31 12:00'):
+        client = Client(org_app)
+        client.get(get_cronjob_url(job))
+
+    # the first batch is sent right away
+    newsletter = newsletters.query().one()
+    assert newsletter.delivery_pending
+    assert newsletter.delivery_total == 5
+    assert newsletter.delivery_sent == 2
+    assert len(newsletter.recipients) == 2
+    assert len(smtp.outbox) == 2
+
+    # the rest is sent by the delivery job
+    job = get_cronjob_by_name(org_app, 'deliver_newsletters')
+    job.app = org_app
+
+    client = Client(org_app)
+    client.get(get_cronjob_url(job))
+
+    newsletter = newsletters.query().one()
+    assert not newsletter.delivery_pending
+    assert newsletter.delivery_sent == 5
+    assert len(newsletter.recipients) == 5
+    assert not newsletter.open_recipients
+    assert len(smtp.outbox) == 5
+    assert len({mail['To'] for mail in smtp.outbox}) == 5
+
+    # nothing is sent twice
+    client.get(get_cronjob_url(job))
+    assert len(smtp.outbox) == 5
+
+
+def test_deliver_newsletters_time_budget(org_app, smtp, monkeypatch):
+    monkeypatch.setattr('onegov.org.views.newsletter.NEWSLETTER_BATCH_SIZE', 2)
+    monkeypatch.setattr('onegov.org.cronjobs.NEWSLETTER_TIME_BUDGET', 0)
+
+    newsletters = NewsletterCollection(org_app.session())
+    recipients = RecipientCollection(org_app.session())
+
+    for ix in range(5):
+        recipients.add(f'info{ix}@example.org', confirmed=True)
+
+    newsletter = newsletters.add("Foo", "Bar")
+    newsletter.delivery_total = 5
+    newsletter.delivery_sent = 0
+    newsletter.delivery_pending = True
+    transaction.commit()
+
+    job = get_cronjob_by_name(org_app, 'deliver_newsletters')
+    job.app = org_app
+    client = Client(org_app)
+
+    # each run sends one batch once the time budget is used up
+    for sent in (2, 4, 5):
+        client.get(get_cronjob_url(job))
+
+        newsletter = newsletters.query().one()
+        assert newsletter.delivery_sent == sent
+        assert len(smtp.outbox) == sent
+
+    assert not newsletter.delivery_pending
@@ -126,8 +126,25 @@ def test_view_occurrences(client):
     assert len(as_json('max=1&cat1=Politics&cat1=Party')) == 1
 
     # Test iCal
-    assert client.get('/events/').click('Diese Termine exportieren').\
-        text.startswith('BEGIN:VCALENDAR')
+    ical = client.get('/events/').click('Diese Termine exportieren')
+    assert ical.text.startswith('BEGIN:VCALENDAR')
+    assert ical.text.endswith('END:VCALENDAR\r\n')
+    assert ical.text.count('BEGIN:VEVENT') > 1
+    assert ical.headers['ETag']
+    assert 'Last-Modified' not in ical.headers
+
+    # polling subscribers get a 304 while the calendar doesn't change
+    url = ical.request.url
+    headers = {'If-None-Match': ical.headers['ETag']}
+    assert client.get(url, headers=headers, status=304).body == b''
+
+    # only the etag is considered, the calendar also changes if events are
+    # deleted, which is not reflected by a modification date
+    headers = {'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'}
+    assert client.get(url, headers=headers).text == ical.text
+
+    headers = {'If-None-Match': '"outdated"'}
+    assert client.get(url, headers=headers).text == ical.text
 
 
 def test_view_occurrence(client):
@@ -270,6 +270,41 @@ def test_newsletter_send(client):
     assert 'My Html editor text' in mail['text']
 
 
+def test_newsletter_send_pending(client, monkeypatch):
+    monkeypatch.setattr('onegov.org.views.newsletter.NEWSLETTER_BATCH_SIZE', 1)
+
+    client.login_editor()
+
+    new = client.get('/newsletters').click('Newsletter')
+    new.form['title'] = "Our town is AWESOME"
+    new.form['lead'] = "Like many of you, I just love our town..."
+    newsletter = new.form.submit().follow()
+
+    recipients = RecipientCollection(client.app.session())
+    recipients.add('one@example.org', confirmed=True)
+    recipients.add('two@example.org', confirmed=True)
+
+    transaction.commit()
+
+    # the first batch is sent right away, the rest in the background
+    send = newsletter.click('Senden')
+    page = send.form.submit().follow()
+    assert "im Hintergrund fortgesetzt" in page
+    assert len(client.app.smtp.outbox) == 1
+
+    page = page.click('Senden')
+    assert "an 1 von 2 Abonnenten gesendet" in page
+
+    # the pending delivery is not restarted
+    page = send.form.submit().follow()
+    assert "ist noch im Gange" in page
+    assert len(client.app.smtp.outbox) == 1
+
+    newsletter = NewsletterCollection(client.app.session()).query().one()
+    assert newsletter.delivery_pending
+    assert newsletter.delivery_sent == 1
+
+
 def test_newsletter_schedule(client):
     client.login_editor()
 
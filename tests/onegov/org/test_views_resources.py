@@ -67,6 +67,31 @@ def test_resource_slots(client):
     assert result[0]['className'] == 'event-in-past event-unavailable'
     assert result[0]['title'] == "12:00 - 16:00 \nBesetzt"
 
+    # the cached feed is updated once the reservations change
+    url = '/resource/foo/slots?start=2015-08-04&end=2015-08-04'
+    assert client.get(url).json[0]['title'] == "Ganztägig \nVerfügbar"
+
+    scheduler.approve_reservations(
+        scheduler.reserve(
+            'info@example.org',
+            (datetime(2015, 8, 4), datetime(2015, 8, 4)),
+        )
+    )
+    transaction.commit()
+
+    assert client.get(url).json[0]['title'] == "Ganztägig \nBesetzt"
+
+    # slots in the cached feed move into the past
+    url = '/resource/foo/slots?start=2015-08-06&end=2015-08-06'
+
+    with freeze_time('2015-08-06 13:58'):
+        result = client.get(url).json
+        assert result[0]['className'] == 'event-unavailable'
+
+    with freeze_time('2015-08-06 14:01'):
+        result = client.get(url).json
+        assert result[0]['className'] == 'event-in-past event-unavailable'
+
 
 def test_resources(client):
     client.login_admin()
@@ -5,6 +5,8 @@ from datetime import datetime
 from onegov.search import Searchable, SearchOfflineError, utils
 from onegov.search.indexer import parse_index_name
 from onegov.search.indexer import (
+    BulkIndexer,
+    coalesce_tasks,
     Indexer,
     IndexManager,
     ORMEventTranslator,
@@ -12,7 +14,7 @@ from onegov.search.indexer import (
     TypeMappingRegistry
 )
 from queue import Queue
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 
 def test_index_manager_assertions(es_client):
@@ -577,6 +579,232 @@ def test_indexer_process(es_client):
     assert search['hits']['total']['value'] == 1
 
 
+def test_coalesce_tasks():
+    def task(action, id, schema='foo', title=None):
+        return {
+            'action': action,
+            'schema': schema,
+            'type_name': 'page',
+            'id': id,
+            'title': title
+        }
+
+    assert coalesce_tasks([]) == []
+
+    # an update is a delete followed by an index
+    tasks = [
+        task('index', 1, title='a'),
+        task('delete', 1),
+        task('index', 1, title='b'),
+        task('delete', 1),
+        task('index', 1, title='c'),
+        task('index', 2, title='d'),
+        task('index', 2, schema='bar', title='e'),
+        task('index', 3, title='f'),
+        task('delete', 3),
+    ]
+
+    documents = coalesce_tasks(tasks)
+    assert len(documents) == 4
+
+    delete, index = documents[0]
+    assert delete['action'] == 'delete'
+    assert index['title'] == 'c'
+
+    delete, index = documents[1]
+    assert delete is None
+    assert index['title'] == 'd'
+
+    delete, index = documents[2]
+    assert delete is None
+    assert index['title'] == 'e'
+
+    delete, index = documents[3]
+    assert delete['action'] == 'delete'
+    assert index is None
+
+    with pytest.raises(NotImplementedError):
+        coalesce_tasks([task('move', 1)])
+
+
+def test_bulk_indexer_process(es_client):
+    mappings = TypeMappingRegistry()
+    mappings.register_type('page', {
+        'title': {'type': 'localized'},
+    })
+
+    index = "foo_bar-my_schema-en-page"
+    indexer = BulkIndexer(
+        mappings, Queue(), hostname='foo.bar', es_client=es_client,
+        batch_size=2)
+
+    def put(action, id, title=None):
+        task = {
+            'action': action,
+            'schema': 'my-schema',
+            'type_name': 'page',
+            'id': id
+        }
+
+        if action == 'index':
+            task['language'] = 'en'
+            task['properties'] = {'title': title, 'es_public': True}
+
+        indexer.queue.put(task)
+
+    put('index', 1, 'Go ahead and jump')
+    put('index', 2, 'Might as well jump')
+    put('delete', 2)
+    put('index', 2, 'Jump')
+    put('index', 3, 'Get it and jump')
+
+    assert indexer.process() == 5
+    assert indexer.process() == 0
+    assert indexer.queue.empty()
+    assert indexer.statistics.batches == 3
+    assert indexer.statistics.tasks == 5
+    assert indexer.statistics.max_queue_depth == 5
+    es_client.indices.refresh(index=index)
+
+    search = es_client.search(index=index)
+    assert search['hits']['total']['value'] == 3
+
+    search = es_client.search(
+        index=index, body={'query': {'match': {'title': 'might'}}})
+    assert search['hits']['total']['value'] == 0
+
+    # updates within a batch are coalesced
+    indexer.batch_size = 10
+    indexer.statistics.reset()
+
+    put('delete', 1)
+    put('index', 1, 'Might as well jump')
+    put('delete', 1)
+    put('index', 1, 'Jump')
+    put('delete', 3)
+
+    assert indexer.process() == 5
+    assert indexer.statistics.batches == 1
+    assert indexer.statistics.coalesced == 2
+    es_client.indices.refresh(index=index)
+
+    search = es_client.search(index=index)
+    assert search['hits']['total']['value'] == 2
+
+    search = es_client.search(
+        index=index, body={'query': {'match': {'title': 'jump'}}})
+    assert search['hits']['total']['value'] == 2
+
+
+def test_bulk_indexer_outage(es_client):
+    mappings = TypeMappingRegistry()
+    mappings.register_type('page', {
+        'title': {'type': 'localized'},
+    })
+
+    indexer = BulkIndexer(
+        mappings, Queue(), hostname='foo.bar', es_client=es_client)
+
+    for id in (1, 2):
+        indexer.queue.put({
+            'action': 'index',
+            'schema': 'my-schema',
+            'type_name': 'page',
+            'id': id,
+            'language': 'en',
+            'properties': {
+                'title': 'Foo',
+                'es_public': True
+            }
+        })
+
+    original = indexer.es_client.transport.perform_request
+    indexer.es_client.transport.perform_request = Mock(
+        side_effect=SearchOfflineError)
+
+    for i in range(0, 2):
+        assert indexer.process() == 0
+        assert indexer.queue.empty()
+        assert len(indexer.failed_tasks) == 2
+
+    assert indexer.statistics.failures == 2
+
+    indexer.es_client.transport.perform_request = original
+
+    assert indexer.process() == 2
+    assert not indexer.failed_tasks
+
+    indexer.es_client.indices.refresh(index='_all')
+    assert indexer.es_client\
+        .search(index='_all')['hits']['total']['value'] == 2
+
+
+def test_bulk_indexer_retry(es_client):
+    mappings = TypeMappingRegistry()
+    mappings.register_type('page', {
+        'title': {'type': 'localized'},
+    })
+
+    indexer = BulkIndexer(
+        mappings, Queue(), hostname='foo.bar', es_client=es_client)
+
+    for id in (1, 2):
+        indexer.queue.put({
+            'action': 'index',
+            'schema': 'my-schema',
+            'type_name': 'page',
+            'id': id,
+            'language': 'en',
+            'properties': {
+                'title': 'Foo',
+                'es_public': True
+            }
+        })
+
+    def reject_first(client, actions, **kwargs):
+        # the helper must not retry by itself, see below
+        assert kwargs['max_retries'] == 0
+
+        for action in actions:
+            if action['_id'] == 1:
+                yield False, {'index': {
+                    '_index': action['_index'],
+                    '_id': '1',
+                    'status': 429,
+                    'error': 'es_rejected_execution_exception'
+                }}
+            else:
+                yield True, {'index': {
+                    '_index': action['_index'],
+                    '_id': str(action['_id']),
+                    'status': 201
+                }}
+
+    with patch('onegov.search.indexer.streaming_bulk', reject_first):
+        assert indexer.process() == 1
+
+    assert indexer.statistics.failures == 1
+    assert len(indexer.failed_tasks) == 1
+    assert indexer.failed_tasks[0]['id'] == 1
+    assert indexer.failed_tasks[0]['action'] == 'index'
+
+    # the rejected document is sent again on the next run, before any newer
+    # tasks of the same document, so a later delete is not undone
+    indexer.queue.put({
+        'action': 'delete',
+        'schema': 'my-schema',
+        'type_name': 'page',
+        'id': 1
+    })
+
+    assert indexer.process() == 2
+    assert not indexer.failed_tasks
+
+    indexer.es_client.indices.refresh(index='_all')
+    assert indexer.es_client\
+        .search(index='_all')['hits']['total']['value'] == 1
+
+
 def test_extra_analyzers(es_client):
 
     page = TypeMapping('page', {
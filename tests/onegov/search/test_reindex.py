@@ -0,0 +1,175 @@
+from onegov.search.indexer import BulkIndexer, IndexManager, TypeMapping
+from onegov.search.indexer import Indexer, TypeMappingRegistry
+from onegov.search.reindex import ReindexCheckpoint
+from queue import Queue
+
+
+class Page(object):
+    pass
+
+
+def test_reindex_checkpoint(temporary_directory):
+    checkpoint = ReindexCheckpoint(temporary_directory)
+
+    assert checkpoint.schema('foo') == {}
+    assert checkpoint.model('foo', Page) == {}
+
+    checkpoint.update_schema('foo', build='20211118', done=False)
+    checkpoint.update_model('foo', Page, after=10)
+    checkpoint.update_model('foo', Page, after=20)
+
+    # a new instance (as used after an interruption) sees the progress
+    checkpoint = ReindexCheckpoint(temporary_directory)
+    assert checkpoint.schema('foo') == {'build': '20211118', 'done': False}
+    assert checkpoint.model('foo', Page) == {'after': 20}
+    assert checkpoint.schema('bar') == {}
+
+    checkpoint.update_model('foo', Page, done=True)
+    assert checkpoint.model('foo', Page) == {'after': 20, 'done': True}
+
+
+def test_activate_build(es_client):
+    ixmgr = IndexManager(hostname='example.org', es_client=es_client)
+
+    page = TypeMapping('page', {
+        'title': {'type': 'text'}
+    })
+
+    index = ixmgr.ensure_index('foo', 'en', page, return_index='internal')
+    assert index == 'example_org-foo-en-page-' + page.version
+
+    # build a new index without touching the alias
+    builder = IndexManager(
+        hostname='example.org', es_client=es_client, build='1234')
+
+    build = builder.ensure_index('foo', 'en', page, return_index='internal')
+    assert build == index + '_1234'
+    assert builder.query_aliases() == {'example_org-foo-en-page'}
+    assert es_client.indices.get_alias(name='example_org-foo-en-page') == {
+        index: {'aliases': {'example_org-foo-en-page': {
+            'is_write_index': True
+        }}}
+    }
+
+    # switch over
+    assert ixmgr.activate_build('foo', '1234') == 1
+    assert ixmgr.query_indices() == {build}
+    assert es_client.indices.get_alias(name='example_org-foo-en-page') == {
+        build: {'aliases': {'example_org-foo-en-page': {
+            'is_write_index': True
+        }}}
+    }
+
+    # the regular index manager picks up the rebuilt index
+    ixmgr = IndexManager(hostname='example.org', es_client=es_client)
+    assert ixmgr.ensure_index(
+        'foo', 'en', page, return_index='internal') == build
+    assert ixmgr.remove_expired_indices(current_mappings=[page]) == 0
+
+
+def test_indexer_during_build(es_client):
+    mappings = TypeMappingRegistry()
+    mappings.register_type('page', {
+        'title': {'type': 'localized'},
+    })
+
+    indexer = Indexer(
+        mappings, Queue(), hostname='foo.bar', es_client=es_client)
+
+    builder = Indexer(
+        mappings, Queue(), hostname='foo.bar', es_client=es_client)
+    builder.ixmgr = IndexManager(
+        hostname='foo.bar', es_client=es_client, build='1234')
+
+    def put(indexer, action, id):
+        task = {
+            'action': action,
+            'schema': 'foo',
+            'type_name': 'page',
+            'id': id
+        }
+
+        if action == 'index':
+            task['language'] = 'en'
+            task['properties'] = {'title': 'Page', 'es_public': True}
+
+        indexer.queue.put(task)
+        assert indexer.process() == 1
+
+    def ids(index):
+        es_client.indices.refresh(index=index)
+        hits = es_client.search(index=index)['hits']['hits']
+        return {hit['_id'] for hit in hits}
+
+    put(indexer, 'index', 1)
+    put(indexer, 'index', 2)
+    put(builder, 'index', 1)
+    put(builder, 'index', 2)
+
+    # deletions and changes reach the build
+    put(indexer, 'delete', 2)
+    put(indexer, 'index', 4)
+
+    current = 'foo_bar-foo-en-page-' + mappings['page'].version
+    assert ids(current) == {'1', '4'}
+    assert ids(current + '_1234') == {'1', '4'}
+
+    # once switched over by another process, the indexer writes to the build
+    other = IndexManager(hostname='foo.bar', es_client=es_client)
+    assert other.activate_build('foo', '1234') == 1
+
+    put(indexer, 'index', 3)
+    assert ids('foo_bar-foo-en-page') == {'1', '3', '4'}
+    assert ids(current + '_1234') == {'1', '3', '4'}
+
+
+def test_bulk_indexer_during_build(es_client):
+    mappings = TypeMappingRegistry()
+    mappings.register_type('page', {
+        'title': {'type': 'localized'},
+    })
+
+    indexer = BulkIndexer(
+        mappings, Queue(), hostname='foo.bar', es_client=es_client)
+
+    builder = BulkIndexer(
+        mappings, Queue(), hostname='foo.bar', es_client=es_client)
+    builder.ixmgr = IndexManager(
+        hostname='foo.bar', es_client=es_client, build='1234')
+
+    def put(indexer, id, title):
+        indexer.queue.put({
+            'action': 'index',
+            'schema': 'foo',
+            'type_name': 'page',
+            'id': id,
+            'language': 'en',
+            'properties': {'title': title, 'es_public': True}
+        })
+        assert indexer.process() == 1
+
+    def titles(index):
+        es_client.indices.refresh(index=index)
+        hits = es_client.search(index=index)['hits']['hits']
+        return {hit['_id']: hit['_source']['title'] for hit in hits}
+
+    put(indexer, 1, 'Old')
+
+    # the indices of the build are created before the workers start
+    build = builder.ixmgr.ensure_index(
+        'foo', 'en', mappings['page'], return_index='internal')
+
+    # changes made during the build are written to the build as well, the
+    # workers don't overwrite them with the records loaded before
+    put(indexer, 1, 'New')
+    put(builder, 1, 'Old')
+    put(builder, 2, 'Page')
+    assert titles(build) == {'1': 'New', '2': 'Page'}
+
+    put(indexer, 3, 'Late')
+
+    other = IndexManager(hostname='foo.bar', es_client=es_client)
+    assert other.activate_build('foo', '1234') == 1
+    assert titles('foo_bar-foo-en-page') == {
+        '1': 'New', '2': 'Page', '3': 'Late'
+    }
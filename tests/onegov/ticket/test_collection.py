@@ -1,6 +1,15 @@
+import pytest
+import re
+
 from onegov.ticket import Handler, Ticket, TicketCollection
+from onegov.ticket.numbers import format_ticket_number
+from onegov.ticket.numbers import next_ticket_number_value
+from onegov.ticket.numbers import permute_ticket_number
+from onegov.ticket.numbers import TICKET_NUMBERS
 from onegov.user import UserCollection
-from unittest.mock import Mock
+from psycopg2.extensions import TransactionRollbackError
+from sqlalchemy.exc import OperationalError
+from unittest.mock import MagicMock
 
 
 class EchoHandler(Handler):
@@ -98,43 +107,43 @@ class LtdTicket(Ticket):
     es_type_name = 'ltd_tickets'
 
 
-def test_random_number():
+def test_issue_unique_ticket_number(session, handlers):
 
-    collection = TicketCollection(session=object())
-    assert 10000000 <= collection.random_number(length=8) <= 99999999
+    handlers.register('ABC', EchoHandler)
+    handlers.register('XYZ', EchoHandler)
+    collection = TicketCollection(session)
 
+    numbers = [collection.issue_unique_ticket_number('ABC') for i in range(50)]
+    assert len(set(numbers)) == 50
+    assert all(re.match(r'ABC-0\d{3}-\d{4}$', n) for n in numbers)
+    assert numbers != sorted(numbers)
 
-def test_random_ticket_number():
+    # each handler has its own sequence
+    assert collection.issue_unique_ticket_number('XYZ') \
+        == format_ticket_number('XYZ', permute_ticket_number(0, 'XYZ'))
+    assert collection.issue_unique_ticket_number('ABC') \
+        == format_ticket_number('ABC', permute_ticket_number(50, 'ABC'))
 
-    collection = TicketCollection(session=object())
 
-    collection.random_number = Mock(return_value=10000000)
-    assert collection.random_ticket_number('ABC') == 'ABC-1000-0000'
+def test_ticket_number_sequence_created_concurrently():
+    # the sequence is still missing after trying to create it
+    session = MagicMock()
+    session.execute.return_value.scalar.return_value = None
 
-    collection.random_number = Mock(return_value=99999999)
-    assert collection.random_ticket_number('XXX') == 'XXX-9999-9999'
+    with pytest.raises(OperationalError) as e:
+        next_ticket_number_value(session, 'ABC')
 
+    # which makes the transaction retry
+    assert isinstance(e.value.orig, TransactionRollbackError)
 
-def test_issue_unique_ticket_number(session, handlers):
 
-    handlers.register('ABC', EchoHandler)
-    collection = TicketCollection(session)
-
-    collection.random_number = Mock(return_value=10000000)
-    assert collection.issue_unique_ticket_number('ABC') == 'ABC-1000-0000'
-
-    session.add(Ticket(
-        number='ABC-1000-0000',
-        title='Test',
-        group='Test',
-        handler_code='ABC',
-        handler_id='1'
-    ))
+def test_permute_ticket_number():
+    numbers = {permute_ticket_number(value, 'ABC') for value in range(1000)}
+    assert len(numbers) == 1000
+    assert all(0 <= number < TICKET_NUMBERS for number in numbers)
 
-    collection.random_number = Mock(side_effect=[10000000, 10000001, 10000002])
-    assert collection.issue_unique_ticket_number('ABC') == 'ABC-1000-0001'
-    assert collection.issue_unique_ticket_number('ABC') == 'ABC-1000-0002'
-    assert len(collection.random_number.mock_calls) == 3
+    assert permute_ticket_number(1, 'ABC') != permute_ticket_number(1, 'XYZ')
+    assert format_ticket_number('ABC', 123) == 'ABC-0000-0123'
 
 
 def test_ticket_count(session):
@@ -0,0 +1,98 @@
+from onegov.ticket import Ticket
+from onegov.ticket import TicketCollection
+from onegov.ticket import TicketCounter
+
+
+def add_ticket(session, number, handler_code='ABC', group='A', state='open'):
+    session.add(Ticket(
+        number=f'{handler_code}-1000-{number:04d}',
+        title='test',
+        group=group,
+        handler_code=handler_code,
+        handler_id=f'{handler_code}{number}',
+        state=state
+    ))
+
+
+def test_ticket_counter(session):
+    assert TicketCounter.counts(session) == {}
+
+    add_ticket(session, 1)
+    add_ticket(session, 2)
+    add_ticket(session, 3, group='B')
+    add_ticket(session, 4, handler_code='DEF', state='pending')
+    session.flush()
+
+    assert TicketCounter.counts(session) == {'open': 3, 'pending': 1}
+    assert TicketCounter.counts(session, handler_code='ABC') == {'open': 3}
+    assert TicketCounter.counts(session, group='B') == {'open': 1}
+
+    # state changes
+    ticket = session.query(Ticket).filter_by(number='ABC-1000-0001').one()
+    ticket.state = 'closed'
+    session.flush()
+    assert TicketCounter.counts(session) == {
+        'open': 2, 'pending': 1, 'closed': 1
+    }
+
+    # other changes
+    ticket.title = 'Title'
+    ticket.snapshot = {'summary': 'Summary'}
+    session.flush()
+    assert TicketCounter.counts(session) == {
+        'open': 2, 'pending': 1, 'closed': 1
+    }
+
+    # bulk changes
+    session.query(Ticket).filter_by(state='open').update(
+        {'state': 'pending'}, synchronize_session=False
+    )
+    assert TicketCounter.counts(session) == {
+        'open': 0, 'pending': 3, 'closed': 1
+    }
+
+    session.query(Ticket).filter_by(handler_code='ABC').delete()
+    assert TicketCounter.counts(session) == {
+        'open': 0, 'pending': 1, 'closed': 0
+    }
+
+    count = TicketCollection(session).get_count()
+    assert count.open == 0
+    assert count.pending == 1
+    assert count.closed == 0
+
+    assert TicketCounter.stored(session) == TicketCounter.live(session)
+    assert not TicketCounter.refresh(session)
+
+    # inconsistencies are fixed by refreshing
+    session.query(TicketCounter).update({'count': 10})
+    assert TicketCounter.stored(session) != TicketCounter.live(session)
+
+    assert TicketCounter.refresh(session)
+    assert TicketCounter.stored(session) == TicketCounter.live(session)
+    assert TicketCollection(session).get_count().pending == 1
+
+
+def test_ticket_counter_compact(session):
+    for number in range(1, 4):
+        add_ticket(session, number)
+        session.flush()
+
+    ticket = session.query(Ticket).filter_by(number='ABC-1000-0001').one()
+    ticket.state = 'closed'
+    session.flush()
+
+    # the changes are appended, not updated in place
+    assert session.query(TicketCounter).count() == 5
+    assert TicketCounter.counts(session) == {'open': 2, 'closed': 1}
+
+    TicketCounter.compact(session)
+    assert session.query(TicketCounter).count() == 2
+    assert TicketCounter.counts(session) == {'open': 2, 'closed': 1}
+    assert TicketCounter.stored(session) == TicketCounter.live(session)
+
+    # keys without tickets are removed
+    session.query(Ticket).filter_by(state='closed').delete()
+    TicketCounter.compact(session)
+    assert session.query(TicketCounter).count() == 1
+    assert TicketCounter.counts(session) == {'open': 2}